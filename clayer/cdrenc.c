@@ -0,0 +1,911 @@
+/*
+ * Copyright(c) 2021 to 2022 ZettaScale Technology and others
+ *
+ * This program and the accompanying materials are made available under the
+ * terms of the Eclipse Public License v. 2.0 which is available at
+ * http://www.eclipse.org/legal/epl-2.0, or the Eclipse Distribution License
+ * v. 1.0 which is available at
+ * http://www.eclipse.org/org/documents/edl-v10.php.
+ *
+ * SPDX-License-Identifier: EPL-2.0 OR BSD-3-Clause
+ */
+
+/*
+ * Native XCDR1/XCDR2 encoder for IDL types.
+ *
+ * The encoder interprets a program of nested tuples that is generated from the
+ * machines of a type (see cyclonedds/idl/_builder.py, NativeCodecBuilder) and writes
+ * directly into the bytearray of a cyclonedds.idl._support.Buffer. The output must be
+ * identical to what the machines produce, which is why this file follows the machines
+ * step by step. Whenever a value is not of the expected shape an exception is raised
+ * and the Python side redoes the sample with the machines, so it is fine to be strict
+ * here.
+ */
+
+#define PY_SSIZE_T_CLEAN
+#include <Python.h>
+#include <stdint.h>
+#include <string.h>
+
+#if PY_VERSION_HEX < 0x030B0000
+#define PyFloat_Pack4 _PyFloat_Pack4
+#define PyFloat_Pack8 _PyFloat_Pack8
+#endif
+
+// Must be kept in sync with NativeCodecBuilder
+enum cdrenc_op {
+  OP_NONE = 0,
+  OP_PRIMITIVE = 1,
+  OP_CHAR = 2,
+  OP_STRING = 3,
+  OP_BYTES = 4,
+  OP_BYTEARRAY = 5,
+  OP_ARRAY = 6,
+  OP_SEQUENCE = 7,
+  OP_PLAIN_ARRAY = 8,
+  OP_PLAIN_SEQUENCE = 9,
+  OP_ENUM = 10,
+  OP_BITMASK = 11,
+  OP_STRUCT = 12,
+  OP_INSTANCE = 13,
+  OP_OPTIONAL = 14,
+  OP_UNION = 15,
+  OP_MAPPING = 16,
+  OP_MUTABLE = 17
+};
+
+enum cdrenc_kind {
+  KIND_DATA_SAMPLE = 0,
+  KIND_KEY_DEFINITION_ORDER = 1,
+  KIND_KEY_NORMALIZED = 2
+};
+
+enum cdrenc_key_enabled {
+  KE_NEVER = 0,
+  KE_IN_KEYLIST = 1,
+  KE_IN_KEYLIST_OR_KEYLESS = 2
+};
+
+#define PL_SHORT_PID_EXTENDED 0x3f01
+#define PL_SHORT_PID_LIST_END 0x3f02
+#define PL_SHORT_PID_EXT_LEN 0x8
+#define PL_SHORT_FLAG_MU 0x4000
+#define LENTYPE_NEXTINT 4
+
+#define MAX_DEPTH 256
+
+typedef struct cdrenc {
+  PyObject *bytearray;
+  char *data;
+  Py_ssize_t size;
+  Py_ssize_t pos;
+  Py_ssize_t align_offset;
+  Py_ssize_t align_max;
+  int swap;
+  int kind;
+  int depth;
+} cdrenc_t;
+
+static int encode (cdrenc_t *enc, PyObject *op, PyObject *value, int key_enabled);
+
+static int fail (const char *msg)
+{
+  PyErr_SetString (PyExc_ValueError, msg);
+  return -1;
+}
+
+static int ensure_size (cdrenc_t *enc, Py_ssize_t size)
+{
+  if (enc->pos + size <= enc->size)
+    return 0;
+
+  Py_ssize_t old_size = enc->size, new_size = enc->size ? enc->size : 64;
+  while (enc->pos + size > new_size)
+    new_size *= 2;
+  if (PyByteArray_Resize (enc->bytearray, new_size) < 0)
+    return -1;
+  enc->data = PyByteArray_AS_STRING (enc->bytearray);
+  enc->size = new_size;
+  memset (enc->data + old_size, 0, (size_t) (new_size - old_size));
+  return 0;
+}
+
+static inline void align (cdrenc_t *enc, Py_ssize_t alignment)
+{
+  if (alignment > enc->align_max)
+    alignment = enc->align_max;
+  enc->pos = ((enc->pos - enc->align_offset + alignment - 1) & ~(alignment - 1)) + enc->align_offset;
+}
+
+static int write_raw (cdrenc_t *enc, const void *src, Py_ssize_t size, int swappable)
+{
+  if (ensure_size (enc, size) < 0)
+    return -1;
+  if (swappable && enc->swap) {
+    const unsigned char *s = src;
+    for (Py_ssize_t i = 0; i < size; i++)
+      enc->data[enc->pos + i] = (char) s[size - 1 - i];
+  } else {
+    memcpy (enc->data + enc->pos, src, (size_t) size);
+  }
+  enc->pos += size;
+  return 0;
+}
+
+static int write_u32 (cdrenc_t *enc, uint32_t v)
+{
+  return write_raw (enc, &v, 4, 1);
+}
+
+static int write_u16 (cdrenc_t *enc, uint16_t v)
+{
+  return write_raw (enc, &v, 2, 1);
+}
+
+static void patch_u32 (cdrenc_t *enc, Py_ssize_t at, uint32_t v)
+{
+  if (enc->swap)
+    v = ((v & 0xff) << 24) | ((v & 0xff00) << 8) | ((v >> 8) & 0xff00) | (v >> 24);
+  memcpy (enc->data + at, &v, 4);
+}
+
+static int signed_in_range (PyObject *value, long long lo, long long hi, long long *out)
+{
+  if (PyLong_CheckExact (value)) {
+    int overflow;
+    long long v = PyLong_AsLongLongAndOverflow (value, &overflow);
+    if (overflow || v < lo || v > hi)
+      return fail ("integer out of range");
+    *out = v;
+    return 0;
+  }
+
+  PyObject *index = PyNumber_Index (value);
+  if (index == NULL)
+    return -1;
+  long long v = PyLong_AsLongLong (index);
+  Py_DECREF (index);
+  if (v == -1 && PyErr_Occurred ())
+    return -1;
+  if (v < lo || v > hi)
+    return fail ("integer out of range");
+  *out = v;
+  return 0;
+}
+
+static int unsigned_in_range (PyObject *value, unsigned long long hi, unsigned long long *out)
+{
+  if (PyLong_CheckExact (value)) {
+    int overflow;
+    long long v = PyLong_AsLongLongAndOverflow (value, &overflow);
+    if (!overflow && v >= 0 && (unsigned long long) v <= hi) {
+      *out = (unsigned long long) v;
+      return 0;
+    }
+  }
+
+  PyObject *index = PyNumber_Index (value);
+  if (index == NULL)
+    return -1;
+  unsigned long long v = PyLong_AsUnsignedLongLong (index);
+  Py_DECREF (index);
+  if (v == (unsigned long long) -1 && PyErr_Occurred ())
+    return -1;
+  if (v > hi)
+    return fail ("integer out of range");
+  *out = v;
+  return 0;
+}
+
+// Write one primitive value without alignment, code is a struct module format character
+static int write_primitive (cdrenc_t *enc, int code, PyObject *value)
+{
+  long long s;
+  unsigned long long u;
+  double d;
+
+  switch (code) {
+    case '?': {
+      int b = PyObject_IsTrue (value);
+      if (b < 0)
+        return -1;
+      uint8_t v = (uint8_t) b;
+      return write_raw (enc, &v, 1, 0);
+    }
+    case 'b': {
+      if (signed_in_range (value, INT8_MIN, INT8_MAX, &s) < 0)
+        return -1;
+      int8_t v = (int8_t) s;
+      return write_raw (enc, &v, 1, 0);
+    }
+    case 'B': {
+      if (unsigned_in_range (value, UINT8_MAX, &u) < 0)
+        return -1;
+      uint8_t v = (uint8_t) u;
+      return write_raw (enc, &v, 1, 0);
+    }
+    case 'h': {
+      if (signed_in_range (value, INT16_MIN, INT16_MAX, &s) < 0)
+        return -1;
+      int16_t v = (int16_t) s;
+      return write_raw (enc, &v, 2, 1);
+    }
+    case 'H': {
+      if (unsigned_in_range (value, UINT16_MAX, &u) < 0)
+        return -1;
+      uint16_t v = (uint16_t) u;
+      return write_raw (enc, &v, 2, 1);
+    }
+    case 'i': {
+      if (signed_in_range (value, INT32_MIN, INT32_MAX, &s) < 0)
+        return -1;
+      int32_t v = (int32_t) s;
+      return write_raw (enc, &v, 4, 1);
+    }
+    case 'I': {
+      if (unsigned_in_range (value, UINT32_MAX, &u) < 0)
+        return -1;
+      uint32_t v = (uint32_t) u;
+      return write_raw (enc, &v, 4, 1);
+    }
+    case 'q': {
+      if (signed_in_range (value, INT64_MIN, INT64_MAX, &s) < 0)
+        return -1;
+      int64_t v = (int64_t) s;
+      return write_raw (enc, &v, 8, 1);
+    }
+    case 'Q': {
+      if (unsigned_in_range (value, UINT64_MAX, &u) < 0)
+        return -1;
+      uint64_t v = (uint64_t) u;
+      return write_raw (enc, &v, 8, 1);
+    }
+    case 'f': {
+      d = PyFloat_CheckExact (value) ? PyFloat_AS_DOUBLE (value) : PyFloat_AsDouble (value);
+      if (d == -1.0 && PyErr_Occurred ())
+        return -1;
+      if (ensure_size (enc, 4) < 0)
+        return -1;
+      // PyFloat_Pack4 takes care of the byte order and of overflow
+      if (PyFloat_Pack4 (d, enc->data + enc->pos, PY_LITTLE_ENDIAN ^ enc->swap) < 0)
+        return -1;
+      enc->pos += 4;
+      return 0;
+    }
+    case 'd': {
+      d = PyFloat_CheckExact (value) ? PyFloat_AS_DOUBLE (value) : PyFloat_AsDouble (value);
+      if (d == -1.0 && PyErr_Occurred ())
+        return -1;
+      if (ensure_size (enc, 8) < 0)
+        return -1;
+      if (PyFloat_Pack8 (d, enc->data + enc->pos, PY_LITTLE_ENDIAN ^ enc->swap) < 0)
+        return -1;
+      enc->pos += 8;
+      return 0;
+    }
+    default:
+      return fail ("unsupported primitive type code");
+  }
+}
+
+static inline PyObject *arg (PyObject *op, Py_ssize_t i)
+{
+  return PyTuple_GET_ITEM (op, i);
+}
+
+static inline long iarg (PyObject *op, Py_ssize_t i)
+{
+  return PyLong_AsLong (PyTuple_GET_ITEM (op, i));
+}
+
+static int member_key_enabled (int key_enabled, int has_keylist, int in_keylist)
+{
+  switch (key_enabled) {
+    case KE_NEVER:
+      return KE_NEVER;
+    case KE_IN_KEYLIST:
+      return (has_keylist && in_keylist) ? KE_IN_KEYLIST_OR_KEYLESS : KE_NEVER;
+    default:
+      return (!has_keylist || in_keylist) ? KE_IN_KEYLIST_OR_KEYLESS : KE_NEVER;
+  }
+}
+
+static int encode_char (cdrenc_t *enc, PyObject *value)
+{
+  long c;
+  if (PyUnicode_Check (value) && PyUnicode_GET_LENGTH (value) == 1)
+    c = (long) PyUnicode_READ_CHAR (value, 0);
+  else if (PyBytes_Check (value) && PyBytes_GET_SIZE (value) == 1)
+    c = (unsigned char) PyBytes_AS_STRING (value)[0];
+  else
+    return fail ("expected a character");
+  if (c > INT8_MAX)
+    return fail ("character out of range");
+  int8_t v = (int8_t) c;
+  return write_raw (enc, &v, 1, 0);
+}
+
+static int encode_string (cdrenc_t *enc, PyObject *op, PyObject *value)
+{
+  long bound = iarg (op, 1);
+  Py_ssize_t size;
+  if (!PyUnicode_Check (value))
+    return fail ("expected a str");
+  if (bound && PyUnicode_GET_LENGTH (value) > bound)
+    return fail ("string longer than bound");
+  const char *utf8 = PyUnicode_AsUTF8AndSize (value, &size);
+  if (utf8 == NULL)
+    return -1;
+  align (enc, 4);
+  if (size + 1 > (Py_ssize_t) UINT32_MAX)
+    return fail ("string too long");
+  if (write_u32 (enc, (uint32_t) size + 1) < 0 || write_raw (enc, utf8, size, 0) < 0)
+    return -1;
+  char nul = 0;
+  return write_raw (enc, &nul, 1, 0);
+}
+
+static int encode_bytes (cdrenc_t *enc, PyObject *op, PyObject *value, int bytearray)
+{
+  Py_buffer view;
+  int ret = -1;
+  if (PyObject_GetBuffer (value, &view, PyBUF_SIMPLE) < 0)
+    return -1;
+  if (bytearray) {
+    if (view.len != iarg (op, 1)) {
+      fail ("incorrectly sized array");
+      goto out;
+    }
+  } else {
+    long bound = iarg (op, 1);
+    if (bound && view.len > bound) {
+      fail ("bytes longer than bound");
+      goto out;
+    }
+    align (enc, 4);
+    if (write_u32 (enc, (uint32_t) view.len) < 0)
+      goto out;
+  }
+  ret = write_raw (enc, view.buf, view.len, 0);
+out:
+  PyBuffer_Release (&view);
+  return ret;
+}
+
+static int encode_collection (cdrenc_t *enc, PyObject *op, PyObject *value, int key_enabled, int sequence)
+{
+  PyObject *subop = arg (op, 1);
+  long size = iarg (op, 2);
+  int header = PyObject_IsTrue (arg (op, 3));
+  Py_ssize_t hpos = 0;
+  int ret = -1;
+
+  PyObject *fast = PySequence_Fast (value, "expected a sequence");
+  if (fast == NULL)
+    return -1;
+  Py_ssize_t length = PySequence_Fast_GET_SIZE (fast);
+
+  if (sequence) {
+    if (size >= 0 && length > size) {
+      fail ("sequence longer than bound");
+      goto out;
+    }
+    align (enc, 4);
+  } else {
+    if (length != size) {
+      fail ("incorrectly sized array");
+      goto out;
+    }
+    if (header)
+      align (enc, 4);
+  }
+
+  if (header) {
+    if (write_u32 (enc, 0) < 0)
+      goto out;
+    hpos = enc->pos;
+  }
+  if (sequence && write_u32 (enc, (uint32_t) length) < 0)
+    goto out;
+
+  PyObject **items = PySequence_Fast_ITEMS (fast);
+  for (Py_ssize_t i = 0; i < length; i++)
+    if (encode (enc, subop, items[i], key_enabled) < 0)
+      goto out;
+
+  if (header)
+    patch_u32 (enc, hpos - 4, (uint32_t) (enc->pos - hpos));
+  ret = 0;
+out:
+  Py_DECREF (fast);
+  return ret;
+}
+
+static char format_kind (const char *format)
+{
+  if (format[0] != 0 && format[1] != 0 && (format[0] == '@' || format[0] == '=' || format[0] == (PY_LITTLE_ENDIAN ? '<' : '>')))
+    format++;
+  if (format[0] == 0 || format[1] != 0)
+    return 0;
+  switch (format[0]) {
+    case 'b': case 'h': case 'i': case 'l': case 'q': case 'n':
+      return 'i';
+    case 'B': case 'H': case 'I': case 'L': case 'Q': case 'N':
+      return 'u';
+    case 'f': case 'd':
+      return 'f';
+    case '?':
+      return '?';
+  }
+  return 0;
+}
+
+/* Packed members hold an array.array or numpy array, whose buffer is copied as is when
+   its elements have the size and kind of the primitive. Returns whether view holds it. */
+static int get_packed (PyObject *value, int code, Py_ssize_t itemsize, Py_buffer *view)
+{
+  if (PyList_CheckExact (value) || PyTuple_CheckExact (value) || !PyObject_CheckBuffer (value))
+    return 0;
+  if (PyObject_GetBuffer (value, view, PyBUF_FORMAT | PyBUF_C_CONTIGUOUS) < 0) {
+    PyErr_Clear ();
+    return 0;
+  }
+  const char code_format[2] = { (char) code, 0 };
+  if (view->ndim == 1 && view->itemsize == itemsize && view->format != NULL &&
+      format_kind (view->format) == format_kind (code_format))
+    return 1;
+  PyBuffer_Release (view);
+  return 0;
+}
+
+static int encode_plain_collection (cdrenc_t *enc, PyObject *op, PyObject *value, int sequence)
+{
+  int code = (int) iarg (op, 1);
+  Py_ssize_t itemsize = iarg (op, 2);
+  long alignment = iarg (op, 3);
+  long size = iarg (op, 4);
+  PyObject *fast = NULL;
+  Py_buffer view;
+  Py_ssize_t length;
+  int ret = -1;
+
+  int packed = get_packed (value, code, itemsize, &view);
+  if (packed) {
+    length = view.len / itemsize;
+  } else {
+    fast = PySequence_Fast (value, "expected a sequence");
+    if (fast == NULL)
+      return -1;
+    length = PySequence_Fast_GET_SIZE (fast);
+  }
+
+  if (sequence) {
+    if (size >= 0 && length > size) {
+      fail ("sequence longer than bound");
+      goto out;
+    }
+    align (enc, 4);
+    if (write_u32 (enc, (uint32_t) length) < 0)
+      goto out;
+    if (length == 0) {
+      ret = 0;
+      goto out;
+    }
+  } else if (length != size) {
+    fail ("incorrectly sized array");
+    goto out;
+  }
+
+  align (enc, alignment);
+  if (ensure_size (enc, length * itemsize) < 0)
+    goto out;
+  if (packed) {
+    char *dst = enc->data + enc->pos;
+    memcpy (dst, view.buf, (size_t) (length * itemsize));
+    if (enc->swap && itemsize > 1) {
+      for (Py_ssize_t i = 0; i < length * itemsize; i += itemsize) {
+        for (Py_ssize_t j = 0; j < itemsize / 2; j++) {
+          char t = dst[i + j];
+          dst[i + j] = dst[i + itemsize - 1 - j];
+          dst[i + itemsize - 1 - j] = t;
+        }
+      }
+    }
+    enc->pos += length * itemsize;
+  } else {
+    PyObject **items = PySequence_Fast_ITEMS (fast);
+    for (Py_ssize_t i = 0; i < length; i++)
+      if (write_primitive (enc, code, items[i]) < 0)
+        goto out;
+  }
+  ret = 0;
+out:
+  if (packed)
+    PyBuffer_Release (&view);
+  else
+    Py_DECREF (fast);
+  return ret;
+}
+
+static int encode_enum (cdrenc_t *enc, PyObject *op, PyObject *value, int bitmask)
+{
+  PyObject *v;
+  if (bitmask)
+    v = PyObject_CallMethod (value, "as_mask", NULL);
+  else if (Py_IS_TYPE (value, &PyLong_Type))
+    v = Py_NewRef (value);
+  else
+    v = PyObject_GetAttrString (value, "value");
+  if (v == NULL)
+    return -1;
+  align (enc, iarg (op, 3));
+  int ret = write_primitive (enc, (int) iarg (op, 1), v);
+  Py_DECREF (v);
+  return ret;
+}
+
+static int encode_struct (cdrenc_t *enc, PyObject *op, PyObject *value, int key_enabled)
+{
+  PyObject *members = arg (op, 1);
+  int has_keylist = PyObject_IsTrue (arg (op, 2));
+  int delimited = PyObject_IsTrue (arg (op, 3));
+  Py_ssize_t hpos = 0;
+
+  if (delimited) {
+    align (enc, 4);
+    hpos = enc->pos;
+    if (write_u32 (enc, 0) < 0)
+      return -1;
+  }
+
+  for (Py_ssize_t i = 0; i < PyTuple_GET_SIZE (members); i++) {
+    PyObject *member = PyTuple_GET_ITEM (members, i);
+    int m_key_enabled = member_key_enabled (key_enabled, has_keylist, PyObject_IsTrue (arg (member, 2)));
+    if (enc->kind != KIND_DATA_SAMPLE && m_key_enabled == KE_NEVER)
+      continue;
+
+    PyObject *v = PyObject_GetAttr (value, arg (member, 0));
+    if (v == NULL)
+      return -1;
+    int ret = encode (enc, arg (member, 1), v, m_key_enabled);
+    Py_DECREF (v);
+    if (ret < 0)
+      return -1;
+  }
+
+  if (delimited)
+    patch_u32 (enc, hpos, (uint32_t) (enc->pos - hpos - 4));
+  return 0;
+}
+
+static int encode_optional (cdrenc_t *enc, PyObject *op, PyObject *value)
+{
+  if (enc->kind != KIND_DATA_SAMPLE)
+    return fail ("optional members are not part of the key");
+
+  if (PyObject_IsTrue (arg (op, 3))) {
+    uint8_t present = (value != Py_None);
+    if (write_raw (enc, &present, 1, 0) < 0)
+      return -1;
+    return present ? encode (enc, arg (op, 1), value, KE_NEVER) : 0;
+  }
+
+  align (enc, 4);
+  if (write_u16 (enc, PL_SHORT_PID_EXTENDED | PL_SHORT_FLAG_MU) < 0 ||
+      write_u16 (enc, PL_SHORT_PID_EXT_LEN) < 0 ||
+      write_u32 (enc, (uint32_t) PyLong_AsUnsignedLong (arg (op, 2))) < 0)
+    return -1;
+  Py_ssize_t hpos = enc->pos;
+  if (write_u32 (enc, 0) < 0)
+    return -1;
+  Py_ssize_t dpos = enc->pos;
+  if (value != Py_None) {
+    Py_ssize_t old_align_offset = enc->align_offset;
+    enc->align_offset = dpos;
+    int ret = encode (enc, arg (op, 1), value, KE_NEVER);
+    enc->align_offset = old_align_offset;
+    if (ret < 0)
+      return -1;
+    patch_u32 (enc, hpos, (uint32_t) (enc->pos - dpos));
+  }
+  return 0;
+}
+
+static int encode_union (cdrenc_t *enc, PyObject *op, PyObject *value, int key_enabled)
+{
+  PyObject *discriminator_op = arg (op, 1);
+  PyObject *labels = arg (op, 2);
+  PyObject *default_op = arg (op, 3);
+  int discriminator_is_key = PyObject_IsTrue (arg (op, 4));
+  int delimited = PyObject_IsTrue (arg (op, 5));
+  Py_ssize_t hpos = 0;
+  int ret = -1;
+
+  // The delimited union machine passes the default key_enabled on to its members
+  int value_key_enabled = delimited ? KE_IN_KEYLIST : KE_NEVER;
+  int discriminator_key_enabled = delimited ? KE_IN_KEYLIST : key_enabled;
+
+  if (delimited) {
+    align (enc, 4);
+    hpos = enc->pos;
+    if (write_u32 (enc, 0) < 0)
+      return -1;
+  }
+
+  PyObject *discr_value = PyObject_CallMethod (value, "get", NULL);
+  if (discr_value == NULL)
+    return -1;
+  if (!PyTuple_Check (discr_value) || PyTuple_GET_SIZE (discr_value) != 2) {
+    Py_DECREF (discr_value);
+    return fail ("union get() did not return a pair");
+  }
+  PyObject *discr = PyTuple_GET_ITEM (discr_value, 0);
+  PyObject *val = PyTuple_GET_ITEM (discr_value, 1);
+  PyObject *default_discr = NULL;
+
+  if (discr == Py_None) {
+    default_discr = PyObject_GetAttrString (value, "__idl_default_discriminator__");
+    if (default_discr == NULL)
+      goto out;
+  }
+
+  if (enc->kind != KIND_DATA_SAMPLE && discriminator_is_key) {
+    // Note: the delimited union machine does not patch up the header in this case
+    ret = encode (enc, discriminator_op, default_discr ? default_discr : discr, discriminator_key_enabled);
+    goto out;
+  }
+
+  PyObject *case_op = NULL;
+  if (discr != Py_None) {
+    case_op = PyDict_GetItemWithError (labels, discr);
+    if (case_op == NULL && PyErr_Occurred ())
+      goto out;
+  }
+  if (case_op == NULL && default_op != Py_None)
+    case_op = default_op;
+
+  if (encode (enc, discriminator_op, default_discr ? default_discr : discr, discriminator_key_enabled) < 0)
+    goto out;
+  if (case_op && encode (enc, case_op, val, value_key_enabled) < 0)
+    goto out;
+
+  if (delimited)
+    patch_u32 (enc, hpos, (uint32_t) (enc->pos - hpos - 4));
+  ret = 0;
+out:
+  Py_XDECREF (default_discr);
+  Py_DECREF (discr_value);
+  return ret;
+}
+
+static int encode_mapping (cdrenc_t *enc, PyObject *op, PyObject *value, int key_enabled)
+{
+  PyObject *key, *val;
+  Py_ssize_t i = 0;
+  if (!PyDict_Check (value))
+    return fail ("expected a dict");
+  align (enc, 4);
+  if (write_u32 (enc, (uint32_t) PyDict_GET_SIZE (value)) < 0)
+    return -1;
+  while (PyDict_Next (value, &i, &key, &val)) {
+    if (encode (enc, arg (op, 1), key, key_enabled) < 0 || encode (enc, arg (op, 2), val, key_enabled) < 0)
+      return -1;
+  }
+  return 0;
+}
+
+static int encode_mutable (cdrenc_t *enc, PyObject *op, PyObject *value, int key_enabled)
+{
+  PyObject *members = arg (op, enc->kind == KIND_KEY_NORMALIZED ? 2 : 1);
+  int has_keylist = PyObject_IsTrue (arg (op, 3));
+  int version_2 = PyObject_IsTrue (arg (op, 4));
+  Py_ssize_t hpos = 0;
+
+  if (version_2) {
+    align (enc, 4);
+    hpos = enc->pos;
+    if (write_u32 (enc, 0) < 0)
+      return -1;
+  }
+
+  for (Py_ssize_t i = 0; i < PyTuple_GET_SIZE (members); i++) {
+    // (name, op, key, optional, lentype, must_understand, memberid, header)
+    PyObject *member = PyTuple_GET_ITEM (members, i);
+    int m_key_enabled = member_key_enabled (key_enabled, has_keylist, PyObject_IsTrue (arg (member, 2)));
+    if (enc->kind != KIND_DATA_SAMPLE && m_key_enabled == KE_NEVER)
+      continue;
+
+    PyObject *v = PyObject_GetAttr (value, arg (member, 0));
+    if (v == NULL)
+      return -1;
+    if (PyObject_IsTrue (arg (member, 3)) && v == Py_None) {
+      Py_DECREF (v);
+      continue;
+    }
+
+    long lentype = iarg (member, 4);
+    int ret = -1;
+    align (enc, 4);
+    if (version_2) {
+      if (write_u32 (enc, (uint32_t) PyLong_AsUnsignedLong (arg (member, 7))) < 0)
+        goto member_out;
+    } else {
+      uint32_t mu_flag = PyObject_IsTrue (arg (member, 5)) ? (1u << 30) : 0;
+      if (lentype != LENTYPE_NEXTINT) {
+        fail ("XCDR1 members require a length");
+        goto member_out;
+      }
+      if (write_u16 (enc, PL_SHORT_PID_EXTENDED | PL_SHORT_FLAG_MU) < 0 ||
+          write_u16 (enc, PL_SHORT_PID_EXT_LEN) < 0 ||
+          write_u32 (enc, mu_flag | (uint32_t) PyLong_AsUnsignedLong (arg (member, 6))) < 0)
+        goto member_out;
+    }
+
+    Py_ssize_t mpos = enc->pos;
+    if (lentype == LENTYPE_NEXTINT && write_u32 (enc, 0) < 0)
+      goto member_out;
+
+    Py_ssize_t old_align_offset = enc->align_offset;
+    if (!version_2)
+      enc->align_offset = enc->pos;
+    ret = encode (enc, arg (member, 1), v, m_key_enabled);
+    enc->align_offset = old_align_offset;
+    if (ret < 0)
+      goto member_out;
+    if (!version_2)
+      align (enc, 4);
+
+    if (lentype == LENTYPE_NEXTINT)
+      patch_u32 (enc, mpos, (uint32_t) (enc->pos - mpos - 4));
+member_out:
+    Py_DECREF (v);
+    if (ret < 0)
+      return -1;
+  }
+
+  if (version_2) {
+    patch_u32 (enc, hpos, (uint32_t) (enc->pos - hpos - 4));
+  } else {
+    align (enc, 4);
+    if (write_u16 (enc, PL_SHORT_PID_LIST_END | PL_SHORT_FLAG_MU) < 0 || write_u16 (enc, 0) < 0)
+      return -1;
+  }
+  return 0;
+}
+
+static int encode (cdrenc_t *enc, PyObject *op, PyObject *value, int key_enabled)
+{
+  int ret;
+
+  if (!PyTuple_Check (op) || PyTuple_GET_SIZE (op) < 1)
+    return fail ("malformed encoder program");
+  if (++enc->depth > MAX_DEPTH) {
+    enc->depth--;
+    return fail ("maximum nesting depth exceeded");
+  }
+
+  switch (iarg (op, 0)) {
+    case OP_NONE:
+      ret = 0;
+      break;
+    case OP_PRIMITIVE:
+      align (enc, iarg (op, 3));
+      ret = write_primitive (enc, (int) iarg (op, 1), value);
+      break;
+    case OP_CHAR:
+      ret = encode_char (enc, value);
+      break;
+    case OP_STRING:
+      ret = encode_string (enc, op, value);
+      break;
+    case OP_BYTES:
+      ret = encode_bytes (enc, op, value, 0);
+      break;
+    case OP_BYTEARRAY:
+      ret = encode_bytes (enc, op, value, 1);
+      break;
+    case OP_ARRAY:
+      ret = encode_collection (enc, op, value, key_enabled, 0);
+      break;
+    case OP_SEQUENCE:
+      ret = encode_collection (enc, op, value, key_enabled, 1);
+      break;
+    case OP_PLAIN_ARRAY:
+      ret = encode_plain_collection (enc, op, value, 0);
+      break;
+    case OP_PLAIN_SEQUENCE:
+      ret = encode_plain_collection (enc, op, value, 1);
+      break;
+    case OP_ENUM:
+      ret = encode_enum (enc, op, value, 0);
+      break;
+    case OP_BITMASK:
+      ret = encode_enum (enc, op, value, 1);
+      break;
+    case OP_STRUCT:
+      ret = encode_struct (enc, op, value, key_enabled);
+      break;
+    case OP_INSTANCE: {
+      // The program of the type lives in a list so recursive types can refer to themselves
+      PyObject *cell = arg (op, 1);
+      if (!PyList_Check (cell) || PyList_GET_SIZE (cell) != 1)
+        ret = fail ("malformed encoder program");
+      else
+        ret = encode (enc, PyList_GET_ITEM (cell, 0), value, key_enabled);
+      break;
+    }
+    case OP_OPTIONAL:
+      ret = encode_optional (enc, op, value);
+      break;
+    case OP_UNION:
+      ret = encode_union (enc, op, value, key_enabled);
+      break;
+    case OP_MAPPING:
+      ret = encode_mapping (enc, op, value, key_enabled);
+      break;
+    case OP_MUTABLE:
+      ret = encode_mutable (enc, op, value, key_enabled);
+      break;
+    default:
+      ret = fail ("unknown encoder op");
+      break;
+  }
+
+  enc->depth--;
+  return ret;
+}
+
+static PyObject *cdrenc_encode (PyObject *self, PyObject *args)
+{
+  PyObject *program, *value, *bytearray;
+  Py_ssize_t pos, align_offset, align_max;
+  int little_endian, kind;
+  (void)self;
+
+  if (!PyArg_ParseTuple (args, "OOO!nnnpi", &program, &value, &PyByteArray_Type, &bytearray,
+                         &pos, &align_offset, &align_max, &little_endian, &kind))
+    return NULL;
+
+  cdrenc_t enc = {
+    .bytearray = bytearray,
+    .data = PyByteArray_AS_STRING (bytearray),
+    .size = PyByteArray_GET_SIZE (bytearray),
+    .pos = pos,
+    .align_offset = align_offset,
+    .align_max = align_max,
+    .swap = (little_endian != PY_LITTLE_ENDIAN),
+    .kind = kind,
+    .depth = 0
+  };
+
+  if (encode (&enc, program, value, KE_IN_KEYLIST) < 0)
+    return NULL;
+  return PyLong_FromSsize_t (enc.pos);
+}
+
+char cdrenc_encode_docs[] = "encode(program, value, bytearray, pos, align_offset, align_max, little_endian, kind) -> pos\n\n"
+  "Encode value according to program into bytearray starting at pos, growing it as needed.";
+
+static PyMethodDef cdrenc_funcs[] = {
+  { "encode", cdrenc_encode, METH_VARARGS, cdrenc_encode_docs },
+  { NULL, NULL, 0, NULL }
+};
+
+char cdrencmod_docs[] = "Native XCDR encoder for IDL types.";
+
+PyModuleDef _cdrenc_mod = {
+  PyModuleDef_HEAD_INIT,
+  "cyclonedds._cdrenc",
+  cdrencmod_docs,
+  -1,
+  cdrenc_funcs,
+  NULL,
+  NULL,
+  NULL,
+  NULL
+};
+
+PyMODINIT_FUNC PyInit__cdrenc (void)
+{
+  return PyModule_Create (&_cdrenc_mod);
+}
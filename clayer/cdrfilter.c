@@ -0,0 +1,531 @@
+/*
+ * Copyright(c) 2021 to 2022 ZettaScale Technology and others
+ *
+ * This program and the accompanying materials are made available under the
+ * terms of the Eclipse Public License v. 2.0 which is available at
+ * http://www.eclipse.org/legal/epl-2.0, or the Eclipse Distribution License
+ * v. 1.0 which is available at
+ * http://www.eclipse.org/org/documents/edl-v10.php.
+ *
+ * SPDX-License-Identifier: EPL-2.0 OR BSD-3-Clause
+ */
+
+/*
+ * Evaluation of content filter expressions on serialized samples.
+ *
+ * The program is generated by cyclonedds/idl/_filter.py, which has the description of
+ * the layout. Expressions are evaluated with a single boolean register, AND and OR are
+ * conditional jumps. Fields are found by skipping over the members in front of them,
+ * like the key VM does, and only the fields a comparison needs are loaded. Samples come
+ * from the network, so every read is bounds checked; a field that can't be read makes
+ * the comparison false.
+ */
+
+#include <string.h>
+#include "cdrfilter.h"
+
+// Must be kept in sync with cyclonedds/idl/_filter.py
+enum cdrfilter_op {
+  FOP_CMP = 1,
+  FOP_LIKE = 2,
+  FOP_NOT = 3,
+  FOP_JUMP_FALSE = 4,
+  FOP_JUMP_TRUE = 5
+};
+
+enum cdrfilter_cmp {
+  CMP_EQ = 0,
+  CMP_NE = 1,
+  CMP_LT = 2,
+  CMP_LE = 3,
+  CMP_GT = 4,
+  CMP_GE = 5
+};
+
+enum cdrfilter_nav {
+  NOP_STATIC = 1,
+  NOP_SIZED = 2,
+  NOP_DELIMITED = 3,
+  NOP_REPEAT = 4,
+  NOP_REPEAT_SIZED = 5,
+  NOP_OPTIONAL = 6,
+  NOP_ENTER = 7,
+  NOP_LOAD = 8
+};
+
+enum cdrfilter_kind {
+  KIND_INT8 = 1,
+  KIND_UINT8 = 2,
+  KIND_INT16 = 3,
+  KIND_UINT16 = 4,
+  KIND_INT32 = 5,
+  KIND_UINT32 = 6,
+  KIND_INT64 = 7,
+  KIND_UINT64 = 8,
+  KIND_FLOAT32 = 9,
+  KIND_FLOAT64 = 10,
+  KIND_BOOL = 11,
+  KIND_CHAR = 12,
+  KIND_STRING = 13
+};
+
+enum cdrfilter_class {
+  CLS_INT = 0,
+  CLS_UINT = 1,
+  CLS_FLOAT = 2,
+  CLS_STRING = 3
+};
+
+#define CONSTANT_SIZE 16
+#define MAX_DEPTH 32
+
+typedef struct cdrfilter_value {
+  enum cdrfilter_class cls;
+  union {
+    int64_t i;
+    uint64_t u;
+    double d;
+  } v;
+  const unsigned char *str;
+  uint32_t len;
+} cdrfilter_value_t;
+
+typedef struct cdrfilter_ctx {
+  const uint32_t *program;
+  size_t program_words;
+  const unsigned char *constants;
+  size_t constants_size;
+  const unsigned char *data;
+  size_t size;
+  size_t align_max;
+  bool swap;
+  int version;
+} cdrfilter_ctx_t;
+
+static size_t align_pos (const cdrfilter_ctx_t *ctx, size_t pos, size_t align)
+{
+  if (align > ctx->align_max)
+    align = ctx->align_max;
+  if (align <= 1)
+    return pos;
+  // Alignment is relative to the end of the encapsulation header
+  return ((pos - 4 + align - 1) & ~(align - 1)) + 4;
+}
+
+static uint16_t load16 (const cdrfilter_ctx_t *ctx, size_t pos)
+{
+  uint16_t x;
+  memcpy (&x, ctx->data + pos, sizeof (x));
+  return ctx->swap ? (uint16_t) ((x >> 8) | (x << 8)) : x;
+}
+
+static uint32_t load32 (const cdrfilter_ctx_t *ctx, size_t pos)
+{
+  uint32_t x;
+  memcpy (&x, ctx->data + pos, sizeof (x));
+  if (ctx->swap)
+    x = ((x >> 24) & 0xff) | ((x >> 8) & 0xff00) | ((x << 8) & 0xff0000) | (x << 24);
+  return x;
+}
+
+static uint64_t load64 (const cdrfilter_ctx_t *ctx, size_t pos)
+{
+  uint64_t x;
+  memcpy (&x, ctx->data + pos, sizeof (x));
+  if (ctx->swap)
+  {
+    const uint64_t high = load32 (ctx, pos), low = load32 (ctx, pos + 4);
+    x = (high << 32) | low;
+  }
+  return x;
+}
+
+static bool read_length (const cdrfilter_ctx_t *ctx, size_t *pos, size_t limit, uint32_t *length)
+{
+  size_t p = align_pos (ctx, *pos, 4);
+  if (p > limit || limit - p < 4)
+    return false;
+  *length = load32 (ctx, p);
+  *pos = p + 4;
+  return true;
+}
+
+/* Steps over the skip ops in code[0..len), stops at a load op when len is SIZE_MAX. Returns
+   the index of the load op, len at the end of the code or SIZE_MAX if the data is too short. */
+static size_t navigate (const cdrfilter_ctx_t *ctx, const uint32_t *code, size_t len, size_t *pos, size_t *limit, int depth)
+{
+  size_t i = 0;
+  if (depth > MAX_DEPTH)
+    return SIZE_MAX;
+  while (i < len)
+  {
+    size_t p = *pos;
+    uint32_t n;
+    switch (code[i])
+    {
+      case NOP_STATIC:
+        p = align_pos (ctx, p, code[i + 2]);
+        if (p > *limit || *limit - p < code[i + 1])
+          return SIZE_MAX;
+        *pos = p + code[i + 1];
+        i += 3;
+        break;
+      case NOP_SIZED:
+        if (!read_length (ctx, &p, *limit, &n))
+          return SIZE_MAX;
+        if (n)
+        {
+          p = align_pos (ctx, p, code[i + 2]);
+          if (p > *limit || (code[i + 1] && (*limit - p) / code[i + 1] < n))
+            return SIZE_MAX;
+          p += (size_t) n * code[i + 1];
+        }
+        *pos = p;
+        i += 3;
+        break;
+      case NOP_DELIMITED:
+        if (!read_length (ctx, &p, *limit, &n) || *limit - p < n)
+          return SIZE_MAX;
+        *pos = p + n;
+        i += 1;
+        break;
+      case NOP_ENTER:
+        // The delimiter of an appendable struct, members past its end were not sent
+        if (!read_length (ctx, &p, *limit, &n) || *limit - p < n)
+          return SIZE_MAX;
+        *limit = p + n;
+        *pos = p;
+        i += 1;
+        break;
+      case NOP_REPEAT:
+      case NOP_REPEAT_SIZED: {
+        const uint32_t body = (code[i] == NOP_REPEAT) ? code[i + 2] : code[i + 1];
+        const size_t start = (code[i] == NOP_REPEAT) ? i + 3 : i + 2;
+        if (code[i] == NOP_REPEAT)
+          n = code[i + 1];
+        else if (!read_length (ctx, &p, *limit, &n))
+          return SIZE_MAX;
+        for (uint32_t k = 0; k < n; k++)
+        {
+          const size_t before = p;
+          size_t sublimit = *limit;
+          if (navigate (ctx, code + start, body, &p, &sublimit, depth + 1) != body)
+            return SIZE_MAX;
+          // Elements that take no space do not need to be repeated
+          if (p == before)
+            break;
+        }
+        *pos = p;
+        i = start + body;
+        break;
+      }
+      case NOP_OPTIONAL: {
+        const uint32_t body = code[i + 1];
+        size_t sublimit = *limit;
+        if (ctx->version == 2)
+        {
+          // A boolean flags presence
+          if (p >= *limit)
+            return SIZE_MAX;
+          p += 1;
+          if (ctx->data[p - 1] && navigate (ctx, code + i + 2, body, &p, &sublimit, depth + 1) != body)
+            return SIZE_MAX;
+        }
+        else
+        {
+          // A parameter header with the size of the member
+          uint32_t membersize;
+          p = align_pos (ctx, p, 4);
+          if (p > *limit || *limit - p < 4)
+            return SIZE_MAX;
+          membersize = load16 (ctx, p + 2);
+          p += 4;
+          if ((load16 (ctx, p - 4) & 0xbfff) == 0x3f01)
+          {
+            if (*limit - p < 8)
+              return SIZE_MAX;
+            membersize = load32 (ctx, p + 4);
+            p += 8;
+          }
+          if (*limit - p < membersize)
+            return SIZE_MAX;
+          p += membersize;
+        }
+        *pos = p;
+        i += 2 + body;
+        break;
+      }
+      case NOP_LOAD:
+        return i;
+      default:
+        return SIZE_MAX;
+    }
+  }
+  return len;
+}
+
+static bool load_field (const cdrfilter_ctx_t *ctx, uint32_t field, cdrfilter_value_t *value)
+{
+  const size_t expr_words = ctx->program[0], nfields = ctx->program[1];
+  size_t pos = 4, limit = ctx->size, at, size;
+  const uint32_t *code;
+  uint64_t u;
+
+  if (field >= nfields)
+    return false;
+  at = ctx->program[2 + expr_words + 2 * field + (size_t) (ctx->version - 1)];
+  if (at == 0 || at >= ctx->program_words)
+    return false;
+  code = ctx->program + at;
+
+  at = navigate (ctx, code, SIZE_MAX, &pos, &limit, 0);
+  if (at == SIZE_MAX)
+    return false;
+
+  switch (code[at + 1])
+  {
+    case KIND_INT8: case KIND_UINT8: case KIND_BOOL: case KIND_CHAR: size = 1; break;
+    case KIND_INT16: case KIND_UINT16: size = 2; break;
+    case KIND_INT32: case KIND_UINT32: case KIND_FLOAT32: size = 4; break;
+    case KIND_INT64: case KIND_UINT64: case KIND_FLOAT64: size = 8; break;
+    case KIND_STRING: {
+      uint32_t n;
+      if (!read_length (ctx, &pos, limit, &n) || limit - pos < n)
+        return false;
+      value->cls = CLS_STRING;
+      value->str = ctx->data + pos;
+      // The length includes the terminating 0
+      value->len = n ? n - 1 : 0;
+      return true;
+    }
+    default:
+      return false;
+  }
+
+  pos = align_pos (ctx, pos, size);
+  if (pos > limit || limit - pos < size)
+    return false;
+  switch (size)
+  {
+    case 1: u = ctx->data[pos]; break;
+    case 2: u = load16 (ctx, pos); break;
+    case 4: u = load32 (ctx, pos); break;
+    default: u = load64 (ctx, pos); break;
+  }
+
+  switch (code[at + 1])
+  {
+    case KIND_INT8: value->cls = CLS_INT; value->v.i = (int8_t) u; break;
+    case KIND_INT16: value->cls = CLS_INT; value->v.i = (int16_t) u; break;
+    case KIND_INT32: value->cls = CLS_INT; value->v.i = (int32_t) u; break;
+    case KIND_INT64: value->cls = CLS_INT; value->v.i = (int64_t) u; break;
+    case KIND_UINT8: case KIND_UINT16: case KIND_UINT32: case KIND_UINT64: case KIND_BOOL:
+      value->cls = CLS_UINT;
+      value->v.u = u;
+      break;
+    case KIND_FLOAT32: {
+      float f;
+      uint32_t x = (uint32_t) u;
+      memcpy (&f, &x, sizeof (f));
+      value->cls = CLS_FLOAT;
+      value->v.d = f;
+      break;
+    }
+    case KIND_FLOAT64:
+      value->cls = CLS_FLOAT;
+      memcpy (&value->v.d, &u, sizeof (value->v.d));
+      break;
+    case KIND_CHAR:
+      value->cls = CLS_STRING;
+      value->str = ctx->data + pos;
+      value->len = 1;
+      break;
+  }
+  return true;
+}
+
+static bool load_constant (const cdrfilter_ctx_t *ctx, uint32_t index, cdrfilter_value_t *value)
+{
+  const unsigned char *c;
+  uint32_t cls, len;
+  uint64_t payload;
+
+  if (index >= ctx->constants_size / CONSTANT_SIZE)
+    return false;
+  c = ctx->constants + (size_t) index * CONSTANT_SIZE;
+  memcpy (&cls, c, 4);
+  memcpy (&len, c + 4, 4);
+  memcpy (&payload, c + 8, 8);
+  value->cls = (enum cdrfilter_class) cls;
+  switch (cls)
+  {
+    case CLS_INT: value->v.i = (int64_t) payload; break;
+    case CLS_UINT: value->v.u = payload; break;
+    case CLS_FLOAT: memcpy (&value->v.d, &payload, sizeof (value->v.d)); break;
+    case CLS_STRING:
+      if (payload > ctx->constants_size || ctx->constants_size - payload < len)
+        return false;
+      value->str = ctx->constants + payload;
+      value->len = len;
+      break;
+    default:
+      return false;
+  }
+  return true;
+}
+
+static bool load_operand (const cdrfilter_ctx_t *ctx, uint32_t operand, cdrfilter_value_t *value)
+{
+  // Fields are numbered from 0, constants from -1 down
+  if ((int32_t) operand >= 0)
+    return load_field (ctx, operand, value);
+  return load_constant (ctx, (uint32_t) (-1 - (int32_t) operand), value);
+}
+
+static double as_double (const cdrfilter_value_t *x)
+{
+  switch (x->cls)
+  {
+    case CLS_INT: return (double) x->v.i;
+    case CLS_UINT: return (double) x->v.u;
+    default: return x->v.d;
+  }
+}
+
+// Returns -1, 0 or 1, or 2 if the values can't be compared
+static int compare (const cdrfilter_value_t *a, const cdrfilter_value_t *b)
+{
+  if (a->cls == CLS_STRING || b->cls == CLS_STRING)
+  {
+    int c;
+    if (a->cls != b->cls)
+      return 2;
+    c = memcmp (a->str, b->str, a->len < b->len ? a->len : b->len);
+    if (c == 0)
+      return (a->len > b->len) - (a->len < b->len);
+    return (c > 0) - (c < 0);
+  }
+  else if (a->cls == CLS_FLOAT || b->cls == CLS_FLOAT)
+  {
+    const double x = as_double (a), y = as_double (b);
+    if (x != x || y != y)
+      return 2;
+    return (x > y) - (x < y);
+  }
+  else if (a->cls == b->cls)
+  {
+    if (a->cls == CLS_INT)
+      return (a->v.i > b->v.i) - (a->v.i < b->v.i);
+    return (a->v.u > b->v.u) - (a->v.u < b->v.u);
+  }
+  else if (a->cls == CLS_INT)
+    return (a->v.i < 0) ? -1 : ((uint64_t) a->v.i > b->v.u) - ((uint64_t) a->v.i < b->v.u);
+  else
+    return (b->v.i < 0) ? 1 : (a->v.u > (uint64_t) b->v.i) - (a->v.u < (uint64_t) b->v.i);
+}
+
+// SQL LIKE: % matches any sequence, _ any single character
+static bool like (const unsigned char *s, size_t slen, const unsigned char *p, size_t plen)
+{
+  size_t si = 0, pi = 0, star_p = SIZE_MAX, star_s = 0;
+  while (si < slen)
+  {
+    if (pi < plen && (p[pi] == '_' || p[pi] == s[si]) && p[pi] != '%')
+    {
+      si++;
+      pi++;
+    }
+    else if (pi < plen && p[pi] == '%')
+    {
+      star_p = pi++;
+      star_s = si;
+    }
+    else if (star_p != SIZE_MAX)
+    {
+      pi = star_p + 1;
+      si = ++star_s;
+    }
+    else
+      return false;
+  }
+  while (pi < plen && p[pi] == '%')
+    pi++;
+  return pi == plen;
+}
+
+bool ddspy_cdrfilter_eval (const uint32_t *program, size_t program_words,
+                           const unsigned char *constants, size_t constants_size,
+                           const unsigned char *data, size_t size)
+{
+  const uint16_t one = 1;
+  const bool host_little = *(const unsigned char *) &one;
+  cdrfilter_ctx_t ctx;
+  size_t pc, expr_words;
+  bool r = false;
+
+  if (size < 4 || program_words < 2 || program_words - 2 < program[0] || (program_words - 2 - program[0]) / 2 < program[1])
+    return false;
+
+  ctx.program = program;
+  ctx.program_words = program_words;
+  ctx.constants = constants;
+  ctx.constants_size = constants_size;
+  ctx.data = data;
+  ctx.size = size;
+  // The second byte of the encapsulation header is the encoding, 6 and up are XCDR2
+  ctx.version = (data[1] >= 6) ? 2 : 1;
+  ctx.align_max = (ctx.version == 2) ? 4 : 8;
+  ctx.swap = (bool) (data[1] & 1) != host_little;
+
+  expr_words = program[0];
+  program += 2;
+  pc = 0;
+  while (pc < expr_words)
+  {
+    cdrfilter_value_t a, b;
+    switch (program[pc])
+    {
+      case FOP_CMP: {
+        int c;
+        if (!load_operand (&ctx, program[pc + 2], &a) || !load_operand (&ctx, program[pc + 3], &b))
+          r = false;
+        else if ((c = compare (&a, &b)) == 2)
+          r = (program[pc + 1] == CMP_NE);
+        else
+        {
+          switch (program[pc + 1])
+          {
+            case CMP_EQ: r = (c == 0); break;
+            case CMP_NE: r = (c != 0); break;
+            case CMP_LT: r = (c < 0); break;
+            case CMP_LE: r = (c <= 0); break;
+            case CMP_GT: r = (c > 0); break;
+            case CMP_GE: r = (c >= 0); break;
+            default: return false;
+          }
+        }
+        pc += 4;
+        break;
+      }
+      case FOP_LIKE:
+        r = load_operand (&ctx, program[pc + 1], &a) && load_operand (&ctx, program[pc + 2], &b) &&
+            a.cls == CLS_STRING && b.cls == CLS_STRING && like (a.str, a.len, b.str, b.len);
+        pc += 3;
+        break;
+      case FOP_NOT:
+        r = !r;
+        pc += 1;
+        break;
+      case FOP_JUMP_FALSE:
+      case FOP_JUMP_TRUE:
+        // Jumps only go forward
+        if (program[pc + 1] <= pc)
+          return false;
+        pc = (r == (program[pc] == FOP_JUMP_TRUE)) ? program[pc + 1] : pc + 2;
+        break;
+      default:
+        return false;
+    }
+  }
+  return r;
+}
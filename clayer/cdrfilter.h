@@ -0,0 +1,26 @@
+/*
+ * Copyright(c) 2021 to 2022 ZettaScale Technology and others
+ *
+ * This program and the accompanying materials are made available under the
+ * terms of the Eclipse Public License v. 2.0 which is available at
+ * http://www.eclipse.org/legal/epl-2.0, or the Eclipse Distribution License
+ * v. 1.0 which is available at
+ * http://www.eclipse.org/org/documents/edl-v10.php.
+ *
+ * SPDX-License-Identifier: EPL-2.0 OR BSD-3-Clause
+ */
+
+#ifndef CDRFILTER_H
+#define CDRFILTER_H
+
+#include <stdbool.h>
+#include <stddef.h>
+#include <stdint.h>
+
+/* Evaluates a filter program (see cyclonedds/idl/_filter.py) on a serialized sample,
+   including its 4 byte encapsulation header. Returns whether the sample passes. */
+bool ddspy_cdrfilter_eval (const uint32_t *program, size_t program_words,
+                           const unsigned char *constants, size_t constants_size,
+                           const unsigned char *data, size_t size);
+
+#endif
@@ -16,6 +16,8 @@
 #include "dds/dds.h"
 #include "dds/ddsrt/endian.h"
 #include "dds/ddsrt/heap.h"
+#include "dds/ddsrt/atomics.h"
+#include "dds/ddsrt/sync.h"
 #include "dds/ddsrt/string.h"
 #include "dds/ddsrt/mh3.h"
 #include "dds/ddsrt/md5.h"
@@ -26,6 +28,7 @@
 #include "dds/ddsi/ddsi_typebuilder.h"
 #include "dds/cdr/dds_cdrstream.h"
 #include "pysertype.h"
+#include "cdrfilter.h"
 
 #define HEXDUMP 0
 
@@ -42,6 +45,8 @@ typedef struct ddspy_sertype {
 
   bool v1_key_maxsize_bigger_16;
   bool v2_key_maxsize_bigger_16;
+  bool keyhash_is_v2;   // XCDR version of the key in keyhashes received without data
+  bool keyhash_is_sample_key;   // keyhash form of the key equals sample form, see serdata_from_keyhash
 
   // xtypes
   unsigned char *typeinfo_ser_data;
@@ -70,10 +75,21 @@ typedef struct ddspy_sample_container {
 typedef struct {
   ddspy_sample_container_t *containers;
   dds_sample_info_t *sample_infos;
+  ddsi_serdata_t **serdatas;  // only used when loaning, NULL entries for invalid samples
+  bool loan;
+  bool info_batch;  // sample infos as columns instead of one object per sample
   size_t count;
   size_t capacity;
 } collector_state_t;
 
+// Python object exposing the payload of a serdata (including the 4 byte CDR
+// encapsulation header) through the buffer protocol, it holds a reference on
+// the serdata for as long as it (or any memoryview on it) is alive.
+typedef struct {
+  PyObject_HEAD
+  ddsi_serdata_t *serdata;
+} ddspy_serdata_buffer_t;
+
 #if 0
 static inline ddspy_sertype_t *sertype (ddspy_serdata_t *this)
 {
@@ -226,29 +242,14 @@ static bool ddspy_serdata_populate_key (ddspy_serdata_t *this)
   return extract_result;
 }
 
-static uint32_t hash_value (void *data, const size_t sz)
-{
-  if (sz == 0)
-    return 0;
-
-  unsigned char buf[16];
-  ddsrt_md5_state_t md5st;
-  ddsrt_md5_init (&md5st);
-  ddsrt_md5_append (&md5st, (ddsrt_md5_byte_t *)data, (uint32_t)sz);
-  ddsrt_md5_finish (&md5st, (ddsrt_md5_byte_t *)buf);
-  return *(uint32_t *)buf;
-}
-
 static void ddspy_serdata_populate_hash (ddspy_serdata_t *this)
 {
   ddsi_serdata_t *sd = (ddsi_serdata_t *)this;
 
-  // set initial hash to that of type
-  sd->hash = sd->type->serdata_basehash;
-
-  // xor type hash with hash of key
-  const uint32_t key_hash = hash_value (this->key, this->key_size);
-  sd->hash ^= key_hash;
+  // The serdata hash is only used for hash tables in this process, so a seeded murmur3 of the
+  // key will do. The key is in native endianness XCDR2, so equal keys hash equal regardless of
+  // how the sample was serialized. MD5 is only needed for keyhashes, see serdata_get_keyhash.
+  sd->hash = this->key_size ? ddsrt_mh3 (this->key, this->key_size, sd->type->serdata_basehash) : sd->type->serdata_basehash;
 }
 
 static bool serdata_eqkey (const struct ddsi_serdata *a, const struct ddsi_serdata *b)
@@ -330,12 +331,24 @@ static ddsi_serdata_t *serdata_from_ser_iov (const struct ddsi_sertype *type, en
 
 static ddsi_serdata_t *serdata_from_keyhash (const struct ddsi_sertype *topic, const struct ddsi_keyhash *keyhash)
 {
-  (void)keyhash;
-  (void)topic;
-  //replace with (if key_size_max <= 16) then populate the data class with the key hash (key_read)
-  // TODO
-  assert (0);
-  return NULL;
+  const ddspy_sertype_t *type = (const ddspy_sertype_t *)topic;
+  const bool is_v2 = type->keyhash_is_v2;
+
+  // A keyhash is the big-endian serialized key padded with zeroes if the key always fits in
+  // 16 bytes, otherwise it is an MD5 of the key and the key can't be recovered from it.
+  if (type->keyless || (is_v2 ? type->v2_key_maxsize_bigger_16 : type->v1_key_maxsize_bigger_16))
+    return NULL;
+  // The key is in keyhash form: member id order and no DHEADERs. It is parsed as a key in
+  // sample form, which only gives the same key for final types with keys in member order.
+  if (!type->keyhash_is_sample_key)
+    return NULL;
+
+  // The encoding identifiers are defined in network byte order
+  struct { uint16_t enc; uint16_t options; } header = { is_v2 ? DDSI_RTPS_CDR2_BE : DDSI_RTPS_CDR_BE, 0 };
+  ddspy_serdata_t *d = ddspy_serdata_new (topic, SDK_KEY, 4 + sizeof (keyhash->value));
+  memcpy (d->data, &header, 4);
+  memcpy ((char *)d->data + 4, keyhash->value, sizeof (keyhash->value));
+  return serdata_from_common (d, SDK_KEY);
 }
 
 static ddsi_serdata_t *serdata_from_sample (const ddsi_sertype_t *type, enum ddsi_serdata_kind kind, const void *sample)
@@ -490,8 +503,8 @@ static void serdata_get_keyhash (const ddsi_serdata_t *d, struct ddsi_keyhash *b
   bool v1_key_maxsize_bigger_16 = csertype (cserdata(d))->v1_key_maxsize_bigger_16;
   bool v2_key_maxsize_bigger_16 = csertype (cserdata(d))->v2_key_maxsize_bigger_16;
 
-  assert (le_key != NULL);
-  assert (le_keysz > 0);
+  assert (cserdata(d)->key != NULL);
+  assert (cserdata(d)->key_size > 0);
 
   dds_istream_t is;
   dds_istream_init (&is, cserdata(d)->key_size, cserdata(d)->key, DDSI_RTPS_CDR_ENC_VERSION_2);
@@ -723,7 +736,8 @@ static bool valid_topic_py_or_set_error (PyObject *py_obj)
 static ddspy_sertype_t *ddspy_sertype_new (PyObject *pytype)
 {
   // PyObjects
-  PyObject *idl = NULL, *pyname = NULL, *pydata_type_props = NULL, *pysupported_versions = NULL;
+  PyObject *idl = NULL, *pyname = NULL, *pydata_type_props = NULL, *pysupported_versions = NULL, *pydefault_version = NULL;
+  PyObject *pykeyhash_is_sample_key = NULL;
   PyObject *xt_type_data = NULL;
   Py_buffer xt_type_map_bytes, xt_type_info_bytes;
   ddspy_sertype_t *new = NULL;
@@ -744,6 +758,12 @@ static ddspy_sertype_t *ddspy_sertype_new (PyObject *pytype)
   pysupported_versions = PyObject_GetAttrString (idl, "supported_versions");
   if (!valid_topic_py_or_set_error (pysupported_versions)) goto err;
 
+  pydefault_version = PyObject_GetAttrString (idl, "default_version");
+  if (!valid_topic_py_or_set_error (pydefault_version)) goto err;
+
+  pykeyhash_is_sample_key = PyObject_GetAttrString (idl, "keyhash_is_sample_key");
+  if (!valid_topic_py_or_set_error (pykeyhash_is_sample_key)) goto err;
+
   xt_type_data = PyObject_GetAttrString (idl, "_xt_bytedata");
   if (!valid_py_allow_none_or_set_error (xt_type_data)) goto err;
 
@@ -758,6 +778,8 @@ static ddspy_sertype_t *ddspy_sertype_new (PyObject *pytype)
   Py_INCREF (pytype);
   new->my_py_type = pytype;
   new->keyless = keyless;
+  new->keyhash_is_v2 = PyLong_AsLong (pydefault_version) == 2;
+  new->keyhash_is_sample_key = PyObject_IsTrue (pykeyhash_is_sample_key) == 1;
 
   if (xt_type_data != Py_None && PyTuple_GetItem (xt_type_data, 0) != Py_None)
   {
@@ -822,6 +844,8 @@ static ddspy_sertype_t *ddspy_sertype_new (PyObject *pytype)
   Py_XDECREF (pyname);
   Py_XDECREF (pydata_type_props);
   Py_XDECREF (pysupported_versions);
+  Py_XDECREF (pydefault_version);
+  Py_XDECREF (pykeyhash_is_sample_key);
   return new;
 }
 
@@ -943,7 +967,9 @@ static PyObject *ddspy_write (PyObject *self, PyObject *args)
   assert (sample_data.len >= 0);
   container.usample_size = (size_t)sample_data.len;
 
+  Py_BEGIN_ALLOW_THREADS
   sts = dds_write (writer, &container);
+  Py_END_ALLOW_THREADS
 
   PyBuffer_Release (&sample_data);
   return PyLong_FromLong ((long)sts);
@@ -965,12 +991,96 @@ static PyObject *ddspy_write_ts (PyObject *self, PyObject *args)
   assert (sample_data.len >= 0);
   container.usample_size = (size_t)sample_data.len;
 
+  Py_BEGIN_ALLOW_THREADS
   sts = dds_write_ts (writer, &container, time);
+  Py_END_ALLOW_THREADS
 
   PyBuffer_Release (&sample_data);
   return PyLong_FromLong ((long)sts);
 }
 
+static PyObject *ddspy_write_batch (PyObject *self, PyObject *args)
+{
+  ddspy_sample_container_t container;
+  dds_entity_t writer;
+  dds_return_t sts = DDS_RETCODE_OK;
+  PyObject *samples, *timestamps, *samples_fast = NULL, *timestamps_fast = NULL, *result = NULL;
+  Py_buffer *sample_data = NULL;
+  dds_time_t *times = NULL;
+  Py_ssize_t count, acquired = 0, written = 0;
+  (void)self;
+
+  if (!PyArg_ParseTuple (args, "iOO", &writer, &samples, &timestamps))
+    return NULL;
+
+  if ((samples_fast = PySequence_Fast (samples, "samples must be a sequence of bytes-like objects")) == NULL)
+    return NULL;
+  count = PySequence_Fast_GET_SIZE (samples_fast);
+
+  if (timestamps != Py_None)
+  {
+    if ((timestamps_fast = PySequence_Fast (timestamps, "timestamps must be a sequence of integers")) == NULL)
+      goto err;
+    if (PySequence_Fast_GET_SIZE (timestamps_fast) != count)
+    {
+      PyErr_SetString (PyExc_ValueError, "Number of timestamps does not match the number of samples.");
+      goto err;
+    }
+    if ((times = PyMem_Malloc (sizeof (*times) * (size_t) (count > 0 ? count : 1))) == NULL)
+    {
+      PyErr_NoMemory ();
+      goto err;
+    }
+  }
+
+  if ((sample_data = PyMem_Malloc (sizeof (*sample_data) * (size_t) (count > 0 ? count : 1))) == NULL)
+  {
+    PyErr_NoMemory ();
+    goto err;
+  }
+
+  // Pin all the serialized samples (and convert the timestamps) while holding
+  // the GIL, so that the loop below can run without touching any Python object.
+  for (Py_ssize_t i = 0; i < count; i++)
+  {
+    if (PyObject_GetBuffer (PySequence_Fast_GET_ITEM (samples_fast, i), &sample_data[i], PyBUF_CONTIG_RO) < 0)
+      goto err;
+    acquired++;
+    if (times != NULL)
+    {
+      times[i] = PyLong_AsLongLong (PySequence_Fast_GET_ITEM (timestamps_fast, i));
+      if (times[i] == -1 && PyErr_Occurred ())
+        goto err;
+    }
+  }
+
+  Py_BEGIN_ALLOW_THREADS
+  for (Py_ssize_t i = 0; i < count; i++)
+  {
+    container.usample = sample_data[i].buf;
+    container.usample_size = (size_t) sample_data[i].len;
+    if (times != NULL)
+      sts = dds_write_ts (writer, &container, times[i]);
+    else
+      sts = dds_write (writer, &container);
+    if (sts < 0)
+      break;
+    written++;
+  }
+  Py_END_ALLOW_THREADS
+
+  result = Py_BuildValue ("nl", written, (long) sts);
+
+err:
+  for (Py_ssize_t i = 0; i < acquired; i++)
+    PyBuffer_Release (&sample_data[i]);
+  PyMem_Free (sample_data);
+  PyMem_Free (times);
+  Py_XDECREF (timestamps_fast);
+  Py_DECREF (samples_fast);
+  return result;
+}
+
 static PyObject *ddspy_dispose (PyObject *self, PyObject *args)
 {
   ddspy_sample_container_t container;
@@ -986,7 +1096,9 @@ static PyObject *ddspy_dispose (PyObject *self, PyObject *args)
   assert (sample_data.len >= 0);
   container.usample_size = (size_t)sample_data.len;
 
+  Py_BEGIN_ALLOW_THREADS
   sts = dds_dispose (writer, &container);
+  Py_END_ALLOW_THREADS
 
   PyBuffer_Release (&sample_data);
   return PyLong_FromLong ((long)sts);
@@ -1008,7 +1120,9 @@ static PyObject *ddspy_dispose_ts (PyObject *self, PyObject *args)
   assert (sample_data.len >= 0);
   container.usample_size = (size_t)sample_data.len;
 
+  Py_BEGIN_ALLOW_THREADS
   sts = dds_dispose_ts (writer, &container, time);
+  Py_END_ALLOW_THREADS
 
   PyBuffer_Release (&sample_data);
   return PyLong_FromLong ((long)sts);
@@ -1029,7 +1143,9 @@ static PyObject *ddspy_writedispose (PyObject *self, PyObject *args)
   assert (sample_data.len >= 0);
   container.usample_size = (size_t)sample_data.len;
 
+  Py_BEGIN_ALLOW_THREADS
   sts = dds_writedispose (writer, &container);
+  Py_END_ALLOW_THREADS
 
   PyBuffer_Release (&sample_data);
   return PyLong_FromLong ((long)sts);
@@ -1051,7 +1167,9 @@ static PyObject *ddspy_writedispose_ts (PyObject *self, PyObject *args)
   assert (sample_data.len >= 0);
   container.usample_size = (size_t)sample_data.len;
 
+  Py_BEGIN_ALLOW_THREADS
   sts = dds_writedispose_ts (writer, &container, time);
+  Py_END_ALLOW_THREADS
 
   PyBuffer_Release (&sample_data);
   return PyLong_FromLong ((long)sts);
@@ -1067,7 +1185,9 @@ static PyObject *ddspy_dispose_handle (PyObject *self, PyObject *args)
   if (!PyArg_ParseTuple (args, "iK", &writer, &handle))
     return NULL;
 
+  Py_BEGIN_ALLOW_THREADS
   sts = dds_dispose_ih (writer, handle);
+  Py_END_ALLOW_THREADS
   return PyLong_FromLong ((long)sts);
 }
 
@@ -1082,31 +1202,280 @@ static PyObject *ddspy_dispose_handle_ts (PyObject *self, PyObject *args)
   if (!PyArg_ParseTuple (args, "iKL", &writer, &handle, &time))
     return NULL;
 
+  Py_BEGIN_ALLOW_THREADS
   sts = dds_dispose_ih_ts (writer, handle, time);
+  Py_END_ALLOW_THREADS
   return PyLong_FromLong ((long)sts);
 }
 
-static PyObject *sampleinfo_descriptor;
+// SampleInfo objects keep the C struct and only create the Python objects of the
+// fields that are accessed.
+typedef struct {
+  PyObject_HEAD
+  dds_sample_info_t info;
+} ddspy_sampleinfo_t;
+
+static char *ddspy_sampleinfo_names[] = {
+  "sample_state", "view_state", "instance_state", "valid_data", "source_timestamp", "instance_handle",
+  "publication_handle", "disposed_generation_count", "no_writers_generation_count", "sample_rank",
+  "generation_rank", "absolute_generation_rank", NULL
+};
+#define DDSPY_SAMPLEINFO_NFIELDS 12
+
+static PyTypeObject ddspy_sampleinfo_type;
+
+static PyObject *ddspy_sampleinfo_value (const dds_sample_info_t *info, uintptr_t field)
+{
+  switch (field)
+  {
+    case 0: return PyLong_FromUnsignedLong ((unsigned long) info->sample_state);
+    case 1: return PyLong_FromUnsignedLong ((unsigned long) info->view_state);
+    case 2: return PyLong_FromUnsignedLong ((unsigned long) info->instance_state);
+    case 3: return PyBool_FromLong (info->valid_data);
+    case 4: return PyLong_FromLongLong (info->source_timestamp);
+    case 5: return PyLong_FromUnsignedLongLong (info->instance_handle);
+    case 6: return PyLong_FromUnsignedLongLong (info->publication_handle);
+    case 7: return PyLong_FromUnsignedLong (info->disposed_generation_count);
+    case 8: return PyLong_FromUnsignedLong (info->no_writers_generation_count);
+    case 9: return PyLong_FromUnsignedLong (info->sample_rank);
+    case 10: return PyLong_FromUnsignedLong (info->generation_rank);
+    case 11: return PyLong_FromUnsignedLong (info->absolute_generation_rank);
+  }
+  Py_RETURN_NONE;
+}
+
+static PyObject *ddspy_sampleinfo_get (ddspy_sampleinfo_t *self, void *closure)
+{
+  return ddspy_sampleinfo_value (&self->info, (uintptr_t) closure);
+}
+
+static PyObject *ddspy_sampleinfo_tuple (const dds_sample_info_t *info)
+{
+  PyObject *values = PyTuple_New (DDSPY_SAMPLEINFO_NFIELDS);
+  if (values == NULL)
+    return NULL;
+  for (uintptr_t i = 0; i < DDSPY_SAMPLEINFO_NFIELDS; i++)
+  {
+    PyObject *value = ddspy_sampleinfo_value (info, i);
+    if (value == NULL)
+    {
+      Py_DECREF (values);
+      return NULL;
+    }
+    PyTuple_SET_ITEM (values, (Py_ssize_t) i, value);
+  }
+  return values;
+}
+
+static int ddspy_sampleinfo_init (ddspy_sampleinfo_t *self, PyObject *args, PyObject *kwargs)
+{
+  dds_sample_info_t *info = &self->info;
+  unsigned int sample_state, view_state, instance_state;
+  int valid_data;
+  memset (info, 0, sizeof (*info));
+  if (!PyArg_ParseTupleAndKeywords (args, kwargs, "IIIpLKKIIIII", ddspy_sampleinfo_names,
+        &sample_state, &view_state, &instance_state, &valid_data, &info->source_timestamp,
+        &info->instance_handle, &info->publication_handle, &info->disposed_generation_count,
+        &info->no_writers_generation_count, &info->sample_rank, &info->generation_rank,
+        &info->absolute_generation_rank))
+    return -1;
+  info->sample_state = (dds_sample_state_t) sample_state;
+  info->view_state = (dds_view_state_t) view_state;
+  info->instance_state = (dds_instance_state_t) instance_state;
+  info->valid_data = valid_data;
+  return 0;
+}
+
+static bool ddspy_sampleinfo_equal (const dds_sample_info_t *a, const dds_sample_info_t *b)
+{
+  return a->sample_state == b->sample_state && a->view_state == b->view_state &&
+    a->instance_state == b->instance_state && a->valid_data == b->valid_data &&
+    a->source_timestamp == b->source_timestamp && a->instance_handle == b->instance_handle &&
+    a->publication_handle == b->publication_handle &&
+    a->disposed_generation_count == b->disposed_generation_count &&
+    a->no_writers_generation_count == b->no_writers_generation_count &&
+    a->sample_rank == b->sample_rank && a->generation_rank == b->generation_rank &&
+    a->absolute_generation_rank == b->absolute_generation_rank;
+}
+
+static PyObject *ddspy_sampleinfo_richcompare (PyObject *a, PyObject *b, int op)
+{
+  if ((op != Py_EQ && op != Py_NE) || !PyObject_TypeCheck (a, &ddspy_sampleinfo_type) || !PyObject_TypeCheck (b, &ddspy_sampleinfo_type))
+    Py_RETURN_NOTIMPLEMENTED;
+  bool equal = ddspy_sampleinfo_equal (&((ddspy_sampleinfo_t *) a)->info, &((ddspy_sampleinfo_t *) b)->info);
+  return PyBool_FromLong (op == Py_EQ ? equal : !equal);
+}
+
+static PyObject *ddspy_sampleinfo_repr (ddspy_sampleinfo_t *self)
+{
+  const dds_sample_info_t *info = &self->info;
+  return PyUnicode_FromFormat (
+    "SampleInfo(sample_state=%u, view_state=%u, instance_state=%u, valid_data=%s, source_timestamp=%lld, "
+    "instance_handle=%llu, publication_handle=%llu, disposed_generation_count=%u, no_writers_generation_count=%u, "
+    "sample_rank=%u, generation_rank=%u, absolute_generation_rank=%u)",
+    (unsigned) info->sample_state, (unsigned) info->view_state, (unsigned) info->instance_state,
+    info->valid_data ? "True" : "False", (long long) info->source_timestamp,
+    (unsigned long long) info->instance_handle, (unsigned long long) info->publication_handle,
+    (unsigned) info->disposed_generation_count, (unsigned) info->no_writers_generation_count,
+    (unsigned) info->sample_rank, (unsigned) info->generation_rank, (unsigned) info->absolute_generation_rank);
+}
+
+static PyObject *ddspy_sampleinfo_reduce (ddspy_sampleinfo_t *self, PyObject *unused)
+{
+  (void) unused;
+  PyObject *values = ddspy_sampleinfo_tuple (&self->info);
+  if (values == NULL)
+    return NULL;
+  return Py_BuildValue ("(ON)", (PyObject *) Py_TYPE (self), values);
+}
+
+#define DDSPY_SAMPLEINFO_GETSET(i, name, doc) { name, (getter) ddspy_sampleinfo_get, NULL, doc, (void *) (uintptr_t) i }
+static PyGetSetDef ddspy_sampleinfo_getset[] = {
+  DDSPY_SAMPLEINFO_GETSET (0, "sample_state", "Possible values: :class:`SampleState<cyclonedds.core.SampleState>`"),
+  DDSPY_SAMPLEINFO_GETSET (1, "view_state", "Possible values: :class:`ViewState<cyclonedds.core.ViewState>`"),
+  DDSPY_SAMPLEINFO_GETSET (2, "instance_state", "Possible values: :class:`InstanceState<cyclonedds.core.InstanceState>`"),
+  DDSPY_SAMPLEINFO_GETSET (3, "valid_data", "Whether the sample holds data or only signals a change of instance state."),
+  DDSPY_SAMPLEINFO_GETSET (4, "source_timestamp", "The time (in unix nanoseconds) that the associated sample was written."),
+  DDSPY_SAMPLEINFO_GETSET (5, "instance_handle", "Handle to the data instance (if this is a keyed topic)"),
+  DDSPY_SAMPLEINFO_GETSET (6, "publication_handle", "Handle of the writer of the sample."),
+  DDSPY_SAMPLEINFO_GETSET (7, "disposed_generation_count", NULL),
+  DDSPY_SAMPLEINFO_GETSET (8, "no_writers_generation_count", NULL),
+  DDSPY_SAMPLEINFO_GETSET (9, "sample_rank", NULL),
+  DDSPY_SAMPLEINFO_GETSET (10, "generation_rank", NULL),
+  DDSPY_SAMPLEINFO_GETSET (11, "absolute_generation_rank", NULL),
+  { NULL, NULL, NULL, NULL, NULL }
+};
+#undef DDSPY_SAMPLEINFO_GETSET
+
+static PyMethodDef ddspy_sampleinfo_methods[] = {
+  { "__reduce__", (PyCFunction) ddspy_sampleinfo_reduce, METH_NOARGS, NULL },
+  { NULL, NULL, 0, NULL }
+};
+
+static PyTypeObject ddspy_sampleinfo_type = {
+  PyVarObject_HEAD_INIT (NULL, 0)
+  .tp_name = "cyclonedds.internal.SampleInfo",
+  .tp_doc =
+    "SampleInfo(sample_state, view_state, instance_state, valid_data, source_timestamp, instance_handle,\n"
+    "           publication_handle, disposed_generation_count, no_writers_generation_count, sample_rank,\n"
+    "           generation_rank, absolute_generation_rank)\n"
+    "--\n\n"
+    "Contains information about the associated data value. The fields are stored as C values and\n"
+    "only converted to Python objects when accessed, instances are immutable.",
+  .tp_basicsize = sizeof (ddspy_sampleinfo_t),
+  .tp_itemsize = 0,
+  .tp_flags = Py_TPFLAGS_DEFAULT,
+  .tp_new = PyType_GenericNew,
+  .tp_init = (initproc) ddspy_sampleinfo_init,
+  .tp_repr = (reprfunc) ddspy_sampleinfo_repr,
+  .tp_richcompare = ddspy_sampleinfo_richcompare,
+  .tp_hash = PyObject_HashNotImplemented,
+  .tp_getset = ddspy_sampleinfo_getset,
+  .tp_methods = ddspy_sampleinfo_methods
+};
 
 static PyObject *get_sampleinfo_pyobject (dds_sample_info_t *sampleinfo)
 {
-  PyObject *arguments = Py_BuildValue (
-          "IIIOLKKkkkkk",
-          sampleinfo->sample_state,
-          sampleinfo->view_state,
-          sampleinfo->instance_state,
-          (sampleinfo->valid_data > 0) ? Py_True : Py_False,
-          sampleinfo->source_timestamp,
-          sampleinfo->instance_handle,
-          sampleinfo->publication_handle,
-          sampleinfo->disposed_generation_count,
-          sampleinfo->no_writers_generation_count,
-          sampleinfo->sample_rank,
-          sampleinfo->generation_rank,
-          sampleinfo->absolute_generation_rank);
-  PyObject *pysampleinfo = PyObject_CallObject (sampleinfo_descriptor, arguments);
-  Py_DECREF (arguments);
-  return pysampleinfo;
+  ddspy_sampleinfo_t *obj = PyObject_New (ddspy_sampleinfo_t, &ddspy_sampleinfo_type);
+  if (obj == NULL)
+    return NULL;
+  obj->info = *sampleinfo;
+  return (PyObject *) obj;
+}
+
+// The sample infos of a read or take as one bytes object per field, in the order of
+// ddspy_sampleinfo_names and with the native representation of the field type.
+static PyObject *get_sampleinfo_columns (const dds_sample_info_t *infos, size_t count)
+{
+  static const size_t sizes[DDSPY_SAMPLEINFO_NFIELDS] = { 4, 4, 4, 1, 8, 8, 8, 4, 4, 4, 4, 4 };
+  PyObject *columns = PyTuple_New (DDSPY_SAMPLEINFO_NFIELDS);
+  if (columns == NULL)
+    return NULL;
+  for (uintptr_t f = 0; f < DDSPY_SAMPLEINFO_NFIELDS; f++)
+  {
+    PyObject *column = PyBytes_FromStringAndSize (NULL, (Py_ssize_t) (count * sizes[f]));
+    if (column == NULL)
+    {
+      Py_DECREF (columns);
+      return NULL;
+    }
+    char *dst = PyBytes_AS_STRING (column);
+    for (size_t i = 0; i < count; i++)
+    {
+      const dds_sample_info_t *info = &infos[i];
+      union { uint32_t u32; uint64_t u64; int64_t i64; unsigned char b; } v;
+      switch (f)
+      {
+        case 0: v.u32 = (uint32_t) info->sample_state; break;
+        case 1: v.u32 = (uint32_t) info->view_state; break;
+        case 2: v.u32 = (uint32_t) info->instance_state; break;
+        case 3: v.b = info->valid_data ? 1 : 0; break;
+        case 4: v.i64 = info->source_timestamp; break;
+        case 5: v.u64 = info->instance_handle; break;
+        case 6: v.u64 = info->publication_handle; break;
+        case 7: v.u32 = info->disposed_generation_count; break;
+        case 8: v.u32 = info->no_writers_generation_count; break;
+        case 9: v.u32 = info->sample_rank; break;
+        case 10: v.u32 = info->generation_rank; break;
+        default: v.u32 = info->absolute_generation_rank; break;
+      }
+      memcpy (dst + i * sizes[f], &v, sizes[f]);
+    }
+    PyTuple_SET_ITEM (columns, (Py_ssize_t) f, column);
+  }
+  return columns;
+}
+
+static void ddspy_serdata_buffer_dealloc (ddspy_serdata_buffer_t *self)
+{
+  if (self->serdata)
+    ddsi_serdata_unref (self->serdata);
+  Py_TYPE (self)->tp_free ((PyObject *) self);
+}
+
+static int ddspy_serdata_buffer_getbuffer (ddspy_serdata_buffer_t *self, Py_buffer *view, int flags)
+{
+  const ddspy_serdata_t *d = cserdata (self->serdata);
+  return PyBuffer_FillInfo (view, (PyObject *) self, d->data, (Py_ssize_t) d->data_size, 1, flags);
+}
+
+static Py_ssize_t ddspy_serdata_buffer_length (ddspy_serdata_buffer_t *self)
+{
+  return (Py_ssize_t) cserdata (self->serdata)->data_size;
+}
+
+static PyBufferProcs ddspy_serdata_buffer_as_buffer = {
+  .bf_getbuffer = (getbufferproc) ddspy_serdata_buffer_getbuffer,
+  .bf_releasebuffer = NULL
+};
+
+static PySequenceMethods ddspy_serdata_buffer_as_sequence = {
+  .sq_length = (lenfunc) ddspy_serdata_buffer_length
+};
+
+static PyTypeObject ddspy_serdata_buffer_type = {
+  PyVarObject_HEAD_INIT (NULL, 0)
+  .tp_name = "cyclonedds._clayer.SerdataBuffer",
+  .tp_doc = "Read-only view on the serialized data of a received sample.",
+  .tp_basicsize = sizeof (ddspy_serdata_buffer_t),
+  .tp_itemsize = 0,
+  .tp_flags = Py_TPFLAGS_DEFAULT,
+  .tp_dealloc = (destructor) ddspy_serdata_buffer_dealloc,
+  .tp_as_buffer = &ddspy_serdata_buffer_as_buffer,
+  .tp_as_sequence = &ddspy_serdata_buffer_as_sequence
+};
+
+// Steals the serdata reference, also if creating the object fails.
+static PyObject *ddspy_serdata_buffer_new (ddsi_serdata_t *serdata)
+{
+  ddspy_serdata_buffer_t *obj = PyObject_New (ddspy_serdata_buffer_t, &ddspy_serdata_buffer_type);
+  if (obj == NULL)
+  {
+    ddsi_serdata_unref (serdata);
+    return NULL;
+  }
+  obj->serdata = serdata;
+  return (PyObject *) obj;
 }
 
 static inline uint32_t check_number_of_samples (long long n)
@@ -1126,28 +1495,93 @@ static inline uint32_t check_number_of_samples (long long n)
   return (uint32_t)n;
 }
 
+// Releases the samples from index "from" that have not been handed to Python and the arrays.
+static void readtake_release (collector_state_t *state, size_t from)
+{
+  for (size_t i = from; i < state->count; ++i)
+  {
+    if (state->loan && state->serdatas[i] != NULL)
+      ddsi_serdata_unref (state->serdatas[i]);
+    else
+      dds_free (state->containers[i].usample);
+  }
+  dds_free(state->containers);
+  dds_free(state->sample_infos);
+  dds_free(state->serdatas);
+}
+
 static PyObject *readtake_post (int32_t sts, collector_state_t *state)
 {
   if (sts < 0 && state->count == 0)
+  {
+    readtake_release (state, 0);
     return PyLong_FromLong ((long)sts);
+  }
 
-  PyObject *list = PyList_New((Py_ssize_t)state->count);
-  for (size_t i = 0; i < state->count; ++i)
+  PyObject *list, *result;
+  size_t i;
+  if ((list = PyList_New((Py_ssize_t)state->count)) == NULL)
   {
-    PyObject *sampleinfo = get_sampleinfo_pyobject(&state->sample_infos[i]);
-    PyObject *item = Py_BuildValue("(y#O)", 
-                                   state->containers[i].usample,
-                                   (Py_ssize_t)state->containers[i].usample_size,
-                                   sampleinfo);
-    PyList_SetItem(list, (Py_ssize_t)i, item); // steals ref
-    Py_DECREF(sampleinfo);
-    dds_free(state->containers[i].usample);
+    readtake_release (state, 0);
+    return NULL;
   }
 
-  dds_free(state->containers);
-  dds_free(state->sample_infos);
+  for (i = 0; i < state->count; ++i)
+  {
+    // Sample i is handed over here: the buffer takes the serdata reference (also on failure)
+    // or the sample is copied and freed, so on failure only the samples after i remain.
+    PyObject *data;
+    if (state->loan && state->serdatas[i] != NULL)
+      data = ddspy_serdata_buffer_new(state->serdatas[i]);
+    else
+    {
+      data = PyBytes_FromStringAndSize(state->containers[i].usample, (Py_ssize_t)state->containers[i].usample_size);
+      dds_free(state->containers[i].usample);
+    }
+    if (data == NULL)
+      goto err;
 
-  return list;
+    PyObject *item = data;
+    if (!state->info_batch)
+    {
+      PyObject *info = get_sampleinfo_pyobject(&state->sample_infos[i]);
+      if (info == NULL)
+      {
+        Py_DECREF(data);
+        goto err;
+      }
+      item = PyTuple_Pack(2, data, info);
+      Py_DECREF(data);
+      Py_DECREF(info);
+      if (item == NULL)
+        goto err;
+    }
+    PyList_SET_ITEM(list, (Py_ssize_t)i, item); // steals ref
+  }
+
+  result = list;
+  if (state->info_batch)
+  {
+    PyObject *columns = get_sampleinfo_columns(state->sample_infos, state->count);
+    if (columns == NULL)
+    {
+      Py_DECREF(list);
+      readtake_release (state, state->count);
+      return NULL;
+    }
+    result = PyTuple_Pack(2, list, columns);
+    Py_DECREF(list);
+    Py_DECREF(columns);
+  }
+
+  readtake_release (state, state->count);
+  return result;
+
+err:
+  // The list owns the items before i, the remaining slots are still NULL which it handles
+  Py_DECREF(list);
+  readtake_release (state, i + 1);
+  return NULL;
 }
 
 dds_return_t collector_callback_fn(
@@ -1165,18 +1599,33 @@ dds_return_t collector_callback_fn(
     size_t new_capacity = state->capacity ? state->capacity * 2 : 8;
     
     void *new_containers = dds_realloc(state->containers, new_capacity * sizeof(ddspy_sample_container_t));
+    if (new_containers)
+      state->containers = new_containers;
     void *new_infos = dds_realloc(state->sample_infos, new_capacity * sizeof(dds_sample_info_t));
+    if (new_infos)
+      state->sample_infos = new_infos;
+    void *new_serdatas = NULL;
+    if (state->loan && (new_serdatas = dds_realloc(state->serdatas, new_capacity * sizeof(ddsi_serdata_t *))))
+      state->serdatas = new_serdatas;
 
-    if (!new_containers || !new_infos)
+    if (!new_containers || !new_infos || (state->loan && !new_serdatas))
       return DDS_RETCODE_OUT_OF_RESOURCES;
 
-    state->containers = new_containers;
-    state->sample_infos = new_infos;
     state->capacity = new_capacity;
   }
 
   bool ok;
-  if (info->valid_data)
+  if (state->loan)
+    state->serdatas[state->count] = NULL;
+  if (info->valid_data && state->loan)
+  {
+    // No copy at all: the Python side gets a buffer object holding this reference.
+    state->serdatas[state->count] = ddsi_serdata_ref (serdata);
+    state->containers[state->count].usample = NULL;
+    state->containers[state->count].usample_size = 0;
+    ok = true;
+  }
+  else if (info->valid_data)
     ok = ddsi_serdata_to_sample (serdata,  &state->containers[state->count], NULL, NULL);
   else
     ok = ddsi_serdata_untyped_to_sample (sertype, serdata, &state->containers[state->count], NULL, NULL);
@@ -1193,7 +1642,8 @@ static PyObject *ddspy_readtake (PyObject *args, dds_return_t (*readtake) (dds_e
   dds_entity_t reader;
   uint32_t mask;
   long long N;
-  if (!PyArg_ParseTuple (args, "iIL", &reader, &mask, &N))
+  int loan = 0, info_batch = 0;
+  if (!PyArg_ParseTuple (args, "iIL|pp", &reader, &mask, &N, &loan, &info_batch))
     return NULL;
 
   if (!(check_number_of_samples (N)))
@@ -1202,17 +1652,25 @@ static PyObject *ddspy_readtake (PyObject *args, dds_return_t (*readtake) (dds_e
   collector_state_t state = {
     .containers = NULL,
     .sample_infos = NULL,
+    .serdatas = NULL,
+    .loan = loan,
+    .info_batch = info_batch,
     .count = 0,
     .capacity = 0
   };
 
-  dds_return_t sts = readtake(
+  // The collector only copies into C-owned storage, the Python objects are
+  // constructed in readtake_post once the GIL has been reacquired.
+  dds_return_t sts;
+  Py_BEGIN_ALLOW_THREADS
+  sts = readtake(
     reader,
     (uint32_t)N,
     DDS_HANDLE_NIL,
     mask,
     collector_callback_fn,
     &state);
+  Py_END_ALLOW_THREADS
 
   return readtake_post((int32_t)sts, &state);
 }
@@ -1223,24 +1681,33 @@ static PyObject *ddspy_readtake_handle (PyObject *args, dds_return_t (*readtake)
   dds_entity_t reader;
   uint32_t mask;
   dds_instance_handle_t handle;
+  int loan = 0, info_batch = 0;
 
-  if (!PyArg_ParseTuple (args, "iILK", &reader, &mask, &N, &handle))
+  if (!PyArg_ParseTuple (args, "iILK|pp", &reader, &mask, &N, &handle, &loan, &info_batch))
     return NULL;
 
   collector_state_t state = {
     .containers = NULL,
     .sample_infos = NULL,
+    .serdatas = NULL,
+    .loan = loan,
+    .info_batch = info_batch,
     .count = 0,
     .capacity = 0
   };
 
-  dds_return_t sts = readtake(
+  // The collector only copies into C-owned storage, the Python objects are
+  // constructed in readtake_post once the GIL has been reacquired.
+  dds_return_t sts;
+  Py_BEGIN_ALLOW_THREADS
+  sts = readtake(
     reader,
     (uint32_t)N,
     handle,
     mask,
     collector_callback_fn,
     &state);
+  Py_END_ALLOW_THREADS
 
   return readtake_post((int32_t)sts, &state);
 }
@@ -1260,7 +1727,9 @@ static PyObject *ddspy_readtake_next (PyObject *args, dds_return_t (*readtake) (
 
   pt_container = &container;
 
+  Py_BEGIN_ALLOW_THREADS
   sts = readtake (reader, (void **) &pt_container, &info);
+  Py_END_ALLOW_THREADS
   if (sts < 0)
     return PyLong_FromLong ((long)sts);
 
@@ -1330,7 +1799,9 @@ static PyObject *ddspy_register_instance (PyObject *self, PyObject *args)
   handle = 0;
   container.usample_size = (size_t)sample_data.len;
 
+  Py_BEGIN_ALLOW_THREADS
   sts = dds_register_instance (writer, &handle, &container);
+  Py_END_ALLOW_THREADS
 
   PyBuffer_Release (&sample_data);
 
@@ -1355,7 +1826,9 @@ static PyObject *ddspy_unregister_instance (PyObject *self, PyObject *args)
   assert (sample_data.len >= 0);
   container.usample_size = (size_t)sample_data.len;
 
+  Py_BEGIN_ALLOW_THREADS
   sts = dds_unregister_instance (writer, &container);
+  Py_END_ALLOW_THREADS
 
   PyBuffer_Release (&sample_data);
   return PyLong_FromLong ((long)sts);
@@ -1371,7 +1844,9 @@ static PyObject *ddspy_unregister_instance_handle (PyObject *self, PyObject *arg
   if (!PyArg_ParseTuple (args, "iK", &writer, &handle))
     return NULL;
 
+  Py_BEGIN_ALLOW_THREADS
   sts = dds_unregister_instance_ih (writer, handle);
+  Py_END_ALLOW_THREADS
   return PyLong_FromLong ((long)sts);
 }
 
@@ -1391,7 +1866,9 @@ static PyObject *ddspy_unregister_instance_ts (PyObject *self, PyObject *args)
   assert (sample_data.len >= 0);
   container.usample_size = (size_t)sample_data.len;
 
+  Py_BEGIN_ALLOW_THREADS
   sts = dds_unregister_instance_ts (writer, &container, time);
+  Py_END_ALLOW_THREADS
 
   PyBuffer_Release (&sample_data);
   return PyLong_FromLong ((long)sts);
@@ -1408,7 +1885,9 @@ static PyObject *ddspy_unregister_instance_handle_ts (PyObject *self, PyObject *
   if (!PyArg_ParseTuple (args, "iKL", &writer, &handle, &time))
     return NULL;
 
+  Py_BEGIN_ALLOW_THREADS
   sts = dds_unregister_instance_ih_ts (writer, handle, time);
+  Py_END_ALLOW_THREADS
   return PyLong_FromLong ((long)sts);
 }
 
@@ -1427,7 +1906,9 @@ static PyObject *ddspy_lookup_instance (PyObject *self, PyObject *args)
   assert (sample_data.len >= 0);
   container.usample_size = (size_t)sample_data.len;
 
+  Py_BEGIN_ALLOW_THREADS
   sts = dds_lookup_instance (entity, &container);
+  Py_END_ALLOW_THREADS
 
   PyBuffer_Release (&sample_data);
   return PyLong_FromUnsignedLongLong ((unsigned long long)sts);
@@ -1480,62 +1961,331 @@ static PyObject *ddspy_calc_key (PyObject *self, PyObject *args)
   return returnv;
 }
 
-/* builtin topic */
-
-static PyObject *ddspy_readtake_participant (PyObject *self, PyObject *args, dds_return_t (*readtake) (dds_entity_t, void **, dds_sample_info_t *, size_t, uint32_t))
+static PyObject *ddspy_calc_keyhash (PyObject *self, PyObject *args)
 {
-  uint32_t Nu32;
-  long long N;
-  dds_entity_t reader;
-  dds_return_t sts;
-
-  PyObject *participant_constructor;
-  PyObject *cqos_to_qos;
+  Py_buffer sample_data;
+  dds_entity_t entity;
+  const struct ddsi_sertype *sertype;
+  struct ddsi_keyhash keyhash;
   (void)self;
 
-  if (!PyArg_ParseTuple (args, "iLOO", &reader, &N, &participant_constructor, &cqos_to_qos))
-    return NULL;
-  if (!(Nu32 = check_number_of_samples (N)))
+  if (!PyArg_ParseTuple (args, "iy*", &entity, &sample_data))
     return NULL;
 
-  dds_sample_info_t *info = dds_alloc (sizeof (*info) * Nu32);
-  struct dds_builtintopic_participant **rcontainer = dds_alloc (sizeof (*rcontainer) * Nu32);
-
-  for (uint32_t i = 0; i < Nu32; ++i)
-    rcontainer[i] = NULL;
-
-  sts = readtake (reader, (void **)rcontainer, info, Nu32, Nu32);
-  if (sts < 0)
-    return PyLong_FromLong ((long)sts);
+  dds_return_t ret = dds_get_entity_sertype (entity, &sertype);
+  if (ret != DDS_RETCODE_OK)
+  {
+    PyBuffer_Release (&sample_data);
+    return PyLong_FromLong ((long) ret);
+  }
 
-  PyObject *list = PyList_New (sts);
-  for (uint32_t i = 0; i < (uint32_t)sts; ++i)
+  ddsrt_iovec_t sample_cdr;
+  sample_cdr.iov_len = (ddsrt_iov_len_t)sample_data.len;
+  sample_cdr.iov_base = (void *)sample_data.buf;
+  ddsi_serdata_t *serdata = serdata_from_ser_iov (sertype, SDK_DATA, 1, &sample_cdr, sample_cdr.iov_len);
+  PyBuffer_Release (&sample_data);
+  if (serdata == NULL)
   {
-    PyObject *sampleinfo = get_sampleinfo_pyobject (&info[i]);
-    if (PyErr_Occurred ())
-      return NULL;
-    PyObject *qos_p = PyLong_FromVoidPtr (rcontainer[i]->qos);
-    if (PyErr_Occurred ())
-      return NULL;
-    PyObject *qos = PyObject_CallFunction (cqos_to_qos, "O", qos_p);
-    if (PyErr_Occurred ())
-      return NULL;
-    PyObject *item = PyObject_CallFunction (participant_constructor, "y#OO", rcontainer[i]->key.v, (Py_ssize_t) 16, qos, sampleinfo);
-    if (PyErr_Occurred ())
-      return NULL;
-    PyList_SetItem (list, i, item); // steals ref
-    Py_DECREF (sampleinfo);
-    Py_DECREF (qos_p);
-    Py_DECREF (qos);
+    PyErr_SetString (PyExc_ValueError, "Invalid sample.");
+    return NULL;
   }
 
-  dds_return_loan (reader, (void **)rcontainer, sts);
-  dds_free (info);
-  dds_free (rcontainer);
-  return list;
+  ddsi_serdata_get_keyhash (serdata, &keyhash, false);
+  ddsi_serdata_unref (serdata);
+  return PyBytes_FromStringAndSize ((const char *) keyhash.value, sizeof (keyhash.value));
 }
 
-static PyObject *ddspy_read_participant (PyObject *self, PyObject *args)
+static PyObject *ddspy_lookup_instance_keyhash (PyObject *self, PyObject *args)
+{
+  Py_buffer keyhash_data;
+  dds_entity_t entity;
+  const struct ddsi_sertype *sertype;
+  struct ddsi_keyhash keyhash;
+  dds_instance_handle_t sts = DDS_HANDLE_NIL;
+  (void)self;
+
+  if (!PyArg_ParseTuple (args, "iy*", &entity, &keyhash_data))
+    return NULL;
+  if (keyhash_data.len != (Py_ssize_t) sizeof (keyhash.value))
+  {
+    PyBuffer_Release (&keyhash_data);
+    PyErr_SetString (PyExc_ValueError, "A keyhash is 16 bytes.");
+    return NULL;
+  }
+  memcpy (keyhash.value, keyhash_data.buf, sizeof (keyhash.value));
+  PyBuffer_Release (&keyhash_data);
+
+  dds_return_t ret = dds_get_entity_sertype (entity, &sertype);
+  if (ret != DDS_RETCODE_OK)
+    return PyLong_FromLong ((long) ret);
+
+  // The key is only recoverable from keyhashes of small keys, MD5 keyhashes give no serdata
+  Py_BEGIN_ALLOW_THREADS
+  ddsi_serdata_t *serdata = ddsi_serdata_from_keyhash (sertype, &keyhash);
+  if (serdata != NULL)
+  {
+    ddspy_sample_container_t container = { NULL, 0 };
+    if (ddsi_serdata_to_sample (serdata, &container, NULL, NULL))
+      sts = dds_lookup_instance (entity, &container);
+    dds_free (container.usample);
+    ddsi_serdata_unref (serdata);
+  }
+  Py_END_ALLOW_THREADS
+
+  return PyLong_FromUnsignedLongLong ((unsigned long long) sts);
+}
+
+/* qos decoding */
+
+#define DDSPY_QOS_POLICIES 27
+
+static PyObject *ddspy_qos_data (bool (*qget) (const dds_qos_t *, void **, size_t *), const dds_qos_t *qos)
+{
+  void *value = NULL;
+  size_t sz = 0;
+  PyObject *data;
+
+  if (qget (qos, &value, &sz) && value != NULL && sz > 0)
+    data = PyBytes_FromStringAndSize (value, (Py_ssize_t) sz);
+  else
+    data = Py_NewRef (Py_None);
+  dds_free (value);
+  return data;
+}
+
+static PyObject *ddspy_qos_properties (const dds_qos_t *qos, bool binary)
+{
+  uint32_t n = 0;
+  char **names = NULL;
+
+  if (!(binary ? dds_qget_bpropnames (qos, &n, &names) : dds_qget_propnames (qos, &n, &names)))
+    Py_RETURN_NONE;
+
+  PyObject *props = PyTuple_New (n);
+  for (uint32_t i = 0; i < n; ++i)
+  {
+    if (props != NULL)
+    {
+      PyObject *prop = NULL;
+      bool propagate = false;
+      if (binary)
+      {
+        void *value = NULL;
+        size_t sz = 0;
+        if (dds_qget_bprop_propagate (qos, names[i], &value, &sz, &propagate))
+          prop = Py_BuildValue ("sy#O", names[i], value ? (const char *) value : "", (Py_ssize_t) sz, propagate ? Py_True : Py_False);
+        dds_free (value);
+      }
+      else
+      {
+        char *value = NULL;
+        if (dds_qget_prop_propagate (qos, names[i], &value, &propagate))
+          prop = Py_BuildValue ("ssO", names[i], value ? value : "", propagate ? Py_True : Py_False);
+        dds_free (value);
+      }
+      if (prop == NULL)
+      {
+        if (!PyErr_Occurred ())
+          PyErr_SetString (PyExc_Exception, "Internal QOS property structure is corrupt!");
+        Py_CLEAR (props);
+      }
+      else
+        PyTuple_SET_ITEM (props, i, prop);
+    }
+    dds_free (names[i]);
+  }
+  dds_free (names);
+  return props;
+}
+
+static PyObject *ddspy_qos_partition (const dds_qos_t *qos)
+{
+  uint32_t n = 0;
+  char **names = NULL;
+
+  if (!dds_qget_partition (qos, &n, &names))
+    Py_RETURN_NONE;
+
+  PyObject *partitions = n > 0 ? PyTuple_New (n) : Py_NewRef (Py_None);
+  for (uint32_t i = 0; i < n; ++i)
+  {
+    if (partitions != NULL)
+    {
+      PyObject *name = PyUnicode_FromString (names[i]);
+      if (name == NULL)
+        Py_CLEAR (partitions);
+      else
+        PyTuple_SET_ITEM (partitions, i, name);
+    }
+    dds_free (names[i]);
+  }
+  dds_free (names);
+  return partitions;
+}
+
+static PyObject *ddspy_qos_decode (const dds_qos_t *qos)
+{
+  /* One entry per policy in the order of _CQos._all_scopes, None where the policy is not set. The
+     entries only hold ints, bools, strings and bytes, so the tuple is hashable and the Python side
+     can intern the Qos objects built from it. */
+  PyObject *v[DDSPY_QOS_POLICIES];
+  dds_reliability_kind_t reliability;
+  dds_durability_kind_t durability;
+  dds_history_kind_t history, durservice_history;
+  dds_presentation_access_scope_kind_t access_scope;
+  dds_ownership_kind_t ownership;
+  dds_liveliness_kind_t liveliness;
+  dds_destination_order_kind_t destination_order;
+  dds_ignorelocal_kind_t ignorelocal;
+  dds_type_consistency_kind_t type_consistency;
+  dds_duration_t d0, d1;
+  int32_t i0, i1, i2, i3;
+  bool b0, b1, b2, b3, b4;
+  uint32_t n;
+  dds_data_representation_id_t *values;
+  char *name;
+
+#define ABSENT Py_NewRef (Py_None)
+  v[0] = dds_qget_reliability (qos, &reliability, &d0) ? Py_BuildValue ("iL", (int) reliability, (long long) d0) : ABSENT;
+  v[1] = dds_qget_durability (qos, &durability) ? PyLong_FromLong ((long) durability) : ABSENT;
+  v[2] = dds_qget_history (qos, &history, &i0) ? Py_BuildValue ("ii", (int) history, i0) : ABSENT;
+  v[3] = dds_qget_resource_limits (qos, &i0, &i1, &i2) ? Py_BuildValue ("iii", i0, i1, i2) : ABSENT;
+  v[4] = dds_qget_presentation (qos, &access_scope, &b0, &b1) ? Py_BuildValue ("iOO", (int) access_scope, b0 ? Py_True : Py_False, b1 ? Py_True : Py_False) : ABSENT;
+  v[5] = dds_qget_lifespan (qos, &d0) ? PyLong_FromLongLong (d0) : ABSENT;
+  v[6] = dds_qget_deadline (qos, &d0) ? PyLong_FromLongLong (d0) : ABSENT;
+  v[7] = dds_qget_latency_budget (qos, &d0) ? PyLong_FromLongLong (d0) : ABSENT;
+  v[8] = dds_qget_ownership (qos, &ownership) ? PyLong_FromLong ((long) ownership) : ABSENT;
+  v[9] = dds_qget_ownership_strength (qos, &i0) ? PyLong_FromLong ((long) i0) : ABSENT;
+  v[10] = dds_qget_liveliness (qos, &liveliness, &d0) ? Py_BuildValue ("iL", (int) liveliness, (long long) d0) : ABSENT;
+  v[11] = dds_qget_time_based_filter (qos, &d0) ? PyLong_FromLongLong (d0) : ABSENT;
+  v[12] = ddspy_qos_partition (qos);
+  v[13] = dds_qget_transport_priority (qos, &i0) ? PyLong_FromLong ((long) i0) : ABSENT;
+  v[14] = dds_qget_destination_order (qos, &destination_order) ? PyLong_FromLong ((long) destination_order) : ABSENT;
+  v[15] = dds_qget_writer_data_lifecycle (qos, &b0) ? PyBool_FromLong (b0) : ABSENT;
+  v[16] = dds_qget_reader_data_lifecycle (qos, &d0, &d1) ? Py_BuildValue ("LL", (long long) d0, (long long) d1) : ABSENT;
+  v[17] = dds_qget_durability_service (qos, &d0, &durservice_history, &i0, &i1, &i2, &i3)
+    ? Py_BuildValue ("Liiiii", (long long) d0, (int) durservice_history, i0, i1, i2, i3) : ABSENT;
+  v[18] = dds_qget_ignorelocal (qos, &ignorelocal) ? PyLong_FromLong ((long) ignorelocal) : ABSENT;
+  v[19] = ddspy_qos_data (dds_qget_userdata, qos);
+  v[20] = ddspy_qos_data (dds_qget_groupdata, qos);
+  v[21] = ddspy_qos_data (dds_qget_topicdata, qos);
+  v[22] = ddspy_qos_properties (qos, false);
+  v[23] = ddspy_qos_properties (qos, true);
+  v[24] = dds_qget_type_consistency (qos, &type_consistency, &b0, &b1, &b2, &b3, &b4)
+    ? Py_BuildValue ("iOOOOO", (int) type_consistency, b0 ? Py_True : Py_False, b1 ? Py_True : Py_False,
+                     b2 ? Py_True : Py_False, b3 ? Py_True : Py_False, b4 ? Py_True : Py_False) : ABSENT;
+
+  values = NULL;
+  if (dds_qget_data_representation (qos, &n, &values))
+  {
+    b0 = b1 = false;
+    for (uint32_t i = 0; i < n; ++i)
+    {
+      if (values[i] == DDS_DATA_REPRESENTATION_XCDR1)
+        b0 = true;
+      else if (values[i] == DDS_DATA_REPRESENTATION_XCDR2)
+        b1 = true;
+    }
+    v[25] = Py_BuildValue ("OO", b0 ? Py_True : Py_False, b1 ? Py_True : Py_False);
+  }
+  else
+    v[25] = ABSENT;
+  dds_free (values);
+
+  name = NULL;
+  v[26] = dds_qget_entity_name (qos, &name) && name != NULL ? PyUnicode_FromString (name) : ABSENT;
+  dds_free (name);
+#undef ABSENT
+
+  PyObject *decoded = PyTuple_New (DDSPY_QOS_POLICIES);
+  for (int i = 0; i < DDSPY_QOS_POLICIES; ++i)
+  {
+    if (v[i] == NULL || decoded == NULL)
+    {
+      Py_CLEAR (decoded);
+      Py_XDECREF (v[i]);
+    }
+    else
+      PyTuple_SET_ITEM (decoded, i, v[i]);
+  }
+  return decoded;
+}
+
+static PyObject *ddspy_qos_decode_pointer (PyObject *self, PyObject *args)
+{
+  PyObject *pointer;
+  (void)self;
+
+  if (!PyArg_ParseTuple (args, "O", &pointer))
+    return NULL;
+  const dds_qos_t *qos = PyLong_AsVoidPtr (pointer);
+  if (qos == NULL)
+  {
+    if (!PyErr_Occurred ())
+      PyErr_SetString (PyExc_ValueError, "Cannot decode a NULL qos.");
+    return NULL;
+  }
+  return ddspy_qos_decode (qos);
+}
+
+/* builtin topic */
+
+static PyObject *ddspy_readtake_participant (PyObject *self, PyObject *args, dds_return_t (*readtake) (dds_entity_t, void **, dds_sample_info_t *, size_t, uint32_t))
+{
+  uint32_t Nu32;
+  long long N;
+  dds_entity_t reader;
+  dds_return_t sts;
+
+  PyObject *participant_constructor;
+  PyObject *cqos_to_qos;
+  (void)self;
+
+  if (!PyArg_ParseTuple (args, "iLOO", &reader, &N, &participant_constructor, &cqos_to_qos))
+    return NULL;
+  if (!(Nu32 = check_number_of_samples (N)))
+    return NULL;
+
+  dds_sample_info_t *info = dds_alloc (sizeof (*info) * Nu32);
+  struct dds_builtintopic_participant **rcontainer = dds_alloc (sizeof (*rcontainer) * Nu32);
+
+  for (uint32_t i = 0; i < Nu32; ++i)
+    rcontainer[i] = NULL;
+
+  Py_BEGIN_ALLOW_THREADS
+  sts = readtake (reader, (void **)rcontainer, info, Nu32, Nu32);
+  Py_END_ALLOW_THREADS
+  if (sts < 0)
+    return PyLong_FromLong ((long)sts);
+
+  PyObject *list = PyList_New (sts);
+  for (uint32_t i = 0; i < (uint32_t)sts; ++i)
+  {
+    PyObject *sampleinfo = get_sampleinfo_pyobject (&info[i]);
+    if (PyErr_Occurred ())
+      return NULL;
+    PyObject *qos_decoded = ddspy_qos_decode (rcontainer[i]->qos);
+    if (PyErr_Occurred ())
+      return NULL;
+    PyObject *qos = PyObject_CallFunction (cqos_to_qos, "O", qos_decoded);
+    if (PyErr_Occurred ())
+      return NULL;
+    PyObject *item = PyObject_CallFunction (participant_constructor, "y#OO", rcontainer[i]->key.v, (Py_ssize_t) 16, qos, sampleinfo);
+    if (PyErr_Occurred ())
+      return NULL;
+    PyList_SetItem (list, i, item); // steals ref
+    Py_DECREF (sampleinfo);
+    Py_DECREF (qos_decoded);
+    Py_DECREF (qos);
+  }
+
+  dds_return_loan (reader, (void **)rcontainer, sts);
+  dds_free (info);
+  dds_free (rcontainer);
+  return list;
+}
+
+static PyObject *ddspy_read_participant (PyObject *self, PyObject *args)
 {
   return ddspy_readtake_participant (self, args, dds_read);
 }
@@ -1570,22 +2320,22 @@ static PyObject *ddspy_construct_endpoint (struct dds_builtintopic_endpoint *end
     Py_INCREF (type_id_bytes);
   }
 
-  PyObject *qos_p, *qos;
+  PyObject *qos_decoded, *qos;
   if (endpoint->qos != NULL)
   {
-    qos_p = PyLong_FromVoidPtr (endpoint->qos);
+    qos_decoded = ddspy_qos_decode (endpoint->qos);
     if (PyErr_Occurred ())
     {
       Py_DECREF (type_id_bytes);
       PyErr_Clear ();
-      PyErr_SetString (PyExc_Exception, "VoidPtr errored.");
+      PyErr_SetString (PyExc_Exception, "Qos decode errored.");
       return NULL;
     }
-    qos = PyObject_CallFunction (cqos_to_qos, "O", qos_p);
+    qos = PyObject_CallFunction (cqos_to_qos, "O", qos_decoded);
     if (PyErr_Occurred ())
     {
       Py_DECREF (type_id_bytes);
-      Py_DECREF (qos_p);
+      Py_DECREF (qos_decoded);
       PyErr_Clear ();
       PyErr_SetString (PyExc_Exception, "Callfunc cqos errored.");
       return NULL;
@@ -1595,7 +2345,7 @@ static PyObject *ddspy_construct_endpoint (struct dds_builtintopic_endpoint *end
   {
     Py_INCREF (Py_None);
     Py_INCREF (Py_None);
-    qos_p = Py_None;
+    qos_decoded = Py_None;
     qos = Py_None;
   }
 
@@ -1614,7 +2364,7 @@ static PyObject *ddspy_construct_endpoint (struct dds_builtintopic_endpoint *end
   if (PyErr_Occurred ())
   {
     Py_DECREF (type_id_bytes);
-    Py_DECREF (qos_p);
+    Py_DECREF (qos_decoded);
     Py_DECREF (qos);
     PyErr_Clear ();
     PyErr_SetString (PyExc_Exception, "Callfunc endpoint constructor errored.");
@@ -1622,7 +2372,7 @@ static PyObject *ddspy_construct_endpoint (struct dds_builtintopic_endpoint *end
   }
 
   Py_DECREF (type_id_bytes);
-  Py_DECREF (qos_p);
+  Py_DECREF (qos_decoded);
   Py_DECREF (qos);
   return item;
 }
@@ -1649,7 +2399,9 @@ static PyObject *ddspy_readtake_endpoint (PyObject *self, PyObject *args, dds_re
   for (uint32_t i = 0; i < Nu32; ++i)
     rcontainer[i] = NULL;
 
+  Py_BEGIN_ALLOW_THREADS
   sts = readtake (reader, (void **)rcontainer, info, Nu32, Nu32);
+  Py_END_ALLOW_THREADS
   if (sts < 0)
     return PyLong_FromLong ((long)sts);
 
@@ -1715,7 +2467,9 @@ static PyObject *ddspy_readtake_topic (PyObject *self, PyObject *args, dds_retur
   for (uint32_t i = 0; i < Nu32; ++i)
     rcontainer[i] = NULL;
 
+  Py_BEGIN_ALLOW_THREADS
   sts = readtake (reader, (void **)rcontainer, info, Nu32, Nu32);
+  Py_END_ALLOW_THREADS
   if (sts < 0)
     return PyLong_FromLong ((long)sts);
 
@@ -1755,17 +2509,17 @@ static PyObject *ddspy_readtake_topic (PyObject *self, PyObject *args, dds_retur
       return NULL;
     }
 
-    PyObject *qos_p, *qos;
+    PyObject *qos_decoded, *qos;
     if (rcontainer[i]->qos != NULL)
     {
-      qos_p = PyLong_FromVoidPtr (rcontainer[i]->qos);
+      qos_decoded = ddspy_qos_decode (rcontainer[i]->qos);
       if (PyErr_Occurred ())
       {
         PyErr_Clear ();
-        PyErr_SetString (PyExc_Exception, "VoidPtr errored.");
+        PyErr_SetString (PyExc_Exception, "Qos decode errored.");
         return NULL;
       }
-      qos = PyObject_CallFunction (cqos_to_qos, "O", qos_p);
+      qos = PyObject_CallFunction (cqos_to_qos, "O", qos_decoded);
       if (PyErr_Occurred ())
       {
         PyErr_Clear ();
@@ -1777,7 +2531,7 @@ static PyObject *ddspy_readtake_topic (PyObject *self, PyObject *args, dds_retur
     {
       Py_INCREF (Py_None);
       Py_INCREF (Py_None);
-      qos_p = Py_None;
+      qos_decoded = Py_None;
       qos = Py_None;
     }
 
@@ -1799,7 +2553,7 @@ static PyObject *ddspy_readtake_topic (PyObject *self, PyObject *args, dds_retur
     }
     PyList_SetItem (list, i, item); // steals ref
     Py_DECREF (sampleinfo);
-    Py_DECREF (qos_p);
+    Py_DECREF (qos_decoded);
     Py_DECREF (qos);
   }
 
@@ -1887,7 +2641,9 @@ ddspy_get_matched_subscription_data(PyObject *self, PyObject *args)
   if (!PyArg_ParseTuple(args, "iKOO", &writer, &handle, &endpoint_constructor, &cqos_to_qos))
     return NULL;
 
+  Py_BEGIN_ALLOW_THREADS
   endpoint = dds_get_matched_subscription_data(writer, handle);
+  Py_END_ALLOW_THREADS
   if (endpoint == NULL) {
     Py_INCREF(Py_None);
     return Py_None;
@@ -1913,7 +2669,9 @@ ddspy_get_matched_publication_data(PyObject *self, PyObject *args)
   if (!PyArg_ParseTuple(args, "iKOO", &reader, &handle, &endpoint_constructor, &cqos_to_qos))
     return NULL;
 
+  Py_BEGIN_ALLOW_THREADS
   endpoint = dds_get_matched_publication_data(reader, handle);
+  Py_END_ALLOW_THREADS
   if (endpoint == NULL) {
     Py_INCREF(Py_None);
     return Py_None;
@@ -2095,10 +2853,683 @@ static PyObject *ddspy_set_trace_sink(PyObject *self, PyObject *args)
 }
 
 
+/* Listener event queue
+
+   Listeners in queued mode have C callbacks that copy the entity, status kind and status into a
+   bounded multi-producer/multi-consumer ring (Vyukov's algorithm) and return, the DDS thread
+   never touches Python. Python threads take the events in batches. The mutex and condition
+   variable are only used to put takers to sleep, producers only take the mutex when a taker
+   is sleeping. Events that don't fit in the ring are counted and dropped. */
+
+typedef struct ddspy_listener_event {
+  dds_entity_t entity;
+  uint32_t kind;
+  uint32_t listener;
+  uint32_t pad;
+  union {
+    dds_inconsistent_topic_status_t inconsistent_topic;
+    dds_offered_deadline_missed_status_t offered_deadline_missed;
+    dds_requested_deadline_missed_status_t requested_deadline_missed;
+    dds_offered_incompatible_qos_status_t offered_incompatible_qos;
+    dds_requested_incompatible_qos_status_t requested_incompatible_qos;
+    dds_sample_lost_status_t sample_lost;
+    dds_sample_rejected_status_t sample_rejected;
+    dds_liveliness_lost_status_t liveliness_lost;
+    dds_liveliness_changed_status_t liveliness_changed;
+    dds_publication_matched_status_t publication_matched;
+    dds_subscription_matched_status_t subscription_matched;
+  } status;
+} ddspy_listener_event_t;
+
+typedef struct ddspy_listener_cell {
+  ddsrt_atomic_uint32_t seq;
+  ddspy_listener_event_t event;
+} ddspy_listener_cell_t;
+
+typedef struct ddspy_listener_queue {
+  ddsrt_atomic_uint32_t refc;
+  ddsrt_atomic_uint32_t head;
+  ddsrt_atomic_uint32_t tail;
+  ddsrt_atomic_uint32_t dropped;
+  ddsrt_atomic_uint32_t sleepers;
+  ddsrt_atomic_uint32_t closed;
+  ddsrt_mutex_t lock;
+  ddsrt_cond_t cond;
+  uint32_t mask;
+  ddspy_listener_cell_t cells[];
+} ddspy_listener_queue_t;
+
+/* The callback argument of a listener, one per Listener object */
+typedef struct ddspy_listener_tag {
+  ddspy_listener_queue_t *queue;
+  uint32_t listener;
+} ddspy_listener_tag_t;
+
+static void ddspy_listener_queue_unref (ddspy_listener_queue_t *queue)
+{
+  if (ddsrt_atomic_dec32_nv (&queue->refc) == 0)
+  {
+    ddsrt_cond_destroy (&queue->cond);
+    ddsrt_mutex_destroy (&queue->lock);
+    ddsrt_free (queue);
+  }
+}
+
+static bool ddspy_listener_queue_push (ddspy_listener_queue_t *queue, const ddspy_listener_event_t *event)
+{
+  ddspy_listener_cell_t *cell;
+  uint32_t pos = ddsrt_atomic_ld32 (&queue->head);
+  for (;;)
+  {
+    cell = &queue->cells[pos & queue->mask];
+    uint32_t seq = ddsrt_atomic_ld32 (&cell->seq);
+    ddsrt_atomic_fence_acq ();
+    int32_t dif = (int32_t) (seq - pos);
+    if (dif == 0)
+    {
+      if (ddsrt_atomic_cas32 (&queue->head, pos, pos + 1))
+        break;
+      pos = ddsrt_atomic_ld32 (&queue->head);
+    }
+    else if (dif < 0)
+      return false;
+    else
+      pos = ddsrt_atomic_ld32 (&queue->head);
+  }
+  cell->event = *event;
+  ddsrt_atomic_fence_rel ();
+  ddsrt_atomic_st32 (&cell->seq, pos + 1);
+  return true;
+}
+
+static bool ddspy_listener_queue_pop (ddspy_listener_queue_t *queue, ddspy_listener_event_t *event)
+{
+  ddspy_listener_cell_t *cell;
+  uint32_t pos = ddsrt_atomic_ld32 (&queue->tail);
+  for (;;)
+  {
+    cell = &queue->cells[pos & queue->mask];
+    uint32_t seq = ddsrt_atomic_ld32 (&cell->seq);
+    ddsrt_atomic_fence_acq ();
+    int32_t dif = (int32_t) (seq - (pos + 1));
+    if (dif == 0)
+    {
+      if (ddsrt_atomic_cas32 (&queue->tail, pos, pos + 1))
+        break;
+      pos = ddsrt_atomic_ld32 (&queue->tail);
+    }
+    else if (dif < 0)
+      return false;
+    else
+      pos = ddsrt_atomic_ld32 (&queue->tail);
+  }
+  *event = cell->event;
+  ddsrt_atomic_fence_rel ();
+  ddsrt_atomic_st32 (&cell->seq, pos + queue->mask + 1);
+  return true;
+}
+
+static void ddspy_listener_queue_post (void *arg, dds_entity_t entity, enum dds_status_id kind, const void *status, size_t size)
+{
+  const ddspy_listener_tag_t *tag = arg;
+  ddspy_listener_queue_t *queue = tag->queue;
+  ddspy_listener_event_t event;
+
+  if (ddsrt_atomic_ld32 (&queue->closed))
+    return;
+
+  memset (&event, 0, sizeof (event));
+  event.entity = entity;
+  event.kind = (uint32_t) kind;
+  event.listener = tag->listener;
+  if (size)
+    memcpy (&event.status, status, size);
+
+  if (!ddspy_listener_queue_push (queue, &event))
+  {
+    ddsrt_atomic_inc32 (&queue->dropped);
+    return;
+  }
+
+  /* Pairs with the fence in take: either the taker sees the event or we see the sleeper */
+  ddsrt_atomic_fence ();
+  if (ddsrt_atomic_ld32 (&queue->sleepers))
+  {
+    ddsrt_mutex_lock (&queue->lock);
+    ddsrt_cond_broadcast (&queue->cond);
+    ddsrt_mutex_unlock (&queue->lock);
+  }
+}
+
+#define DDSPY_LISTENER_QUEUE_CB(name_, id_) \
+  static void ddspy_listener_queue_on_##name_ (dds_entity_t entity, const dds_##name_##_status_t status, void *arg) \
+  { \
+    ddspy_listener_queue_post (arg, entity, id_, &status, sizeof (status)); \
+  }
+
+DDSPY_LISTENER_QUEUE_CB (inconsistent_topic, DDS_INCONSISTENT_TOPIC_STATUS_ID)
+DDSPY_LISTENER_QUEUE_CB (offered_deadline_missed, DDS_OFFERED_DEADLINE_MISSED_STATUS_ID)
+DDSPY_LISTENER_QUEUE_CB (requested_deadline_missed, DDS_REQUESTED_DEADLINE_MISSED_STATUS_ID)
+DDSPY_LISTENER_QUEUE_CB (offered_incompatible_qos, DDS_OFFERED_INCOMPATIBLE_QOS_STATUS_ID)
+DDSPY_LISTENER_QUEUE_CB (requested_incompatible_qos, DDS_REQUESTED_INCOMPATIBLE_QOS_STATUS_ID)
+DDSPY_LISTENER_QUEUE_CB (sample_lost, DDS_SAMPLE_LOST_STATUS_ID)
+DDSPY_LISTENER_QUEUE_CB (sample_rejected, DDS_SAMPLE_REJECTED_STATUS_ID)
+DDSPY_LISTENER_QUEUE_CB (liveliness_lost, DDS_LIVELINESS_LOST_STATUS_ID)
+DDSPY_LISTENER_QUEUE_CB (liveliness_changed, DDS_LIVELINESS_CHANGED_STATUS_ID)
+DDSPY_LISTENER_QUEUE_CB (publication_matched, DDS_PUBLICATION_MATCHED_STATUS_ID)
+DDSPY_LISTENER_QUEUE_CB (subscription_matched, DDS_SUBSCRIPTION_MATCHED_STATUS_ID)
+
+#undef DDSPY_LISTENER_QUEUE_CB
+
+static void ddspy_listener_queue_on_data_on_readers (dds_entity_t entity, void *arg)
+{
+  ddspy_listener_queue_post (arg, entity, DDS_DATA_ON_READERS_STATUS_ID, NULL, 0);
+}
+
+static void ddspy_listener_queue_on_data_available (dds_entity_t entity, void *arg)
+{
+  ddspy_listener_queue_post (arg, entity, DDS_DATA_AVAILABLE_STATUS_ID, NULL, 0);
+}
+
+static PyObject *ddspy_listener_queue_new (PyObject *self, PyObject *args)
+{
+  uint32_t capacity, size = 1;
+  ddspy_listener_queue_t *queue;
+  (void)self;
+
+  if (!PyArg_ParseTuple (args, "I", &capacity))
+    return NULL;
+  if (capacity == 0 || capacity > (1u << 24))
+  {
+    PyErr_SetString (PyExc_ValueError, "capacity must be between 1 and 2**24");
+    return NULL;
+  }
+  while (size < capacity)
+    size <<= 1;
+
+  queue = ddsrt_malloc (sizeof (*queue) + size * sizeof (queue->cells[0]));
+  ddsrt_atomic_st32 (&queue->refc, 1);
+  ddsrt_atomic_st32 (&queue->head, 0);
+  ddsrt_atomic_st32 (&queue->tail, 0);
+  ddsrt_atomic_st32 (&queue->dropped, 0);
+  ddsrt_atomic_st32 (&queue->sleepers, 0);
+  ddsrt_atomic_st32 (&queue->closed, 0);
+  ddsrt_mutex_init (&queue->lock);
+  ddsrt_cond_init (&queue->cond);
+  queue->mask = size - 1;
+  for (uint32_t i = 0; i < size; i++)
+    ddsrt_atomic_st32 (&queue->cells[i].seq, i);
+  ddsrt_atomic_fence ();
+
+  return PyLong_FromVoidPtr (queue);
+}
+
+static PyObject *ddspy_listener_queue_close (PyObject *self, PyObject *args)
+{
+  ddspy_listener_queue_t *queue;
+  unsigned long long ptr;
+  (void)self;
+
+  if (!PyArg_ParseTuple (args, "K", &ptr))
+    return NULL;
+  queue = (ddspy_listener_queue_t *) (uintptr_t) ptr;
+
+  ddsrt_mutex_lock (&queue->lock);
+  ddsrt_atomic_st32 (&queue->closed, 1);
+  ddsrt_cond_broadcast (&queue->cond);
+  ddsrt_mutex_unlock (&queue->lock);
+  Py_RETURN_NONE;
+}
+
+static PyObject *ddspy_listener_queue_release (PyObject *self, PyObject *args)
+{
+  unsigned long long ptr;
+  (void)self;
+
+  if (!PyArg_ParseTuple (args, "K", &ptr))
+    return NULL;
+  ddspy_listener_queue_unref ((ddspy_listener_queue_t *) (uintptr_t) ptr);
+  Py_RETURN_NONE;
+}
+
+static PyObject *ddspy_listener_queue_attach (PyObject *self, PyObject *args)
+{
+  ddspy_listener_tag_t *tag;
+  unsigned long long ptr;
+  uint32_t listener;
+  (void)self;
+
+  if (!PyArg_ParseTuple (args, "KI", &ptr, &listener))
+    return NULL;
+
+  tag = ddsrt_malloc (sizeof (*tag));
+  tag->queue = (ddspy_listener_queue_t *) (uintptr_t) ptr;
+  tag->listener = listener;
+  ddsrt_atomic_inc32 (&tag->queue->refc);
+  return PyLong_FromVoidPtr (tag);
+}
+
+static PyObject *ddspy_listener_queue_detach (PyObject *self, PyObject *args)
+{
+  ddspy_listener_tag_t *tag;
+  unsigned long long ptr;
+  (void)self;
+
+  if (!PyArg_ParseTuple (args, "K", &ptr))
+    return NULL;
+  tag = (ddspy_listener_tag_t *) (uintptr_t) ptr;
+  ddspy_listener_queue_unref (tag->queue);
+  ddsrt_free (tag);
+  Py_RETURN_NONE;
+}
+
+static PyObject *ddspy_listener_queue_enable (PyObject *self, PyObject *args)
+{
+  unsigned long long tagptr, listenerptr;
+  uint32_t kind;
+  int enable;
+  void *tag;
+  dds_listener_t *listener;
+  (void)self;
+
+  if (!PyArg_ParseTuple (args, "KKIp", &tagptr, &listenerptr, &kind, &enable))
+    return NULL;
+  tag = (void *) (uintptr_t) tagptr;
+  listener = (dds_listener_t *) (uintptr_t) listenerptr;
+
+#define DDSPY_LSET(name_) \
+  dds_lset_##name_##_arg (listener, enable ? ddspy_listener_queue_on_##name_ : 0, tag, false)
+  switch (kind)
+  {
+    case DDS_INCONSISTENT_TOPIC_STATUS_ID: DDSPY_LSET (inconsistent_topic); break;
+    case DDS_OFFERED_DEADLINE_MISSED_STATUS_ID: DDSPY_LSET (offered_deadline_missed); break;
+    case DDS_REQUESTED_DEADLINE_MISSED_STATUS_ID: DDSPY_LSET (requested_deadline_missed); break;
+    case DDS_OFFERED_INCOMPATIBLE_QOS_STATUS_ID: DDSPY_LSET (offered_incompatible_qos); break;
+    case DDS_REQUESTED_INCOMPATIBLE_QOS_STATUS_ID: DDSPY_LSET (requested_incompatible_qos); break;
+    case DDS_SAMPLE_LOST_STATUS_ID: DDSPY_LSET (sample_lost); break;
+    case DDS_SAMPLE_REJECTED_STATUS_ID: DDSPY_LSET (sample_rejected); break;
+    case DDS_DATA_ON_READERS_STATUS_ID: DDSPY_LSET (data_on_readers); break;
+    case DDS_DATA_AVAILABLE_STATUS_ID: DDSPY_LSET (data_available); break;
+    case DDS_LIVELINESS_LOST_STATUS_ID: DDSPY_LSET (liveliness_lost); break;
+    case DDS_LIVELINESS_CHANGED_STATUS_ID: DDSPY_LSET (liveliness_changed); break;
+    case DDS_PUBLICATION_MATCHED_STATUS_ID: DDSPY_LSET (publication_matched); break;
+    case DDS_SUBSCRIPTION_MATCHED_STATUS_ID: DDSPY_LSET (subscription_matched); break;
+    default:
+      PyErr_SetString (PyExc_ValueError, "invalid status kind");
+      return NULL;
+  }
+#undef DDSPY_LSET
+  Py_RETURN_NONE;
+}
+
+static uint32_t ddspy_listener_queue_drain (ddspy_listener_queue_t *queue, ddspy_listener_event_t *events, uint32_t max)
+{
+  uint32_t n = 0;
+  while (n < max && ddspy_listener_queue_pop (queue, &events[n]))
+    n++;
+  return n;
+}
+
+/* Returns (events, dropped, closed): the records of up to max events as bytes, the number of
+   events dropped since the previous call and whether the queue is closed and empty. Waits at
+   most timeout nanoseconds for the first event. */
+static PyObject *ddspy_listener_queue_take (PyObject *self, PyObject *args)
+{
+  ddspy_listener_queue_t *queue;
+  ddspy_listener_event_t *events;
+  unsigned long long ptr;
+  uint32_t max, n, dropped;
+  dds_duration_t timeout;
+  bool closed = false;
+  PyObject *data, *result;
+  (void)self;
+
+  if (!PyArg_ParseTuple (args, "KIL", &ptr, &max, &timeout))
+    return NULL;
+  queue = (ddspy_listener_queue_t *) (uintptr_t) ptr;
+  if (max == 0)
+    max = 1;
+  events = ddsrt_malloc (max * sizeof (*events));
+
+  Py_BEGIN_ALLOW_THREADS
+  n = ddspy_listener_queue_drain (queue, events, max);
+  if (n == 0 && timeout > 0)
+  {
+    const dds_time_t deadline = (timeout >= DDS_INFINITY) ? DDS_NEVER : dds_time () + timeout;
+    ddsrt_mutex_lock (&queue->lock);
+    ddsrt_atomic_inc32 (&queue->sleepers);
+    ddsrt_atomic_fence ();
+    while ((n = ddspy_listener_queue_drain (queue, events, max)) == 0 && !ddsrt_atomic_ld32 (&queue->closed))
+    {
+      const dds_time_t now = dds_time ();
+      if (now >= deadline)
+        break;
+      (void) ddsrt_cond_waitfor (&queue->cond, &queue->lock, (deadline == DDS_NEVER) ? DDS_INFINITY : deadline - now);
+    }
+    ddsrt_atomic_dec32 (&queue->sleepers);
+    ddsrt_mutex_unlock (&queue->lock);
+  }
+  if (n == 0 && ddsrt_atomic_ld32 (&queue->closed))
+    closed = true;
+  Py_END_ALLOW_THREADS
+
+  /* Events that were dropped are reported with the batch that follows them */
+  do {
+    dropped = ddsrt_atomic_ld32 (&queue->dropped);
+  } while (dropped && !ddsrt_atomic_cas32 (&queue->dropped, dropped, 0));
+
+  data = PyBytes_FromStringAndSize ((const char *) events, (Py_ssize_t) (n * sizeof (*events)));
+  ddsrt_free (events);
+  if (data == NULL)
+    return NULL;
+  result = Py_BuildValue ("(NIO)", data, dropped, closed ? Py_True : Py_False);
+  return result;
+}
+
+
+/* Content filters
+
+   A filter holds a program compiled by cyclonedds/idl/_filter.py and its constants, the
+   constants are replaced when the parameters of the filter change. Topic filters are
+   called from the receive threads, the lock allows replacing the constants while they
+   run.
+
+   The ContentFilter, the topics and the query filter slots that use a filter each hold a
+   reference, it is freed when the last one is dropped. The receive threads get the filter
+   of a topic from a holder that lives as long as the topic, so replacing it never frees a
+   filter that is still being evaluated. */
+
+typedef struct ddspy_filter {
+  ddsrt_atomic_uint32_t refc;
+  ddsrt_rwlock_t lock;
+  uint32_t *program;
+  size_t program_words;
+  unsigned char *constants;
+  size_t constants_size;
+} ddspy_filter_t;
+
+static bool ddspy_filter_eval_locked (ddspy_filter_t *filter, const void *data, size_t size)
+{
+  bool result;
+  ddsrt_rwlock_read (&filter->lock);
+  result = ddspy_cdrfilter_eval (filter->program, filter->program_words, filter->constants, filter->constants_size, data, size);
+  ddsrt_rwlock_unlock (&filter->lock);
+  return result;
+}
+
+static void ddspy_filter_unref (ddspy_filter_t *filter)
+{
+  if (ddsrt_atomic_dec32_nv (&filter->refc) == 0)
+  {
+    ddsrt_rwlock_destroy (&filter->lock);
+    ddsrt_free (filter->program);
+    ddsrt_free (filter->constants);
+    ddsrt_free (filter);
+  }
+}
+
+/* The filter argument of a topic, one per Topic object */
+typedef struct ddspy_topic_filter {
+  ddsrt_rwlock_t lock;
+  ddspy_filter_t *filter;
+} ddspy_topic_filter_t;
+
+static bool ddspy_topic_filter (const void *sample, void *arg)
+{
+  const ddspy_sample_container_t *container = sample;
+  ddspy_topic_filter_t *holder = arg;
+  bool result = true;
+  ddsrt_rwlock_read (&holder->lock);
+  if (holder->filter)
+    result = ddspy_filter_eval_locked (holder->filter, container->usample, container->usample_size);
+  ddsrt_rwlock_unlock (&holder->lock);
+  return result;
+}
+
+static void *ddspy_filter_copy (const Py_buffer *buffer)
+{
+  void *copy = ddsrt_malloc (buffer->len ? (size_t) buffer->len : 1);
+  memcpy (copy, buffer->buf, (size_t) buffer->len);
+  return copy;
+}
+
+static PyObject *ddspy_filter_new (PyObject *self, PyObject *args)
+{
+  Py_buffer program, constants;
+  ddspy_filter_t *filter;
+  (void)self;
+
+  if (!PyArg_ParseTuple (args, "y*y*", &program, &constants))
+    return NULL;
+
+  filter = ddsrt_malloc (sizeof (*filter));
+  ddsrt_atomic_st32 (&filter->refc, 1);
+  ddsrt_rwlock_init (&filter->lock);
+  filter->program_words = (size_t) program.len / sizeof (uint32_t);
+  filter->program = ddspy_filter_copy (&program);
+  filter->constants_size = (size_t) constants.len;
+  filter->constants = ddspy_filter_copy (&constants);
+  PyBuffer_Release (&program);
+  PyBuffer_Release (&constants);
+  return PyLong_FromVoidPtr (filter);
+}
+
+static PyObject *ddspy_filter_set_constants (PyObject *self, PyObject *args)
+{
+  unsigned long long ptr;
+  Py_buffer constants;
+  ddspy_filter_t *filter;
+  unsigned char *copy, *old;
+  (void)self;
+
+  if (!PyArg_ParseTuple (args, "Ky*", &ptr, &constants))
+    return NULL;
+  filter = (ddspy_filter_t *) (uintptr_t) ptr;
+  copy = ddspy_filter_copy (&constants);
+
+  Py_BEGIN_ALLOW_THREADS
+  ddsrt_rwlock_write (&filter->lock);
+  old = filter->constants;
+  filter->constants = copy;
+  filter->constants_size = (size_t) constants.len;
+  ddsrt_rwlock_unlock (&filter->lock);
+  Py_END_ALLOW_THREADS
+
+  ddsrt_free (old);
+  PyBuffer_Release (&constants);
+  Py_RETURN_NONE;
+}
+
+static PyObject *ddspy_filter_free (PyObject *self, PyObject *args)
+{
+  unsigned long long ptr;
+  ddspy_filter_t *filter;
+  (void)self;
+
+  if (!PyArg_ParseTuple (args, "K", &ptr))
+    return NULL;
+  filter = (ddspy_filter_t *) (uintptr_t) ptr;
+
+  /* Drops the reference of the ContentFilter, topics and query conditions keep their own */
+  ddspy_filter_unref (filter);
+  Py_RETURN_NONE;
+}
+
+static PyObject *ddspy_filter_eval (PyObject *self, PyObject *args)
+{
+  unsigned long long ptr;
+  Py_buffer data;
+  bool result;
+  (void)self;
+
+  if (!PyArg_ParseTuple (args, "Ky*", &ptr, &data))
+    return NULL;
+  result = ddspy_filter_eval_locked ((ddspy_filter_t *) (uintptr_t) ptr, data.buf, (size_t) data.len);
+  PyBuffer_Release (&data);
+  return PyBool_FromLong (result);
+}
+
+static PyObject *ddspy_topic_filter_new (PyObject *self, PyObject *args)
+{
+  ddspy_topic_filter_t *holder;
+  (void)self;
+  (void)args;
+
+  holder = ddsrt_malloc (sizeof (*holder));
+  ddsrt_rwlock_init (&holder->lock);
+  holder->filter = NULL;
+  return PyLong_FromVoidPtr (holder);
+}
+
+static PyObject *ddspy_topic_filter_free (PyObject *self, PyObject *args)
+{
+  unsigned long long ptr;
+  ddspy_topic_filter_t *holder;
+  (void)self;
+
+  if (!PyArg_ParseTuple (args, "K", &ptr))
+    return NULL;
+  holder = (ddspy_topic_filter_t *) (uintptr_t) ptr;
+
+  /* Only called once the topic is deleted, nothing evaluates its filter anymore */
+  if (holder->filter)
+    ddspy_filter_unref (holder->filter);
+  ddsrt_rwlock_destroy (&holder->lock);
+  ddsrt_free (holder);
+  Py_RETURN_NONE;
+}
+
+static PyObject *ddspy_topic_set_filter (PyObject *self, PyObject *args)
+{
+  dds_entity_t topic;
+  unsigned long long holder_ptr, ptr;
+  ddspy_topic_filter_t *holder;
+  ddspy_filter_t *filter, *old;
+  dds_return_t ret;
+  (void)self;
+
+  if (!PyArg_ParseTuple (args, "iKK", &topic, &holder_ptr, &ptr))
+    return NULL;
+  holder = (ddspy_topic_filter_t *) (uintptr_t) holder_ptr;
+  filter = (ddspy_filter_t *) (uintptr_t) ptr;
+
+  Py_BEGIN_ALLOW_THREADS
+  ret = dds_set_topic_filter_and_arg (topic, filter ? ddspy_topic_filter : 0, holder);
+  if (ret == DDS_RETCODE_OK)
+  {
+    if (filter)
+      ddsrt_atomic_inc32 (&filter->refc);
+    /* Receive threads evaluate with the read lock held, once the write lock is taken none of
+       them uses the old filter anymore */
+    ddsrt_rwlock_write (&holder->lock);
+    old = holder->filter;
+    holder->filter = filter;
+    ddsrt_rwlock_unlock (&holder->lock);
+    if (old)
+      ddspy_filter_unref (old);
+  }
+  Py_END_ALLOW_THREADS
+  return PyLong_FromLong ((long) ret);
+}
+
+/* Query condition filters
+
+   The filter function of a query condition gets no argument to carry a filter, so filters are
+   bound to a fixed set of functions through slots. Slots are only changed with the GIL held,
+   before the query condition is created and after it is deleted. A slot holds a reference to
+   its filter, so the filter outlives the query condition whatever order they are freed in. */
+
+#define DDSPY_QUERY_FILTER_SLOTS 64
+static ddspy_filter_t *ddspy_query_filters[DDSPY_QUERY_FILTER_SLOTS];
+
+#define DDSPY_QUERY_FILTER(name, slot) \
+  static bool ddspy_query_filter_##name (const void *sample) \
+  { \
+    const ddspy_sample_container_t *container = sample; \
+    return ddspy_filter_eval_locked (ddspy_query_filters[slot], container->usample, container->usample_size); \
+  }
+#define DDSPY_QUERY_FILTER8(a) \
+  DDSPY_QUERY_FILTER(a##_0, 8 * a + 0) DDSPY_QUERY_FILTER(a##_1, 8 * a + 1) \
+  DDSPY_QUERY_FILTER(a##_2, 8 * a + 2) DDSPY_QUERY_FILTER(a##_3, 8 * a + 3) \
+  DDSPY_QUERY_FILTER(a##_4, 8 * a + 4) DDSPY_QUERY_FILTER(a##_5, 8 * a + 5) \
+  DDSPY_QUERY_FILTER(a##_6, 8 * a + 6) DDSPY_QUERY_FILTER(a##_7, 8 * a + 7)
+#define DDSPY_QUERY_FILTER_REF8(a) \
+  ddspy_query_filter_##a##_0, ddspy_query_filter_##a##_1, ddspy_query_filter_##a##_2, ddspy_query_filter_##a##_3, \
+  ddspy_query_filter_##a##_4, ddspy_query_filter_##a##_5, ddspy_query_filter_##a##_6, ddspy_query_filter_##a##_7
+
+DDSPY_QUERY_FILTER8(0) DDSPY_QUERY_FILTER8(1) DDSPY_QUERY_FILTER8(2) DDSPY_QUERY_FILTER8(3)
+DDSPY_QUERY_FILTER8(4) DDSPY_QUERY_FILTER8(5) DDSPY_QUERY_FILTER8(6) DDSPY_QUERY_FILTER8(7)
+
+static dds_querycondition_filter_fn const ddspy_query_filter_fns[DDSPY_QUERY_FILTER_SLOTS] = {
+  DDSPY_QUERY_FILTER_REF8(0), DDSPY_QUERY_FILTER_REF8(1), DDSPY_QUERY_FILTER_REF8(2), DDSPY_QUERY_FILTER_REF8(3),
+  DDSPY_QUERY_FILTER_REF8(4), DDSPY_QUERY_FILTER_REF8(5), DDSPY_QUERY_FILTER_REF8(6), DDSPY_QUERY_FILTER_REF8(7)
+};
+
+static PyObject *ddspy_query_filter_acquire (PyObject *self, PyObject *args)
+{
+  unsigned long long ptr;
+  (void)self;
+
+  if (!PyArg_ParseTuple (args, "K", &ptr))
+    return NULL;
+  for (long slot = 0; slot < DDSPY_QUERY_FILTER_SLOTS; slot++)
+  {
+    if (ddspy_query_filters[slot] == NULL)
+    {
+      ddspy_query_filters[slot] = (ddspy_filter_t *) (uintptr_t) ptr;
+      ddsrt_atomic_inc32 (&ddspy_query_filters[slot]->refc);
+      return PyLong_FromLong (slot);
+    }
+  }
+  return PyLong_FromLong (-1);
+}
+
+static PyObject *ddspy_query_filter_release (PyObject *self, PyObject *args)
+{
+  int slot;
+  (void)self;
+
+  if (!PyArg_ParseTuple (args, "i", &slot))
+    return NULL;
+  if (slot < 0 || slot >= DDSPY_QUERY_FILTER_SLOTS)
+  {
+    PyErr_SetString (PyExc_ValueError, "Invalid query filter slot.");
+    return NULL;
+  }
+  if (ddspy_query_filters[slot])
+    ddspy_filter_unref (ddspy_query_filters[slot]);
+  ddspy_query_filters[slot] = NULL;
+  Py_RETURN_NONE;
+}
+
+static PyObject *ddspy_querycondition_create (PyObject *self, PyObject *args)
+{
+  dds_entity_t reader, condition;
+  uint32_t mask;
+  int slot;
+  (void)self;
+
+  if (!PyArg_ParseTuple (args, "iIi", &reader, &mask, &slot))
+    return NULL;
+  if (slot < 0 || slot >= DDSPY_QUERY_FILTER_SLOTS || ddspy_query_filters[slot] == NULL)
+  {
+    PyErr_SetString (PyExc_ValueError, "Invalid query filter slot.");
+    return NULL;
+  }
+
+  Py_BEGIN_ALLOW_THREADS
+  condition = dds_create_querycondition (reader, mask, ddspy_query_filter_fns[slot]);
+  Py_END_ALLOW_THREADS
+  return PyLong_FromLong ((long) condition);
+}
+
+
 char ddspy_docs[] = "DDSPY module";
 
 PyMethodDef ddspy_funcs[] = {
   { "ddspy_calc_key", (PyCFunction)ddspy_calc_key, METH_VARARGS, ddspy_docs },
+  { "ddspy_calc_keyhash", (PyCFunction)ddspy_calc_keyhash, METH_VARARGS, ddspy_docs },
+  { "ddspy_lookup_instance_keyhash", (PyCFunction)ddspy_lookup_instance_keyhash, METH_VARARGS, ddspy_docs },
   { "ddspy_topic_create", (PyCFunction)ddspy_topic_create, METH_VARARGS, ddspy_docs },
   { "ddspy_read", (PyCFunction)ddspy_read, METH_VARARGS, ddspy_docs },
   { "ddspy_take", (PyCFunction)ddspy_take, METH_VARARGS, ddspy_docs },
@@ -2106,6 +3537,7 @@ PyMethodDef ddspy_funcs[] = {
   { "ddspy_take_handle", (PyCFunction)ddspy_take_handle, METH_VARARGS, ddspy_docs },
   { "ddspy_write", (PyCFunction)ddspy_write, METH_VARARGS, ddspy_docs },
   { "ddspy_write_ts", (PyCFunction)ddspy_write_ts, METH_VARARGS, ddspy_docs },
+  { "ddspy_write_batch", (PyCFunction)ddspy_write_batch, METH_VARARGS, ddspy_docs },
   { "ddspy_writedispose", (PyCFunction)ddspy_writedispose, METH_VARARGS, ddspy_docs },
   { "ddspy_writedispose_ts", (PyCFunction)ddspy_writedispose_ts, METH_VARARGS, ddspy_docs },
   { "ddspy_dispose", (PyCFunction)ddspy_dispose, METH_VARARGS, ddspy_docs },
@@ -2129,10 +3561,28 @@ PyMethodDef ddspy_funcs[] = {
 #ifdef DDS_HAS_TYPE_DISCOVERY
   { "ddspy_get_typeobj", (PyCFunction)ddspy_get_typeobj, METH_VARARGS, ddspy_docs },
 #endif
+  { "ddspy_qos_decode", (PyCFunction)ddspy_qos_decode_pointer, METH_VARARGS, ddspy_docs },
   { "ddspy_get_matched_subscription_data", (PyCFunction)ddspy_get_matched_subscription_data, METH_VARARGS, ddspy_docs },
   { "ddspy_get_matched_publication_data", (PyCFunction)ddspy_get_matched_publication_data, METH_VARARGS, ddspy_docs },
   { "ddspy_set_log_sink", (PyCFunction)ddspy_set_log_sink, METH_VARARGS, ddspy_docs },
   { "ddspy_set_trace_sink", (PyCFunction)ddspy_set_trace_sink, METH_VARARGS, ddspy_docs },
+  { "ddspy_listener_queue_new", (PyCFunction)ddspy_listener_queue_new, METH_VARARGS, ddspy_docs },
+  { "ddspy_listener_queue_close", (PyCFunction)ddspy_listener_queue_close, METH_VARARGS, ddspy_docs },
+  { "ddspy_listener_queue_release", (PyCFunction)ddspy_listener_queue_release, METH_VARARGS, ddspy_docs },
+  { "ddspy_listener_queue_attach", (PyCFunction)ddspy_listener_queue_attach, METH_VARARGS, ddspy_docs },
+  { "ddspy_listener_queue_detach", (PyCFunction)ddspy_listener_queue_detach, METH_VARARGS, ddspy_docs },
+  { "ddspy_listener_queue_enable", (PyCFunction)ddspy_listener_queue_enable, METH_VARARGS, ddspy_docs },
+  { "ddspy_listener_queue_take", (PyCFunction)ddspy_listener_queue_take, METH_VARARGS, ddspy_docs },
+  { "ddspy_filter_new", (PyCFunction)ddspy_filter_new, METH_VARARGS, ddspy_docs },
+  { "ddspy_filter_set_constants", (PyCFunction)ddspy_filter_set_constants, METH_VARARGS, ddspy_docs },
+  { "ddspy_filter_free", (PyCFunction)ddspy_filter_free, METH_VARARGS, ddspy_docs },
+  { "ddspy_filter_eval", (PyCFunction)ddspy_filter_eval, METH_VARARGS, ddspy_docs },
+  { "ddspy_topic_filter_new", (PyCFunction)ddspy_topic_filter_new, METH_NOARGS, ddspy_docs },
+  { "ddspy_topic_filter_free", (PyCFunction)ddspy_topic_filter_free, METH_VARARGS, ddspy_docs },
+  { "ddspy_topic_set_filter", (PyCFunction)ddspy_topic_set_filter, METH_VARARGS, ddspy_docs },
+  { "ddspy_query_filter_acquire", (PyCFunction)ddspy_query_filter_acquire, METH_VARARGS, ddspy_docs },
+  { "ddspy_query_filter_release", (PyCFunction)ddspy_query_filter_release, METH_VARARGS, ddspy_docs },
+  { "ddspy_querycondition_create", (PyCFunction)ddspy_querycondition_create, METH_VARARGS, ddspy_docs },
   { NULL }
 };
 
@@ -2158,7 +3608,7 @@ PyMODINIT_FUNC PyInit__clayer (void)
     return NULL;
   if (import == NULL)
   {
-    PyObject *msg = PyUnicode_FromString ("Failed to import cyclonedds.internal to get SampleInfo cls.");
+    PyObject *msg = PyUnicode_FromString ("Failed to import cyclonedds.internal to get LogData cls.");
     PyObject *name = PyUnicode_FromString ("cyclonedds.internal");
     PyObject *path = PyUnicode_FromString ("cyclonedds.internal");
     PyErr_SetImportError (msg, name, path);
@@ -2168,14 +3618,13 @@ PyMODINIT_FUNC PyInit__clayer (void)
     return NULL;
   }
 
-  sampleinfo_descriptor = PyObject_GetAttrString (import, "SampleInfo");
   logdata_descriptor = PyObject_GetAttrString(import, "LogData");
 
   if (PyErr_Occurred ())
     return NULL;
-  if (sampleinfo_descriptor == NULL)
+  if (logdata_descriptor == NULL)
   {
-    PyObject *msg = PyUnicode_FromString ("Failed to import cyclonedds.internal to get SampleInfo cls.");
+    PyObject *msg = PyUnicode_FromString ("Failed to import cyclonedds.internal to get LogData cls.");
     PyObject *name = PyUnicode_FromString ("cyclonedds.internal");
     PyObject *path = PyUnicode_FromString ("cyclonedds.internal");
     PyErr_SetImportError (msg, name, path);
@@ -2186,8 +3635,18 @@ PyMODINIT_FUNC PyInit__clayer (void)
   }
   Py_DECREF (import);
 
+  if (PyType_Ready (&ddspy_serdata_buffer_type) < 0)
+    return NULL;
+  if (PyType_Ready (&ddspy_sampleinfo_type) < 0)
+    return NULL;
+
   PyObject *module = PyModule_Create (&_clayer_mod);
 
+  Py_INCREF (&ddspy_serdata_buffer_type);
+  PyModule_AddObject (module, "SerdataBuffer", (PyObject *) &ddspy_serdata_buffer_type);
+  Py_INCREF (&ddspy_sampleinfo_type);
+  PyModule_AddObject (module, "SampleInfo", (PyObject *) &ddspy_sampleinfo_type);
+
   PyModule_AddObject (module, "DDS_INFINITY", PyLong_FromLongLong (DDS_INFINITY));
   PyModule_AddObject (module, "UINT32_MAX", PyLong_FromUnsignedLong (UINT32_MAX));
   PyModule_AddObject (module, "DDS_DOMAIN_DEFAULT", PyLong_FromUnsignedLong (DDS_DOMAIN_DEFAULT));
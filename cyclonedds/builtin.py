@@ -11,14 +11,15 @@
 """
 
 import uuid
+import threading
 import ctypes as ct
 from dataclasses import dataclass
-from typing import Optional, Union, TYPE_CHECKING
+from typing import Any, Callable, Dict, List, Optional, Union, TYPE_CHECKING
 
-from .core import Entity, DDSException, Qos, ReadCondition, ViewState, InstanceState, SampleState
+from .core import Entity, DDSException, Qos, ReadCondition, ViewState, InstanceState, SampleState, WaitSetDispatcher
 from .topic import Topic
 from .sub import DataReader
-from .internal import dds_c_t
+from .internal import dds_c_t, feature_topic_discovery
 from .qos import _CQos
 from .builtin_types import DcpsParticipant, DcpsTopic, DcpsEndpoint, endpoint_constructor, participant_constructor, topic_constructor, cqos_to_qos
 
@@ -171,8 +172,250 @@ BuiltinTopicDcpsPublication = BuiltinTopic(_pseudo_handle + 3, DcpsEndpoint)
 BuiltinTopicDcpsSubscription = BuiltinTopic(_pseudo_handle + 4, DcpsEndpoint)
 """Built-in topic, is published to when a subscription happens."""
 
+
+class DiscoveryChange:
+    """DiscoveryChange constants passed to the subscribers of a :class:`DiscoveryGraph`. This class is
+    static and there should never be a need to instantiate it.
+
+    Attributes
+    ----------
+    Added: int
+        A participant, topic or endpoint was discovered.
+    Updated: int
+        The Qos of a known participant, topic or endpoint changed.
+    Removed: int
+        A participant, topic or endpoint was disposed or lost.
+    """
+
+    Added: int = 1
+    Updated: int = 2
+    Removed: int = 3
+
+
+class DiscoveryGraph:
+    """An incrementally updated view of the participants, topics and endpoints in a domain.
+
+    The graph owns the builtin readers of a participant and takes the new samples of the readers
+    whose condition triggered in a waitset, so an update costs as much as the discovery data that
+    arrived. Disposed and lost entities are removed again. The endpoints are indexed by participant,
+    topic name and type id, and subscribers are called with every change.
+
+    Attributes
+    ----------
+    participant: DomainParticipant
+        The participant the builtin readers belong to.
+    readers: List[BuiltinDataReader]
+        The builtin readers.
+    participants: Dict[uuid.UUID, DcpsParticipant]
+        The alive participants by key. This and the other dictionaries should not be modified.
+    topics: Dict[uuid.UUID, DcpsTopic]
+        The alive topics by key, only discovered when topic discovery is enabled.
+    publications: Dict[uuid.UUID, DcpsEndpoint]
+        The alive writers by key.
+    subscriptions: Dict[uuid.UUID, DcpsEndpoint]
+        The alive readers by key.
+    """
+
+    def __init__(self, domain_participant: "cyclonedds.domain.DomainParticipant",
+                 topic_discovery: Optional[bool] = None, max_batch: int = 256) -> None:
+        """
+        Parameters
+        ----------
+        domain_participant: DomainParticipant
+            The participant to create the builtin readers in.
+        topic_discovery: bool, optional
+            Whether to read the BuiltinTopicDcpsTopic topic, by default when CycloneDDS was built with it.
+        max_batch: int
+            The maximum number of samples taken from a builtin reader at once.
+        """
+        self.participant = domain_participant
+        self.participants: Dict[uuid.UUID, DcpsParticipant] = {}
+        self.topics: Dict[uuid.UUID, DcpsTopic] = {}
+        self.publications: Dict[uuid.UUID, DcpsEndpoint] = {}
+        self.subscriptions: Dict[uuid.UUID, DcpsEndpoint] = {}
+
+        # The indices map to the entities by key, in the order they were discovered
+        self._by_participant: Dict[uuid.UUID, Dict[uuid.UUID, DcpsEndpoint]] = {}
+        self._by_topic_name: Dict[str, Dict[uuid.UUID, DcpsEndpoint]] = {}
+        self._by_type_id: Dict[TypeIdentifier, Dict[uuid.UUID, DcpsEndpoint]] = {}
+        self._topics_by_name: Dict[str, Dict[uuid.UUID, DcpsTopic]] = {}
+        self._subscribers: List[Callable[[int, BuiltinTopic, Any], None]] = []
+        self._lock = threading.RLock()
+        self._changes = 0
+
+        if topic_discovery is None:
+            topic_discovery = bool(feature_topic_discovery)
+
+        tables = [
+            (BuiltinTopicDcpsParticipant, self.participants),
+            (BuiltinTopicDcpsPublication, self.publications),
+            (BuiltinTopicDcpsSubscription, self.subscriptions)
+        ]
+        if topic_discovery:
+            tables.append((BuiltinTopicDcpsTopic, self.topics))
+
+        self._dispatcher = WaitSetDispatcher(domain_participant, max_batch=max_batch)
+        self.readers: List[BuiltinDataReader] = []
+        for builtin_topic, table in tables:
+            reader = BuiltinDataReader(domain_participant, builtin_topic)
+            condition = ReadCondition(reader, SampleState.NotRead | ViewState.Any | InstanceState.Any)
+            self._dispatcher.add(condition, self._make_handler(builtin_topic, table))
+            self.readers.append(reader)
+
+    def _make_handler(self, builtin_topic: BuiltinTopic, table: Dict[uuid.UUID, Any]) -> Callable[[list], None]:
+        is_endpoint = builtin_topic is BuiltinTopicDcpsPublication or builtin_topic is BuiltinTopicDcpsSubscription
+        is_topic = builtin_topic is BuiltinTopicDcpsTopic
+
+        def handler(samples):
+            with self._lock:
+                for sample in samples:
+                    old = table.get(sample.key)
+                    if sample.sample_info.instance_state != InstanceState.Alive:
+                        if old is None:
+                            continue
+                        del table[sample.key]
+                        change, sample = DiscoveryChange.Removed, old
+                    elif not sample.sample_info.valid_data:
+                        continue
+                    else:
+                        table[sample.key] = sample
+                        change = DiscoveryChange.Added if old is None else DiscoveryChange.Updated
+
+                    if old is not None:
+                        if is_endpoint:
+                            self._unindex_endpoint(old)
+                        elif is_topic:
+                            _unindex(self._topics_by_name, old.topic_name, old.key)
+                    if change != DiscoveryChange.Removed:
+                        if is_endpoint:
+                            self._index_endpoint(sample)
+                        elif is_topic:
+                            self._topics_by_name.setdefault(sample.topic_name, {})[sample.key] = sample
+
+                    self._changes += 1
+                    for subscriber in self._subscribers:
+                        subscriber(change, builtin_topic, sample)
+
+        return handler
+
+    def _index_endpoint(self, endpoint: DcpsEndpoint) -> None:
+        self._by_participant.setdefault(endpoint.participant_key, {})[endpoint.key] = endpoint
+        self._by_topic_name.setdefault(endpoint.topic_name, {})[endpoint.key] = endpoint
+        if endpoint.type_id is not None:
+            self._by_type_id.setdefault(endpoint.type_id, {})[endpoint.key] = endpoint
+
+    def _unindex_endpoint(self, endpoint: DcpsEndpoint) -> None:
+        _unindex(self._by_participant, endpoint.participant_key, endpoint.key)
+        _unindex(self._by_topic_name, endpoint.topic_name, endpoint.key)
+        if endpoint.type_id is not None:
+            _unindex(self._by_type_id, endpoint.type_id, endpoint.key)
+
+    def update(self, timeout: int = 0) -> int:
+        """Wait for discovery data and apply all of it that arrived.
+
+        Parameters
+        ----------
+        timeout: int
+            The maximum number of nanoseconds to wait for discovery data.
+
+        Returns
+        -------
+        int
+            The number of changes applied to the graph, 0 when a timeout occurred.
+        """
+        self._changes = 0
+        self._dispatcher.dispatch(timeout)
+        return self._changes
+
+    def run(self, timeout: Optional[int] = None) -> None:
+        """Update the graph until :meth:`stop` is called, or until no discovery data arrived within timeout.
+
+        Parameters
+        ----------
+        timeout: int, Optional = None
+            Maximum number of nanoseconds to wait for discovery data. By default this is infinity.
+        """
+        self._dispatcher.run(timeout)
+
+    def stop(self) -> None:
+        """Make :meth:`run` return, this can be called from a subscriber or another thread."""
+        self._dispatcher.stop()
+
+    def subscribe(self, subscriber: Callable[[int, BuiltinTopic, Any], None]) -> None:
+        """Call subscriber with every change to the graph, with the :class:`DiscoveryChange`, the builtin
+        topic and the sample. For removals that is the last sample of the entity. Subscribers are called
+        while the graph is locked, they can query the graph but should not block.
+        """
+        with self._lock:
+            self._subscribers.append(subscriber)
+
+    def unsubscribe(self, subscriber: Callable[[int, BuiltinTopic, Any], None]) -> None:
+        """Stop calling a subscriber, it is a no-op if it was not subscribed."""
+        with self._lock:
+            if subscriber in self._subscribers:
+                self._subscribers.remove(subscriber)
+
+    def endpoints(self, participant_key: Optional[uuid.UUID] = None, topic_name: Optional[str] = None,
+                  type_id: Optional[TypeIdentifier] = None) -> List[DcpsEndpoint]:
+        """The alive writers and readers that match all of the given criteria, in discovery order.
+
+        Parameters
+        ----------
+        participant_key: uuid.UUID, optional
+            Only endpoints of this participant.
+        topic_name: str, optional
+            Only endpoints of this topic.
+        type_id: TypeIdentifier, optional
+            Only endpoints of this type.
+
+        Returns
+        -------
+        List[DcpsEndpoint]
+            The writers followed by the readers.
+        """
+        with self._lock:
+            indexed = [
+                index.get(value, {}) for index, value in (
+                    (self._by_participant, participant_key),
+                    (self._by_topic_name, topic_name),
+                    (self._by_type_id, type_id)
+                ) if value is not None
+            ]
+            if not indexed:
+                return list(self.publications.values()) + list(self.subscriptions.values())
+
+            smallest = min(indexed, key=len)
+            matches = [e for k, e in smallest.items() if all(k in index for index in indexed)]
+            return [e for e in matches if e.key in self.publications] + \
+                [e for e in matches if e.key not in self.publications]
+
+    def topics_named(self, topic_name: str) -> List[DcpsTopic]:
+        """The alive topics with a name, there is one per type when they are created with different types."""
+        with self._lock:
+            return list(self._topics_by_name.get(topic_name, {}).values())
+
+    def topic_names(self) -> List[str]:
+        """The names of all topics with endpoints or discovered topics, sorted."""
+        with self._lock:
+            return sorted(self._by_topic_name.keys() | self._topics_by_name.keys())
+
+    def type_ids(self) -> List[TypeIdentifier]:
+        """The type ids of all endpoints that have one."""
+        with self._lock:
+            return list(self._by_type_id)
+
+
+def _unindex(index: Dict[Any, Dict[uuid.UUID, Any]], value: Any, key: uuid.UUID) -> None:
+    entities = index.get(value)
+    if entities is not None:
+        entities.pop(key, None)
+        if not entities:
+            del index[value]
+
+
 __all__ = [
     "DcpsParticipant", "DcpsEndpoint", "BuiltinDataReader",
     "BuiltinTopicDcpsParticipant", "BuiltinTopicDcpsTopic",
-    "BuiltinTopicDcpsPublication", "BuiltinTopicDcpsSubscription"
+    "BuiltinTopicDcpsPublication", "BuiltinTopicDcpsSubscription",
+    "DiscoveryChange", "DiscoveryGraph"
 ]
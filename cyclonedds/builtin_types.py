@@ -11,12 +11,11 @@
 """
 
 import uuid
-import ctypes as ct
 from dataclasses import dataclass
+from functools import lru_cache
 from typing import Optional, Union, TYPE_CHECKING
 
 from .core import Qos
-from .internal import dds_c_t
 from .qos import _CQos
 
 from cyclonedds.idl._typesupport.DDS.XTypes import TypeIdentifier
@@ -97,9 +96,11 @@ class DcpsEndpoint:
     type_id: Optional[TypeIdentifier]
 
 
-def cqos_to_qos(pointer):
-    p = ct.cast(pointer, dds_c_t.qos_p)
-    return _CQos.cqos_to_qos(p)
+@lru_cache(maxsize=4096)
+def cqos_to_qos(decoded):
+    # The builtin topic readers pass the qos decoded by ddspy_qos_decode. Most endpoints share a handful
+    # of qos profiles and Qos objects are immutable, so identical ones are interned here.
+    return _CQos.decoded_to_qos(decoded)
 
 def participant_constructor(keybytes, qosobject, sampleinfo):
     s = DcpsParticipant(uuid.UUID(bytes=keybytes), qos=qosobject)
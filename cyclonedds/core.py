@@ -15,12 +15,19 @@ import uuid
 import asyncio
 import concurrent
 import ctypes as ct
+import itertools
+import threading
+import traceback
 from weakref import WeakValueDictionary
-from typing import Any, Callable, Dict, Optional, List, TYPE_CHECKING
+from typing import Any, Callable, Dict, Optional, List, Sequence, TYPE_CHECKING, Union
 from datetime import datetime, time, timedelta
 
 from .internal import c_call, c_callable, dds_infinity, dds_c_t, DDS, stat_keyvalue, stat_kind
 from .qos import Qos, Policy, _CQos
+from .idl._extract import MemberExtractor
+from ._clayer import ddspy_listener_queue_new, ddspy_listener_queue_close, ddspy_listener_queue_release, \
+    ddspy_listener_queue_attach, ddspy_listener_queue_detach, ddspy_listener_queue_enable, ddspy_listener_queue_take, \
+    ddspy_query_filter_acquire, ddspy_query_filter_release, ddspy_querycondition_create
 
 
 if TYPE_CHECKING:
@@ -499,10 +506,12 @@ class Entity(DDS):
             ref = self._listener._ref
         else:
             ref = None
-            self._listener = None
 
         ret = self._set_listener(self._ref, ref)
         if ret == 0:
+            if listener is None:
+                # Only once the entity no longer uses it, dropping the listener may free its dispatch tag
+                self._listener = None
             return
         raise DDSException(ret, f"Occurred when setting the Listener for {repr(self)}")
 
@@ -812,15 +821,19 @@ def _is_override(func):
 class Listener(DDS):
     """Listeners are callback containers for entities."""
 
-    def __init__(self, **kwargs):
+    def __init__(self, dispatcher: Optional["ListenerDispatcher"] = None, **kwargs):
         """Create a Listener object. The initializer takes override function lambdas.
 
-        Please note that all listener callbacks are dispatched synchronously from DDS receive thread(s). You can get away with doing
-        tiny amounts of processing in these callback methods, but aquiring the Python GIL from the DDS receive thread will severely
-        hurt your DDS performance. Furthermore, deleting entities or writing data inside listener callbacks can get you into deadlocks.
+        Please note that by default all listener callbacks are dispatched synchronously from DDS receive thread(s). You can get
+        away with doing tiny amounts of processing in these callback methods, but aquiring the Python GIL from the DDS receive
+        thread will severely hurt your DDS performance. Furthermore, deleting entities or writing data inside listener
+        callbacks can get you into deadlocks. Pass a :class:`ListenerDispatcher` to have the callbacks called from its
+        threads instead.
 
         Parameters
         ----------
+        dispatcher : ListenerDispatcher, optional
+            Queue the events in C and call the callbacks from the threads of this dispatcher.
         on_data_available : Callable
             Set on_data_available callback.
         on_inconsistent_topic : Callable
@@ -850,6 +863,10 @@ class Listener(DDS):
         """
         super().__init__(self._create_listener(None))
         self._set_functors = {}
+        self._dispatcher = dispatcher
+        self._dispatch_tag = None
+        # Tags of a previous dispatcher, an entity may still use them until this listener is deleted
+        self._retired_dispatch_tags = []
 
         if _is_override(self.on_data_available):
             self.set_on_data_available(self.on_data_available)
@@ -934,22 +951,45 @@ class Listener(DDS):
 
     def __del__(self):
         self._delete_listener(self._ref)
+        if self._dispatch_tag is not None:
+            self._dispatcher._detach(self)
+        for tag in getattr(self, "_retired_dispatch_tags", ()):
+            ddspy_listener_queue_detach(tag)
 
     def reset(self) -> None:
         self._reset_listener(self._ref)
 
     def copy(self) -> "Listener":
-        listener = Listener(**self._set_functors)
+        listener = Listener(dispatcher=self._dispatcher, **self._set_functors)
         return listener
 
+    def _dispatch(self, status: int, enable: bool) -> bool:
+        # Listeners with a dispatcher have native callbacks that queue the event
+        if self._dispatcher is None:
+            return False
+        self._dispatcher._enable(self, status, enable)
+        return True
+
     def copy_to(self, listener: "Listener") -> None:
+        if self._dispatcher is not None and listener._dispatcher is not self._dispatcher:
+            listener._set_dispatcher(self._dispatcher)
         for name, functor in self._set_functors.items():
             listener.setters[name](functor)
 
+    def _set_dispatcher(self, dispatcher: "ListenerDispatcher") -> None:
+        # The callbacks that are set already are installed again to queue on the new dispatcher
+        if self._dispatch_tag is not None:
+            self._retired_dispatch_tags.append(self._dispatch_tag)
+        self._dispatcher = dispatcher
+        self._dispatch_tag = None
+        for name, functor in list(self._set_functors.items()):
+            self.setters[name](functor)
+
     def merge(self, listener: "Listener") -> None:
         """
         Copies any configured (non-default) callbacks from the given `listener` to self, replacing existing callbacks
-        already configured on this listener.
+        already configured on this listener. If the given `listener` has a dispatcher all callbacks of self are
+        dispatched by it from then on.
         """
         listener.copy_to(self)
 
@@ -965,10 +1005,13 @@ class Listener(DDS):
     ):
         self.on_inconsistent_topic = callable
         if callable is None:
-            self._set_inconsistent_topic(self._ref, None)
+            if not self._dispatch(DDSStatus.InconsistentTopic, False):
+                self._set_inconsistent_topic(self._ref, None)
             del self._set_functors["on_inconsistent_topic"]
         else:
             self._set_functors["on_inconsistent_topic"] = self.on_inconsistent_topic
+            if self._dispatch(DDSStatus.InconsistentTopic, True):
+                return
 
             def call(topic, status, arg):
                 self.on_inconsistent_topic(Entity.get_entity(topic), status)
@@ -984,10 +1027,13 @@ class Listener(DDS):
     ):
         self.on_data_available = callable
         if callable is None:
-            self._set_data_available(self._ref, None)
+            if not self._dispatch(DDSStatus.DataAvailable, False):
+                self._set_data_available(self._ref, None)
             del self._set_functors["on_data_available"]
         else:
             self._set_functors["on_data_available"] = self.on_data_available
+            if self._dispatch(DDSStatus.DataAvailable, True):
+                return
 
             def call(reader, arg):
                 self.on_data_available(Entity.get_entity(reader))
@@ -1010,10 +1056,13 @@ class Listener(DDS):
     ):
         self.on_liveliness_lost = callable
         if callable is None:
-            self._set_liveliness_lost(self._ref, None)
+            if not self._dispatch(DDSStatus.LivelinessLost, False):
+                self._set_liveliness_lost(self._ref, None)
             del self._set_functors["on_liveliness_lost"]
         else:
             self._set_functors["on_liveliness_lost"] = self.on_liveliness_lost
+            if self._dispatch(DDSStatus.LivelinessLost, True):
+                return
 
             def call(writer, status, arg):
                 self.on_liveliness_lost(Entity.get_entity(writer), status)
@@ -1036,10 +1085,13 @@ class Listener(DDS):
     ):
         self.on_liveliness_changed = callable
         if callable is None:
-            self._set_liveliness_changed(self._ref, None)
+            if not self._dispatch(DDSStatus.LivelinessChanged, False):
+                self._set_liveliness_changed(self._ref, None)
             del self._set_functors["on_liveliness_changed"]
         else:
             self._set_functors["on_liveliness_changed"] = self.on_liveliness_changed
+            if self._dispatch(DDSStatus.LivelinessChanged, True):
+                return
 
             def call(reader, status, arg):
                 self.on_liveliness_changed(Entity.get_entity(reader), status)
@@ -1062,12 +1114,15 @@ class Listener(DDS):
     ):
         self.on_offered_deadline_missed = callable
         if callable is None:
-            self._set_on_offered_deadline_missed(self._ref, None)
+            if not self._dispatch(DDSStatus.OfferedDeadlineMissed, False):
+                self._set_on_offered_deadline_missed(self._ref, None)
             del self._set_functors["on_offered_deadline_missed"]
         else:
             self._set_functors[
                 "on_offered_deadline_missed"
             ] = self.on_offered_deadline_missed
+            if self._dispatch(DDSStatus.OfferedDeadlineMissed, True):
+                return
 
             def call(writer, status, arg):
                 self.on_offered_deadline_missed(Entity.get_entity(writer), status)
@@ -1092,12 +1147,15 @@ class Listener(DDS):
     ):
         self.on_offered_incompatible_qos = callable
         if callable is None:
-            self._set_on_offered_incompatible_qos(self._ref, None)
+            if not self._dispatch(DDSStatus.OfferedIncompatibleQos, False):
+                self._set_on_offered_incompatible_qos(self._ref, None)
             del self._set_functors["on_offered_incompatible_qos"]
         else:
             self._set_functors[
                 "on_offered_incompatible_qos"
             ] = self.on_offered_incompatible_qos
+            if self._dispatch(DDSStatus.OfferedIncompatibleQos, True):
+                return
 
             def call(writer, status, arg):
                 self.on_offered_incompatible_qos(Entity.get_entity(writer), status)
@@ -1115,10 +1173,13 @@ class Listener(DDS):
     ):
         self.on_data_on_readers = callable
         if callable is None:
-            self._set_data_available(self._ref, None)
+            if not self._dispatch(DDSStatus.DataOnReaders, False):
+                self._set_data_available(self._ref, None)
             del self._set_functors["on_data_on_readers"]
         else:
             self._set_functors["on_data_on_readers"] = self.on_data_on_readers
+            if self._dispatch(DDSStatus.DataOnReaders, True):
+                return
 
             def call(subscriber, arg):
                 self.on_data_on_readers(Entity.get_entity(subscriber))
@@ -1139,10 +1200,13 @@ class Listener(DDS):
     ):
         self.on_sample_lost = callable
         if callable is None:
-            self._set_on_sample_lost(self._ref, None)
+            if not self._dispatch(DDSStatus.SampleLost, False):
+                self._set_on_sample_lost(self._ref, None)
             del self._set_functors["on_sample_lost"]
         else:
             self._set_functors["on_sample_lost"] = self.on_sample_lost
+            if self._dispatch(DDSStatus.SampleLost, True):
+                return
 
             def call(writer, status, arg):
                 self.on_sample_lost(Entity.get_entity(writer), status)
@@ -1165,10 +1229,13 @@ class Listener(DDS):
     ):
         self.on_sample_rejected = callable
         if callable is None:
-            self._set_on_sample_rejected(self._ref, None)
+            if not self._dispatch(DDSStatus.SampleRejected, False):
+                self._set_on_sample_rejected(self._ref, None)
             del self._set_functors["on_sample_rejected"]
         else:
             self._set_functors["on_sample_rejected"] = self.on_sample_rejected
+            if self._dispatch(DDSStatus.SampleRejected, True):
+                return
 
             def call(writer, status, arg):
                 self.on_sample_rejected(Entity.get_entity(writer), status)
@@ -1192,12 +1259,15 @@ class Listener(DDS):
     ):
         self.on_requested_deadline_missed = callable
         if callable is None:
-            self._set_on_requested_deadline_missed(self._ref, None)
+            if not self._dispatch(DDSStatus.RequestedDeadlineMissed, False):
+                self._set_on_requested_deadline_missed(self._ref, None)
             del self._set_functors["on_requested_deadline_missed"]
         else:
             self._set_functors[
                 "on_requested_deadline_missed"
             ] = self.on_requested_deadline_missed
+            if self._dispatch(DDSStatus.RequestedDeadlineMissed, True):
+                return
 
             def call(reader, status, arg):
                 self.on_requested_deadline_missed(Entity.get_entity(reader), status)
@@ -1223,12 +1293,15 @@ class Listener(DDS):
     ):
         self.on_requested_incompatible_qos = callable
         if callable is None:
-            self._set_on_requested_incompatible_qos(self._ref, None)
+            if not self._dispatch(DDSStatus.RequestedIncompatibleQos, False):
+                self._set_on_requested_incompatible_qos(self._ref, None)
             del self._set_functors["on_requested_incompatible_qos"]
         else:
             self._set_functors[
                 "on_requested_incompatible_qos"
             ] = self.on_requested_incompatible_qos
+            if self._dispatch(DDSStatus.RequestedIncompatibleQos, True):
+                return
 
             def call(reader, status, arg):
                 self.on_requested_incompatible_qos(Entity.get_entity(reader), status)
@@ -1255,10 +1328,13 @@ class Listener(DDS):
     ):
         self.on_publication_matched = callable
         if callable is None:
-            self._set_on_publication_matched(self._ref, None)
+            if not self._dispatch(DDSStatus.PublicationMatched, False):
+                self._set_on_publication_matched(self._ref, None)
             del self._set_functors["on_publication_matched"]
         else:
             self._set_functors["on_publication_matched"] = self.on_publication_matched
+            if self._dispatch(DDSStatus.PublicationMatched, True):
+                return
 
             def call(writer, status, arg):
                 self.on_publication_matched(Entity.get_entity(writer), status)
@@ -1281,10 +1357,13 @@ class Listener(DDS):
     ):
         self.on_subscription_matched = callable
         if callable is None:
-            self._set_on_subscription_matched(self._ref, None)
+            if not self._dispatch(DDSStatus.SubscriptionMatched, False):
+                self._set_on_subscription_matched(self._ref, None)
             del self._set_functors["on_subscription_matched"]
         else:
             self._set_functors["on_subscription_matched"] = self.on_subscription_matched
+            if self._dispatch(DDSStatus.SubscriptionMatched, True):
+                return
 
             def call(reader, status, arg):
                 self.on_subscription_matched(Entity.get_entity(reader), status)
@@ -1547,34 +1626,98 @@ _querycondition_filter_fn = c_callable(ct.c_bool, [ct.c_void_p])
 class QueryCondition(_Condition):
     """Condition that triggers when new data is available to read according to the mask.
     Construct a mask using InstanceState, ViewState and SampleState. Add a filter function
-    that receives the sample and returns a boolean whether to accept or reject the sample.
+    that receives the sample and returns a boolean whether to accept or reject the sample,
+    or a :class:`ContentFilter<cyclonedds.topic.ContentFilter>` that is evaluated in C.
     """
 
     def __init__(
         self,
         reader: "cyclonedds.sub.DataReader",
         mask: int,
-        filter: Callable[[Any], bool],
+        filter: Union[Callable[..., bool], "cyclonedds.topic.ContentFilter"],
+        members: Optional[Sequence[str]] = None,
     ) -> None:
-        """Construct a QueryCondition."""
+        """Construct a QueryCondition.
+
+        Parameters
+        ----------
+        reader: DataReader
+            The reader whose samples are queried.
+        mask: int
+            The sample, view and instance states of the samples to query.
+        filter: Callable[..., bool] or ContentFilter
+            Called with the sample, or with the values of the members when members is given. A
+            ContentFilter is evaluated on the serialized sample without taking the GIL, changing
+            its parameters affects the samples that arrive afterwards.
+        members: Sequence[str], optional
+            Paths of the members the filter looks at, like ``"header.seq"`` or ``"points[1].x"``.
+            Only these members are decoded from the serialized sample.
+
+        Raises
+        ------
+        ValueError, TypeError
+            If a member path is invalid or does not name a member of the datatype, or if the
+            ContentFilter is for another datatype or combined with members.
+        """
+        from .topic import ContentFilter
+
         self.reader = reader
         self.mask = mask
         self.filter = filter
+        self.members = None if members is None else list(members)
+        self._filter_slot = -1
+
+        if isinstance(filter, ContentFilter):
+            if members is not None:
+                raise ValueError("A ContentFilter can not be combined with members")
+            if filter.data_type is not self.reader._topic.data_type:
+                raise TypeError(f"{filter!r} is not for the datatype of {self.reader!r}")
+            # The slot holds a reference to the C filter, self.filter keeps the ContentFilter
+            self._filter_slot = ddspy_query_filter_acquire(filter._ref)
+            if self._filter_slot >= 0:
+                ref = ddspy_querycondition_create(reader._ref, mask, self._filter_slot)
+                if ref < 0:
+                    ddspy_query_filter_release(self._filter_slot)
+                    self._filter_slot = -1
+                super().__init__(ref)
+                return
+
+            # All C filter functions are in use, evaluate from Python without deserializing
+            def call(sample_pt):
+                try:
+                    sample_info = ct.cast(sample_pt, ct.POINTER(dds_c_t.sample_buffer))[0]
+                    return filter.matches(ct.string_at(sample_info.buf, sample_info.len))
+                except Exception:  # Block any python exception from going into C
+                    return False
+        elif members is None:
+            data_type = self.reader._topic.data_type
+
+            def call(sample_pt):
+                try:
+                    sample_info = ct.cast(sample_pt, ct.POINTER(dds_c_t.sample_buffer))[0]
+                    return self.filter(data_type.deserialize(ct.string_at(sample_info.buf, sample_info.len)))
+                except Exception:  # Block any python exception from going into C
+                    return False
+        else:
+            extractor = MemberExtractor(self.reader._topic.data_type, members)
 
-        def call(sample_pt):
-            try:
-                sample_info = ct.cast(sample_pt, ct.POINTER(dds_c_t.sample_buffer))[0]
-                array_type = ct.c_ubyte * sample_info.len
-                array = ct.cast(sample_info.buf, ct.POINTER(array_type))
-                contents = array.contents[:]
-                data = self.reader._topic.data_type.deserialize(bytes(contents))
-                return self.filter(data)
-            except Exception:  # Block any python exception from going into C
-                return False
+            def call(sample_pt):
+                try:
+                    sample_info = ct.cast(sample_pt, ct.POINTER(dds_c_t.sample_buffer))[0]
+                    return self.filter(*extractor.extract(ct.string_at(sample_info.buf, sample_info.len)))
+                except Exception:  # Block any python exception from going into C
+                    return False
 
         self._filter = _querycondition_filter_fn(call)
         super().__init__(self._create_querycondition(reader._ref, mask, self._filter))
 
+    def __del__(self) -> None:
+        super().__del__()
+        # The condition is gone, so nothing evaluates the filter of the slot anymore
+        if getattr(self, "_filter_slot", -1) >= 0:
+            ddspy_query_filter_release(self._filter_slot)
+            self._filter_slot = -1
+
     @c_call("dds_create_querycondition")
     def _create_querycondition(
         self,
@@ -1695,14 +1838,22 @@ class WaitSet(Entity):
             The domain in which you want to make a WaitSet
         """
         super().__init__(self._create_waitset(domain_participant._ref))
-        self.attached = []
+        # Entities are attached with their handle as the attach argument, that is how
+        # the triggered entities that dds_waitset_wait returns map back to the entities
+        self._attached: Dict[int, Entity] = {}
+        self._xs = (dds_c_t.attach * 8)()
 
     def __del__(self) -> None:
-        if hasattr(self, "attached"):
-            for v in self.attached:
-                self._waitset_detach(self._ref, v[0]._ref)
+        if hasattr(self, "_attached"):
+            for ref in self._attached:
+                self._waitset_detach(self._ref, ref)
         super().__del__()
 
+    @property
+    def attached(self) -> List[tuple]:
+        """The attached entities with their attach arguments, see :meth:`get_entities`."""
+        return [(entity, ref) for ref, entity in self._attached.items()]
+
     def attach(self, entity: Entity) -> None:
         """Attach an entity to this WaitSet. This is a no-op if the entity was already attached.
 
@@ -1715,17 +1866,17 @@ class WaitSet(Entity):
         ------
         DDSException: When you try to attach a non-triggerable entity.
         """
-        if self.is_attached(entity):
+        if entity._ref in self._attached:
             return
 
-        value_pt = ct.c_int()
-
-        ret = self._waitset_attach(self._ref, entity._ref, ct.byref(value_pt))
+        ret = self._waitset_attach(self._ref, entity._ref, entity._ref)
         if ret < 0:
             raise DDSException(
                 ret, f"Occurred when trying to attach {repr(entity)} to {repr(self)}"
             )
-        self.attached.append((entity, value_pt))
+        self._attached[entity._ref] = entity
+        if len(self._attached) > len(self._xs):
+            self._xs = (dds_c_t.attach * (2 * len(self._xs)))()
 
     def detach(self, entity: Entity) -> None:
         """Detach an entity from this WaitSet. If it was not attach this is a no-op.
@@ -1738,16 +1889,14 @@ class WaitSet(Entity):
             The entity you wish to attach
 
         """
-        for i, v in enumerate(self.attached):
-            if v[0] == entity:
-                ret = self._waitset_detach(self._ref, entity._ref)
-                if ret < 0:
-                    raise DDSException(
-                        ret,
-                        f"Occurred when trying to attach {repr(entity)} to {repr(self)}",
-                    )
-                del self.attached[i]
-                break
+        if entity._ref in self._attached:
+            ret = self._waitset_detach(self._ref, entity._ref)
+            if ret < 0:
+                raise DDSException(
+                    ret,
+                    f"Occurred when trying to attach {repr(entity)} to {repr(self)}",
+                )
+            del self._attached[entity._ref]
 
     def is_attached(self, entity: Entity) -> bool:
         """Check whether an entity is attached.
@@ -1757,16 +1906,13 @@ class WaitSet(Entity):
         entity: Entity
             Check the attachment of this entity.
         """
-        for v in self.attached:
-            if v[0] == entity:
-                return True
-        return False
+        return entity._ref in self._attached
 
     def get_entities(self) -> List[Entity]:
         """Get all entities attached"""
         # Note: should spend some time on synchronisation. What if the waitset is used across threads?
         # That is probably a bad idea in python, but who is going to stop the user from doing it anyway...
-        return [v[0] for v in self.attached]
+        return list(self._attached.values())
 
     def wait(self, timeout: int) -> int:
         """Block execution and wait for one of the entities in this waitset to trigger.
@@ -1789,6 +1935,36 @@ class WaitSet(Entity):
 
         raise DDSException(ret, f"Occurred while waiting in {repr(self)}")
 
+    def wait_triggered(self, timeout: int) -> List[Entity]:
+        """Block execution and wait for one of the entities in this waitset to trigger, like :meth:`wait`,
+        but return the entities that triggered. This saves checking every attached entity after a wakeup.
+
+        The triggered entities are collected in a buffer owned by the waitset, so this is not
+        thread-safe: only one thread at a time may call it on a waitset.
+
+        Parameters
+        ----------
+        timeout: int
+            The maximum number of nanoseconds to block. Use the function :func:`duration<cyclonedds.util.duration>`
+            to write that in a human readable format.
+
+        Returns
+        -------
+        List[Entity]
+            The triggered entities. This will be empty when a timeout occurred.
+        """
+        xs = self._xs
+        ret = self._waitset_wait(self._ref, xs, len(xs), timeout)
+
+        if ret < 0:
+            raise DDSException(ret, f"Occurred while waiting in {repr(self)}")
+        return self._triggered(xs, ret)
+
+    def _triggered(self, xs, count: int) -> List[Entity]:
+        # An entity can be detached by another thread while waiting, those are skipped
+        attached = self._attached
+        return [attached[x] for x in xs[:min(count, len(xs))] if x in attached]
+
     def wait_until(self, abstime: int) -> int:
         """Block execution and wait for one of the entities in this waitset to trigger.
 
@@ -1804,11 +1980,7 @@ class WaitSet(Entity):
         int
             The number of triggered entities. This will be 0 when a timeout occurred.
         """
-        cs = (ct.c_void_p * len(self.attached))()
-        pcs = ct.cast(cs, ct.c_void_p)
-        ret = self._waitset_wait_until(
-            self._ref, ct.byref(pcs), len(self.attached), abstime
-        )
+        ret = self._waitset_wait_until(self._ref, None, 0, abstime)
 
         if ret >= 0:
             return ret
@@ -1885,6 +2057,463 @@ class WaitSet(Entity):
         pass
 
 
+class WaitSetDispatcher:
+    """Waits on a :class:`WaitSet` and runs the handlers of the conditions that triggered, so the work
+    per wakeup does not grow with the number of attached conditions.
+
+    The handler of a :class:`ReadCondition` or :class:`QueryCondition` is called with the samples
+    taken with the condition, in batches of at most ``max_batch`` samples until there are no more.
+    When the samples are read instead a single batch is read per wakeup, use a condition with
+    ``SampleState.NotRead`` to get the remaining samples on the next wakeups. Guard conditions are
+    reset before their handler is called with the condition, for other entities the handler is
+    called with the entity.
+
+    A dispatcher is meant to be driven by one thread: it waits with :meth:`WaitSet.wait_triggered`,
+    which is not thread-safe.
+    """
+
+    def __init__(self, domain_participant: "cyclonedds.domain.DomainParticipant", max_batch: int = 256) -> None:
+        """
+        Parameters
+        ----------
+        domain_participant: DomainParticipant
+            The domain in which you want to make the WaitSet.
+        max_batch: int
+            The maximum number of samples passed to a handler in one call.
+        """
+        if max_batch < 1:
+            raise ValueError("max_batch must be at least 1")
+        self.waitset = WaitSet(domain_participant)
+        self.max_batch = max_batch
+        self._handlers: Dict[int, tuple] = {}
+        self._stop = GuardCondition(domain_participant)
+        self._stopped = False
+        self.waitset.attach(self._stop)
+
+    def add(self, condition: Entity, handler: Callable[[Any], None], take: bool = True) -> None:
+        """Attach a condition and set its handler, replacing the handler if it was attached already.
+
+        Parameters
+        ----------
+        condition: Entity
+            The condition, or other triggerable entity, to dispatch.
+        handler: Callable
+            Called with the samples of read and query conditions, with the entity otherwise.
+        take: bool
+            Whether samples of read and query conditions are taken or read.
+        """
+        self.waitset.attach(condition)
+        self._handlers[condition._ref] = (handler, take)
+
+    def remove(self, condition: Entity) -> None:
+        """Detach a condition. It is a no-op if it was not attached."""
+        if self._handlers.pop(condition._ref, None) is not None:
+            self.waitset.detach(condition)
+
+    def dispatch(self, timeout: int) -> int:
+        """Wait once for conditions to trigger and run their handlers.
+
+        Parameters
+        ----------
+        timeout: int
+            The maximum number of nanoseconds to block.
+
+        Returns
+        -------
+        int
+            The number of conditions that were handled. This will be 0 when a timeout occurred.
+        """
+        handled = 0
+        for entity in self.waitset.wait_triggered(timeout):
+            try:
+                handler, take = self._handlers[entity._ref]
+            except KeyError:
+                # The stop guard, or a condition that was removed while waiting
+                continue
+
+            if isinstance(entity, (ReadCondition, QueryCondition)):
+                if take:
+                    while True:
+                        samples = entity.reader.take(N=self.max_batch, condition=entity)
+                        if samples:
+                            handler(samples)
+                        if len(samples) < self.max_batch:
+                            break
+                else:
+                    # Reading does not remove the samples, depending on the mask the same
+                    # batch would come back forever
+                    samples = entity.reader.read(N=self.max_batch, condition=entity)
+                    if samples:
+                        handler(samples)
+            else:
+                if isinstance(entity, GuardCondition):
+                    entity.take()
+                handler(entity)
+            handled += 1
+        return handled
+
+    def run(self, timeout: Optional[int] = None) -> None:
+        """Dispatch until :meth:`stop` is called, or until no condition triggered within timeout.
+
+        Parameters
+        ----------
+        timeout: int, Optional = None
+            Maximum number of nanoseconds to wait for a condition. By default this is infinity.
+        """
+        self._stopped = False
+        self._stop.take()
+        finite = timeout is not None and timeout != dds_infinity
+        timeout = dds_infinity if timeout is None else timeout
+        while not self._stopped:
+            # With an infinite timeout nothing handled only means a removed condition or the stop guard
+            if not self.dispatch(timeout) and finite and not self._stop.take():
+                break
+
+    def stop(self) -> None:
+        """Make :meth:`run` return, this can be called from a handler or another thread."""
+        self._stopped = True
+        self._stop.set(True)
+
+
+class AsyncWaitSet:
+    """Lets coroutines wait for conditions without tying up a thread each. All conditions of a
+    participant that are awaited are multiplexed on a single WaitSet served by one daemon thread,
+    which wakes the awaiting coroutines through their event loop. Use :func:`of` to get the
+    instance shared by all readers of a participant.
+    """
+
+    _create_lock = threading.Lock()
+    _batch = 64
+
+    def __init__(self, domain_participant: "cyclonedds.domain.DomainParticipant") -> None:
+        self._waitset = WaitSet(domain_participant)
+        self._guard = GuardCondition(domain_participant)
+        self._lock = threading.Lock()
+        self._waiters: Dict[int, List[asyncio.Future]] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+
+        # The guard only serves to wake up the thread on close, it is attached with argument 0
+        ret = self._waitset._waitset_attach(self._waitset._ref, self._guard._ref, 0)
+        if ret < 0:
+            raise DDSException(ret, f"Occurred when trying to attach {repr(self._guard)} to {repr(self._waitset)}")
+
+    @classmethod
+    def of(cls, domain_participant: "cyclonedds.domain.DomainParticipant") -> "AsyncWaitSet":
+        """The AsyncWaitSet shared by everything in a participant, created on first use."""
+        with cls._create_lock:
+            waitset = getattr(domain_participant, "_async_waitset", None)
+            if waitset is None or waitset._closed:
+                waitset = domain_participant._async_waitset = cls(domain_participant)
+            return waitset
+
+    async def wait(self, condition: Entity, timeout: Optional[int] = None) -> bool:
+        """Wait until the condition triggers.
+
+        Parameters
+        ----------
+        condition: Entity
+            A ReadCondition, QueryCondition, GuardCondition or other triggerable entity of the participant.
+        timeout: int, Optional = None
+            Maximum number of nanoseconds to wait. By default this is infinity.
+
+        Returns
+        -------
+        bool
+            True when the condition triggered, False when the timeout expired.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        ref = condition._ref
+
+        with self._lock:
+            if self._closed:
+                raise DDSException(DDSException.DDS_RETCODE_PRECONDITION_NOT_MET, f"Occurred when waiting on closed {repr(self)}")
+            futures = self._waiters.get(ref)
+            if not futures:
+                # The condition handle is the attach argument, that is how the thread finds the waiters
+                ret = self._waitset._waitset_attach(self._waitset._ref, ref, ref)
+                if ret < 0:
+                    raise DDSException(ret, f"Occurred when trying to attach {repr(condition)} to {repr(self._waitset)}")
+                futures = self._waiters[ref] = []
+            futures.append(future)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="cyclonedds-async-waitset", daemon=True)
+                self._thread.start()
+
+        try:
+            if timeout is None or timeout >= dds_infinity:
+                await future
+            else:
+                await asyncio.wait_for(future, timeout / 1e9)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            with self._lock:
+                futures = self._waiters.get(ref)
+                if futures and future in futures:
+                    futures.remove(future)
+                    if not futures:
+                        del self._waiters[ref]
+                        self._waitset._waitset_detach(self._waitset._ref, ref)
+
+    def close(self) -> None:
+        """Stop the thread, coroutines that are still waiting get cancelled."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            waiters, self._waiters = self._waiters, {}
+            for ref in waiters:
+                self._waitset._waitset_detach(self._waitset._ref, ref)
+        self._guard.set(True)
+        for futures in waiters.values():
+            for future in futures:
+                self._wake(future, cancel=True)
+
+    @staticmethod
+    def _wake(future: asyncio.Future, cancel: bool = False) -> None:
+        def wake():
+            if not future.done():
+                if cancel:
+                    future.cancel()
+                else:
+                    future.set_result(True)
+        try:
+            future.get_loop().call_soon_threadsafe(wake)
+        except RuntimeError:
+            # The event loop is closed, nobody is waiting anymore
+            pass
+
+    def _run(self) -> None:
+        xs = (dds_c_t.attach * self._batch)()
+        while True:
+            # This fails once the participant, and with it the waitset, is deleted
+            ret = self._waitset._waitset_wait(self._waitset._ref, xs, self._batch, dds_infinity)
+            if ret < 0:
+                break
+
+            woken = []
+            with self._lock:
+                if self._closed:
+                    break
+                for i in range(min(ret, self._batch)):
+                    # Triggered conditions are detached until they are awaited again, which is
+                    # after the coroutine has read or taken the data that triggered them
+                    futures = self._waiters.pop(xs[i] or 0, None)
+                    if futures:
+                        self._waitset._waitset_detach(self._waitset._ref, xs[i])
+                        woken.extend(futures)
+
+            for future in woken:
+                self._wake(future)
+
+
+class _listener_event_status(ct.Union):  # noqa N801
+    _fields_ = [
+        ('inconsistent_topic', dds_c_t.inconsistent_topic_status),
+        ('offered_deadline_missed', dds_c_t.offered_deadline_missed_status),
+        ('requested_deadline_missed', dds_c_t.requested_deadline_missed_status),
+        ('offered_incompatible_qos', dds_c_t.offered_incompatible_qos_status),
+        ('requested_incompatible_qos', dds_c_t.requested_incompatible_qos_status),
+        ('sample_lost', dds_c_t.sample_lost_status),
+        ('sample_rejected', dds_c_t.sample_rejected_status),
+        ('liveliness_lost', dds_c_t.liveliness_lost_status),
+        ('liveliness_changed', dds_c_t.liveliness_changed_status),
+        ('publication_matched', dds_c_t.publication_matched_status),
+        ('subscription_matched', dds_c_t.subscription_matched_status)
+    ]
+
+
+class _listener_event(ct.Structure):  # noqa N801
+    """Event record of the native listener queue (ddspy_listener_event_t)."""
+    _fields_ = [
+        ('entity', dds_c_t.entity),
+        ('kind', ct.c_uint32),
+        ('listener', ct.c_uint32),
+        ('pad', ct.c_uint32),
+        ('status', _listener_event_status)
+    ]
+
+
+# Status id (the bit number in DDSStatus) -> callback and status field of the event record
+_listener_event_kinds = {
+    0: ("on_inconsistent_topic", "inconsistent_topic"),
+    1: ("on_offered_deadline_missed", "offered_deadline_missed"),
+    2: ("on_requested_deadline_missed", "requested_deadline_missed"),
+    3: ("on_offered_incompatible_qos", "offered_incompatible_qos"),
+    4: ("on_requested_incompatible_qos", "requested_incompatible_qos"),
+    5: ("on_sample_lost", "sample_lost"),
+    6: ("on_sample_rejected", "sample_rejected"),
+    7: ("on_data_on_readers", None),
+    8: ("on_data_available", None),
+    9: ("on_liveliness_lost", "liveliness_lost"),
+    10: ("on_liveliness_changed", "liveliness_changed"),
+    11: ("on_publication_matched", "publication_matched"),
+    12: ("on_subscription_matched", "subscription_matched"),
+}
+
+
+class ListenerDispatcher:
+    """Calls the callbacks of listeners from Python threads instead of from the DDS receive threads.
+
+    The native callbacks of a listener created with ``Listener(dispatcher=...)`` only copy the
+    entity, status kind and status into a fixed size queue in C, they never take the Python GIL.
+    The threads of the dispatcher take the events from the queue in batches and call the ``on_*``
+    methods of the listeners, so slow callbacks do not hold up the DDS receive threads.
+
+    Events of a batch are coalesced: data available and data on readers are delivered once per
+    entity, for the other statuses the last status is delivered with the ``*_change`` fields
+    summed over the coalesced events. When the queue is full events are dropped and counted in
+    :attr:`dropped`, after a loss a data available (or data on readers) event is delivered again
+    for all entities that had one, the other statuses are cumulative.
+
+    With more than one thread the callbacks for one entity can run concurrently.
+
+    Examples
+    --------
+    >>> dispatcher = ListenerDispatcher()
+    >>> reader = DataReader(topic, listener=Listener(dispatcher=dispatcher, on_data_available=handle))
+    """
+
+    _ids = itertools.count(1)
+
+    def __init__(self, threads: int = 1, capacity: int = 4096, batch: int = 256,
+                 loop: Optional[asyncio.AbstractEventLoop] = None) -> None:
+        """
+        Parameters
+        ----------
+        threads: int
+            Number of threads that take events from the queue and call the callbacks.
+        capacity: int
+            Number of events the queue holds, rounded up to a power of two.
+        batch: int
+            Maximum number of events a thread takes and coalesces at once.
+        loop: asyncio.AbstractEventLoop, optional
+            Call the callbacks on this event loop instead of on the threads of the dispatcher.
+            Callbacks that return a coroutine are scheduled as a task on the loop.
+        """
+        if threads < 1:
+            raise ValueError("A ListenerDispatcher needs at least one thread.")
+        self._queue = ddspy_listener_queue_new(capacity)
+        self._batch = batch
+        self._loop = loop
+        self._lock = threading.Lock()
+        self._listeners: Dict[int, "Listener"] = WeakValueDictionary()
+        self._data_events = set()
+        self._dropped = 0
+        self._closed = False
+        self._threads = [
+            threading.Thread(target=self._run, name=f"cyclonedds-listener-{i}", daemon=True)
+            for i in range(threads)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    @property
+    def dropped(self) -> int:
+        """Number of events dropped because the queue was full."""
+        return self._dropped
+
+    def close(self) -> None:
+        """Stop the threads, events that are still queued are delivered first. Listeners of a closed
+        dispatcher no longer queue events."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        ddspy_listener_queue_close(self._queue)
+        for thread in self._threads:
+            if thread is not threading.current_thread():
+                thread.join()
+        # The listeners keep the queue alive while they are attached
+        ddspy_listener_queue_release(self._queue)
+
+    def __enter__(self) -> "ListenerDispatcher":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def __del__(self) -> None:
+        # The threads reference the dispatcher, so this only runs if they never started
+        if hasattr(self, "_closed") and not self._closed:
+            self.close()
+
+    def _enable(self, listener: "Listener", status: int, enable: bool) -> None:
+        with self._lock:
+            if listener._dispatch_tag is None:
+                listener_id = next(self._ids) & 0xffffffff
+                listener._dispatch_tag = ddspy_listener_queue_attach(self._queue, listener_id)
+                self._listeners[listener_id] = listener
+        ddspy_listener_queue_enable(listener._dispatch_tag, listener._ref, status.bit_length() - 1, enable)
+
+    def _detach(self, listener: "Listener") -> None:
+        ddspy_listener_queue_detach(listener._dispatch_tag)
+        listener._dispatch_tag = None
+
+    def _run(self) -> None:
+        size = ct.sizeof(_listener_event)
+        while True:
+            data, dropped, closed = ddspy_listener_queue_take(self._queue, self._batch, dds_infinity)
+            if closed:
+                break
+            events = (_listener_event * (len(data) // size)).from_buffer_copy(data)
+            pending = self._coalesce(events, dropped)
+            if self._loop is None:
+                self._deliver(pending)
+            else:
+                try:
+                    self._loop.call_soon_threadsafe(self._deliver, pending)
+                except RuntimeError:
+                    # The event loop is closed, nobody is listening anymore
+                    pass
+
+    def _coalesce(self, events, dropped: int) -> Dict[tuple, Any]:
+        pending = {}
+        for event in events:
+            key = (event.listener, event.entity, event.kind)
+            field = _listener_event_kinds[event.kind][1]
+            if field is None:
+                pending[key] = None
+                self._data_events.add(key)
+                continue
+            status = getattr(event.status, field)
+            previous = pending.get(key)
+            if previous is not None:
+                for name, _ in status._fields_:
+                    if name.endswith("_change"):
+                        setattr(status, name, getattr(status, name) + getattr(previous, name))
+            pending[key] = status
+
+        if dropped:
+            with self._lock:
+                self._dropped += dropped
+            # A lost data event could leave data unread, so they are all delivered again
+            for key in list(self._data_events):
+                pending.setdefault(key, None)
+        return pending
+
+    def _deliver(self, pending: Dict[tuple, Any]) -> None:
+        for key, status in pending.items():
+            listener_id, handle, kind = key
+            listener = self._listeners.get(listener_id)
+            entity = Entity.get_entity(handle)
+            if listener is None or entity is None:
+                self._data_events.discard(key)
+                continue
+
+            callback = getattr(listener, _listener_event_kinds[kind][0])
+            try:
+                result = callback(entity) if status is None else callback(entity, status)
+                if self._loop is not None and asyncio.iscoroutine(result):
+                    self._loop.create_task(result)
+            except Exception:
+                # Like exceptions in synchronous callbacks, they are printed and ignored
+                traceback.print_exc()
+
+
 class Statistics(DDS):
     """Statistics object for entity.
 
@@ -1986,5 +2615,8 @@ __all__ = [
     "QueryCondition",
     "GuardCondition",
     "WaitSet",
+    "WaitSetDispatcher",
+    "AsyncWaitSet",
+    "ListenerDispatcher",
     "Statistics"
 ]
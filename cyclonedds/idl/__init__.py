@@ -10,12 +10,14 @@
  * SPDX-License-Identifier: EPL-2.0 OR BSD-3-Clause
 """
 import dataclasses as _dataclasses
-from typing import Any, Tuple, Type, TypeVar, Optional, Dict, Callable, Sequence
+from typing import Any, Tuple, Type, TypeVar, Optional, Dict, Callable, Sequence, Union
 from enum import Enum
 
 from .types import ValidUnionHolder
 from ._main import IdlMeta, IdlUnionMeta, IdlBitmaskMeta, IdlEnumMeta
 from ._support import Buffer, Endianness, SerializeKind
+from ._lazy import LazyView
+from ._parallel import DeserializerPool
 
 
 _TIS = TypeVar('_TIS', bound='IdlStruct')
@@ -25,6 +27,9 @@ _TIE = TypeVar('_TIE', bound='IdlEnum')
 
 
 class IdlStruct(metaclass=IdlMeta):
+    # Subclasses have an instance __dict__ unless they are compact, see annotations.compact
+    __slots__ = ()
+
     def serialize(self, buffer: Optional[Buffer] = None, endianness: Optional[Endianness] = None, use_version_2: Optional[bool] = None) -> bytes:
         return self.__idl__.serialize(self, buffer=buffer, endianness=endianness, use_version_2=use_version_2)
 
@@ -35,6 +40,14 @@ class IdlStruct(metaclass=IdlMeta):
     def deserialize(cls: Type[_TIS], data: bytes, has_header: bool = True, use_version_2: Optional[bool] = None) -> _TIS:
         return cls.__idl__.deserialize(data, has_header=has_header, use_version_2=use_version_2)
 
+    @classmethod
+    def deserialize_lazy(cls: Type[_TIS], data: bytes, has_header: bool = True, use_version_2: Optional[bool] = None) -> Union[_TIS, LazyView]:
+        """Deserialize into a :class:`LazyView` that only decodes the members that are accessed.
+
+        Mutable types are not viewable and are deserialized completely.
+        """
+        return cls.__idl__.deserialize_lazy(data, has_header=has_header, use_version_2=use_version_2)
+
     @classmethod
     def deserialize_key(cls: Type[_TIS], data: bytes, has_header: bool = True, use_version_2: Optional[bool] = None) -> _TIS:
         return cls.__idl__.deserialize_key(data, has_header=has_header, use_version_2=use_version_2)
@@ -251,5 +264,5 @@ def make_idl_enum(class_name: str, typename: str, fields: Dict[str, int],
 __all__ = [
     "IdlUnion", "IdlStruct", "IdlBitmask", "IdlEnum",
     "make_idl_struct", "make_idl_union", "make_idl_bitmask",
-    "make_idl_enum"
+    "make_idl_enum", "LazyView", "DeserializerPool"
 ]
@@ -10,8 +10,11 @@
  * SPDX-License-Identifier: EPL-2.0 OR BSD-3-Clause
 """
 
+import struct
+import sys
 from enum import Enum, IntFlag, auto
 from inspect import isclass
+from dataclasses import is_dataclass, fields
 from typing import Tuple, Type, Union
 
 from . import IdlStruct, IdlUnion, IdlBitmask
@@ -20,12 +23,13 @@ from ._type_normalize import get_idl_annotations, get_idl_field_annotations, get
 from ._machinery import Machine, NoneMachine, PrimitiveMachine, StringMachine, BytesMachine, ByteArrayMachine, UnionMachine, \
     ArrayMachine, SequenceMachine, InstanceMachine, MappingMachine, EnumMachine, StructMachine, OptionalMachine, CharMachine, \
     PLCdrMutableStructMachine, DelimitedCdrAppendableStructMachine, MutableMember, DelimitedCdrAppendableUnionMachine, \
-    PlainCdrV2ArrayOfPrimitiveMachine, PlainCdrV2SequenceOfPrimitiveMachine, LenType, BitMaskMachine, BitBoundEnumMachine
+    PlainCdrV2ArrayOfPrimitiveMachine, PlainCdrV2SequenceOfPrimitiveMachine, LenType, BitMaskMachine, BitBoundEnumMachine, \
+    KeyEnabled, PackedArrayOfPrimitiveMachine, PackedSequenceOfPrimitiveMachine
 
 from .types import array, bounded_str, sequence, _type_code_align_size_default_mapping, NoneType, char, typedef, uint8, \
     byte, case, default
 
-from ._support import DataRepresentationFlags, DataTypeProperties
+from ._support import DataRepresentationFlags, DataTypeProperties, Endianness, SerializeKind, DeserializeKind
 
 class Builder:
     easy_types = {
@@ -94,15 +98,15 @@ class Builder:
             return props
         return 0
 
-    # memberid is needed for XCDR1 optionals
+    # memberid is needed for XCDR1 optionals, packed is the container of packed arrays and sequences of primitives
     @classmethod
-    def _machine_for_type(cls, _type, memberid_muflag, add_size_header, use_version_2):
+    def _machine_for_type(cls, _type, memberid_muflag, add_size_header, use_version_2, packed=None):
         if _type in cls.easy_types:
             return cls.easy_types[_type]()
         elif _type in _type_code_align_size_default_mapping:
             return PrimitiveMachine(_type)
         elif isinstance(_type, WrapOpt):
-            return OptionalMachine(cls._machine_for_type(_type.inner, None, add_size_header, use_version_2), memberid_muflag, use_version_2)
+            return OptionalMachine(cls._machine_for_type(_type.inner, None, add_size_header, use_version_2, packed), memberid_muflag, use_version_2)
         elif isclass(_type) and issubclass(_type, Enum):
             if "bit_bound" in get_idl_annotations(_type) and use_version_2:
                 return BitBoundEnumMachine(_type, get_idl_annotations(_type)["bit_bound"])
@@ -122,13 +126,15 @@ class Builder:
                 cls._machine_for_type(get_args(_type)[1], None, add_size_header, use_version_2)
             )
         elif isinstance(_type, typedef):
-            return cls._machine_for_type(_type.subtype, memberid_muflag, add_size_header, use_version_2)
+            return cls._machine_for_type(_type.subtype, memberid_muflag, add_size_header, use_version_2, packed)
         elif isinstance(_type, array):
-            submachine = cls._machine_for_type(_type.subtype, None, add_size_header, use_version_2)
+            submachine = cls._machine_for_type(_type.subtype, None, add_size_header, use_version_2, packed)
 
             if isinstance(submachine, PrimitiveMachine):
                 if submachine.type == uint8 or submachine.type == byte:
                     return ByteArrayMachine(_type.length)
+                if packed:
+                    return PackedArrayOfPrimitiveMachine(submachine.type, _type.length, packed)
 
                 return PlainCdrV2ArrayOfPrimitiveMachine(submachine.type, _type.length)
 
@@ -146,9 +152,11 @@ class Builder:
                 add_size_header=add_size_header
             )
         elif isinstance(_type, sequence):
-            submachine = cls._machine_for_type(_type.subtype, None, add_size_header, use_version_2)
+            submachine = cls._machine_for_type(_type.subtype, None, add_size_header, use_version_2, packed)
 
             if isinstance(submachine, PrimitiveMachine):
+                if packed:
+                    return PackedSequenceOfPrimitiveMachine(submachine.type, _type.max_length, packed)
                 return PlainCdrV2SequenceOfPrimitiveMachine(submachine.type, max_length=_type.max_length)
 
             if isinstance(submachine, (CharMachine)):
@@ -229,8 +237,9 @@ class Builder:
         for name, field_type in fields.items():
             mu = field_annotations.get(name, {}).get("must_understand", False)
             mid_mu = struct.__idl__.get_member_id(name) | ((1 << 31) if mu else 0)
-            v1_members[name] = cls._machine_for_type(field_type, mid_mu, False, False)
-            v2_members[name] = cls._machine_for_type(field_type, mid_mu, True, True)
+            packed = field_annotations.get(name, {}).get("packed", annotations.get("packed"))
+            v1_members[name] = cls._machine_for_type(field_type, mid_mu, False, False, packed)
+            v2_members[name] = cls._machine_for_type(field_type, mid_mu, True, True, packed)
 
         if extensibility is None:
             extensibility = "final"
@@ -348,3 +357,846 @@ class Builder:
             default_version = 1 if supported_versions & DataRepresentationFlags.FLAG_XCDR1 else 2        
 
         return v1_machine, v2_machine, data_type_props, supported_versions, default_version
+
+
+class _CompiledFallback(Exception):
+    """Raised by a generated deserializer when the data needs the machines, e.g. an appendable
+    struct that was serialized with fewer members than we know of."""
+    pass
+
+
+class _Run:
+    # A run of fixed size members that is written/read with a single struct.Struct
+    def __init__(self, var):
+        self.var = var
+        self.items = []
+        self.exprs = []
+        self.nvalues = 0
+        self.checks = []
+
+    def add(self, code, size, align, nvalues):
+        self.items.append((code, size, align))
+        index = self.nvalues
+        self.nvalues += nvalues
+        return index
+
+
+class _CodeGen:
+    def __init__(self, use_version_2: bool, endianness: Endianness):
+        self.use_version_2 = use_version_2
+        self.endianness = endianness
+        self.endian = '<' if endianness == Endianness.Little else '>'
+        self.align_max = 4 if use_version_2 else 8
+        self.lines = []
+        self.indent = 2
+        self.counter = 0
+        self.namespace = {
+            '_CompiledFallback': _CompiledFallback,
+            '_u32': struct.Struct(self.endian + 'I'),
+            '_pack_into': struct.pack_into,
+            '_unpack_from': struct.unpack_from,
+        }
+        self.run = None
+        # the alignment the current position is known to have (relative to the align offset)
+        self.known = 1
+        self.active = set()
+        self.delimited_ends = []
+
+    # -- helpers --
+
+    def name(self, prefix):
+        self.counter += 1
+        return f"{prefix}{self.counter}"
+
+    def const(self, obj, prefix='_c'):
+        name = self.name(prefix)
+        self.namespace[name] = obj
+        return name
+
+    def emit(self, line):
+        self.lines.append('    ' * self.indent + line)
+
+    def align(self, alignment):
+        alignment = min(alignment, self.align_max)
+        if alignment > self.known:
+            self.emit(f"pos = ((pos - ao + {alignment - 1}) & {~(alignment - 1)}) + ao")
+            self.known = alignment
+
+    def grow(self, size):
+        self.emit(f"if pos + {size} > buffer._size:")
+        self.emit(f"    buffer._pos = pos; buffer.ensure_size({size}); buf = buffer._bytes")
+
+    def unknown_position(self):
+        self.known = 1
+
+    def run_item(self, code, size, align, exprs=None, nvalues=1):
+        if self.run is None:
+            self.run = _Run(self.name('t'))
+        index = self.run.add(code, size, min(align, self.align_max), nvalues)
+        if exprs is not None:
+            self.run.exprs.extend(exprs)
+        return index
+
+    def run_structs(self, run):
+        first_align = run.items[0][2]
+        max_align = max(align for _, _, align in run.items)
+        start_align = max(first_align, min(self.known, max_align))
+        structs = {}
+        for residue in range(0, max_align, start_align):
+            offset = residue
+            fmt = self.endian
+            for code, size, align in run.items:
+                pad = (-offset) % align
+                fmt += 'x' * pad + code
+                offset += pad + size
+            structs[residue] = struct.Struct(fmt)
+        return start_align, max_align, structs
+
+    def end_alignment(self, max_align, structs):
+        known = max_align
+        for residue, s in structs.items():
+            end = (residue + s.size) % max_align
+            while known > 1 and end % known:
+                known //= 2
+        return known
+
+    def select_struct(self, run):
+        first_align, max_align, structs = self.run_structs(run)
+        self.align(first_align)
+        if len(structs) == 1:
+            s = self.const(structs[0], '_s')
+            self.emit(f"s = {s}")
+        else:
+            table = tuple(structs.get(r) for r in range(max_align))
+            s = self.const(table, '_s')
+            self.emit(f"s = {s}[(pos - ao) & {max_align - 1}]")
+        self.known = self.end_alignment(max_align, structs)
+
+    def flush_serialize(self):
+        run, self.run = self.run, None
+        if run is None:
+            return
+        for check in run.checks:
+            self.emit(check)
+        self.select_struct(run)
+        self.grow("s.size")
+        self.emit(f"s.pack_into(buf, pos, {', '.join(run.exprs)})")
+        self.emit("pos += s.size")
+
+    def flush_deserialize(self):
+        run, self.run = self.run, None
+        if run is None:
+            return
+        self.select_struct(run)
+        if self.delimited_ends:
+            self.emit(f"if pos + s.size > {self.delimited_ends[-1]}: raise _CompiledFallback()")
+        self.emit(f"{run.var} = s.unpack_from(buf, pos)")
+        self.emit("pos += s.size")
+
+    def local(self, expr, prefix='x'):
+        if expr.isidentifier():
+            return expr
+        var = self.name(prefix)
+        self.emit(f"{var} = {expr}")
+        return var
+
+    def recurse(self, machine, serialize, kind):
+        idl = machine.type.__idl__
+        key = (serialize, machine.use_version_2, self.endianness, kind)
+
+        # The codec of the type may well be the one being built right now, look it up on first use
+        if serialize:
+            def codec(buffer, value):
+                return (idl._codec(*key) or self.instance_machine(machine).serialize)(buffer, value)
+        else:
+            def codec(buffer):
+                return (idl._codec(*key) or self.instance_machine(machine).deserialize)(buffer)
+        return codec
+
+    def instance_machine(self, machine):
+        idl = machine.type.__idl__
+        if not idl._populated:
+            idl.populate()
+        return idl.v2_machine if machine.use_version_2 else idl.v1_machine
+
+    # -- serialization --
+
+    def serialize(self, machine, expr, kind, key_enabled):
+        if isinstance(machine, PrimitiveMachine):
+            self.run_item(machine.code, machine.size, machine.alignment, [expr])
+        elif isinstance(machine, CharMachine):
+            self.run_item('b', 1, 1, [f"ord({expr})"])
+        elif isinstance(machine, (EnumMachine, BitBoundEnumMachine)):
+            code = 'I' if isinstance(machine, EnumMachine) else machine.code
+            self.run_item(code, machine.size, machine.alignment, [f"_enum_value({expr})"])
+            self.namespace['_enum_value'] = _enum_value
+        elif isinstance(machine, BitMaskMachine):
+            self.run_item(machine.code, machine.size, machine.alignment, [f"{expr}.as_mask()"])
+        elif isinstance(machine, PlainCdrV2ArrayOfPrimitiveMachine) and machine.packing is None:
+            value = self.local(expr)
+            self.run_item(machine.code, machine.size, machine.alignment, [f"*{value}"], machine.length)
+            self.run.checks.append(f"if len({value}) != {machine.length}: raise ValueError('Incorrectly sized array.')")
+        elif isinstance(machine, ByteArrayMachine):
+            value = self.local(expr)
+            self.run_item(f"{machine.size}s", machine.size, 1, [value])
+            self.run.checks.append(f"if len({value}) != {machine.size}: raise ValueError('Incorrectly sized array.')")
+        elif isinstance(machine, ArrayMachine) and isinstance(machine.submachine, CharMachine) and not machine.add_size_header:
+            value = self.local(expr)
+            self.run_item(f"{machine.size}b", machine.size, 1, [f"*map(ord, {value})"], machine.size)
+            self.run.checks.append(f"if len({value}) != {machine.size}: raise ValueError('Incorrectly sized array.')")
+        elif isinstance(machine, (StructMachine, DelimitedCdrAppendableStructMachine)):
+            self.serialize_struct(machine, expr, kind, key_enabled)
+        elif isinstance(machine, InstanceMachine) and machine.type not in self.active \
+                and isinstance(self.instance_machine(machine), (StructMachine, DelimitedCdrAppendableStructMachine)):
+            self.active.add(machine.type)
+            self.serialize(self.instance_machine(machine), expr, kind, key_enabled)
+            self.active.remove(machine.type)
+        elif isinstance(machine, InstanceMachine) and kind == SerializeKind.DataSample:
+            # Recursive type, continue in the compiled serializer of the type
+            self.flush_serialize()
+            codec = self.const(self.recurse(machine, True, kind), '_r')
+            self.emit("buffer._pos = pos")
+            self.emit(f"{codec}(buffer, {expr})")
+            self.emit("pos = buffer._pos; buf = buffer._bytes")
+            self.unknown_position()
+        elif isinstance(machine, (StringMachine, BytesMachine)):
+            self.serialize_string(machine, expr)
+        elif isinstance(machine, PlainCdrV2SequenceOfPrimitiveMachine) and machine.packing is None:
+            self.serialize_primitive_sequence(machine, machine.max_length, expr)
+        elif isinstance(machine, SequenceMachine) and isinstance(machine.submachine, PrimitiveMachine) \
+                and not machine.add_size_header:
+            self.serialize_primitive_sequence(machine.submachine, machine.maxlen, expr)
+        elif isinstance(machine, (SequenceMachine, ArrayMachine)):
+            self.serialize_collection(machine, expr, kind, key_enabled)
+        elif isinstance(machine, OptionalMachine) and machine.use_version_2 and kind == SerializeKind.DataSample:
+            self.flush_serialize()
+            value = self.local(expr)
+            self.grow(1)
+            self.emit(f"if {value} is None:")
+            self.emit("    buf[pos] = 0; pos += 1")
+            self.emit("else:")
+            self.emit("    buf[pos] = 1; pos += 1")
+            self.indent += 1
+            self.unknown_position()
+            self.serialize(machine.submachine, value, kind, KeyEnabled.Never)
+            self.flush_serialize()
+            self.indent -= 1
+            self.unknown_position()
+        else:
+            self.flush_serialize()
+            m = self.const(machine, '_m')
+            self.emit("buffer._pos = pos")
+            self.emit(f"{m}.serialize(buffer, {expr}, {self.const(kind)}, {self.const(key_enabled)})")
+            self.emit("pos = buffer._pos; buf = buffer._bytes")
+            self.unknown_position()
+
+    def serialize_struct(self, machine, expr, kind, key_enabled):
+        members = machine.members_machines if isinstance(machine, StructMachine) else machine.member_machines
+        delimited = isinstance(machine, DelimitedCdrAppendableStructMachine)
+        value = self.local(expr, 'v')
+
+        if delimited:
+            self.flush_serialize()
+            self.align(4)
+            self.grow(4)
+            header = self.name('h')
+            self.emit(f"{header} = pos; pos += 4")
+
+        for member, m in members.items():
+            m_key_enabled = machine.key_enabled(member, key_enabled)
+            if kind != SerializeKind.DataSample and m_key_enabled == KeyEnabled.Never:
+                continue
+            self.serialize(m, f"{value}.{member}", kind, m_key_enabled)
+
+        if delimited:
+            self.flush_serialize()
+            self.emit(f"_u32.pack_into(buf, {header}, pos - {header} - 4)")
+
+    def serialize_string(self, machine, expr):
+        self.flush_serialize()
+        value = self.local(expr)
+        if machine.bound:
+            self.emit(f"if len({value}) > {machine.bound}: raise ValueError('Too long for bound.')")
+        if isinstance(machine, StringMachine):
+            data = self.name('d')
+            self.emit(f"{data} = {value}.encode('utf-8')")
+            self.emit(f"n = len({data})")
+            self.align(4)
+            self.grow("n + 5")
+            self.emit("_u32.pack_into(buf, pos, n + 1)")
+            self.emit(f"buf[pos + 4:pos + 4 + n] = {data}")
+            self.emit("buf[pos + 4 + n] = 0")
+            self.emit("pos += n + 5")
+        else:
+            self.emit(f"n = len({value})")
+            self.align(4)
+            self.grow("n + 4")
+            self.emit("_u32.pack_into(buf, pos, n)")
+            self.emit(f"buf[pos + 4:pos + 4 + n] = {value}")
+            self.emit("pos += n + 4")
+        self.unknown_position()
+
+    def serialize_primitive_sequence(self, machine, max_length, expr):
+        self.flush_serialize()
+        value = self.local(expr)
+        if max_length is not None:
+            self.emit(f"if len({value}) > {max_length}: raise ValueError('Too long for bound.')")
+        self.emit(f"n = len({value})")
+        self.align(4)
+        self.grow(4)
+        self.emit("_u32.pack_into(buf, pos, n)")
+        self.emit("pos += 4")
+        self.emit("if n:")
+        self.indent += 1
+        self.align(machine.alignment)
+        self.grow(f"n * {machine.size}")
+        self.emit(f"_pack_into(f'{self.endian}{{n}}{machine.code}', buf, pos, *{value})")
+        self.emit(f"pos += n * {machine.size}")
+        self.indent -= 1
+        self.unknown_position()
+
+    def serialize_collection(self, machine, expr, kind, key_enabled):
+        self.flush_serialize()
+        value = self.local(expr)
+        header = None
+        if isinstance(machine, SequenceMachine):
+            if machine.maxlen is not None:
+                self.emit(f"if len({value}) > {machine.maxlen}: raise ValueError('Too long for bound.')")
+            self.align(4)
+            if machine.add_size_header:
+                self.grow(4)
+                header = self.name('h')
+                self.emit(f"{header} = pos; pos += 4")
+                self.known = 4
+            self.run_item('I', 4, 4, [f"len({value})"])
+            self.flush_serialize()
+        else:
+            self.emit(f"if len({value}) != {machine.size}: raise ValueError('Incorrectly sized array.')")
+            if machine.add_size_header:
+                self.align(4)
+                self.grow(4)
+                header = self.name('h')
+                self.emit(f"{header} = pos; pos += 4")
+
+        element = self.name('e')
+        self.emit(f"for {element} in {value}:")
+        self.indent += 1
+        self.unknown_position()
+        self.serialize(machine.submachine, element, kind, key_enabled)
+        self.flush_serialize()
+        self.indent -= 1
+        self.unknown_position()
+
+        if header:
+            self.emit(f"_u32.pack_into(buf, {header}, pos - {header} - 4)")
+
+    # -- deserialization --
+
+    def deserialize(self, machine, kind, key_enabled):
+        if isinstance(machine, PrimitiveMachine):
+            index = self.run_item(machine.code, machine.size, machine.alignment)
+            return f"{self.run.var}[{index}]"
+        elif isinstance(machine, CharMachine):
+            index = self.run_item('b', 1, 1)
+            return f"chr({self.run.var}[{index}])"
+        elif isinstance(machine, (EnumMachine, BitBoundEnumMachine)):
+            code = 'I' if isinstance(machine, EnumMachine) else machine.code
+            index = self.run_item(code, machine.size, machine.alignment)
+            return f"{self.const(_enum_converter(machine.enum), '_enum')}({self.run.var}[{index}])"
+        elif isinstance(machine, BitMaskMachine):
+            index = self.run_item(machine.code, machine.size, machine.alignment)
+            return f"{self.const(machine.type, '_T')}.from_mask({self.run.var}[{index}])"
+        elif isinstance(machine, PlainCdrV2ArrayOfPrimitiveMachine) and machine.packing is None:
+            index = self.run_item(machine.code, machine.size, machine.alignment, nvalues=machine.length)
+            return f"list({self.run.var}[{index}:{index + machine.length}])"
+        elif isinstance(machine, ByteArrayMachine):
+            index = self.run_item(f"{machine.size}s", machine.size, 1)
+            return f"{self.run.var}[{index}]"
+        elif isinstance(machine, ArrayMachine) and isinstance(machine.submachine, CharMachine) and not machine.add_size_header:
+            index = self.run_item(f"{machine.size}b", machine.size, 1, nvalues=machine.size)
+            return f"list(map(chr, {self.run.var}[{index}:{index + machine.size}]))"
+        elif isinstance(machine, (StructMachine, DelimitedCdrAppendableStructMachine)):
+            return self.deserialize_struct(machine, kind, key_enabled)
+        elif isinstance(machine, InstanceMachine) and machine.type not in self.active \
+                and isinstance(self.instance_machine(machine), (StructMachine, DelimitedCdrAppendableStructMachine)):
+            self.active.add(machine.type)
+            expr = self.deserialize(self.instance_machine(machine), kind, key_enabled)
+            self.active.remove(machine.type)
+            return expr
+
+        # Everything below does not fit in a run
+        self.flush_deserialize()
+        if self.delimited_ends:
+            self.emit(f"if pos >= {self.delimited_ends[-1]}: raise _CompiledFallback()")
+
+        value = self.name('x')
+        if isinstance(machine, InstanceMachine) and kind == DeserializeKind.DataSample:
+            # Recursive type, continue in the compiled deserializer of the type
+            codec = self.const(self.recurse(machine, False, kind), '_r')
+            self.emit("buffer._pos = pos")
+            self.emit(f"{value} = {codec}(buffer)")
+            self.emit("pos = buffer._pos")
+        elif isinstance(machine, (StringMachine, BytesMachine)):
+            self.align(4)
+            self.emit("n = _u32.unpack_from(buf, pos)[0]")
+            if isinstance(machine, StringMachine):
+                self.emit(f"{value} = str(buf[pos + 4:pos + 3 + n], 'utf-8')")
+            else:
+                self.emit(f"{value} = bytes(buf[pos + 4:pos + 4 + n])")
+            self.emit("pos += n + 4")
+        elif (isinstance(machine, PlainCdrV2SequenceOfPrimitiveMachine) and machine.packing is None) or (
+                isinstance(machine, SequenceMachine) and isinstance(machine.submachine, PrimitiveMachine)
+                and not machine.add_size_header):
+            if isinstance(machine, SequenceMachine):
+                machine = machine.submachine
+            self.align(4)
+            self.emit("n = _u32.unpack_from(buf, pos)[0]")
+            self.emit("pos += 4")
+            self.emit("if n:")
+            self.indent += 1
+            self.known = 4
+            self.align(machine.alignment)
+            self.emit(f"{value} = list(_unpack_from(f'{self.endian}{{n}}{machine.code}', buf, pos))")
+            self.emit(f"pos += n * {machine.size}")
+            self.indent -= 1
+            self.emit("else:")
+            self.emit(f"    {value} = []")
+        elif isinstance(machine, (SequenceMachine, ArrayMachine)):
+            self.deserialize_collection(machine, value, kind, key_enabled)
+        elif isinstance(machine, OptionalMachine) and machine.use_version_2:
+            self.emit("o = buf[pos]; pos += 1")
+            self.emit("if o:")
+            self.indent += 1
+            self.unknown_position()
+            expr = self.deserialize(machine.submachine, kind, KeyEnabled.Never)
+            self.flush_deserialize()
+            self.emit(f"{value} = {expr}")
+            self.indent -= 1
+            self.emit("else:")
+            self.emit(f"    {value} = None")
+        else:
+            m = self.const(machine, '_m')
+            self.emit("buffer._pos = pos")
+            self.emit(f"{value} = {m}.deserialize(buffer, {self.const(kind)}, {self.const(key_enabled)})")
+            self.emit("pos = buffer._pos")
+        self.unknown_position()
+        return value
+
+    def deserialize_struct(self, machine, kind, key_enabled):
+        members = machine.members_machines if isinstance(machine, StructMachine) else machine.member_machines
+        delimited = isinstance(machine, DelimitedCdrAppendableStructMachine)
+
+        if delimited:
+            self.flush_deserialize()
+            if self.delimited_ends:
+                self.emit(f"if pos >= {self.delimited_ends[-1]}: raise _CompiledFallback()")
+            self.align(4)
+            end = self.name('end')
+            self.emit(f"{end} = pos + 4 + _u32.unpack_from(buf, pos)[0]")
+            self.emit("pos += 4")
+            self.delimited_ends.append(end)
+
+        values = []
+        for member, m in members.items():
+            m_key_enabled = machine.key_enabled(member, key_enabled)
+            if kind != DeserializeKind.DataSample and m_key_enabled == KeyEnabled.Never:
+                values.append(f"{self.const(m, '_m')}.default_initialize()")
+            else:
+                values.append(self.deserialize(m, kind, m_key_enabled))
+
+        if delimited:
+            self.flush_deserialize()
+            self.delimited_ends.pop()
+            self.emit(f"if pos > {end}: raise _CompiledFallback()")
+            self.emit(f"pos = {end}")
+            self.unknown_position()
+
+        return f"{self.const(machine.type.__idl__.constructor(), '_new')}({', '.join(values)})"
+
+    def deserialize_collection(self, machine, value, kind, key_enabled):
+        end = None
+        if isinstance(machine, SequenceMachine):
+            self.align(4)
+            if machine.add_size_header:
+                end = self.name('end')
+                self.emit(f"{end} = pos + 4 + _u32.unpack_from(buf, pos)[0]")
+                self.emit("pos += 4")
+            count = self.name('n')
+            self.emit(f"{count} = _u32.unpack_from(buf, pos)[0]")
+            self.emit("pos += 4")
+        else:
+            if machine.add_size_header:
+                self.align(4)
+                self.emit("pos += 4")
+            count = machine.size
+
+        self.emit(f"{value} = []")
+        self.emit(f"for _ in range({count}):")
+        self.indent += 1
+        self.unknown_position()
+        # Elements are not delimited themselves, the bounds checks of an enclosing appendable
+        # struct do not apply to the individual elements.
+        ends, self.delimited_ends = self.delimited_ends, []
+        expr = self.deserialize(machine.submachine, kind, key_enabled)
+        self.flush_deserialize()
+        self.delimited_ends = ends
+        self.emit(f"{value}.append({expr})")
+        self.indent -= 1
+
+        if end:
+            self.emit(f"pos = {end}")
+
+    # -- entry points --
+
+    def function(self, name, signature, body, fallback):
+        source = [f"def {name}({signature}):",
+                  "    start = buffer._pos",
+                  "    try:",
+                  "        buf = buffer._bytes",
+                  "        pos = start",
+                  "        ao = buffer._align_offset"]
+        source += body
+        source += [f"    except {fallback[0]}:"]
+        source += ["        " + line for line in fallback[1:]]
+        exec(compile("\n".join(source), f"<compiled {name}>", "exec"), self.namespace)
+        function = self.namespace[name]
+        function.source = "\n".join(source)
+        return function
+
+
+def _enum_value(value):
+    return value if type(value) == int else value.value
+
+
+def _enum_converter(enum):
+    def convert(value):
+        try:
+            return enum(value)
+        except ValueError:
+            return value
+    return convert
+
+
+class CodecBuilder:
+    """Compile the machine tree of a type into flat Python functions.
+
+    Members with a fixed size are coalesced into runs that are written/read with a single
+    precompiled :class:`struct.Struct`, nested final and appendable structs are inlined and
+    sequences/arrays become plain loops. Anything else is delegated to its machine, the
+    machines remain the reference implementation: the generated serializer hands over to
+    them on any error and the generated deserializer when it encounters data it cannot
+    handle.
+    """
+
+    supported = (StructMachine, DelimitedCdrAppendableStructMachine)
+
+    @classmethod
+    def build_serializer(cls, machine: Machine, use_version_2: bool, endianness: Endianness, serialize_kind: SerializeKind):
+        if not isinstance(machine, cls.supported):
+            return None
+
+        gen = _CodeGen(use_version_2, endianness)
+        gen.active.add(machine.type)
+        gen.serialize(machine, "value", serialize_kind, KeyEnabled.InKeylist)
+        gen.flush_serialize()
+        gen.emit("buffer._pos = pos")
+
+        m = gen.const(machine, '_m')
+        return gen.function("serialize", "buffer, value", gen.lines, [
+            "Exception",
+            "# Let the machine either do it right or raise a descriptive exception",
+            "buffer._pos = start",
+            "buffer._bytes[start:buffer._size] = bytes(buffer._size - start)",
+            f"{m}.serialize(buffer, value, {gen.const(serialize_kind)})"
+        ])
+
+    @classmethod
+    def build_deserializer(cls, machine: Machine, use_version_2: bool, endianness: Endianness, deserialize_kind: DeserializeKind):
+        if not isinstance(machine, cls.supported):
+            return None
+
+        gen = _CodeGen(use_version_2, endianness)
+        gen.active.add(machine.type)
+        expr = gen.deserialize(machine, deserialize_kind, KeyEnabled.InKeylist)
+        gen.flush_deserialize()
+        gen.emit("buffer._pos = pos")
+        gen.emit(f"return {expr}")
+
+        m = gen.const(machine, '_m')
+        return gen.function("deserialize", "buffer", gen.lines, [
+            "_CompiledFallback",
+            "buffer._pos = start",
+            f"return {m}.deserialize(buffer, {gen.const(deserialize_kind)})"
+        ])
+
+    @classmethod
+    def padding_free(cls, machine: Machine, use_version_2: bool) -> bool:
+        """Whether serializing a data sample with `machine` writes every byte up to the end
+        of the sample, i.e. no alignment can ever skip over bytes. Buffers that are reused
+        for such types need no zeroing between samples.
+        """
+        try:
+            _PaddingScan(use_version_2).scan(machine, 0)
+        except _PaddingHole:
+            return False
+        return True
+
+
+def _fast_constructible(datatype: type, names) -> bool:
+    """Whether the only thing __init__ of datatype does is assign the members, which is the case
+    for the __init__ generated by dataclasses if there is no __post_init__."""
+    if not is_dataclass(datatype) or hasattr(datatype, '__post_init__'):
+        return False
+    if datatype.__setattr__ is not object.__setattr__ and not datatype.__dataclass_params__.frozen:
+        return False
+    dataclass_fields = fields(datatype)
+    if not all(f.init for f in dataclass_fields) or {f.name for f in dataclass_fields} != set(names):
+        return False
+    owner = next(klass for klass in datatype.__mro__ if '__init__' in vars(klass))
+    init = owner.__init__
+    # dataclasses compiles the __init__ it generates from source, user code has a file name
+    return is_dataclass(owner) and getattr(getattr(init, '__code__', None), 'co_filename', None) == '<string>' \
+        and init.__qualname__ == f"{owner.__qualname__}.__init__"
+
+
+def build_constructor(datatype: type):
+    """Function creating an instance of datatype from the values of all its members, passed positionally
+    in member order. Unless the fast_construct annotation says otherwise it creates the instance with
+    object.__new__ and assigns the members if that is equivalent to calling __init__."""
+    names = list(get_extended_type_hints(datatype))
+    fast = get_idl_annotations(datatype).get("fast_construct")
+    if fast is None:
+        fast = _fast_constructible(datatype, names)
+
+    values = [f"v{i}" for i in range(len(names))]
+    if not fast:
+        body = [f"    return _T({', '.join(f'{name}={value}' for name, value in zip(names, values))})"]
+    elif datatype.__setattr__ is object.__setattr__:
+        body = ["    obj = _new(_T)"] + [f"    obj.{name} = {value}" for name, value in zip(names, values)] + ["    return obj"]
+    else:
+        # Frozen dataclasses refuse assignments, the members are set like their __init__ does
+        body = ["    obj = _new(_T)"] + [f"    _set(obj, {name!r}, {value})" for name, value in zip(names, values)] + \
+            ["    return obj"]
+
+    source = "\n".join([f"def construct({', '.join(values)}):"] + body)
+    namespace = {'_T': datatype, '_new': object.__new__, '_set': object.__setattr__}
+    exec(compile(source, f"<constructor {datatype.__name__}>", "exec"), namespace)
+    construct = namespace['construct']
+    construct.source = source
+    return construct
+
+
+class _PaddingHole(Exception):
+    pass
+
+
+class _PaddingScan:
+    # Follows the position modulo the maximum alignment, None once it depends on the data
+    def __init__(self, use_version_2: bool):
+        self.align_max = 4 if use_version_2 else 8
+        self.active = set()
+
+    def fixed(self, offset, alignment, size):
+        alignment = min(alignment, self.align_max)
+        if alignment > 1 and (offset is None or offset % alignment):
+            raise _PaddingHole()
+        return None if offset is None else (offset + size) % self.align_max
+
+    def scan(self, machine, offset):
+        if isinstance(machine, NoneMachine):
+            return offset
+        elif isinstance(machine, (PrimitiveMachine, BitBoundEnumMachine, BitMaskMachine)):
+            return self.fixed(offset, machine.alignment, machine.size)
+        elif isinstance(machine, EnumMachine):
+            return self.fixed(offset, 4, 4)
+        elif isinstance(machine, CharMachine):
+            return self.fixed(offset, 1, 1)
+        elif isinstance(machine, ByteArrayMachine):
+            return self.fixed(offset, 1, machine.size)
+        elif isinstance(machine, PlainCdrV2ArrayOfPrimitiveMachine):
+            return self.fixed(offset, machine.alignment, machine.size)
+        elif isinstance(machine, (StringMachine, BytesMachine)):
+            self.fixed(offset, 4, 4)
+            return None
+        elif isinstance(machine, PlainCdrV2SequenceOfPrimitiveMachine):
+            offset = self.fixed(offset, 4, 4)
+            self.fixed(offset, machine.alignment, machine.size)
+            return None
+        elif isinstance(machine, SequenceMachine) and not machine.add_size_header:
+            self.fixed(offset, 4, 4)
+            self.scan(machine.submachine, None)
+            return None
+        elif isinstance(machine, ArrayMachine) and not machine.add_size_header:
+            # The position modulo the alignment cycles, so a hole shows up in the first elements
+            for _ in range(min(machine.size, self.align_max)):
+                offset = self.scan(machine.submachine, offset)
+            if offset is None or machine.size <= self.align_max:
+                return offset
+            for _ in range(machine.size - self.align_max):
+                offset = self.scan(machine.submachine, offset)
+            return offset
+        elif isinstance(machine, StructMachine):
+            for submachine in machine.members_machines.values():
+                offset = self.scan(submachine, offset)
+            return offset
+        elif isinstance(machine, InstanceMachine) and machine.type not in self.active:
+            idl = machine.type.__idl__
+            if not idl._populated:
+                idl.populate()
+            self.active.add(machine.type)
+            offset = self.scan(idl.v2_machine if machine.use_version_2 else idl.v1_machine, offset)
+            self.active.remove(machine.type)
+            return offset
+        # Optionals, unions, mutable and appendable types, recursion: assume the worst
+        raise _PaddingHole()
+
+
+try:
+    from cyclonedds import _cdrenc
+except ImportError:
+    _cdrenc = None
+
+
+class NativeCodecBuilder:
+    """Translate the machine tree of a type into a program for the native encoder.
+
+    The program is a tree of tuples that mirrors the machines one to one, the C side
+    (``clayer/cdrenc.c``) interprets it and writes straight into the bytearray of a
+    :class:`Buffer`. Like the compiled serializers of :class:`CodecBuilder` the machine
+    redoes the sample when the native encoder raises, so results and error messages
+    are the same as with the machines.
+    """
+
+    # Op codes, must be kept in sync with clayer/cdrenc.c
+    OP_NONE = 0
+    OP_PRIMITIVE = 1
+    OP_CHAR = 2
+    OP_STRING = 3
+    OP_BYTES = 4
+    OP_BYTEARRAY = 5
+    OP_ARRAY = 6
+    OP_SEQUENCE = 7
+    OP_PLAIN_ARRAY = 8
+    OP_PLAIN_SEQUENCE = 9
+    OP_ENUM = 10
+    OP_BITMASK = 11
+    OP_STRUCT = 12
+    OP_INSTANCE = 13
+    OP_OPTIONAL = 14
+    OP_UNION = 15
+    OP_MAPPING = 16
+    OP_MUTABLE = 17
+
+    kinds = {
+        SerializeKind.DataSample: 0,
+        SerializeKind.KeyDefinitionOrder: 1,
+        SerializeKind.KeyNormalized: 2
+    }
+
+    def __init__(self):
+        self.instances = {}
+
+    @staticmethod
+    def available() -> bool:
+        return _cdrenc is not None
+
+    def program(self, machine: Machine) -> tuple:
+        if isinstance(machine, NoneMachine):
+            return (self.OP_NONE,)
+        elif isinstance(machine, PrimitiveMachine):
+            return (self.OP_PRIMITIVE, ord(machine.code), machine.size, machine.alignment)
+        elif isinstance(machine, CharMachine):
+            return (self.OP_CHAR,)
+        elif isinstance(machine, StringMachine):
+            return (self.OP_STRING, machine.bound or 0)
+        elif isinstance(machine, BytesMachine):
+            return (self.OP_BYTES, machine.bound or 0)
+        elif isinstance(machine, ByteArrayMachine):
+            return (self.OP_BYTEARRAY, machine.size)
+        elif isinstance(machine, ArrayMachine):
+            return (self.OP_ARRAY, self.program(machine.submachine), machine.size, machine.add_size_header)
+        elif isinstance(machine, SequenceMachine):
+            return (self.OP_SEQUENCE, self.program(machine.submachine),
+                    -1 if machine.maxlen is None else machine.maxlen, machine.add_size_header)
+        elif isinstance(machine, PlainCdrV2ArrayOfPrimitiveMachine):
+            return (self.OP_PLAIN_ARRAY, ord(machine.code[-1]), machine.size // machine.length,
+                    machine.alignment, machine.length)
+        elif isinstance(machine, PlainCdrV2SequenceOfPrimitiveMachine):
+            return (self.OP_PLAIN_SEQUENCE, ord(machine.code), machine.size, machine.alignment,
+                    -1 if machine.max_length is None else machine.max_length)
+        elif isinstance(machine, EnumMachine):
+            return (self.OP_ENUM, ord('I'), 4, 4)
+        elif isinstance(machine, BitBoundEnumMachine):
+            return (self.OP_ENUM, ord(machine.code), machine.size, machine.alignment)
+        elif isinstance(machine, BitMaskMachine):
+            return (self.OP_BITMASK, ord(machine.code), machine.size, machine.alignment)
+        elif isinstance(machine, (StructMachine, DelimitedCdrAppendableStructMachine)):
+            members = machine.members_machines if isinstance(machine, StructMachine) else machine.member_machines
+            keylist = machine.keylist or []
+            # Interned names hit the attribute lookup cache of the type
+            return (
+                self.OP_STRUCT,
+                tuple((sys.intern(name), self.program(m), name in keylist) for name, m in members.items()),
+                bool(machine.keylist),
+                isinstance(machine, DelimitedCdrAppendableStructMachine)
+            )
+        elif isinstance(machine, InstanceMachine):
+            # Recursive types refer back to the program through the cell
+            key = (machine.type, machine.use_version_2)
+            if key not in self.instances:
+                self.instances[key] = cell = [None]
+                idl = machine.type.__idl__
+                if not idl._populated:
+                    idl.populate()
+                cell[0] = self.program(idl.v2_machine if machine.use_version_2 else idl.v1_machine)
+            return (self.OP_INSTANCE, self.instances[key])
+        elif isinstance(machine, OptionalMachine):
+            return (self.OP_OPTIONAL, self.program(machine.submachine), machine.memberid_muflag, machine.use_version_2)
+        elif isinstance(machine, (UnionMachine, DelimitedCdrAppendableUnionMachine)):
+            return (
+                self.OP_UNION,
+                self.program(machine.discriminator),
+                {label: self.program(m) for label, m in machine.labels_submachines.items()},
+                None if machine.default is None else self.program(machine.default),
+                machine.discriminator_is_key,
+                isinstance(machine, DelimitedCdrAppendableUnionMachine)
+            )
+        elif isinstance(machine, MappingMachine):
+            return (self.OP_MAPPING, self.program(machine.key_machine), self.program(machine.value_machine))
+        elif isinstance(machine, PLCdrMutableStructMachine):
+            def member(m: MutableMember):
+                return (sys.intern(m.name), self.program(m.machine), m.key, m.optional, m.lentype.value,
+                        m.must_understand, m.memberid, m.header)
+            return (
+                self.OP_MUTABLE,
+                tuple(member(m) for m in machine.mutablemembers),
+                tuple(member(m) for m in sorted(machine.mutablemembers, key=lambda x: x.memberid)),
+                bool(machine.keylist),
+                machine.use_version_2
+            )
+        raise TypeError(f"No native encoding for {machine}")
+
+    @classmethod
+    def build_serializer(cls, machine: Machine, use_version_2: bool, endianness: Endianness, serialize_kind: SerializeKind):
+        if _cdrenc is None:
+            return None
+
+        program = cls().program(machine)
+        encode = _cdrenc.encode
+        little = endianness == Endianness.Little
+        kind = cls.kinds[serialize_kind]
+
+        def serialize(buffer, value):
+            start = buffer._pos
+            try:
+                buffer._pos = encode(program, value, buffer._bytes, start, buffer._align_offset, buffer._align_max, little, kind)
+                buffer._size = len(buffer._bytes)
+            except Exception:
+                # Let the machine either do it right or raise a descriptive exception
+                buffer._size = len(buffer._bytes)
+                buffer._pos = start
+                buffer._bytes[start:buffer._size] = bytes(buffer._size - start)
+                machine.serialize(buffer, value, serialize_kind)
+
+        serialize.program = program
+        return serialize
@@ -0,0 +1,209 @@
+"""
+ * Copyright(c) 2021 to 2022 ZettaScale Technology and others
+ *
+ * This program and the accompanying materials are made available under the
+ * terms of the Eclipse Public License v. 2.0 which is available at
+ * http://www.eclipse.org/legal/epl-2.0, or the Eclipse Distribution License
+ * v. 1.0 which is available at
+ * http://www.eclipse.org/org/documents/edl-v10.php.
+ *
+ * SPDX-License-Identifier: EPL-2.0 OR BSD-3-Clause
+"""
+
+from typing import List, Optional, Tuple, Any
+
+from ._machinery import PrimitiveMachine, CharMachine, ByteArrayMachine, ArrayMachine, EnumMachine, \
+    BitBoundEnumMachine, BitMaskMachine, PlainCdrV2ArrayOfPrimitiveMachine, StructMachine, \
+    DelimitedCdrAppendableStructMachine, InstanceMachine
+from . import types
+
+
+# Types without strings, sequences, optionals, unions or mutable structs serialize every sample
+# into the same bytes layout. The layout is described by a small tree, which is turned into
+# NumPy dtypes: one that matches the serialized data (with the byte order of the data and its
+# padding) and one native, aligned dtype for the arrays handed to the user. Decoding a batch is
+# then a single copy of the serialized samples and a dtype conversion done by NumPy.
+#
+# Layout nodes:
+#   ('prim', code, size)                        NumPy type code and size
+#   ('array', node, length)
+#   ('struct', [(name, node, offset)], size)    offsets relative to the first member
+
+
+def _align(pos: int, alignment: int, align_max: int) -> int:
+    alignment = min(alignment, align_max)
+    return (pos + alignment - 1) & ~(alignment - 1)
+
+
+def _prim(pos: int, align_max: int, code: str, alignment: int, size: int):
+    alignment = min(alignment, align_max)
+    pos = _align(pos, alignment, align_max)
+    return ('prim', code, size), pos, pos + size, alignment
+
+
+def _layout(machine, pos: int, align_max: int) -> Tuple[tuple, int, int, int]:
+    """Returns the layout node of machine serialized at pos, where its data begins and ends and its alignment."""
+    if isinstance(machine, (PrimitiveMachine, BitBoundEnumMachine, BitMaskMachine)):
+        return _prim(pos, align_max, machine.code, machine.alignment, machine.size)
+    elif isinstance(machine, EnumMachine):
+        return _prim(pos, align_max, 'I', 4, 4)
+    elif isinstance(machine, CharMachine):
+        return _prim(pos, align_max, 'S1', 1, 1)
+    elif isinstance(machine, ByteArrayMachine):
+        return ('array', ('prim', 'B', 1), machine.size), pos, pos + machine.size, 1
+    elif isinstance(machine, PlainCdrV2ArrayOfPrimitiveMachine):
+        code, alignment, size, _ = types._type_code_align_size_default_mapping[machine.subtype]
+        node, begin, _, alignment = _prim(pos, align_max, code, alignment, size)
+        return ('array', node, machine.length), begin, begin + machine.size, alignment
+    elif isinstance(machine, ArrayMachine):
+        if machine.add_size_header:
+            # The delimiter of an array of fixed size elements is a constant, it is skipped
+            pos = _align(pos, 4, align_max) + 4
+        # Elements start at a multiple of their alignment, so they all have the same padding
+        _, _, _, alignment = _layout(machine.submachine, pos, align_max)
+        start = _align(pos, alignment, align_max)
+        node, begin, end, alignment = _layout(machine.submachine, start, align_max)
+        stride = _align(end - start, alignment, align_max)
+        if node[0] == 'struct':
+            node = ('struct', node[1], stride)
+        elif stride != end - begin:
+            raise TypeError("array elements are not evenly spaced")
+        return ('array', node, machine.size), begin, end + stride * (machine.size - 1), alignment
+    elif isinstance(machine, InstanceMachine):
+        idl = machine.type.__idl__
+        idl.populate()
+        return _layout(idl.v2_machine if machine.use_version_2 else idl.v1_machine, pos, align_max)
+    elif isinstance(machine, (StructMachine, DelimitedCdrAppendableStructMachine)):
+        alignment = 1
+        if isinstance(machine, DelimitedCdrAppendableStructMachine):
+            # For a fixed size struct the delimiter is a constant, it is skipped
+            pos = _align(pos, 4, align_max) + 4
+            alignment = min(4, align_max)
+            members = machine.member_machines
+        else:
+            members = machine.members_machines
+
+        fields = []
+        for name, member in members.items():
+            node, begin, pos, member_alignment = _layout(member, pos, align_max)
+            fields.append((name, node, begin))
+            alignment = max(alignment, member_alignment)
+
+        if not fields:
+            raise TypeError("empty structs have no data")
+        first = fields[0][2]
+        # The last member can be an array of structs, NumPy counts trailing padding of its last element
+        size = max(pos, max(o + _size(f) for _, f, o in fields)) - first
+        return ('struct', [(n, f, o - first) for n, f, o in fields], size), first, pos, alignment
+
+    raise TypeError(f"{type(machine).__name__[:-len('Machine')].lower()} members are not fixed size")
+
+
+def _size(node: tuple) -> int:
+    if node[0] == 'array':
+        return _size(node[1]) * node[2]
+    return node[2]
+
+
+def _dtype(np, node: tuple, endian: str, aligned: bool):
+    if node[0] == 'prim':
+        return np.dtype(node[1] if node[1] == 'S1' else endian + node[1])
+    elif node[0] == 'array':
+        return np.dtype((_dtype(np, node[1], endian, aligned), (node[2],)))
+
+    _, fields, size = node
+    if aligned:
+        return np.dtype([(name, _dtype(np, f, endian, aligned)) for name, f, _ in fields], align=True)
+    return np.dtype({
+        'names': [name for name, _, _ in fields],
+        'formats': [_dtype(np, f, endian, aligned) for _, f, _ in fields],
+        'offsets': [offset for _, _, offset in fields],
+        'itemsize': size
+    })
+
+
+class ColumnarLayout:
+    """Fixed serialized layout of a datatype, for one XCDR version."""
+    def __init__(self, datatype: type, use_version_2: bool) -> None:
+        idl = datatype.__idl__
+        idl.populate()
+        node, begin, end, _ = _layout(idl.v2_machine if use_version_2 else idl.v1_machine, 0, 4 if use_version_2 else 8)
+        self.node = node
+        self.begin = begin
+        self.size = end
+        self._dtypes = {}
+
+    def dtype(self, np):
+        try:
+            return self._dtypes[None]
+        except KeyError:
+            dtype = self._dtypes[None] = _dtype(np, self.node, '=', True)
+            return dtype
+
+    def wire_dtype(self, np, little_endian: bool):
+        try:
+            return self._dtypes[little_endian]
+        except KeyError:
+            pass
+        _, fields, size = self.node
+        # Serialized samples start with the 4 byte encapsulation header
+        dtype = self._dtypes[little_endian] = np.dtype({
+            'names': [name for name, _, _ in fields],
+            'formats': [_dtype(np, f, '<' if little_endian else '>', False) for _, f, _ in fields],
+            'offsets': [4 + self.begin + offset for _, _, offset in fields],
+            'itemsize': 4 + self.begin + size
+        })
+        return dtype
+
+
+def columnar_layout(datatype: type, use_version_2: Optional[bool] = None) -> ColumnarLayout:
+    """Fixed layout of datatype, raises TypeError if it does not serialize to a fixed size."""
+    idl = datatype.__idl__
+    idl.populate()
+    if use_version_2 is None:
+        use_version_2 = idl.default_version == 2
+    try:
+        layout = idl._columnar[use_version_2]
+    except KeyError:
+        try:
+            layout = ColumnarLayout(datatype, use_version_2)
+        except TypeError as e:
+            layout = TypeError(f"{datatype.__name__} can not be decoded into a NumPy array, {e}")
+        idl._columnar[use_version_2] = layout
+    if isinstance(layout, TypeError):
+        raise layout
+    return layout
+
+
+def decode_columnar(datatype: type, samples: List[Tuple[Any, bool]]):
+    """Decode a list of (serialized data, valid data) into one structured NumPy array.
+
+    Rows of samples without valid data are zero.
+    """
+    import numpy as np
+
+    layout = columnar_layout(datatype)
+    result = np.zeros(len(samples), dtype=layout.dtype(np))
+
+    # Samples are grouped by encoding header and size, normally there is only one group
+    groups = {}
+    for index, (data, valid) in enumerate(samples):
+        if valid:
+            data = memoryview(data)
+            rows, datas = groups.setdefault((data[1], len(data)), ([], []))
+            rows.append(index)
+            datas.append(data)
+
+    for (encoding, stride), (rows, datas) in groups.items():
+        layout = columnar_layout(datatype, encoding > 3)
+        if not layout.size <= stride - 4 < layout.size + 4:
+            raise ValueError(f"Sample of {stride} bytes does not match the {layout.size + 4} byte layout of {datatype.__name__}")
+        dtype = layout.wire_dtype(np, encoding & 1 > 0)
+        # The wire dtype can extend over the padding at the end of a sample, the last one gets zeroes
+        raw = b"".join(datas) + bytes(max(dtype.itemsize - stride, 0))
+        wire = np.ndarray((len(rows),), dtype=dtype, buffer=raw, strides=(stride,))
+        if len(rows) == len(samples):
+            result[:] = wire
+        else:
+            result[rows] = wire
+    return result
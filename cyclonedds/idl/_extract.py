@@ -0,0 +1,193 @@
+"""
+ * Copyright(c) 2021 to 2022 ZettaScale Technology and others
+ *
+ * This program and the accompanying materials are made available under the
+ * terms of the Eclipse Public License v. 2.0 which is available at
+ * http://www.eclipse.org/legal/epl-2.0, or the Eclipse Distribution License
+ * v. 1.0 which is available at
+ * http://www.eclipse.org/org/documents/edl-v10.php.
+ *
+ * SPDX-License-Identifier: EPL-2.0 OR BSD-3-Clause
+"""
+
+import re
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from ._support import Buffer
+from ._machinery import PrimitiveMachine, ByteArrayMachine, ArrayMachine, PlainCdrV2ArrayOfPrimitiveMachine, \
+    StructMachine, DelimitedCdrAppendableStructMachine
+from ._lazy import _skip_plan, _merge, _skip, _uint32, _STATIC, _REPEAT
+from ._filter import _resolve
+from . import types
+
+
+# Member extractors decode a few members of a serialized sample, for filters that only look at
+# those. The way to a member is compiled into steps: skipping members with the skip plans of the
+# lazy views, entering the delimiter header of an appendable struct and, for members that have
+# no skip plan, decoding them to step over them.
+_ENTER, _SKIP, _DECODE = range(3)
+
+_member_path = re.compile(r"[A-Za-z_]\w*(?:\.[A-Za-z_]\w*|\[\d+\])*")
+_component = re.compile(r"([A-Za-z_]\w*)|\[(\d+)\]")
+
+
+def _parse_path(path: str) -> Tuple:
+    if not isinstance(path, str) or not _member_path.fullmatch(path):
+        raise ValueError(f"Invalid member path {path!r}, expected names and indexes like 'header.stamp' or 'points[2].x'")
+    return tuple(name or int(index) for name, index in _component.findall(path))
+
+
+class _Steps(list):
+    def skip(self, plan: tuple, align_max: int) -> None:
+        if self and self[-1][0] == _SKIP:
+            self[-1] = (_SKIP, _merge(self[-1][1] + plan, align_max))
+        else:
+            self.append((_SKIP, _merge(plan, align_max)))
+
+    def members(self, machine, where: str) -> dict:
+        if isinstance(machine, DelimitedCdrAppendableStructMachine):
+            self.append((_ENTER, None))
+            return machine.member_machines
+        elif isinstance(machine, StructMachine):
+            return machine.members_machines
+        raise TypeError(f"{where} is not a struct")
+
+    def skip_members(self, members: dict, first: int, stop: int, use_version_2: bool) -> None:
+        for member in list(members.values())[first:stop]:
+            plan = _skip_plan(member, use_version_2)
+            if plan is None:
+                self.append((_DECODE, member))
+            else:
+                self.skip(plan, 4 if use_version_2 else 8)
+
+
+def _member_steps(machine, path: Tuple, use_version_2: bool, where: str) -> Tuple[_Steps, Any]:
+    align_max = 4 if use_version_2 else 8
+    steps = _Steps()
+
+    for component in path:
+        machine = _resolve(machine)
+        if isinstance(component, str):
+            members = steps.members(machine, where)
+            if component not in members:
+                raise TypeError(f"{where} has no member {component}")
+            steps.skip_members(members, 0, list(members).index(component), use_version_2)
+            machine = members[component]
+            where = f"{where}.{component}"
+            continue
+
+        if isinstance(machine, ByteArrayMachine) and component < machine.size:
+            steps.skip(((_STATIC, component, 1, None),), align_max)
+            machine = PrimitiveMachine(types.uint8)
+        elif isinstance(machine, PlainCdrV2ArrayOfPrimitiveMachine) and component < machine.length:
+            element = PrimitiveMachine(machine.subtype)
+            steps.skip(((_STATIC, element.size * component, element.alignment, None),), align_max)
+            machine = element
+        elif isinstance(machine, ArrayMachine) and component < machine.size:
+            if machine.add_size_header:
+                steps.skip(((_STATIC, 4, 4, None),), align_max)
+            if component:
+                plan = _skip_plan(machine.submachine, use_version_2)
+                if plan is None:
+                    steps.extend([(_DECODE, machine.submachine)] * component)
+                else:
+                    steps.skip(((_REPEAT, component, 0, plan),), align_max)
+            machine = machine.submachine
+        else:
+            raise TypeError(f"{where}[{component}] is not an element of an array")
+        where = f"{where}[{component}]"
+
+    return steps, machine
+
+
+class _Program:
+    """The steps to the members of one XCDR version. The top level members are walked once: segments
+    step from one top level member that holds a path to the next, paths continue from those."""
+
+    def __init__(self, datatype: type, parsed: List[Tuple], use_version_2: bool) -> None:
+        idl = datatype.__idl__
+        idl.populate()
+        head = _Steps()
+        members = head.members(_resolve(idl.v2_machine if use_version_2 else idl.v1_machine), datatype.__name__)
+        names = list(members)
+        for path in parsed:
+            if path[0] not in members:
+                raise TypeError(f"{datatype.__name__} has no member {path[0]}")
+
+        indexes = sorted({names.index(path[0]) for path in parsed})
+        self.segments = []
+        previous = 0
+        for index in indexes:
+            steps = head if not self.segments else _Steps()
+            steps.skip_members(members, previous, index, use_version_2)
+            self.segments.append(steps)
+            previous = index
+
+        self.paths = []
+        for path in parsed:
+            steps, machine = _member_steps(members[path[0]], path[1:], use_version_2, f"{datatype.__name__}.{path[0]}")
+            self.paths.append((indexes.index(names.index(path[0])), steps, machine))
+
+
+def _walk(steps: list, buffer: Buffer, pos: int, end: Optional[int]) -> Tuple[int, Optional[int]]:
+    data = buffer._bytes
+    offset = buffer._align_offset
+    align_max = buffer._align_max
+    endian = buffer._endian
+    for kind, arg in steps:
+        if end is not None and pos >= end:
+            break
+        if kind == _SKIP:
+            pos = _skip(arg, data, pos, offset, align_max, endian)
+        elif kind == _ENTER:
+            pos = ((pos - offset + 3) & -4) + offset
+            end = pos + 4 + _uint32[endian](data, pos)[0]
+            pos += 4
+        else:
+            arg.deserialize(buffer.seek(pos))
+            pos = buffer.tell()
+    return pos, end
+
+
+class MemberExtractor:
+    """Decodes the members at a list of paths, like ``"header.seq"`` or ``"points[1].x"``, from
+    serialized samples of datatype without deserializing the rest of the sample."""
+
+    def __init__(self, datatype: type, paths: Sequence[str]) -> None:
+        self.datatype = datatype
+        self.paths = list(paths)
+        self._parsed = [_parse_path(path) for path in self.paths]
+        self._programs: Dict[bool, _Program] = {}
+        # Check the paths exist, the other version is compiled on first use
+        self._program(datatype.__idl__.default_version == 2)
+
+    def _program(self, use_version_2: bool) -> _Program:
+        try:
+            return self._programs[use_version_2]
+        except KeyError:
+            program = self._programs[use_version_2] = _Program(self.datatype, self._parsed, use_version_2)
+            return program
+
+    def extract(self, data: bytes) -> Tuple:
+        """Return the values of the members in serialized data, including its encapsulation header.
+
+        Members that an older version of an appendable type did not have get their default value.
+        """
+        buffer = Buffer(memoryview(data), align_offset=4)
+        self.datatype.__idl__._read_header(buffer, True, None)
+        program = self._program(buffer._align_max == 4)
+
+        pos, end = 4, None
+        starts = []
+        for steps in program.segments:
+            pos, end = _walk(steps, buffer, pos, end)
+            starts.append((pos, end))
+
+        values = []
+        for segment, steps, machine in program.paths:
+            pos, end = _walk(steps, buffer, *starts[segment])
+            if end is not None and pos >= end:
+                values.append(machine.default_initialize())
+            else:
+                values.append(machine.deserialize(buffer.seek(pos)))
+        return tuple(values)
@@ -0,0 +1,442 @@
+"""
+ * Copyright(c) 2021 to 2022 ZettaScale Technology and others
+ *
+ * This program and the accompanying materials are made available under the
+ * terms of the Eclipse Public License v. 2.0 which is available at
+ * http://www.eclipse.org/legal/epl-2.0, or the Eclipse Distribution License
+ * v. 1.0 which is available at
+ * http://www.eclipse.org/org/documents/edl-v10.php.
+ *
+ * SPDX-License-Identifier: EPL-2.0 OR BSD-3-Clause
+"""
+
+import re
+import struct
+from array import array
+from enum import Enum
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from ._machinery import PrimitiveMachine, CharMachine, StringMachine, ByteArrayMachine, ArrayMachine, \
+    EnumMachine, BitBoundEnumMachine, BitMaskMachine, PlainCdrV2ArrayOfPrimitiveMachine, StructMachine, \
+    DelimitedCdrAppendableStructMachine, InstanceMachine
+from ._lazy import _skip_plan, _STATIC, _SIZED, _REPEAT, _REPEAT_SIZED, _DELIMITED, _OPTIONAL
+from . import types
+
+
+# Filter expressions are a subset of the DDS content filter SQL:
+#
+#   expression := condition | expression AND expression | expression OR expression
+#                 | NOT expression | ( expression )
+#   condition  := operand op operand | operand [NOT] BETWEEN operand AND operand
+#                 | operand [NOT] LIKE operand
+#   op         := = | <> | != | < | <= | > | >=
+#   operand    := field | number | 'string' | TRUE | FALSE | %n
+#   field      := name ( .name | [index] )*
+#
+# They are compiled into a program that clayer/cdrfilter.c evaluates on the serialized
+# sample, which must be kept in sync with the constants below. The program is an array of
+# 32 bit words:
+#
+#   expression size E, number of fields F
+#   E words of expression code, which sets a boolean register:
+#       CMP op lhs rhs | LIKE lhs rhs | NOT | JUMP_FALSE target | JUMP_TRUE target
+#     operands >= 0 are fields, -1 - k is constant k; targets index the expression code
+#   for every field the offsets of its XCDR1 and XCDR2 code, 0 if it can't be found
+#   field code: the skip steps of the lazy views to get to the field, then LOAD kind
+#
+# Constants are 16 bytes each: class, length and an int64, uint64, double or the offset
+# of the string in the constants blob. Parameters only change the constants, so they can
+# be replaced without touching the program.
+
+_CMP, _LIKE, _NOT, _JUMP_FALSE, _JUMP_TRUE = 1, 2, 3, 4, 5
+_EQ, _NE, _LT, _LE, _GT, _GE = range(6)
+_NAV_STATIC, _NAV_SIZED, _NAV_DELIMITED, _NAV_REPEAT, _NAV_REPEAT_SIZED, _NAV_OPTIONAL, _NAV_ENTER, \
+    _NAV_LOAD = range(1, 9)
+_INT, _UINT, _FLOAT, _STRING = range(4)
+
+_kinds = {'b': 1, 'B': 2, 'h': 3, 'H': 4, 'i': 5, 'I': 6, 'q': 7, 'Q': 8, 'f': 9, 'd': 10, '?': 11}
+_KIND_CHAR, _KIND_STRING = 12, 13
+_operators = {'=': _EQ, '<>': _NE, '!=': _NE, '<': _LT, '<=': _LE, '>': _GT, '>=': _GE}
+_keywords = {'AND', 'OR', 'NOT', 'BETWEEN', 'LIKE', 'TRUE', 'FALSE'}
+_constant = struct.Struct('=IIQ')
+_token = re.compile(r"""
+    \s*(?:
+      (?P<float>(?:\d+\.\d*|\.\d+)(?:[eE][+-]?\d+)?|\d+[eE][+-]?\d+)
+    | (?P<int>0[xX][0-9a-fA-F]+|\d+)
+    | '(?P<string>(?:[^']|'')*)'
+    | %(?P<param>\d+)
+    | (?P<name>[A-Za-z_][A-Za-z0-9_]*)
+    | (?P<op><=|>=|<>|!=|[=<>()\[\].,-])
+    )""", re.VERBOSE)
+
+
+class _Parser:
+    def __init__(self, expression: str) -> None:
+        self.expression = expression
+        self.tokens: List[Tuple[str, Any, int]] = []
+        pos = 0
+        while expression[pos:].strip():
+            m = _token.match(expression, pos)
+            if not m:
+                self.error("unexpected character", len(expression) - len(expression[pos:].lstrip()))
+            kind = m.lastgroup
+            value, start = m.group(kind), m.start(kind)
+            if kind == 'name' and value.upper() in _keywords:
+                kind, value = 'keyword', value.upper()
+            elif kind == 'string':
+                value = value.replace("''", "'")
+            self.tokens.append((kind, value, start))
+            pos = m.end()
+        self.tokens.append(('end', None, len(expression)))
+        self.index = 0
+
+    def error(self, message: str, pos: Optional[int] = None):
+        if pos is None:
+            pos = self.tokens[self.index][2]
+        raise ValueError(f"Invalid filter expression {self.expression!r}: {message} at position {pos}")
+
+    def peek(self, kind: str, value: Any = None) -> bool:
+        tkind, tvalue, _ = self.tokens[self.index]
+        return tkind == kind and (value is None or tvalue == value)
+
+    def accept(self, kind: str, value: Any = None) -> Optional[Any]:
+        if self.peek(kind, value):
+            self.index += 1
+            return self.tokens[self.index - 1][1] if value is None else True
+        return None
+
+    def expect(self, kind: str, value: Any = None, what: str = None) -> Any:
+        if not self.peek(kind, value):
+            self.error(f"expected {what or value or kind}")
+        return self.accept(kind, value)
+
+    def parse(self) -> tuple:
+        node = self.parse_or()
+        if not self.peek('end'):
+            self.error("expected AND, OR or the end of the expression")
+        return node
+
+    def parse_or(self) -> tuple:
+        node = self.parse_and()
+        while self.accept('keyword', 'OR'):
+            node = ('or', node, self.parse_and())
+        return node
+
+    def parse_and(self) -> tuple:
+        node = self.parse_not()
+        while self.accept('keyword', 'AND'):
+            node = ('and', node, self.parse_not())
+        return node
+
+    def parse_not(self) -> tuple:
+        if self.accept('keyword', 'NOT'):
+            return ('not', self.parse_not())
+        if self.peek('op', '('):
+            # A parenthesized expression, unless it turns out to be an operand
+            start = self.index
+            self.accept('op', '(')
+            try:
+                node = self.parse_or()
+                self.expect('op', ')')
+                return node
+            except ValueError:
+                self.index = start
+        return self.parse_condition()
+
+    def parse_condition(self) -> tuple:
+        lhs = self.parse_operand()
+        negate = bool(self.accept('keyword', 'NOT'))
+        if self.accept('keyword', 'BETWEEN'):
+            low = self.parse_operand()
+            self.expect('keyword', 'AND')
+            high = self.parse_operand()
+            node = ('and', self.comparison(_GE, lhs, low), self.comparison(_LE, lhs, high))
+        elif self.accept('keyword', 'LIKE'):
+            pattern = self.parse_operand()
+            if lhs[0] != 'field' or pattern[0] == 'field':
+                self.error("LIKE needs a field on the left and a pattern on the right")
+            node = ('like', lhs, pattern)
+        elif negate:
+            self.error("expected BETWEEN or LIKE")
+        else:
+            op = self.expect('op', what="a comparison operator")
+            if op not in _operators:
+                self.error("expected a comparison operator")
+            node = self.comparison(_operators[op], lhs, self.parse_operand())
+        return ('not', node) if negate else node
+
+    def comparison(self, op: int, lhs: tuple, rhs: tuple) -> tuple:
+        if lhs[0] != 'field' and rhs[0] != 'field':
+            self.error("a comparison needs a field")
+        return ('cmp', op, lhs, rhs)
+
+    def parse_operand(self) -> tuple:
+        sign = -1 if self.accept('op', '-') else 1
+        if self.peek('int'):
+            text = self.accept('int')
+            return ('const', sign * int(text, 16 if text[:2] in ('0x', '0X') else 10))
+        elif self.peek('float'):
+            return ('const', sign * float(self.accept('float')))
+        elif sign < 0:
+            self.error("expected a number")
+        elif self.peek('string'):
+            return ('const', self.accept('string'))
+        elif self.peek('param'):
+            return ('param', int(self.accept('param')))
+        elif self.peek('keyword', 'TRUE') or self.peek('keyword', 'FALSE'):
+            return ('const', self.accept('keyword')[0] == 'T')
+        elif self.peek('name'):
+            path = [self.accept('name')]
+            while True:
+                if self.accept('op', '.'):
+                    path.append(self.expect('name'))
+                elif self.accept('op', '['):
+                    path.append(int(self.expect('int', what="an index")))
+                    self.expect('op', ']')
+                else:
+                    return ('field', tuple(path))
+        elif self.accept('op', '('):
+            operand = self.parse_operand()
+            self.expect('op', ')')
+            return operand
+        self.error("expected a field, constant or parameter")
+
+
+class _Field:
+    """A member the filter compares, the kind of values and its code for both XCDR versions."""
+    def __init__(self, datatype: type, path: Tuple) -> None:
+        self.name = _path_name(path)
+        codes = []
+        for use_version_2 in (False, True):
+            try:
+                codes.append(_field_code(datatype, path, use_version_2))
+            except _Unfilterable as e:
+                codes.append(e)
+
+        default = codes[datatype.__idl__.default_version == 2]
+        if isinstance(default, Exception):
+            raise TypeError(f"Can not filter on {self.name} of {datatype.__name__}: {default}")
+        self.codes = [c if isinstance(c, list) else None for c in codes]
+        self.category, self.enum = _field_category(default[-1], default.enum)
+
+    def constant(self, value: Any) -> Tuple[int, Any]:
+        if isinstance(value, Enum):
+            if self.enum is not None and not isinstance(value, self.enum):
+                raise TypeError(f"{self.name} can not be compared with {value!r}")
+            value = value.value
+        if self.category == 'string':
+            if isinstance(value, str):
+                return _STRING, value.encode('utf-8')
+        elif isinstance(value, str):
+            if self.enum is not None and value in self.enum.__members__:
+                return _INT, self.enum[value].value
+        elif isinstance(value, (bool, int)):
+            if value >= 1 << 63:
+                return _UINT, int(value)
+            return _INT, int(value)
+        elif isinstance(value, float):
+            return _FLOAT, value
+        raise TypeError(f"{self.name} can not be compared with {value!r}")
+
+
+class _Unfilterable(Exception):
+    pass
+
+
+class _Code(list):
+    enum = None
+
+
+def _path_name(path: Tuple) -> str:
+    return ''.join(f"[{p}]" if isinstance(p, int) else f".{p}" for p in path)[1:]
+
+
+def _field_category(kind: int, enum: Optional[type]) -> Tuple[str, Optional[type]]:
+    if kind in (_KIND_CHAR, _KIND_STRING):
+        return 'string', None
+    return ('enum' if enum else 'number'), enum
+
+
+def _resolve(machine):
+    if isinstance(machine, InstanceMachine):
+        idl = machine.type.__idl__
+        idl.populate()
+        return idl.v2_machine if machine.use_version_2 else idl.v1_machine
+    return machine
+
+
+def _skip_code(plan: tuple) -> List[int]:
+    code = []
+    for kind, size, align, body in plan:
+        if kind == _STATIC:
+            code += [_NAV_STATIC, size, align]
+        elif kind == _SIZED:
+            code += [_NAV_SIZED, size, align]
+        elif kind == _REPEAT:
+            body = _skip_code(body)
+            code += [_NAV_REPEAT, size, len(body)] + body
+        elif kind == _REPEAT_SIZED:
+            body = _skip_code(body)
+            code += [_NAV_REPEAT_SIZED, len(body)] + body
+        elif kind == _DELIMITED:
+            code += [_NAV_DELIMITED]
+        elif kind == _OPTIONAL:
+            body = _skip_code(body)
+            code += [_NAV_OPTIONAL, len(body)] + body
+    return code
+
+
+def _field_code(datatype: type, path: Tuple, use_version_2: bool) -> _Code:
+    idl = datatype.__idl__
+    idl.populate()
+    machine = idl.v2_machine if use_version_2 else idl.v1_machine
+    code = _Code()
+    where = datatype.__name__
+
+    for i, component in enumerate(path):
+        machine = _resolve(machine)
+        if isinstance(component, str):
+            if isinstance(machine, DelimitedCdrAppendableStructMachine):
+                code.append(_NAV_ENTER)
+                members = machine.member_machines
+            elif isinstance(machine, StructMachine):
+                members = machine.members_machines
+            else:
+                raise _Unfilterable(f"{where} is not a struct")
+            if component not in members:
+                raise _Unfilterable(f"{where} has no member {component}")
+            for name, member in members.items():
+                if name == component:
+                    break
+                plan = _skip_plan(member, use_version_2)
+                if plan is None:
+                    raise _Unfilterable(f"it follows {name}, which can not be skipped")
+                code += _skip_code(plan)
+            machine = members[component]
+        elif isinstance(machine, ByteArrayMachine) and component < machine.size:
+            code += [_NAV_STATIC, component, 1]
+            machine = PrimitiveMachine(types.uint8)
+        elif isinstance(machine, PlainCdrV2ArrayOfPrimitiveMachine) and component < machine.length:
+            element = PrimitiveMachine(machine.subtype)
+            code += [_NAV_STATIC, element.size * component, element.alignment]
+            machine = element
+        elif isinstance(machine, ArrayMachine) and component < machine.size:
+            if machine.add_size_header:
+                code += [_NAV_STATIC, 4, 4]
+            if component:
+                plan = _skip_plan(machine.submachine, use_version_2)
+                if plan is None:
+                    raise _Unfilterable(f"the elements of {where} can not be skipped")
+                body = _skip_code(plan)
+                code += [_NAV_REPEAT, component, len(body)] + body
+            machine = machine.submachine
+        else:
+            raise _Unfilterable(f"{where}[{component}] is not an element of an array")
+        where = _path_name(path[:i + 1])
+
+    machine = _resolve(machine)
+    if isinstance(machine, (PrimitiveMachine, BitMaskMachine)):
+        kind = _kinds[machine.code]
+    elif isinstance(machine, BitBoundEnumMachine):
+        kind = _kinds[machine.code]
+        code.enum = machine.enum
+    elif isinstance(machine, EnumMachine):
+        kind = _kinds['I']
+        code.enum = machine.enum
+    elif isinstance(machine, CharMachine):
+        kind = _KIND_CHAR
+    elif isinstance(machine, StringMachine):
+        kind = _KIND_STRING
+    else:
+        raise _Unfilterable("only primitive, enum, bitmask, char and string members can be compared")
+    code += [_NAV_LOAD, kind]
+    return code
+
+
+class FilterProgram:
+    """A filter expression compiled for the serialized samples of datatype."""
+
+    def __init__(self, datatype: type, expression: str) -> None:
+        self.datatype = datatype
+        self.expression = expression
+        self._fields: Dict[Tuple, int] = {}
+        self._field_list: List[_Field] = []
+        # Constants are (literal value or parameter number, field the value is compared with)
+        self._slots: List[Tuple[str, Any, _Field]] = []
+        self.parameter_count = 0
+
+        expr = []
+        self._emit(_Parser(expression).parse(), expr)
+
+        words = [len(expr), len(self._field_list)] + expr
+        table = len(words)
+        words += [0] * (2 * len(self._field_list))
+        for i, field in enumerate(self._field_list):
+            for version, code in enumerate(field.codes):
+                if code is not None:
+                    words[table + 2 * i + version] = len(words)
+                    words += code
+        self.code = array('I', [w & 0xffffffff for w in words]).tobytes()
+
+        # Literals are checked here, parameters when they are set
+        for source, value, field in self._slots:
+            if source == 'const':
+                field.constant(value)
+
+    def _field(self, path: Tuple) -> _Field:
+        if path not in self._fields:
+            self._fields[path] = len(self._field_list)
+            self._field_list.append(_Field(self.datatype, path))
+        return self._field_list[self._fields[path]]
+
+    def _operand(self, operand: tuple, other: tuple) -> int:
+        if operand[0] == 'field':
+            self._field(operand[1])
+            return self._fields[operand[1]]
+        if operand[0] == 'param':
+            self.parameter_count = max(self.parameter_count, operand[1] + 1)
+        self._slots.append((operand[0], operand[1], self._field(other[1])))
+        return -len(self._slots)
+
+    def _emit(self, node: tuple, code: List[int]) -> None:
+        if node[0] == 'cmp':
+            _, op, lhs, rhs = node
+            if lhs[0] == rhs[0] == 'field':
+                a, b = self._field(lhs[1]), self._field(rhs[1])
+                if (a.category == 'string') != (b.category == 'string'):
+                    raise TypeError(f"{a.name} can not be compared with {b.name}")
+            code += [_CMP, op, self._operand(lhs, rhs), self._operand(rhs, lhs)]
+        elif node[0] == 'like':
+            _, lhs, pattern = node
+            if self._field(lhs[1]).category != 'string':
+                raise TypeError(f"LIKE needs a string member, {self._field(lhs[1]).name} is not")
+            code += [_LIKE, self._operand(lhs, pattern), self._operand(pattern, lhs)]
+        elif node[0] == 'not':
+            self._emit(node[1], code)
+            code.append(_NOT)
+        else:
+            # AND and OR skip the right hand side when the left hand side decides
+            self._emit(node[1], code)
+            code += [_JUMP_FALSE if node[0] == 'and' else _JUMP_TRUE, 0]
+            at = len(code) - 1
+            self._emit(node[2], code)
+            code[at] = len(code)
+
+    def constants(self, parameters: Sequence[Any] = ()) -> bytes:
+        """The constants of the program for the given parameter values."""
+        if len(parameters) < self.parameter_count:
+            raise ValueError(f"The filter expression {self.expression!r} needs {self.parameter_count} parameters, "
+                             f"{len(parameters)} given")
+        entries, pool = [], []
+        offset = _constant.size * len(self._slots)
+        for source, value, field in self._slots:
+            cls, value = field.constant(parameters[value] if source == 'param' else value)
+            if cls == _STRING:
+                entries.append(_constant.pack(cls, len(value), offset))
+                pool.append(value)
+                offset += len(value)
+            elif cls == _FLOAT:
+                entries.append(_constant.pack(cls, 0, struct.unpack('=Q', struct.pack('=d', value))[0]))
+            else:
+                entries.append(_constant.pack(cls, 0, value & 0xffffffffffffffff))
+        return b''.join(entries + pool)
@@ -0,0 +1,245 @@
+"""
+ * Copyright(c) 2021 to 2022 ZettaScale Technology and others
+ *
+ * This program and the accompanying materials are made available under the
+ * terms of the Eclipse Public License v. 2.0 which is available at
+ * http://www.eclipse.org/legal/epl-2.0, or the Eclipse Distribution License
+ * v. 1.0 which is available at
+ * http://www.eclipse.org/org/documents/edl-v10.php.
+ *
+ * SPDX-License-Identifier: EPL-2.0 OR BSD-3-Clause
+"""
+
+import struct
+from typing import Any, List, Optional
+
+from ._support import Buffer, CdrKeyVMOpType
+from ._support import XCDR1Constants as XCDR1
+from ._machinery import StructMachine, DelimitedCdrAppendableStructMachine
+
+
+# Lazy views find the offsets of members by skipping over the members in front of them. Skipping
+# uses the skip-mode programs of the key machine (the same size logic the C key VM uses to step
+# over non-key members), so only the member that is accessed is decoded. Members with a program
+# that uses ops this interpreter does not know (unions, mutable types, recursion) are skipped by
+# decoding them, the value is then kept for when it is asked for.
+
+
+class _Unsupported(Exception):
+    pass
+
+
+# Skip steps are (kind, size, align, body) tuples, body holds the steps of a repeat or optional.
+_STATIC, _SIZED, _REPEAT, _REPEAT_SIZED, _DELIMITED, _OPTIONAL = range(6)
+
+
+def _skip_plan(machine, use_version_2: bool) -> Optional[tuple]:
+    try:
+        ops = machine.cdr_key_machine_op(True)
+        return _compile(ops, 0, len(ops), 4 if use_version_2 else 8)
+    except Exception:
+        return None
+
+
+def _compile(ops, i: int, stop: int, align_max: int) -> tuple:
+    steps = []
+    while i < stop:
+        op = ops[i]
+        if op.type == CdrKeyVMOpType.StreamStatic:
+            steps.append((_STATIC, op.size, op.align, None))
+        elif op.type == CdrKeyVMOpType.Stream4ByteSize:
+            steps.append((_SIZED, op.size, op.align, None))
+        elif op.type in (CdrKeyVMOpType.RepeatStatic, CdrKeyVMOpType.Repeat4ByteSize):
+            # value is the distance to the op after the matching EndRepeat
+            body = _compile(ops, i + 1, i + op.value - 1, align_max)
+            if op.type == CdrKeyVMOpType.RepeatStatic:
+                steps.append((_REPEAT, op.size, 0, body))
+            else:
+                steps.append((_REPEAT_SIZED, 0, 0, body))
+            i += op.value - 1
+        elif op.type == CdrKeyVMOpType.StructHeader and align_max == 4:
+            # The key VM only knows XCDR2, XCDR1 has no delimiter header to skip with
+            steps.append((_DELIMITED, 0, 4, None))
+        elif op.type == CdrKeyVMOpType.Optional:
+            # size is the distance to the op after the optional member
+            steps.append((_OPTIONAL, 0, 0, _compile(ops, i + 1, i + op.size, align_max)))
+            i += op.size - 1
+        else:
+            raise _Unsupported(op)
+        i += 1
+    return _merge(steps, align_max)
+
+
+def _merge(steps: list, align_max: int) -> tuple:
+    merged = []
+    for step in steps:
+        kind, size, align, body = step
+        if kind == _REPEAT and len(body) == 1 and body[0][0] == _STATIC and \
+                body[0][1] % max(min(body[0][2], align_max), 1) == 0:
+            # A repeat of a fixed stretch without padding is one longer stretch
+            kind, size, align, body = step = (_STATIC, size * body[0][1], body[0][2], None)
+
+        if kind == _STATIC and merged and merged[-1][0] == _STATIC:
+            _, psize, palign, _ = merged[-1]
+            needed = max(min(align, align_max), 1)
+            # No padding between the two if the end of the first is already aligned for the second
+            if needed == 1 or (needed <= max(min(palign, align_max), 1) and psize % needed == 0):
+                merged[-1] = (_STATIC, psize + size, palign, None)
+                continue
+        merged.append(step)
+    return tuple(merged)
+
+
+def _skip(steps: tuple, data, pos: int, offset: int, align_max: int, endian: str) -> int:
+    for kind, size, align, body in steps:
+        if kind == _STATIC:
+            if align > 1:
+                align = min(align, align_max)
+                pos = ((pos - offset + align - 1) & -align) + offset
+            pos += size
+        elif kind == _SIZED or kind == _REPEAT_SIZED or kind == _DELIMITED:
+            pos = ((pos - offset + 3) & -4) + offset
+            length = _uint32[endian](data, pos)[0]
+            pos += 4
+            if kind == _DELIMITED:
+                pos += length
+            elif kind == _REPEAT_SIZED:
+                for _ in range(length):
+                    pos = _skip(body, data, pos, offset, align_max, endian)
+            elif length:
+                if align > 1:
+                    align = min(align, align_max)
+                    pos = ((pos - offset + align - 1) & -align) + offset
+                pos += length * size
+        elif kind == _REPEAT:
+            for _ in range(size):
+                pos = _skip(body, data, pos, offset, align_max, endian)
+        elif align_max == 4:
+            # XCDR2 optional, a boolean flags presence
+            pos += 1
+            if data[pos - 1]:
+                pos = _skip(body, data, pos, offset, align_max, endian)
+        else:
+            # XCDR1 optional, a parameter header with the member size
+            pos = ((pos - offset + 3) & -4) + offset
+            header, membersize = _uint16x2[endian](data, pos)
+            pos += 4
+            if (header & XCDR1.PL_SHORT_PID_MASK) == XCDR1.PL_SHORT_PID_EXTENDED:
+                membersize = _uint32[endian](data, pos + 4)[0]
+                pos += 8
+            pos += membersize
+    return pos
+
+
+_uint32 = {e: struct.Struct(e + 'I').unpack_from for e in '<>'}
+_uint16x2 = {e: struct.Struct(e + 'HH').unpack_from for e in '<>'}
+
+
+class _LazyMember:
+    """Non-data descriptor: once a member is decoded it lives in the instance dict and the
+    descriptor is no longer consulted."""
+    __slots__ = ('index', 'name')
+
+    def __init__(self, index: int, name: str) -> None:
+        self.index = index
+        self.name = name
+
+    def __get__(self, view, owner=None):
+        if view is None:
+            return self
+        value = view._decode(self.index)
+        view.__dict__[self.name] = value
+        return value
+
+
+class LazyView:
+    """View on a serialized struct that decodes members when they are first accessed.
+
+    Views are created by :meth:`IdlStruct.deserialize_lazy<cyclonedds.idl.IdlStruct.deserialize_lazy>`
+    or by reading with ``lazy=True`` from a :class:`DataReader<cyclonedds.sub.DataReader>`. Decoded
+    members are cached on the view. Use :meth:`materialize` to get a regular instance of the datatype.
+    """
+
+    __slots__ = ('_buffer', '_offsets', '_end', 'sample_info', '__dict__')
+    _datatype: type = None
+    _names: List[str] = []
+    _machines: list = []
+    _plans: list = []
+    _appendable: bool = False
+
+    def __init__(self, buffer: Buffer) -> None:
+        self._end = None
+        if self._appendable:
+            buffer.align(4)
+            size = buffer.read('I', 4)
+            self._end = buffer.tell() + size
+        self._buffer = buffer
+        self._offsets = [buffer.tell()]
+        self.sample_info = None
+
+    def _absent(self, offset: int) -> bool:
+        # Members past the end of an appendable struct were not sent by an older writer
+        return self._end is not None and offset >= self._end
+
+    def _decode(self, index: int) -> Any:
+        buffer = self._buffer
+        offsets = self._offsets
+        while len(offsets) <= index:
+            i = len(offsets) - 1
+            if self._absent(offsets[i]):
+                offsets.append(offsets[i])
+                continue
+            plan = self._plans[i]
+            if plan is None:
+                buffer.seek(offsets[i])
+                self.__dict__.setdefault(self._names[i], self._machines[i].deserialize(buffer))
+                offsets.append(buffer.tell())
+            else:
+                offsets.append(_skip(plan, buffer._bytes, offsets[i], buffer._align_offset, buffer._align_max, buffer._endian))
+
+        if self._absent(offsets[index]):
+            return self._machines[index].default_initialize()
+        buffer.seek(offsets[index])
+        return self._machines[index].deserialize(buffer)
+
+    def materialize(self) -> Any:
+        """Decode all members that were not accessed yet and return an instance of the datatype."""
+        sample = self._datatype.__idl__.constructor()(*[getattr(self, name) for name in self._names])
+        sample.sample_info = self.sample_info
+        return sample
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, LazyView):
+            other = other.materialize()
+        return self.materialize() == other
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({', '.join(f'{n}={getattr(self, n)!r}' for n in self._names)})"
+
+
+def build_lazy_view(datatype: type, machine, use_version_2: bool) -> Optional[type]:
+    if isinstance(machine, DelimitedCdrAppendableStructMachine):
+        members = machine.member_machines
+        appendable = True
+    elif isinstance(machine, StructMachine):
+        members = machine.members_machines
+        appendable = False
+    else:
+        return None
+
+    names = list(members.keys())
+    namespace = {
+        '__slots__': (),
+        '__module__': datatype.__module__,
+        '__qualname__': f"Lazy{datatype.__qualname__}",
+        '_datatype': datatype,
+        '_names': names,
+        '_machines': list(members.values()),
+        '_plans': [_skip_plan(m, use_version_2) for m in members.values()],
+        '_appendable': appendable,
+    }
+    for index, name in enumerate(names):
+        namespace[name] = _LazyMember(index, name)
+    return type(f"Lazy{datatype.__name__}", (LazyView,), namespace)
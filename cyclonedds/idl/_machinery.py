@@ -10,6 +10,8 @@
  * SPDX-License-Identifier: EPL-2.0 OR BSD-3-Clause
 """
 
+import sys
+import array
 from math import log2
 from enum import Enum
 from dataclasses import dataclass
@@ -478,7 +480,16 @@ class MappingMachine(Machine):
         return {}
 
 
+def _construct(self, *values):
+    # Struct machines create instances with the positional constructor of the type, looked
+    # up on first use because the type is only complete once its decorators have run.
+    self.construct = self.type.__idl__.constructor()
+    return self.construct(*values)
+
+
 class StructMachine(Machine):
+    construct = _construct
+
     def __init__(self, object, members_machines, keylist):
         self.type = object
         self.members_machines = members_machines
@@ -507,14 +518,14 @@ class StructMachine(Machine):
                 raise Exception(f"Failed to encode member {member}, value is {getattr(value, member)}") from e
 
     def deserialize(self, buffer, deserialize_kind=DeserializeKind.DataSample, key_enabled=KeyEnabled.InKeylist):
-        valuedict = {}
+        values = []
         for member, machine in self.members_machines.items():
             m_key_enabled = self.key_enabled(member, key_enabled)
             if deserialize_kind != DeserializeKind.DataSample and m_key_enabled == KeyEnabled.Never:
-                valuedict[member] = machine.default_initialize()
+                values.append(machine.default_initialize())
             else:
-                valuedict[member] = machine.deserialize(buffer, deserialize_kind, m_key_enabled)
-        return self.type(**valuedict)
+                values.append(machine.deserialize(buffer, deserialize_kind, m_key_enabled))
+        return self.construct(*values)
 
     def key_scan(self) -> KeyScanner:
         scan = KeyScanner()
@@ -536,10 +547,7 @@ class StructMachine(Machine):
         )
 
     def default_initialize(self):
-        valuedict = {}
-        for member, machine in self.members_machines.items():
-            valuedict[member] = machine.default_initialize()
-        return self.type(**valuedict)
+        return self.construct(*[machine.default_initialize() for machine in self.members_machines.values()])
 
 
 class InstanceMachine(Machine):
@@ -721,6 +729,8 @@ class OptionalMachine(Machine):
 
 
 class PlainCdrV2ArrayOfPrimitiveMachine(Machine):
+    packing = None
+
     def __init__(self, type, length):
         code, self.alignment, size, default = types._type_code_align_size_default_mapping[type]
         self.length = length
@@ -752,6 +762,8 @@ class PlainCdrV2ArrayOfPrimitiveMachine(Machine):
 
 
 class PlainCdrV2SequenceOfPrimitiveMachine(Machine):
+    packing = None
+
     def __init__(self, type, max_length=None):
         self.code, self.alignment, self.size, _ = types._type_code_align_size_default_mapping[type]
         self.max_length = max_length
@@ -800,7 +812,126 @@ class PlainCdrV2SequenceOfPrimitiveMachine(Machine):
         return []
 
 
+_native_endian = "<" if sys.byteorder == "little" else ">"
+_format_kinds = {c: "i" for c in "bhilqn"}
+_format_kinds.update({c: "u" for c in "BHILQN"})
+_format_kinds.update({"f": "f", "d": "f", "?": "?"})
+
+
+class PackedPrimitives:
+    """Moves runs of primitives between the serialized data and an ``array.array`` or
+    ``numpy.ndarray`` as raw bytes, only swapping bytes when the data is not in native
+    order. Values with another element layout go through ``struct`` like lists do."""
+
+    containers = ("array", "numpy")
+
+    def __init__(self, type, container):
+        self.code, _, self.size, self.default = types._type_code_align_size_default_mapping[type]
+        self.container = container
+        self.kind = _format_kinds[self.code]
+        if container == "array":
+            if self.code == "?" or array.array(self.code).itemsize != self.size:
+                raise TypeError(f"{type} cannot be packed in an array.array, use container='numpy'.")
+        elif container == "numpy":
+            import numpy
+            self.numpy = numpy
+            self.dtype = numpy.dtype(self.code)
+        else:
+            raise TypeError(f"Packed container is one of {self.containers}, not {container!r}.")
+
+    def new(self, length):
+        if self.container == "numpy":
+            return self.numpy.full(length, self.default, dtype=self.dtype)
+        return array.array(self.code, [self.default]) * length
+
+    def read(self, buffer, length):
+        pos = buffer._pos
+        if pos + length * self.size > len(buffer._bytes):
+            raise Exception("Packed primitives extend past the end of the data, stream corrupt.")
+        buffer._pos += length * self.size
+        if self.container == "numpy":
+            # astype always copies, out of the (possibly read-only) sample data and into native order
+            dtype = self.dtype.newbyteorder(buffer._endian)
+            return self.numpy.frombuffer(buffer._bytes, dtype=dtype, count=length, offset=pos).astype(self.dtype)
+        value = array.array(self.code)
+        with memoryview(buffer._bytes) as view:
+            value.frombytes(view[pos:buffer._pos])
+        if buffer._endian != _native_endian:
+            value.byteswap()
+        return value
+
+    def raw(self, value):
+        """The native order bytes of value, None when it does not hold these primitives."""
+        try:
+            view = memoryview(value)
+        except TypeError:
+            return None
+        format = view.format
+        if len(format) == 2 and format[0] in ("@", "=", _native_endian):
+            format = format[1:]
+        if view.ndim != 1 or view.itemsize != self.size or not view.c_contiguous \
+                or _format_kinds.get(format) != self.kind:
+            return None
+        return view.cast("B")
+
+    def write(self, buffer, value, length):
+        raw = self.raw(value)
+        if raw is None:
+            buffer.write_multi(f"{length}{self.code}", length * self.size, *value)
+        elif buffer._endian == _native_endian or self.size == 1:
+            buffer.write_bytes(raw)
+        else:
+            swapped = array.array(self.code)
+            swapped.frombytes(raw)
+            swapped.byteswap()
+            buffer.write_bytes(memoryview(swapped).cast("B"))
+
+
+class PackedArrayOfPrimitiveMachine(PlainCdrV2ArrayOfPrimitiveMachine):
+    def __init__(self, type, length, container):
+        super().__init__(type, length)
+        self.packing = PackedPrimitives(type, container)
+
+    def serialize(self, buffer, value, serialize_kind=SerializeKind.DataSample, key_enabled=KeyEnabled.InKeylist):
+        assert len(value) == self.length
+        buffer.align(self.alignment)
+        self.packing.write(buffer, value, self.length)
+
+    def deserialize(self, buffer, deserialize_kind=DeserializeKind.DataSample, key_enabled=KeyEnabled.InKeylist):
+        buffer.align(self.alignment)
+        return self.packing.read(buffer, self.length)
+
+    def default_initialize(self):
+        return self.packing.new(self.length)
+
+
+class PackedSequenceOfPrimitiveMachine(PlainCdrV2SequenceOfPrimitiveMachine):
+    def __init__(self, type, max_length, container):
+        super().__init__(type, max_length)
+        self.packing = PackedPrimitives(type, container)
+
+    def serialize(self, buffer, value, serialize_kind=SerializeKind.DataSample, key_enabled=KeyEnabled.InKeylist):
+        assert self.max_length is None or len(value) <= self.max_length
+        buffer.align(4)
+        buffer.write('I', 4, len(value))
+        if len(value):
+            buffer.align(self.alignment)
+            self.packing.write(buffer, value, len(value))
+
+    def deserialize(self, buffer, deserialize_kind=DeserializeKind.DataSample, key_enabled=KeyEnabled.InKeylist):
+        buffer.align(4)
+        length = buffer.read('I', 4)
+        if length:
+            buffer.align(self.alignment)
+        return self.packing.read(buffer, length)
+
+    def default_initialize(self):
+        return self.packing.new(0)
+
+
 class DelimitedCdrAppendableStructMachine(Machine):
+    construct = _construct
+
     def __init__(self, type, member_machines, keylist):
         self.alignment = 4
         self.type = type
@@ -847,21 +978,21 @@ class DelimitedCdrAppendableStructMachine(Machine):
         size = buffer.read('I', 4)
         hpos = buffer.tell()
 
-        data = {}
+        values = []
         for member, machine in self.member_machines.items():
             m_key_enabled = self.key_enabled(member, key_enabled)
             if buffer.tell() - hpos >= size:
-                data[member] = machine.default_initialize()
+                values.append(machine.default_initialize())
             elif deserialize_kind != DeserializeKind.DataSample and m_key_enabled == KeyEnabled.Never:
-                data[member] = machine.default_initialize()
+                values.append(machine.default_initialize())
             else:
-                data[member] = machine.deserialize(buffer, deserialize_kind, m_key_enabled)
+                values.append(machine.deserialize(buffer, deserialize_kind, m_key_enabled))
 
             if buffer.tell() - hpos > size:
                 raise Exception("Struct was not contained inside header indicated size, stream corrupt.")
 
         buffer.seek(hpos + size)
-        return self.type(**data)
+        return self.construct(*values)
 
     def key_scan(self) -> KeyScanner:
         scan = KeyScanner()
@@ -893,10 +1024,7 @@ class DelimitedCdrAppendableStructMachine(Machine):
             [CdrKeyVmOp(CdrKeyVMOpType.AppendableJumpToEnd, False)]
 
     def default_initialize(self):
-        valuedict = {}
-        for member, machine in self.member_machines.items():
-            valuedict[member] = machine.default_initialize()
-        return self.type(**valuedict)
+        return self.construct(*[machine.default_initialize() for machine in self.member_machines.values()])
 
 
 class DelimitedCdrAppendableUnionMachine(Machine):
@@ -1076,6 +1204,8 @@ class KeyFieldNotProvidedFailure(Exception):
     pass
 
 class PLCdrMutableStructMachine(Machine):
+    construct = _construct
+
     def __init__(self, type, mutablemembers, use_version_2):
         self.alignment = 4
         self.type = type
@@ -1243,7 +1373,8 @@ class PLCdrMutableStructMachine(Machine):
 
         if self.use_version_2:
             buffer.seek(hpos + struct_size)
-        return self.type(**data)
+        # data is ordered like the members, init_map was built from them
+        return self.construct(*data.values())
 
     def key_scan(self) -> KeyScanner:
         scan = KeyScanner()
@@ -1277,13 +1408,9 @@ class PLCdrMutableStructMachine(Machine):
         return ret
 
     def default_initialize(self):
-        data = {}
-        for mutmem in self.mutablemembers:
-            if not mutmem.optional:
-                data[mutmem.name] = mutmem.machine.default_initialize()
-            else:
-                data[mutmem.name] = None
-        return self.type(**data)
+        return self.construct(*[
+            None if mutmem.optional else mutmem.machine.default_initialize() for mutmem in self.mutablemembers
+        ])
 
 
 class BitMaskMachine(Machine):
@@ -10,7 +10,7 @@
  * SPDX-License-Identifier: EPL-2.0 OR BSD-3-Clause
 """
 
-from typing import Optional, cast, Any, ClassVar, Mapping, Dict, Tuple, TYPE_CHECKING
+from typing import Optional, Union, cast, Any, Callable, ClassVar, Mapping, Dict, Tuple, TYPE_CHECKING
 from collections import deque
 from enum import EnumMeta, Enum
 from inspect import isclass
@@ -18,7 +18,7 @@ from struct import unpack
 from hashlib import md5
 import threading
 
-from ._support import Buffer, Endianness, CdrKeyVmNamedJumpOp, KeyScanner, KeyScanResult, SerializeKind, DeserializeKind, DataTypeProperties
+from ._support import Buffer, ReusableBuffer, Endianness, CdrKeyVmNamedJumpOp, KeyScanner, KeyScanResult, SerializeKind, DeserializeKind, DataTypeProperties
 from ._type_helper import get_origin, get_args, Annotated, get_annotations
 from ._type_normalize import get_idl_annotations, get_idl_field_annotations, get_extended_type_hints
 from ._machinery import Machine
@@ -64,12 +64,23 @@ class IDL:
         self.supported_versions: int = None
         self.default_version: int = None
         self.data_type_props: int = None
+        self.keyhash_is_sample_key: bool = None
 
         self.idl_transformed_typename: str = self.datatype.__idl_typename__.replace(".", "::")
         self.re_entrancy_protection: bool = False
         self._xt_data: Tuple[TypeInformation, TypeMapping] = (None, None)
         self._xt_bytedata: Tuple[Optional[bytes], Optional[bytes]] = (None, None)
         self.member_ids: Dict[str, int] = None
+        # Flat functions compiled from the machines, see _builder.CodecBuilder
+        self.use_compiled_codecs: bool = True
+        self._codecs: Dict[tuple, Any] = {}
+        self._padding: Dict[bool, bool] = {}
+        # Per-version LazyView subclasses (None if the type can't be viewed), see _lazy
+        self._lazy_views: Dict[bool, Optional[type]] = {}
+        # Per-version fixed layouts for decoding into NumPy arrays, see _columnar
+        self._columnar: Dict[bool, Any] = {}
+        # Positional constructor used by deserialization, see _builder.build_constructor
+        self._constructor: Optional[Callable[..., Any]] = None
 
     def populate_locked(self):
         if not self._populating:
@@ -112,6 +123,8 @@ class IDL:
             from ._builder import Builder
             self.v1_machine, self.v2_machine, self.data_type_props, self.supported_versions, self.default_version = Builder.build_machines(self.datatype)
             self.keyless = (self.data_type_props & DataTypeProperties.CONTAINS_KEY) == 0
+            # Only then a keyhash of a small key can be used as the key, see serdata_from_keyhash
+            self.keyhash_is_sample_key = not self.keyless and _key_in_member_order(self.datatype)
 
             self.v1_keyresult: KeyScanner = self.v1_machine.key_scan()
             if self.v1_keyresult.rtype != KeyScanResult.PossiblyInfinite and self.v1_keyresult.size <= 16:
@@ -139,9 +152,31 @@ class IDL:
         if use_version_2 is None:
             use_version_2 = (self.default_version == 2)
 
-        ibuffer = buffer or Buffer()
-        ibuffer.seek(0)
-        ibuffer.zero_out()
+        if buffer is None:
+            ibuffer = Buffer()
+        else:
+            ibuffer = buffer
+            ibuffer.seek(0)
+            ibuffer.zero_out()
+        self._serialize_into(ibuffer, object, use_version_2, endianness, serialize_kind, prepend_header)
+        return ibuffer.asbytes()
+
+    def serialize_view(self, buffer: ReusableBuffer, object, use_version_2: bool = None, endianness: Endianness = None,
+                       serialize_kind: SerializeKind = SerializeKind.DataSample) -> memoryview:
+        """Serialize into a reusable buffer, returning a view of the data padded to a multiple of
+        4 bytes. The view must be released before the buffer is used again."""
+        if not self._populated:
+            self.populate()
+
+        if use_version_2 is None:
+            use_version_2 = (self.default_version == 2)
+
+        buffer.rewind(zero=not (serialize_kind == SerializeKind.DataSample and self._padding_free(use_version_2)))
+        self._serialize_into(buffer, object, use_version_2, endianness, serialize_kind, True)
+        return buffer.view()
+
+    def _serialize_into(self, ibuffer: Buffer, object, use_version_2: bool, endianness: Endianness,
+                        serialize_kind: SerializeKind, prepend_header: bool) -> None:
         ibuffer.set_align_offset(0)
         ibuffer.set_endianness(endianness or Endianness.native())
         ibuffer._align_max = 4 if use_version_2 else 8
@@ -149,18 +184,27 @@ class IDL:
         if prepend_header:
             enc = ((0 if ibuffer.endianness == Endianness.Big else 1) |
                    (self.xcdrv2_head if use_version_2 else self.xcdrv1_head))
-            ibuffer.write('b', 1, 0)
-            ibuffer.write('b', 1, enc)
-            ibuffer.write('b', 1, 0)
-            ibuffer.write('b', 1, 0)
+            ibuffer.write_bytes(bytes((0, enc, 0, 0)))
             ibuffer.set_align_offset(4)
 
-        if use_version_2:
+        codec = self.use_compiled_codecs and self._codec(True, use_version_2, ibuffer.endianness, serialize_kind)
+        if codec:
+            codec(ibuffer, object)
+        elif use_version_2:
             self.v2_machine.serialize(ibuffer, object, serialize_kind)
         else:
             self.v1_machine.serialize(ibuffer, object, serialize_kind)
 
-        return ibuffer.asbytes()
+    def _padding_free(self, use_version_2: bool) -> bool:
+        try:
+            return self._padding[use_version_2]
+        except KeyError:
+            pass
+
+        from ._builder import CodecBuilder
+        free = CodecBuilder.padding_free(self.v2_machine if use_version_2 else self.v1_machine, use_version_2)
+        self._padding[use_version_2] = free
+        return free
 
     def deserialize(self, data, has_header=True, use_version_2: bool = None, deserialize_kind: DeserializeKind = DeserializeKind.DataSample) -> object:
         if not self._populated:
@@ -171,8 +215,22 @@ class IDL:
         if use_version_2 is None:
             use_version_2 = (self.default_version == 2)
 
-        buffer = Buffer(data, align_offset=4 if has_header else 0) if not isinstance(data, Buffer) else data
+        if not isinstance(data, Buffer):
+            # Immutable data (bytes, loaned sample buffers) is read in place, only
+            # a mutable bytearray is copied so it cannot change under our feet.
+            buffer = Buffer(data if isinstance(data, bytearray) else memoryview(data), align_offset=4 if has_header else 0)
+        else:
+            buffer = data
+
+        machine = self._read_header(buffer, has_header, use_version_2)
+
+        codec = self.use_compiled_codecs and \
+            self._codec(False, buffer._align_max == 4, buffer.endianness, deserialize_kind)
+        if codec:
+            return codec(buffer)
+        return machine.deserialize(buffer, deserialize_kind=deserialize_kind)
 
+    def _read_header(self, buffer: Buffer, has_header: bool, use_version_2: bool) -> Machine:
         if has_header and buffer.tell() == 0:
             buffer.read('b', 1)
             v = buffer.read('b', 1)
@@ -184,19 +242,70 @@ class IDL:
             buffer.read('b', 1)
             if v > 3:
                 buffer._align_max = 4
-                machine = self.v2_machine
-            else:
-                buffer._align_max = 8
-                machine = self.v1_machine
-        else:
-            if use_version_2:
-                buffer._align_max = 4
-                machine = self.v2_machine
-            else:
-                buffer._align_max = 8
-                machine = self.v1_machine
+                return self.v2_machine
+            buffer._align_max = 8
+            return self.v1_machine
 
-        return machine.deserialize(buffer, deserialize_kind=deserialize_kind)
+        if use_version_2:
+            buffer._align_max = 4
+            return self.v2_machine
+        buffer._align_max = 8
+        return self.v1_machine
+
+    def deserialize_lazy(self, data, has_header=True, use_version_2: bool = None) -> object:
+        """Deserialize into a :class:`LazyView<cyclonedds.idl.LazyView>` that decodes members on access.
+
+        Types that cannot be viewed (unions and mutable structs) are deserialized completely.
+        """
+        if not self._populated:
+            self.populate()
+
+        if has_header and use_version_2 is not None:
+            raise Exception("Considered programmer error to set a version of xcdr to use if a header is present in the data.")
+        if use_version_2 is None:
+            use_version_2 = (self.default_version == 2)
+
+        # The view holds on to the data, so a mutable bytearray is copied
+        buffer = Buffer(bytes(data) if isinstance(data, bytearray) else memoryview(data), align_offset=4 if has_header else 0)
+        machine = self._read_header(buffer, has_header, use_version_2)
+
+        version_2 = buffer._align_max == 4
+        try:
+            view = self._lazy_views[version_2]
+        except KeyError:
+            from ._lazy import build_lazy_view
+            view = self._lazy_views[version_2] = build_lazy_view(self.datatype, machine, version_2)
+
+        if view is None:
+            return machine.deserialize(buffer)
+        return view(buffer)
+
+    def _codec(self, serialize: bool, use_version_2: bool, endianness: Endianness, kind):
+        key = (serialize, use_version_2, endianness, kind)
+        try:
+            return self._codecs[key]
+        except KeyError:
+            pass
+
+        from ._builder import CodecBuilder, NativeCodecBuilder
+        machine = self.v2_machine if use_version_2 else self.v1_machine
+        if serialize:
+            # The native encoder is preferred when it is built, it is optional
+            codec = NativeCodecBuilder.build_serializer(machine, use_version_2, endianness, kind) or \
+                CodecBuilder.build_serializer(machine, use_version_2, endianness, kind)
+        else:
+            codec = CodecBuilder.build_deserializer(machine, use_version_2, endianness, kind)
+        self._codecs[key] = codec
+        return codec
+
+    def constructor(self) -> Callable[..., Any]:
+        """Function that creates an instance from the values of all members, passed positionally in
+        member order. It skips the dataclass ``__init__`` when that is safe, see
+        :func:`annotations.fast_construct<cyclonedds.idl.annotations.fast_construct>`."""
+        if self._constructor is None:
+            from ._builder import build_constructor
+            self._constructor = build_constructor(self.datatype)
+        return self._constructor
 
     def deserialize_key(self, data, has_header=True, use_version_2: bool = None) -> object:
         return self.deserialize(data, has_header, use_version_2, DeserializeKind.KeySample)
@@ -220,15 +329,12 @@ class IDL:
             use_version_2 = (self.default_version == 2)
 
         self.re_entrancy_protection = True
-
-        if use_version_2:
-            ops = self.v2_machine.cdr_key_machine_op(skip)
-        else:
-            ops = self.v1_machine.cdr_key_machine_op(skip)
-
-        self.re_entrancy_protection = False
-
-        return ops
+        try:
+            if use_version_2:
+                return self.v2_machine.cdr_key_machine_op(skip)
+            return self.v1_machine.cdr_key_machine_op(skip)
+        finally:
+            self.re_entrancy_protection = False
 
     def key_scan(self, use_version_2: bool = None):
         if self.re_entrancy_protection:
@@ -293,6 +399,37 @@ def get_unknown_members(cls: type, bases: tuple[type, ...]) -> set[str]:
         raise Exception(f'{unknown_members=}')
     return unknown_members
 
+
+def _key_in_member_order(datatype: type) -> bool:
+    """Whether the key of a struct serializes the same in keyhash form, which is in member id order
+    without DHEADERs, as in sample form. That requires final structs with sequential member ids and
+    keys listed in member order, all the way down the key."""
+    annotations = get_idl_annotations(datatype)
+    field_annotations = get_idl_field_annotations(datatype)
+    if annotations.get("extensibility", "final") != "final" or annotations.get("autoid", "sequential") == "hash":
+        return False
+
+    fields = get_extended_type_hints(datatype)
+    keylist = annotations.get("keylist") or [name for name in fields if "key" in field_annotations.get(name, {})]
+    if not keylist:
+        # A nested struct without keys is keyed on all its members
+        keylist = list(fields)
+    elif list(keylist) != [name for name in fields if name in keylist]:
+        return False
+
+    for name in keylist:
+        if "id" in field_annotations.get(name, {}) or "hash_id" in field_annotations.get(name, {}):
+            return False
+        _type = fields[name]
+        while isinstance(_type, (types.array, types.sequence, types.typedef)):
+            _type = _type.subtype
+        if get_origin(_type) is Union or isinstance(_type, IdlUnionMeta):
+            return False
+        if isinstance(_type, IdlMeta) and not _key_in_member_order(_type):
+            return False
+    return True
+
+
 class IdlMeta(type):
     __idl__: ClassVar['IDL']
     __idl_typename__: ClassVar[str]
@@ -321,7 +458,9 @@ class IdlMeta(type):
         return namespace
 
     def __new__(metacls, name, bases, namespace, **kwds):
-        IDLNamespaceScope.exit()
+        # Classes recreated from the namespace of an existing class, like compact ones, have no scope
+        if IDLNamespaceScope.current is namespace:
+            IDLNamespaceScope.exit()
         new_cls = super().__new__(metacls, name, bases, dict(**namespace))
 
         unknown_members = get_unknown_members(cls=new_cls, bases=bases)
@@ -0,0 +1,113 @@
+"""
+ * Copyright(c) 2021 to 2022 ZettaScale Technology and others
+ *
+ * This program and the accompanying materials are made available under the
+ * terms of the Eclipse Public License v. 2.0 which is available at
+ * http://www.eclipse.org/legal/epl-2.0, or the Eclipse Distribution License
+ * v. 1.0 which is available at
+ * http://www.eclipse.org/org/documents/edl-v10.php.
+ *
+ * SPDX-License-Identifier: EPL-2.0 OR BSD-3-Clause
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain, repeat
+from typing import Any, List, Optional, Sequence, Type, Union
+
+from ._support import DeserializeKind, Endianness
+
+
+def _warm_up(datatypes: tuple) -> None:
+    # Build the machines and the compiled deserializer once per worker instead of in the first chunk
+    for datatype in datatypes:
+        idl = datatype.__idl__
+        idl.populate()
+        if idl.use_compiled_codecs:
+            idl._codec(False, idl.default_version == 2, Endianness.native(), DeserializeKind.DataSample)
+
+
+def _deserialize_chunk(datatype: type, datas: List[bytes]) -> List[Any]:
+    deserialize = datatype.deserialize
+    return [deserialize(data) for data in datas]
+
+
+class DeserializerPool:
+    """Deserializes large batches of serialized samples on a pool of worker processes, so that
+    deserialization is not limited to the one core the interpreter runs on.
+
+    Batches are split into chunks that the workers deserialize, the samples come back pickled and in
+    order. That is only faster for samples that take a lot longer to deserialize than to pickle,
+    like large nested structs, so batches smaller than the threshold are deserialized in-process.
+    The datatypes must be importable by the workers, which are warmed up with the machines and
+    compiled codecs of the datatypes they are created for. Pass the pool to a
+    :class:`DataReader<cyclonedds.sub.DataReader>` to use it for read and take, it can be shared by
+    readers and stays alive until :meth:`shutdown`.
+
+    Parameters
+    ----------
+    datatypes: type or Sequence[type]
+        The datatypes the workers are warmed up for, other datatypes can be deserialized too.
+    max_workers: int, optional
+        The number of worker processes, by default the number of CPUs.
+    threshold: int
+        The smallest batch that is deserialized by the workers.
+    chunksize: int, optional
+        The number of samples per chunk, by default batches are split in four chunks per worker.
+    mp_context: multiprocessing.context.BaseContext, optional
+        The multiprocessing context used to start the workers.
+    """
+
+    def __init__(self, datatypes: Union[type, Sequence[type]], max_workers: Optional[int] = None,
+                 threshold: int = 1000, chunksize: Optional[int] = None, mp_context=None) -> None:
+        if max_workers is not None and max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+        if threshold < 1:
+            raise ValueError("threshold must be at least 1")
+        if chunksize is not None and chunksize < 1:
+            raise ValueError("chunksize must be at least 1")
+
+        self.datatypes = (datatypes,) if isinstance(datatypes, type) else tuple(datatypes)
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.threshold = threshold
+        self.chunksize = chunksize
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=mp_context,
+            initializer=_warm_up,
+            initargs=(self.datatypes,)
+        )
+
+    def deserialize(self, datatype: Type[Any], datas: Sequence[Any]) -> List[Any]:
+        """Deserialize a batch of serialized samples, including their encapsulation headers.
+
+        Parameters
+        ----------
+        datatype: type
+            The datatype of the samples.
+        datas: Sequence[bytes]
+            The serialized samples, any object that supports the buffer protocol.
+
+        Returns
+        -------
+        List
+            The samples, in the order of datas.
+        """
+        if len(datas) < self.threshold:
+            return [datatype.deserialize(data) for data in datas]
+
+        # Loaned sample buffers and memoryviews cannot be pickled
+        datas = [data if type(data) is bytes else bytes(data) for data in datas]
+        chunksize = self.chunksize or -(-len(datas) // (4 * self.max_workers))
+        chunks = [datas[i:i + chunksize] for i in range(0, len(datas), chunksize)]
+        return list(chain.from_iterable(self._executor.map(_deserialize_chunk, repeat(datatype), chunks)))
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop the worker processes, the pool cannot be used afterwards."""
+        self._executor.shutdown(wait=wait)
+
+    def __enter__(self) -> 'DeserializerPool':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.shutdown()
@@ -79,7 +79,11 @@ class DeserializeKind(Enum):
 
 class Buffer:
     def __init__(self, _bytes: Optional[bytes] = None, align_offset: int = 0, align_max: int = 8) -> None:
-        self._bytes: bytearray = bytearray(_bytes) if _bytes else bytearray(512)
+        if isinstance(_bytes, memoryview):
+            # Views are wrapped without copying, only suitable for reading.
+            self._bytes: bytearray = _bytes if _bytes.format == 'B' and _bytes.ndim == 1 else _bytes.cast('B')
+        else:
+            self._bytes: bytearray = bytearray(_bytes) if _bytes else bytearray(512)
         self._pos: int = 0
         self._size: int = len(self._bytes)
         self._align_offset: int = align_offset
@@ -112,12 +116,11 @@ class Buffer:
 
     def ensure_size(self, size: int) -> None:
         if self._pos + size > self._size:
-            old_bytes = self._bytes
             old_size = self._size
             while self._pos + size > self._size:
                 self._size *= 2
-            self._bytes = bytearray(self._size)
-            self._bytes[0:old_size] = old_bytes
+            # Grow in place, the bytearray over-allocates so this usually avoids a copy
+            self._bytes.extend(bytes(self._size - old_size))
 
     def align(self, alignment: int) -> 'Buffer':
         alignment = min(alignment, self._align_max)
@@ -162,6 +165,60 @@ class Buffer:
         return bytes(self._bytes[0:self._pos])
 
 
+class ReusableBuffer(Buffer):
+    """A Buffer that is serialized into over and over again, as done by a DataWriter.
+
+    Instead of zeroing the whole buffer for every sample only the bytes used by
+    previous samples are cleared, and not even those when the caller knows the type
+    leaves no padding holes. The buffer keeps the size needed by recent samples and
+    only shrinks when a whole window of samples used a fraction of it.
+    """
+
+    window = 64
+
+    def __init__(self, size: int = 512) -> None:
+        super().__init__(bytearray(size))
+        self._used: int = 0
+        self._high_water: int = 0
+        self._samples: int = 0
+
+    def rewind(self, zero: bool = True) -> 'ReusableBuffer':
+        if self._samples >= self.window:
+            if self._size > 4 * max(self._high_water, 512):
+                size = 512
+                while size < self._high_water:
+                    size *= 2
+                self._bytes = bytearray(size)
+                self._size = size
+                self._used = 0
+            self._high_water = 0
+            self._samples = 0
+
+        if zero and self._used:
+            if self._used <= 4096:
+                self._bytes[0:self._used] = bytes(self._used)
+            else:
+                # For large samples re-allocating is quicker, see zero_out
+                self._bytes = bytearray(self._size)
+            self._used = 0
+        self._pos = 0
+        self._align_offset = 0
+        return self
+
+    def view(self) -> memoryview:
+        """The serialized data padded to a multiple of 4 bytes. Release the view before the
+        buffer is used again, a bytearray cannot grow while it is exported."""
+        end = (self._pos + 3) & ~3
+        if end > self._pos:
+            self.ensure_size(end - self._pos)
+            self._bytes[self._pos:end] = bytes(end - self._pos)
+        # Without zeroing stale bytes of a larger sample may remain beyond this one
+        self._used = max(self._used, end)
+        self._high_water = max(self._high_water, end)
+        self._samples += 1
+        return memoryview(self._bytes)[0:end]
+
+
 class KeyScanResult(Enum):
     FixedSize = 1
     BoundSize = 2
@@ -11,6 +11,7 @@
 """
 
 from typing import Any, Union, Optional, Callable, List, Type, TypeVar
+from dataclasses import fields
 from . import IdlStruct, IdlUnion, IdlBitmask, IdlEnum
 from ._main import IDLNamespaceScope
 
@@ -68,6 +69,20 @@ def external(apply_to: str) -> None:
     __field_annotate(apply_to, "external", True)
 
 
+def _check_container(container: Optional[str]) -> None:
+    if container not in ["array", "numpy", None]:
+        raise AnnotationException("The container of packed members is either 'array', 'numpy' or None.")
+
+
+def packed(apply_to: str, container: Optional[str] = "array") -> None:
+    """Decode a sequence or array of primitives member into an ``array.array`` (or a
+    ``numpy.ndarray`` with container ``"numpy"``) instead of a list. The elements are copied
+    as raw bytes in both directions, only swapping bytes when the data is not in native order.
+    A container of None opts the member out of :func:`packed_members`."""
+    _check_container(container)
+    __field_annotate(apply_to, "packed", container)
+
+
 def xcdrv2(cls: T) -> T:
     __annotate(cls, "xcdrv2", True)
     return cls
@@ -121,6 +136,53 @@ def mutable(cls: T) -> T:
     return extensibility("mutable")(cls)
 
 
+def fast_construct(enabled: bool = True) -> Callable[[T], T]:
+    """Whether deserialization creates instances of the struct without calling its ``__init__``,
+    setting the members directly on an uninitialized object instead. By default this is done for
+    dataclasses with a generated ``__init__``, no ``__post_init__`` and no ``__setattr__``.
+    Disable it for types whose instances need their constructor to run."""
+    def fast_construct_inner(cls: T) -> T:
+        __annotate(cls, "fast_construct", bool(enabled))
+        return cls
+
+    return fast_construct_inner
+
+
+def compact(cls: TIS) -> TIS:
+    """Store the members of a struct in ``__slots__`` instead of an instance ``__dict__``, plus a slot
+    for the ``sample_info`` that readers attach to received samples. This takes a lot less memory
+    per sample. The class is recreated with slots like ``dataclass(slots=True)`` does, so apply it
+    above ``@dataclass``. Structs it derives from must be compact as well."""
+    if "__dataclass_fields__" not in cls.__dict__:
+        raise AnnotationException(f"compact must be applied to a dataclass, put it above @dataclass on {cls.__name__}.")
+    if "__slots__" in cls.__dict__:
+        raise AnnotationException(f"{cls.__name__} already has __slots__.")
+    for base in cls.__mro__[1:-1]:
+        if "__slots__" not in base.__dict__:
+            raise AnnotationException(f"{cls.__name__} can only be compact if {base.__name__} is compact too.")
+
+    inherited = {name for base in cls.__mro__[1:] for name in base.__dict__.get("__slots__", ())}
+    members = tuple(f.name for f in fields(cls) if f.name not in inherited)
+    namespace = dict(cls.__dict__)
+    for name in members + ("__dict__", "__weakref__"):
+        # Defaults are class attributes, they live on in __init__ and the dataclass fields
+        namespace.pop(name, None)
+    namespace["__slots__"] = members + (() if "sample_info" in inherited else ("sample_info",))
+
+    return type(cls)(cls.__name__, cls.__bases__, namespace)
+
+
+def packed_members(container: Optional[str] = "array") -> Callable[[TIS], TIS]:
+    """Apply :func:`packed` to all sequence and array of primitives members of a struct."""
+    _check_container(container)
+
+    def packed_members_inner(cls: TIS) -> TIS:
+        __annotate(cls, "packed", container)
+        return cls
+
+    return packed_members_inner
+
+
 def keylist(list_of_keys: List[str]) -> Callable[[TIS], TIS]:
     def keylist_inner(cls: TIS) -> TIS:
         __annotate(cls, "keylist", list_of_keys)
@@ -146,5 +208,5 @@ def bit_bound(amount: int) -> Callable[[TIBE], TIBE]:
 __all__ = [
     "default_literal", "key", "position", "member_id", "member_hash_id", "xcdrv2", "cdrv0",
     "nested", "must_understand", "autoid", "extensibility", "final", "appendable", "mutable",
-    "keylist", "bit_bound"
+    "keylist", "bit_bound", "fast_construct", "compact"
 ]
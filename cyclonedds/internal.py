@@ -19,6 +19,7 @@ from ctypes.util import find_library
 from functools import wraps
 from dataclasses import dataclass
 from enum import IntEnum, IntFlag
+from typing import Optional
 
 
 if 'CYCLONEDDS_PYTHON_NO_IMPORT_LIBS' not in os.environ:
@@ -241,42 +242,55 @@ class DDS:
         self._ref = reference
 
 
-@dataclass
-class SampleInfo:
+# SampleInfo is implemented in the C extension, see the end of this module
+_sample_info_formats = (
+    ("sample_state", "I"), ("view_state", "I"), ("instance_state", "I"), ("valid_data", "?"),
+    ("source_timestamp", "q"), ("instance_handle", "Q"), ("publication_handle", "Q"),
+    ("disposed_generation_count", "I"), ("no_writers_generation_count", "I"), ("sample_rank", "I"),
+    ("generation_rank", "I"), ("absolute_generation_rank", "I")
+)
+
+
+def _sample_info_column(index: int, name: str) -> property:
+    return property(lambda self: self._columns[index], doc=f"The {name} of all samples.")
+
+
+class SampleInfoBatch:
     """
-    Contains information about the associated data value
-
-    Attributes
-    ----------
-    sample_state:
-        Possible values: :class:`SampleState<cyclonedds.core.SampleState>`
-    view_state:
-        Possible values: :class:`ViewState<cyclonedds.core.ViewState>`
-    instance_state:
-        Possible values: :class:`InstanceState<cyclonedds.core.InstanceState>`
-    source_timestamp:
-        The time (in unix nanoseconds) that the associated sample was written.
-    instance_handle:
-        Handle to the data instance (if this is a keyed topic)
+    The sample infos of a batch of samples, stored per field. Every field is a
+    :class:`memoryview` with one native value per sample, in the order of the samples,
+    which can be wrapped in a NumPy array without copying.
+
+    Indexing or iterating creates :class:`SampleInfo` objects.
     """
-    sample_state: int
-    view_state: int
-    instance_state: int
-    valid_data: bool
-    source_timestamp: int
-    instance_handle: int
-    publication_handle: int
-    disposed_generation_count: int
-    no_writers_generation_count: int
-    sample_rank: int
-    generation_rank: int
-    absolute_generation_rank: int
+    __slots__ = ("_columns",)
+
+    def __init__(self, columns) -> None:
+        self._columns = tuple(
+            memoryview(column).cast(fmt) for column, (_, fmt) in zip(columns, _sample_info_formats)
+        )
+
+    def __len__(self) -> int:
+        return len(self._columns[0])
+
+    def __getitem__(self, index: int) -> 'SampleInfo':
+        return SampleInfo(*(column[index] for column in self._columns))
+
+    def __iter__(self):
+        return map(SampleInfo, *self._columns)
+
+    def __repr__(self) -> str:
+        return f"SampleInfoBatch(<{len(self)} samples>)"
+
+
+for _index, (_name, _) in enumerate(_sample_info_formats):
+    setattr(SampleInfoBatch, _name, _sample_info_column(_index, _name))
 
 
 @dataclass
 class InvalidSample:
     key_sample: object
-    sample_info: SampleInfo
+    sample_info: Optional['SampleInfo']
 
 
 class stat_kind(IntEnum):
@@ -495,6 +509,7 @@ try:
 except ImportError as e:
     raise ImportError(f"Error importing Cyclone DDS C library: is Cyclone built using the ENABLE_TYPELIB build option? -- {e}") from e
 
+SampleInfo = _clayer.SampleInfo
 dds_infinity: int = _clayer.DDS_INFINITY
 uint32_max: int = _clayer.UINT32_MAX
 feature_typelib: int = _clayer.HAS_TYPELIB
@@ -10,8 +10,12 @@
  * SPDX-License-Identifier: EPL-2.0 OR BSD-3-Clause
 """
 
-from typing import Optional, Union, Generic, TypeVar, List, TYPE_CHECKING
+from typing import Any, Callable, Dict, Optional, Union, Generic, TypeVar, List, Sequence, Tuple, TYPE_CHECKING
+from collections import OrderedDict
+from dataclasses import fields, is_dataclass
+from operator import attrgetter
 import ctypes as ct
+import threading
 import uuid
 
 from .internal import c_call, dds_c_t
@@ -20,8 +24,12 @@ from .domain import DomainParticipant
 from .topic import Topic
 from .qos import _CQos, Qos, LimitedScopeQos, PublisherQos, DataWriterQos
 from .builtin_types import DcpsEndpoint, endpoint_constructor, cqos_to_qos
+from .idl import IdlUnion, IdlBitmask
+from .idl._support import ReusableBuffer, SerializeKind
+from .idl._machinery import PrimitiveMachine, CharMachine, StringMachine, EnumMachine, BitBoundEnumMachine, \
+    StructMachine, DelimitedCdrAppendableStructMachine, PLCdrMutableStructMachine
 
-from cyclonedds._clayer import ddspy_write, ddspy_write_ts, ddspy_dispose, ddspy_writedispose, ddspy_writedispose_ts, \
+from cyclonedds._clayer import ddspy_write, ddspy_write_ts, ddspy_write_batch, ddspy_dispose, ddspy_writedispose, ddspy_writedispose_ts, \
     ddspy_dispose_handle, ddspy_dispose_handle_ts, ddspy_register_instance, ddspy_unregister_instance,   \
     ddspy_unregister_instance_handle, ddspy_unregister_instance_ts, ddspy_unregister_instance_handle_ts, \
     ddspy_lookup_instance, ddspy_dispose_ts, ddspy_get_matched_subscription_data
@@ -117,12 +125,152 @@ class Publisher(Entity):
 
 _T = TypeVar('_T')
 
+
+def _freeze(value: Any) -> Any:
+    # A hashable value that is equal for equal values, nested structs contribute all their members
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    elif isinstance(value, IdlUnion):
+        return (type(value), value.discriminator, _freeze(value.value))
+    elif isinstance(value, IdlBitmask):
+        return (type(value), value.as_mask())
+    elif is_dataclass(value):
+        return (type(value),) + tuple(_freeze(getattr(value, f.name)) for f in fields(value))
+    return value
+
+
+def _instance_key_getter(datatype: type) -> Callable[[Any], Any]:
+    idl = datatype.__idl__
+    idl.populate()
+    machine = idl.v2_machine
+    if isinstance(machine, PLCdrMutableStructMachine):
+        keys = [(m.name, m.machine) for m in machine.keylist]
+    elif isinstance(machine, DelimitedCdrAppendableStructMachine):
+        keys = [(name, machine.member_machines[name]) for name in machine.keylist or []]
+    elif isinstance(machine, StructMachine):
+        keys = [(name, machine.members_machines[name]) for name in machine.keylist or []]
+    else:
+        keys = []
+
+    if not keys:
+        # Keyless topics have a single instance
+        return lambda sample: ()
+    getter = attrgetter(*[name for name, _ in keys])
+    if all(isinstance(m, (PrimitiveMachine, CharMachine, StringMachine, EnumMachine, BitBoundEnumMachine)) for _, m in keys):
+        return getter
+    return lambda sample: _freeze(getter(sample))
+
+
+class InstanceCache:
+    """Bounded least recently used cache of the instance handles of a :class:`DataWriter`.
+
+    The cache maps the key members of a sample to the instance handle the writer got for it and
+    the serialized key. Operations on samples that hit the cache use the instance handle, which
+    saves serializing the key and looking up the instance in C. Entries are only added by
+    :meth:`DataWriter.register_instance`, so they hold handles the writer registered, and removed
+    when the instance is unregistered.
+
+    Attributes
+    ----------
+    capacity: int
+        The maximum number of instances in the cache.
+    hits: int
+        The number of lookups that found an instance.
+    misses: int
+        The number of lookups that did not.
+    evictions: int
+        The number of instances dropped to make room for others.
+    """
+
+    def __init__(self, datatype: type, capacity: int) -> None:
+        if capacity < 1:
+            raise ValueError("The capacity of an instance cache must be at least 1.")
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._key = _instance_key_getter(datatype)
+        self._entries: 'OrderedDict[Any, Tuple[int, bytes]]' = OrderedDict()
+        self._keys: Dict[int, Any] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def key(self, sample: Any) -> Any:
+        """The hashable key of the instance of sample."""
+        return self._key(sample)
+
+    def get(self, key: Any) -> Optional[Tuple[int, bytes]]:
+        """Return the instance handle and serialized key for key, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: Any, handle: int, serialized_key: bytes) -> None:
+        with self._lock:
+            self._entries[key] = (handle, serialized_key)
+            self._entries.move_to_end(key)
+            self._keys[handle] = key
+            if len(self._entries) > self.capacity:
+                _, (evicted, _) = self._entries.popitem(last=False)
+                self._keys.pop(evicted, None)
+                self.evictions += 1
+
+    def discard(self, key: Any) -> None:
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._keys.pop(entry[0], None)
+
+    def discard_handle(self, handle: int) -> None:
+        with self._lock:
+            key = self._keys.pop(handle, None)
+            if key is not None:
+                self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Drop all instances and reset the statistics."""
+        with self._lock:
+            self._entries.clear()
+            self._keys.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> Dict[str, int]:
+        """The hits, misses, evictions and size of the cache."""
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions, "size": len(self._entries)}
+
+    def __repr__(self) -> str:
+        return f"InstanceCache(capacity={self.capacity}, size={len(self._entries)}, hits={self.hits}, misses={self.misses})"
+
+
 class DataWriter(Entity, Generic[_T]):
     def __init__(self,
                  publisher_or_participant: Union[DomainParticipant, Publisher],
                  topic: Topic[_T],
                  qos: Optional[Qos] = None,
-                 listener: Optional[Listener] = None):
+                 listener: Optional[Listener] = None,
+                 instance_cache_size: int = 0):
+        """
+        Parameters
+        ----------
+        publisher_or_participant: Union[DomainParticipant, Publisher]
+            The publisher or participant that owns the writer.
+        topic: Topic
+            The topic to write.
+        qos: Qos, optional
+            The qos of the writer.
+        listener: Listener, optional
+            The listener of the writer.
+        instance_cache_size: int
+            Keep the instance handles of this many instances in an :class:`InstanceCache`,
+            0 disables the cache.
+        """
         if not isinstance(publisher_or_participant, (DomainParticipant, Publisher)):
             raise TypeError(f"{publisher_or_participant} is not a cyclonedds.domain.DomainParticipant"
                             " or cyclonedds.pub.Publisher.")
@@ -136,6 +284,8 @@ class DataWriter(Entity, Generic[_T]):
             elif not isinstance(qos, Qos):
                 raise TypeError(f"{qos} is not a valid qos object")
 
+        instance_cache = InstanceCache(topic.data_type, instance_cache_size) if instance_cache_size else None
+
         cqos = _CQos.qos_to_cqos(qos) if qos else None
         try:
             super().__init__(
@@ -155,6 +305,9 @@ class DataWriter(Entity, Generic[_T]):
         self.data_type = topic.data_type
         self._keepalive_entities = [self.publisher, self.topic]
         self._constructor = None
+        # Serialization buffers, one per writing thread as they are in use while the GIL is released
+        self._buffers = threading.local()
+        self._instance_cache = instance_cache
 
         cqos = _CQos.cqos_create()
         ret = self._get_qos(self._ref, cqos)
@@ -172,6 +325,25 @@ class DataWriter(Entity, Generic[_T]):
     def topic(self) -> Topic[_T]:
         return self._topic
 
+    @property
+    def instance_cache(self) -> Optional[InstanceCache]:
+        """The cache of instance handles, None if it is not enabled."""
+        return self._instance_cache
+
+    def _cached_instance(self, sample: _T) -> Tuple[Any, Optional[Tuple[int, bytes]]]:
+        cache = self._instance_cache
+        if cache is None:
+            return None, None
+        key = cache.key(sample)
+        return key, cache.get(key)
+
+    def _serialize(self, sample: _T, serialize_kind: SerializeKind = SerializeKind.DataSample) -> memoryview:
+        try:
+            buffer = self._buffers.buffer
+        except AttributeError:
+            buffer = self._buffers.buffer = ReusableBuffer()
+        return sample.__idl__.serialize_view(buffer, sample, use_version_2=self._use_version_2, serialize_kind=serialize_kind)
+
     def write(self, sample: _T, timestamp: Optional[int] = None):
         """
         Parameters
@@ -184,17 +356,51 @@ class DataWriter(Entity, Generic[_T]):
         if not isinstance(sample, self.data_type):
             raise TypeError(f"{sample} is not of type {self.data_type}")
 
-        ser = sample.serialize(use_version_2=self._use_version_2)
-        ser = ser.ljust((len(ser) + 4 - 1) & ~(4 - 1), b'\0')
-
-        if timestamp is not None:
-            ret = ddspy_write_ts(self._ref, ser, timestamp)
-        else:
-            ret = ddspy_write(self._ref, ser)
+        with self._serialize(sample) as ser:
+            if timestamp is not None:
+                ret = ddspy_write_ts(self._ref, ser, timestamp)
+            else:
+                ret = ddspy_write(self._ref, ser)
 
         if ret < 0:
             raise DDSException(ret, f"Occurred while writing sample in {repr(self)}")
 
+    def write_many(self, samples: Sequence[_T], timestamps: Optional[Sequence[int]] = None):
+        """
+        Write a batch of samples. All samples are serialized first and then handed to
+        the C layer in a single call, which writes them in order without holding the GIL.
+
+        Parameters
+        ----------
+        samples
+            The samples to write
+        timestamps
+            The source_timestamps of the samples (in nanoseconds since the UNIX Epoch),
+            if given there must be exactly one per sample.
+
+        Raises
+        ------
+        DDSException
+            If writing one of the samples fails. The samples before it have already
+            been written at that point, the samples after it are not.
+        """
+        if timestamps is not None and len(timestamps) != len(samples):
+            raise ValueError("The number of timestamps does not match the number of samples.")
+
+        data_type = self.data_type
+        batch = []
+        for sample in samples:
+            if not isinstance(sample, data_type):
+                raise TypeError(f"{sample} is not of type {data_type}")
+            # The whole batch is pinned at once, so every sample needs its own copy
+            with self._serialize(sample) as ser:
+                batch.append(bytes(ser))
+
+        written, ret = ddspy_write_batch(self._ref, batch, timestamps)
+
+        if ret < 0:
+            raise DDSException(ret, f"Occurred while writing sample {written} of a batch of {len(batch)} in {repr(self)}")
+
     def write_dispose(self, sample: _T, timestamp: Optional[int] = None):
         """
         Similar to :func:`write` but also marks the sample for disposal by setting its
@@ -207,13 +413,11 @@ class DataWriter(Entity, Generic[_T]):
         timestamp
             The sample's source_timestamp (in nanoseconds since the UNIX Epoch)
         """
-        ser = sample.serialize(use_version_2=self._use_version_2)
-        ser = ser.ljust((len(ser) + 4 - 1) & ~(4 - 1), b'\0')
-
-        if timestamp is not None:
-            ret = ddspy_writedispose_ts(self._ref, ser, timestamp)
-        else:
-            ret = ddspy_writedispose(self._ref, ser)
+        with self._serialize(sample) as ser:
+            if timestamp is not None:
+                ret = ddspy_writedispose_ts(self._ref, ser, timestamp)
+            else:
+                ret = ddspy_writedispose(self._ref, ser)
 
         if ret < 0:
             raise DDSException(ret, f"Occurred while writedisposing sample in {repr(self)}")
@@ -230,13 +434,27 @@ class DataWriter(Entity, Generic[_T]):
         timestamp
             The sample's source_timestamp (in nanoseconds since the UNIX Epoch)
         """
-        ser = sample.serialize_key(use_version_2=self._use_version_2)
-        ser = ser.ljust((len(ser) + 4 - 1) & ~(4 - 1), b'\0')
-
-        if timestamp is not None:
-            ret = ddspy_dispose_ts(self._ref, ser, timestamp)
+        key, cached = self._cached_instance(sample)
+        if cached is not None:
+            handle, serialized_key = cached
+            if timestamp is not None:
+                ret = ddspy_dispose_handle_ts(self._ref, handle, timestamp)
+            else:
+                ret = ddspy_dispose_handle(self._ref, handle)
+            if ret >= 0:
+                return
+            # The handle is no longer valid, fall back to the key
+            self._instance_cache.discard(key)
+            if timestamp is not None:
+                ret = ddspy_dispose_ts(self._ref, serialized_key, timestamp)
+            else:
+                ret = ddspy_dispose(self._ref, serialized_key)
         else:
-            ret = ddspy_dispose(self._ref, ser)
+            with self._serialize(sample, SerializeKind.KeyDefinitionOrder) as ser:
+                if timestamp is not None:
+                    ret = ddspy_dispose_ts(self._ref, ser, timestamp)
+                else:
+                    ret = ddspy_dispose(self._ref, ser)
 
         if ret < 0:
             raise DDSException(ret, f"Occurred while disposing in {repr(self)}")
@@ -262,10 +480,17 @@ class DataWriter(Entity, Generic[_T]):
             raise DDSException(ret, f"Occurred while disposing in {repr(self)}")
 
     def register_instance(self, sample: _T) -> int:
-        ser = sample.serialize_key(use_version_2=self._use_version_2)
-        ser = ser.ljust((len(ser) + 4 - 1) & ~(4 - 1), b'\0')
-
-        ret = ddspy_register_instance(self._ref, ser)
+        key, cached = self._cached_instance(sample)
+        if cached is not None:
+            # Always register, the instance may have been unregistered behind the cache's back
+            ret = ddspy_register_instance(self._ref, cached[1])
+            if ret > 0 and ret != cached[0]:
+                self._instance_cache.put(key, ret, cached[1])
+        else:
+            with self._serialize(sample, SerializeKind.KeyDefinitionOrder) as ser:
+                ret = ddspy_register_instance(self._ref, ser)
+                if ret > 0 and key is not None:
+                    self._instance_cache.put(key, ret, bytes(ser))
         if ret < 0:
             raise DDSException(ret, f"Occurred while registering instance in {repr(self)}")
         return ret
@@ -279,13 +504,26 @@ class DataWriter(Entity, Generic[_T]):
         timestamp
             The timestamp used at registration (in nanoseconds since the UNIX Epoch)
         """
-        ser = sample.serialize_key(use_version_2=self._use_version_2)
-        ser = ser.ljust((len(ser) + 4 - 1) & ~(4 - 1), b'\0')
-
-        if timestamp is not None:
-            ret = ddspy_unregister_instance_ts(self._ref, ser, timestamp)
+        key, cached = self._cached_instance(sample)
+        if cached is not None:
+            handle, serialized_key = cached
+            self._instance_cache.discard(key)
+            if timestamp is not None:
+                ret = ddspy_unregister_instance_handle_ts(self._ref, handle, timestamp)
+            else:
+                ret = ddspy_unregister_instance_handle(self._ref, handle)
+            if ret < 0:
+                # The handle is no longer valid, fall back to the key
+                if timestamp is not None:
+                    ret = ddspy_unregister_instance_ts(self._ref, serialized_key, timestamp)
+                else:
+                    ret = ddspy_unregister_instance(self._ref, serialized_key)
         else:
-            ret = ddspy_unregister_instance(self._ref, ser)
+            with self._serialize(sample, SerializeKind.KeyDefinitionOrder) as ser:
+                if timestamp is not None:
+                    ret = ddspy_unregister_instance_ts(self._ref, ser, timestamp)
+                else:
+                    ret = ddspy_unregister_instance(self._ref, ser)
 
         if ret < 0:
             raise DDSException(ret, f"Occurred while unregistering instance in {repr(self)}")
@@ -299,6 +537,8 @@ class DataWriter(Entity, Generic[_T]):
         timestamp
             The timestamp used at registration (in nanoseconds since the UNIX Epoch)
         """
+        if self._instance_cache is not None:
+            self._instance_cache.discard_handle(handle)
         if timestamp is not None:
             ret = ddspy_unregister_instance_handle_ts(self._ref, handle, timestamp)
         else:
@@ -329,11 +569,14 @@ class DataWriter(Entity, Generic[_T]):
     def lookup_instance(self, sample: _T) -> Optional[int]:
         """
         This operation takes a sample and returns an instance handle to be used for subsequent operations.
+        With an :attr:`instance_cache` the handle of a cached instance is returned without a lookup, instances
+        that are looked up are not added to the cache.
         """
-        ser = sample.serialize_key(use_version_2=self._use_version_2)
-        ser = ser.ljust((len(ser) + 4 - 1) & ~(4 - 1), b'\0')
-
-        ret = ddspy_lookup_instance(self._ref, ser)
+        key, cached = self._cached_instance(sample)
+        if cached is not None:
+            return cached[0]
+        with self._serialize(sample, SerializeKind.KeyDefinitionOrder) as ser:
+            ret = ddspy_lookup_instance(self._ref, ser)
         if ret < 0:
             raise DDSException(ret, f"Occurred while lookup up instance from {repr(self)}")
         if ret == 0:
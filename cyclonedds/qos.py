@@ -1095,6 +1095,22 @@ class _CQos(DDS):
 
         return Qos(*policies)
 
+    @classmethod
+    def decoded_to_qos(cls, decoded):
+        """Convert the tuple ``ddspy_qos_decode`` makes of a qos pointer in one pass over the C qos.
+        It has one entry per scope in the order of ``_all_scopes``, None for policies that are not set.
+        """
+        policies = []
+        for scope, value in zip(cls._all_scopes, decoded):
+            if value is not None:
+                p = getattr(cls, "_dec_p_" + scope.lower())(value)
+                if type(p) == list:
+                    policies.extend(p)
+                else:
+                    policies.append(p)
+
+        return Qos(*policies)
+
     @classmethod
     def cqos_destroy(cls, cqos):
         cls.delete_cqos(cqos)
@@ -2037,3 +2053,162 @@ class _CQos(DDS):
     @static_c_call("dds_qget_entity_name")
     def _get_entity_name(self, qos: dds_c_t.qos_p, name: ct.POINTER(ct.c_char_p)) -> ct.c_bool:
         pass
+
+    # Decoded policies, the entries of the tuple made by ddspy_qos_decode
+
+    @staticmethod
+    def _dec_p_reliability(value):
+        if value[0] == 0:
+            return Policy.Reliability.BestEffort
+        return Policy.Reliability.Reliable(max_blocking_time=value[1])
+
+    @staticmethod
+    def _dec_p_durability(value):
+        if value == 0:
+            return Policy.Durability.Volatile
+        elif value == 1:
+            return Policy.Durability.TransientLocal
+        elif value == 2:
+            return Policy.Durability.Transient
+        return Policy.Durability.Persistent
+
+    @staticmethod
+    def _dec_p_history(value):
+        if value[0] == 1:
+            return Policy.History.KeepAll
+        return Policy.History.KeepLast(depth=value[1])
+
+    @staticmethod
+    def _dec_p_resourcelimits(value):
+        return Policy.ResourceLimits(max_samples=value[0], max_instances=value[1], max_samples_per_instance=value[2])
+
+    @staticmethod
+    def _dec_p_presentationaccessscope(value):
+        if value[0] == 0:
+            return Policy.PresentationAccessScope.Instance(coherent_access=value[1], ordered_access=value[2])
+        elif value[0] == 1:
+            return Policy.PresentationAccessScope.Topic(coherent_access=value[1], ordered_access=value[2])
+        return Policy.PresentationAccessScope.Group(coherent_access=value[1], ordered_access=value[2])
+
+    @staticmethod
+    def _dec_p_lifespan(value):
+        return Policy.Lifespan(lifespan=value)
+
+    @staticmethod
+    def _dec_p_deadline(value):
+        return Policy.Deadline(deadline=value)
+
+    @staticmethod
+    def _dec_p_latencybudget(value):
+        return Policy.LatencyBudget(budget=value)
+
+    @staticmethod
+    def _dec_p_ownership(value):
+        if value == 0:
+            return Policy.Ownership.Shared
+        return Policy.Ownership.Exclusive
+
+    @staticmethod
+    def _dec_p_ownershipstrength(value):
+        return Policy.OwnershipStrength(strength=value)
+
+    @staticmethod
+    def _dec_p_liveliness(value):
+        if value[0] == 0:
+            return Policy.Liveliness.Automatic(lease_duration=value[1])
+        if value[0] == 1:
+            return Policy.Liveliness.ManualByParticipant(lease_duration=value[1])
+        return Policy.Liveliness.ManualByTopic(lease_duration=value[1])
+
+    @staticmethod
+    def _dec_p_timebasedfilter(value):
+        return Policy.TimeBasedFilter(filter_time=value)
+
+    @staticmethod
+    def _dec_p_partition(value):
+        return Policy.Partition(partitions=value)
+
+    @staticmethod
+    def _dec_p_transportpriority(value):
+        return Policy.TransportPriority(priority=value)
+
+    @staticmethod
+    def _dec_p_destinationorder(value):
+        if value == 0:
+            return Policy.DestinationOrder.ByReceptionTimestamp
+        return Policy.DestinationOrder.BySourceTimestamp
+
+    @staticmethod
+    def _dec_p_writerdatalifecycle(value):
+        return Policy.WriterDataLifecycle(autodispose=value)
+
+    @staticmethod
+    def _dec_p_readerdatalifecycle(value):
+        return Policy.ReaderDataLifecycle(
+            autopurge_nowriter_samples_delay=value[0],
+            autopurge_disposed_samples_delay=value[1]
+        )
+
+    @staticmethod
+    def _dec_p_durabilityservice(value):
+        if value[1] == 0:
+            history = Policy.History.KeepLast(depth=value[2])
+        else:
+            history = Policy.History.KeepAll
+
+        return Policy.DurabilityService(
+            cleanup_delay=value[0],
+            history=history,
+            max_samples=value[3],
+            max_instances=value[4],
+            max_samples_per_instance=value[5]
+        )
+
+    @staticmethod
+    def _dec_p_ignorelocal(value):
+        if value == 0:
+            return Policy.IgnoreLocal.Nothing
+        if value == 1:
+            return Policy.IgnoreLocal.Participant
+        return Policy.IgnoreLocal.Process
+
+    @staticmethod
+    def _dec_p_userdata(value):
+        return Policy.Userdata(data=value)
+
+    @staticmethod
+    def _dec_p_groupdata(value):
+        return Policy.Groupdata(data=value)
+
+    @staticmethod
+    def _dec_p_topicdata(value):
+        return Policy.Topicdata(data=value)
+
+    @staticmethod
+    def _dec_p_property(value):
+        return [Policy.Property(name, v, propagate=propagate) for name, v, propagate in value]
+
+    @staticmethod
+    def _dec_p_binaryproperty(value):
+        return [Policy.BinaryProperty(name, v, propagate=propagate) for name, v, propagate in value]
+
+    @staticmethod
+    def _dec_p_typeconsistency(value):
+        if value[0] == 0:
+            return Policy.TypeConsistency.DisallowTypeCoercion(force_type_validation=value[5])
+
+        return Policy.TypeConsistency.AllowTypeCoercion(
+            ignore_sequence_bounds=value[1],
+            ignore_string_bounds=value[2],
+            ignore_member_names=value[3],
+            prevent_type_widening=value[4],
+            force_type_validation=value[5]
+        )
+
+    @staticmethod
+    def _dec_p_datarepresentation(value):
+        return Policy.DataRepresentation(use_cdrv0_representation=value[0], use_xcdrv2_representation=value[1])
+
+    @staticmethod
+    def _dec_p_entityname(value):
+        return Policy.EntityName(name=value)
@@ -11,24 +11,34 @@
 """
 
 import ctypes as ct
-import asyncio
-import concurrent.futures
-from typing import AsyncGenerator, List, Optional, TypeVar, Union, Generator, Generic, TYPE_CHECKING
+from typing import AsyncGenerator, List, Optional, Tuple, TypeVar, Union, Generator, Generic, TYPE_CHECKING
 import uuid
 
-from .core import Entity, Listener, DDSException, WaitSet, ReadCondition, QueryCondition, SampleState, InstanceState, ViewState
+from .core import Entity, Listener, DDSException, WaitSet, AsyncWaitSet, ReadCondition, QueryCondition, SampleState, InstanceState, ViewState
 from .domain import DomainParticipant
 from .topic import Topic
-from .internal import c_call, dds_c_t, InvalidSample
+from .internal import c_call, dds_c_t, InvalidSample, SampleInfoBatch
 from .qos import _CQos, Qos, LimitedScopeQos, SubscriberQos, DataReaderQos
 from .util import duration
 from .builtin_types import DcpsEndpoint, endpoint_constructor, cqos_to_qos
+from .idl import DeserializerPool
+from .idl._columnar import columnar_layout, decode_columnar
 
 from cyclonedds._clayer import ddspy_read, ddspy_take, ddspy_read_handle, ddspy_take_handle, ddspy_lookup_instance, ddspy_get_matched_publication_data
 
 
 if TYPE_CHECKING:
     import cyclonedds
+    import numpy
+
+
+# Columns of the sample info array returned by read_numpy/take_numpy
+_sample_info_dtype = [
+    ("sample_state", "u4"), ("view_state", "u4"), ("instance_state", "u4"), ("valid_data", "?"),
+    ("source_timestamp", "i8"), ("instance_handle", "u8"), ("publication_handle", "u8"),
+    ("disposed_generation_count", "u4"), ("no_writers_generation_count", "u4"), ("sample_rank", "u4"),
+    ("generation_rank", "u4"), ("absolute_generation_rank", "u4")
+]
 
 
 class Subscriber(Entity):
@@ -94,7 +104,8 @@ class DataReader(Entity, Generic[_T]):
             subscriber_or_participant: Union['cyclonedds.sub.Subscriber', 'cyclonedds.domain.DomainParticipant'],
             topic: Topic[_T],
             qos: Optional[Qos] = None,
-            listener: Optional[Listener] = None):
+            listener: Optional[Listener] = None,
+            deserializer_pool: Optional[DeserializerPool] = None):
         """
         Parameters
         ----------
@@ -109,6 +120,9 @@ class DataReader(Entity, Generic[_T]):
             Optionally supply a Qos.
         listener: cyclonedds.core.Listener = None
             Optionally supply a Listener.
+        deserializer_pool: cyclonedds.idl.DeserializerPool, optional = None
+            Deserialize batches of at least the threshold of the pool on its worker processes,
+            except when reading lazily. The reader does not shut down the pool.
         """
         if not isinstance(subscriber_or_participant, (Subscriber, DomainParticipant)):
             raise TypeError(f"{subscriber_or_participant} is not a cyclonedds.domain.DomainParticipant"
@@ -127,6 +141,9 @@ class DataReader(Entity, Generic[_T]):
             if not isinstance(listener, Listener):
                 raise TypeError(f"{listener} is not a valid listener object.")
 
+        if deserializer_pool is not None and not isinstance(deserializer_pool, DeserializerPool):
+            raise TypeError(f"{deserializer_pool} is not a cyclonedds.idl.DeserializerPool.")
+
         cqos = _CQos.qos_to_cqos(qos) if qos else None
         try:
             super().__init__(
@@ -146,12 +163,14 @@ class DataReader(Entity, Generic[_T]):
         self._next_condition = None
         self._keepalive_entities = [self.subscriber, topic]
         self._constructor = None
+        self._deserializer_pool = deserializer_pool
 
     @property
     def topic(self) -> Topic[_T]:
         return self._topic
 
-    def read(self, N: int = 1, condition: Entity = None, instance_handle: int = None) -> List[_T]:
+    def read(self, N: int = 1, condition: Entity = None, instance_handle: int = None, loan: bool = False,
+             lazy: bool = False) -> List[_T]:
         """Read a maximum of N samples, non-blocking. Optionally use a read/query-condition to select which samples
         you are interested in.
 
@@ -164,39 +183,32 @@ class DataReader(Entity, Generic[_T]):
             The maximum number of samples to read.
         condition: cyclonedds.core.ReadCondition, cyclonedds.core.QueryCondition, optional
             Only read samples that satisfy the supplied condition.
+        loan: bool
+            Deserialize the samples directly from the received data instead of from copies of it,
+            this saves two copies per sample which pays off for large samples.
+        lazy: bool
+            Return :class:`LazyView<cyclonedds.idl.LazyView>` objects that only decode the members
+            that are accessed, this pays off for large samples of which only a few members are used.
 
         Raises
         ------
         DDSException
             If any error code is returned by the DDS API it is converted into an exception.
         """
-        use_reader = self._ref
-        use_mask = SampleState.Any | ViewState.Any | InstanceState.Any
-        if isinstance(condition, ReadCondition):
-            use_reader = condition.reader._ref
-            use_mask = condition.mask
-        elif isinstance(condition, QueryCondition):
-            use_reader = condition._ref
-            use_mask = condition.mask
+        use_reader, use_mask = self._resolve_condition(condition)
 
         if instance_handle is not None:
-            ret = ddspy_read_handle(use_reader, use_mask, N, instance_handle)
+            ret = ddspy_read_handle(use_reader, use_mask, N, instance_handle, loan)
         else:
-            ret = ddspy_read(use_reader, use_mask, N)
+            ret = ddspy_read(use_reader, use_mask, N, loan)
 
         if type(ret) == int:
             raise DDSException(ret, f"Occurred while reading data in {repr(self)}")
 
-        samples = []
-        for (data, info) in ret:
-            if info.valid_data:
-                samples.append(self._topic.data_type.deserialize(data))
-                samples[-1].sample_info = info
-            else:
-                samples.append(InvalidSample(self._topic.data_type.deserialize_key(data), info))
-        return samples
+        return self._convert_samples(ret, lazy)
 
-    def take(self, N: int = 1, condition: Entity = None, instance_handle: int = None) -> List[_T]:
+    def take(self, N: int = 1, condition: Entity = None, instance_handle: int = None, loan: bool = False,
+             lazy: bool = False) -> List[_T]:
         """Take a maximum of N samples, non-blocking. Optionally use a read/query-condition to select which samples
         you are interested in.
 
@@ -209,38 +221,243 @@ class DataReader(Entity, Generic[_T]):
             The maximum number of samples to read.
         condition: cyclonedds.core.ReadCondition, cyclonedds.core.QueryCondition, optional
             Only take samples that satisfy the supplied condition.
+        loan: bool
+            Deserialize the samples directly from the received data instead of from copies of it,
+            this saves two copies per sample which pays off for large samples.
+        lazy: bool
+            Return :class:`LazyView<cyclonedds.idl.LazyView>` objects that only decode the members
+            that are accessed, this pays off for large samples of which only a few members are used.
 
         Raises
         ------
         DDSException
             If any error code is returned by the DDS API it is converted into an exception.
         """
-        use_reader = self._ref
-        use_mask = SampleState.Any | ViewState.Any | InstanceState.Any
-        if isinstance(condition, ReadCondition):
-            use_reader = condition.reader._ref
-            use_mask = condition.mask
-        elif isinstance(condition, QueryCondition):
-            use_reader = condition._ref
-            use_mask = condition.mask
+        use_reader, use_mask = self._resolve_condition(condition)
+
+        if instance_handle is not None:
+            ret = ddspy_take_handle(use_reader, use_mask, N, instance_handle, loan)
+        else:
+            ret = ddspy_take(use_reader, use_mask, N, loan)
+
+        if type(ret) == int:
+            raise DDSException(ret, f"Occurred while taking data in {repr(self)}")
+
+        return self._convert_samples(ret, lazy)
+
+    def read_with_info_batch(self, N: int = 1, condition: Entity = None, instance_handle: int = None,
+                             loan: bool = False, lazy: bool = False) -> Tuple[List[_T], SampleInfoBatch]:
+        """Read a maximum of N samples like :meth:`read`, but return the sample infos of all samples
+        in one :class:`SampleInfoBatch<cyclonedds.internal.SampleInfoBatch>` instead of one object per
+        sample. The samples do not get a ``sample_info`` attribute, the sample info of ``samples[i]`` is
+        ``infos[i]``. This saves creating a sample info per sample when reading large batches.
+
+        Parameters
+        ----------
+        N: int
+            The maximum number of samples to read.
+        condition: cyclonedds.core.ReadCondition, cyclonedds.core.QueryCondition, optional
+            Only read samples that satisfy the supplied condition.
+        instance_handle: int, optional
+            Only read samples of the instance with this handle.
+        loan: bool
+            Deserialize the samples directly from the received data, see :meth:`read`.
+        lazy: bool
+            Return :class:`LazyView<cyclonedds.idl.LazyView>` objects, see :meth:`read`.
+
+        Returns
+        -------
+        Tuple[List[_T], SampleInfoBatch]
+            The samples and their sample infos.
+
+        Raises
+        ------
+        DDSException
+            If any error code is returned by the DDS API it is converted into an exception.
+        """
+        use_reader, use_mask = self._resolve_condition(condition)
+
+        if instance_handle is not None:
+            ret = ddspy_read_handle(use_reader, use_mask, N, instance_handle, loan, True)
+        else:
+            ret = ddspy_read(use_reader, use_mask, N, loan, True)
+
+        if type(ret) == int:
+            raise DDSException(ret, f"Occurred while reading data in {repr(self)}")
+
+        return self._convert_batch(ret, lazy)
+
+    def take_with_info_batch(self, N: int = 1, condition: Entity = None, instance_handle: int = None,
+                             loan: bool = False, lazy: bool = False) -> Tuple[List[_T], SampleInfoBatch]:
+        """Take a maximum of N samples like :meth:`take`, but return the sample infos of all samples
+        in one :class:`SampleInfoBatch<cyclonedds.internal.SampleInfoBatch>` instead of one object per
+        sample. The samples do not get a ``sample_info`` attribute, the sample info of ``samples[i]`` is
+        ``infos[i]``. This saves creating a sample info per sample when taking large batches.
+
+        Parameters
+        ----------
+        N: int
+            The maximum number of samples to take.
+        condition: cyclonedds.core.ReadCondition, cyclonedds.core.QueryCondition, optional
+            Only take samples that satisfy the supplied condition.
+        instance_handle: int, optional
+            Only take samples of the instance with this handle.
+        loan: bool
+            Deserialize the samples directly from the received data, see :meth:`take`.
+        lazy: bool
+            Return :class:`LazyView<cyclonedds.idl.LazyView>` objects, see :meth:`take`.
+
+        Returns
+        -------
+        Tuple[List[_T], SampleInfoBatch]
+            The samples and their sample infos.
+
+        Raises
+        ------
+        DDSException
+            If any error code is returned by the DDS API it is converted into an exception.
+        """
+        use_reader, use_mask = self._resolve_condition(condition)
 
         if instance_handle is not None:
-            ret = ddspy_take_handle(use_reader, use_mask, N, instance_handle)
+            ret = ddspy_take_handle(use_reader, use_mask, N, instance_handle, loan, True)
         else:
-            ret = ddspy_take(use_reader, use_mask, N)
+            ret = ddspy_take(use_reader, use_mask, N, loan, True)
 
         if type(ret) == int:
             raise DDSException(ret, f"Occurred while taking data in {repr(self)}")
 
+        return self._convert_batch(ret, lazy)
+
+    def _resolve_condition(self, condition: Optional[Entity]):
+        if isinstance(condition, ReadCondition):
+            return condition.reader._ref, condition.mask
+        elif isinstance(condition, QueryCondition):
+            return condition._ref, condition.mask
+        return self._ref, SampleState.Any | ViewState.Any | InstanceState.Any
+
+    def _convert_samples(self, ret, lazy: bool = False) -> List[_T]:
+        data_type = self._topic.data_type
+        pool = self._deserializer_pool
+        if pool is not None and not lazy and len(ret) >= pool.threshold:
+            # The pool returns the valid samples in order, they are handed out in the loop below
+            valid = iter(pool.deserialize(data_type, [data for data, info in ret if info.valid_data]))
+
+            def deserialize(data):
+                return next(valid)
+        else:
+            deserialize = data_type.__idl__.deserialize_lazy if lazy else data_type.deserialize
         samples = []
         for (data, info) in ret:
             if info.valid_data:
-                samples.append(self._topic.data_type.deserialize(data))
-                samples[-1].sample_info = info
+                sample = deserialize(data)
+                sample.sample_info = info
+                samples.append(sample)
             else:
-                samples.append(InvalidSample(self._topic.data_type.deserialize_key(data), info))
+                samples.append(InvalidSample(data_type.deserialize_key(data), info))
         return samples
 
+    def _convert_batch(self, ret, lazy: bool = False) -> Tuple[List[_T], SampleInfoBatch]:
+        data_type = self._topic.data_type
+        datas, columns = ret
+        infos = SampleInfoBatch(columns)
+        pool = self._deserializer_pool
+        if pool is not None and not lazy and len(datas) >= pool.threshold:
+            valid = iter(pool.deserialize(data_type, [data for data, v in zip(datas, infos.valid_data) if v]))
+
+            def deserialize(data):
+                return next(valid)
+        else:
+            deserialize = data_type.__idl__.deserialize_lazy if lazy else data_type.deserialize
+        samples = [
+            deserialize(data) if v else InvalidSample(data_type.deserialize_key(data), infos[i])
+            for i, (data, v) in enumerate(zip(datas, infos.valid_data))
+        ]
+        return samples, infos
+
+    def read_numpy(self, N: int = 1, condition: Entity = None) -> Tuple['numpy.ndarray', 'numpy.ndarray']:
+        """Read a maximum of N samples into NumPy structured arrays, non-blocking. This is only possible
+        for datatypes that serialize to a fixed size: structs of primitives, enums, bitmasks, fixed size
+        arrays and nested structs of those. No sample objects are created, the serialized samples are
+        converted in one pass. Requires NumPy.
+
+        Parameters
+        ----------
+        N: int
+            The maximum number of samples to read.
+        condition: cyclonedds.core.ReadCondition, cyclonedds.core.QueryCondition, optional
+            Only read samples that satisfy the supplied condition.
+
+        Returns
+        -------
+        Tuple[numpy.ndarray, numpy.ndarray]
+            The samples, one row per sample, and their sample info fields in a second array with the
+            same number of rows. Rows of samples without valid data are zero.
+
+        Raises
+        ------
+        TypeError
+            If the datatype does not serialize to a fixed size.
+        DDSException
+            If any error code is returned by the DDS API it is converted into an exception.
+        """
+        # Unsupported datatypes fail before any samples are read
+        columnar_layout(self._topic.data_type)
+        use_reader, use_mask = self._resolve_condition(condition)
+        ret = ddspy_read(use_reader, use_mask, N, True, True)
+
+        if type(ret) == int:
+            raise DDSException(ret, f"Occurred while reading data in {repr(self)}")
+
+        return self._convert_numpy(ret)
+
+    def take_numpy(self, N: int = 1, condition: Entity = None) -> Tuple['numpy.ndarray', 'numpy.ndarray']:
+        """Take a maximum of N samples into NumPy structured arrays, non-blocking. This is only possible
+        for datatypes that serialize to a fixed size: structs of primitives, enums, bitmasks, fixed size
+        arrays and nested structs of those. No sample objects are created, the serialized samples are
+        converted in one pass. Requires NumPy.
+
+        Parameters
+        ----------
+        N: int
+            The maximum number of samples to take.
+        condition: cyclonedds.core.ReadCondition, cyclonedds.core.QueryCondition, optional
+            Only take samples that satisfy the supplied condition.
+
+        Returns
+        -------
+        Tuple[numpy.ndarray, numpy.ndarray]
+            The samples, one row per sample, and their sample info fields in a second array with the
+            same number of rows. Rows of samples without valid data are zero.
+
+        Raises
+        ------
+        TypeError
+            If the datatype does not serialize to a fixed size.
+        DDSException
+            If any error code is returned by the DDS API it is converted into an exception.
+        """
+        # Unsupported datatypes fail before any samples are taken
+        columnar_layout(self._topic.data_type)
+        use_reader, use_mask = self._resolve_condition(condition)
+        ret = ddspy_take(use_reader, use_mask, N, True, True)
+
+        if type(ret) == int:
+            raise DDSException(ret, f"Occurred while taking data in {repr(self)}")
+
+        return self._convert_numpy(ret)
+
+    def _convert_numpy(self, ret):
+        import numpy as np
+
+        datas, columns = ret
+        batch = SampleInfoBatch(columns)
+        data = decode_columnar(self._topic.data_type, list(zip(datas, batch.valid_data)))
+        infos = np.zeros(len(datas), dtype=_sample_info_dtype)
+        for name, _ in _sample_info_dtype:
+            infos[name] = np.frombuffer(getattr(batch, name), dtype=infos.dtype[name])
+        return data, infos
+
     def read_next(self) -> Optional[_T]:
         """Shortcut method to read exactly one sample or return None.
 
@@ -280,56 +497,66 @@ class DataReader(Entity, Generic[_T]):
         DDSException
             If any error code is returned by the DDS API it is converted into an exception.
         """
-        waitset = WaitSet(self.participant)
-        condition = condition or ReadCondition(self, ViewState.Any | InstanceState.Alive | SampleState.NotRead)
-        waitset.attach(condition)
-        timeout = timeout or duration(weeks=99999)
+        # One sample per step, so stopping halfway leaves the remaining samples unread
+        for samples in self.read_iter_batches(condition=condition, timeout=timeout, max_batch=1):
+            yield from samples
 
-        while True:
-            while True:
-                a = self.read(condition=condition)
-                if not a:
-                    break
-                yield a[0]
-            if waitset.wait(timeout) == 0:
-                break
+    def read_iter_batches(self, condition=None, timeout: int = None,
+                          max_batch: int = 256) -> Generator[List[_T], None, None]:
+        """Iterate over batches of read samples, every batch holds everything that was available up to
+        max_batch samples. Iteration will stop once the timeout you supply expires. Every time a sample is
+        received the timeout is reset.
+
+        Raises
+        ------
+        DDSException
+            If any error code is returned by the DDS API it is converted into an exception.
+        """
+        condition = self._batches_condition(condition, max_batch)
+        return self._iter_batches(self.read, condition, timeout, max_batch)
 
     def read_one(self, condition=None, timeout: int = None) -> _T:
         """Shortcut method to block and take exactly one sample or raise a timeout"""
-        sample = next(self.read_iter(condition=condition, timeout=timeout))
-        if sample is None:
+        samples = next(self.read_iter_batches(condition=condition, timeout=timeout, max_batch=1))
+        if not samples:
             raise TimeoutError()
-        return sample
+        return samples[0]
 
     def take_iter(self, condition=None, timeout: int = None) -> Generator[_T, None, None]:
         """Shortcut method to iterate taking samples. Iteration will stop once the timeout you supply expires.
         Every time a sample is received the timeout is reset.
 
+        Samples are taken one at a time, so no samples are lost when you stop iterating. Use
+        :func:`take_iter_batches` to take everything that is available at once.
+
         Raises
         ------
         DDSException
             If any error code is returned by the DDS API it is converted into an exception.
         """
-        waitset = WaitSet(self.participant)
-        condition = condition or ReadCondition(self, ViewState.Any | InstanceState.Alive | SampleState.NotRead)
-        waitset.attach(condition)
-        timeout = timeout or duration(weeks=99999)
+        for samples in self.take_iter_batches(condition=condition, timeout=timeout, max_batch=1):
+            yield from samples
 
-        while True:
-            while True:
-                a = self.take(condition=condition)
-                if not a:
-                    break
-                yield a[0]
-            if waitset.wait(timeout) == 0:
-                break
+    def take_iter_batches(self, condition=None, timeout: int = None,
+                          max_batch: int = 256) -> Generator[List[_T], None, None]:
+        """Iterate over batches of taken samples, every batch holds everything that was available up to
+        max_batch samples. Iteration will stop once the timeout you supply expires. Every time a sample is
+        received the timeout is reset.
+
+        Raises
+        ------
+        DDSException
+            If any error code is returned by the DDS API it is converted into an exception.
+        """
+        condition = self._batches_condition(condition, max_batch)
+        return self._iter_batches(self.take, condition, timeout, max_batch)
 
     def take_one(self, condition=None, timeout: int = None) -> _T:
         """Shortcut method to block and take exactly one sample or raise a timeout"""
-        sample = next(self.take_iter(condition=condition, timeout=timeout))
-        if sample is None:
+        samples = next(self.take_iter_batches(condition=condition, timeout=timeout, max_batch=1))
+        if not samples:
             raise TimeoutError()
-        return sample
+        return samples[0]
 
     async def read_aiter(self, condition=None, timeout: int = None) -> AsyncGenerator[_T, None]:
         """Shortcut method to async iterate reading samples. Iteration will stop once the timeout you supply expires.
@@ -340,48 +567,83 @@ class DataReader(Entity, Generic[_T]):
         DDSException
             If any error code is returned by the DDS API it is converted into an exception.
         """
-        waitset = WaitSet(self.participant)
-        condition = condition or ReadCondition(self, ViewState.Any | InstanceState.Alive | SampleState.NotRead)
-        waitset.attach(condition)
-        timeout = timeout or duration(weeks=99999)
+        async for samples in self.read_aiter_batches(condition=condition, timeout=timeout, max_batch=1):
+            for sample in samples:
+                yield sample
+
+    def read_aiter_batches(self, condition=None, timeout: int = None,
+                           max_batch: int = 256) -> AsyncGenerator[List[_T], None]:
+        """Async version of :func:`read_iter_batches`. All readers of a participant wait on a single shared
+        thread, see :class:`AsyncWaitSet<cyclonedds.core.AsyncWaitSet>`.
 
-        loop = asyncio.get_running_loop()
-        with concurrent.futures.ThreadPoolExecutor() as pool:
-            while True:
-                while True:
-                    a = self.read(condition=condition)
-                    if not a:
-                        break
-                    yield a[0]
-                result = await loop.run_in_executor(pool, waitset.wait, timeout)
-                if result == 0:
-                    break
+        Raises
+        ------
+        DDSException
+            If any error code is returned by the DDS API it is converted into an exception.
+        """
+        condition = self._batches_condition(condition, max_batch)
+        return self._aiter_batches(self.read, condition, timeout, max_batch)
 
     async def take_aiter(self, condition=None, timeout: int = None) -> AsyncGenerator[_T, None]:
         """Shortcut method to async iterate taking samples. Iteration will stop once the timeout you supply expires.
         Every time a sample is received the timeout is reset.
 
+        Samples are taken one at a time, so no samples are lost when you stop iterating. Use
+        :func:`take_aiter_batches` to take everything that is available at once.
+
         Raises
         ------
         DDSException
             If any error code is returned by the DDS API it is converted into an exception.
         """
+        async for samples in self.take_aiter_batches(condition=condition, timeout=timeout, max_batch=1):
+            for sample in samples:
+                yield sample
+
+    def take_aiter_batches(self, condition=None, timeout: int = None,
+                           max_batch: int = 256) -> AsyncGenerator[List[_T], None]:
+        """Async version of :func:`take_iter_batches`. All readers of a participant wait on a single shared
+        thread, see :class:`AsyncWaitSet<cyclonedds.core.AsyncWaitSet>`.
+
+        Raises
+        ------
+        DDSException
+            If any error code is returned by the DDS API it is converted into an exception.
+        """
+        condition = self._batches_condition(condition, max_batch)
+        return self._aiter_batches(self.take, condition, timeout, max_batch)
+
+    def _batches_condition(self, condition, max_batch: int):
+        # Called before the generator is created, so invalid arguments raise at the call
+        if max_batch < 1:
+            raise ValueError("max_batch must be at least 1")
+        return condition or ReadCondition(self, ViewState.Any | InstanceState.Alive | SampleState.NotRead)
+
+    def _iter_batches(self, read_or_take, condition, timeout: Optional[int],
+                      max_batch: int) -> Generator[List[_T], None, None]:
+        # Batches go through read/take, which subclasses like BuiltinDataReader override
         waitset = WaitSet(self.participant)
-        condition = condition or ReadCondition(self, ViewState.Any | InstanceState.Alive | SampleState.NotRead)
         waitset.attach(condition)
         timeout = timeout or duration(weeks=99999)
 
-        loop = asyncio.get_running_loop()
-        with concurrent.futures.ThreadPoolExecutor() as pool:
-            while True:
-                while True:
-                    a = self.take(condition=condition)
-                    if not a:
-                        break
-                    yield a[0]
-                result = await loop.run_in_executor(pool, waitset.wait, timeout)
-                if result == 0:
-                    break
+        while True:
+            samples = read_or_take(N=max_batch, condition=condition)
+            if samples:
+                yield samples
+            elif waitset.wait(timeout) == 0:
+                break
+
+    async def _aiter_batches(self, read_or_take, condition, timeout: Optional[int],
+                             max_batch: int) -> AsyncGenerator[List[_T], None]:
+        waitset = AsyncWaitSet.of(self.participant)
+        timeout = timeout or None
+
+        while True:
+            samples = read_or_take(N=max_batch, condition=condition)
+            if samples:
+                yield samples
+            elif not await waitset.wait(condition, timeout):
+                break
 
     def wait_for_historical_data(self, timeout: int) -> bool:
         ret = self._wait_for_historical_data(self._ref, timeout)
@@ -1,8 +1,11 @@
 import time
 from typing import Any, Optional
-from cyclonedds import qos, domain, sub, topic
+from cyclonedds import core, qos, domain, pub, sub, topic, util
+from cyclonedds._clayer import ddspy_take, ddspy_write_batch
+from cyclonedds.internal import SampleInfoBatch
 
 from ..utils import LiveData
+from ..recording import RecordingReader, RecordingWriter
 
 
 def subscribe(
@@ -28,3 +31,125 @@ def subscribe(
         time.sleep(0.01)
 
     live.delivered = True
+
+
+def record(
+    live: LiveData,
+    domain_id: Optional[int],
+    topic_name: str,
+    datatype: Any,
+    topicqos: qos.Qos,
+    endpointqos: qos.Qos,
+    path: str,
+    chunk_size: int,
+    max_batch: int = 256,
+):
+    if domain_id is None:
+        dp = domain.DomainParticipant()
+    else:
+        dp = domain.DomainParticipant(domain_id)
+    tp = topic.Topic(dp, topic_name, datatype, qos=topicqos)
+    rd = sub.DataReader(dp, tp, qos=endpointqos)
+    mask = core.SampleState.Any | core.ViewState.Any | core.InstanceState.Any
+    waitset = core.WaitSet(dp)
+    waitset.attach(core.ReadCondition(rd, mask))
+
+    idl = datatype.__idl__
+    idl.fill_type_data()
+    type_info, type_map = idl._xt_bytedata
+
+    with RecordingWriter(path, chunk_size) as recording:
+        stream = recording.add_stream(
+            topic_name, datatype.__idl_typename__, topicqos.asdict(), endpointqos.asdict(), type_info, type_map
+        )
+
+        while not live.terminate:
+            if not waitset.wait(util.duration(milliseconds=100)):
+                # Write what was recorded so far when the topic is idle
+                recording.flush()
+                continue
+
+            while True:
+                # The serialized samples are stored as they are, they are never deserialized
+                ret = ddspy_take(rd._ref, mask, max_batch, False, True)
+                if type(ret) == int:
+                    raise core.DDSException(ret, f"Occurred while taking data in {repr(rd)}")
+                datas, columns = ret
+                infos = SampleInfoBatch(columns)
+                valid = infos.valid_data
+                if all(valid):
+                    recording.write(stream, time.time_ns(), datas, infos.source_timestamp)
+                else:
+                    recording.write(
+                        stream, time.time_ns(),
+                        [data for data, v in zip(datas, valid) if v],
+                        [t for t, v in zip(infos.source_timestamp, valid) if v]
+                    )
+                live.entities += sum(valid)
+                if len(datas) < max_batch:
+                    break
+
+    live.delivered = True
+
+
+def replay(
+    live: LiveData,
+    domain_id: Optional[int],
+    path: str,
+    rate: float,
+    start: Optional[int],
+    source_timestamps: bool,
+    max_batch: int = 256,
+):
+    with RecordingReader(path) as recording:
+        if domain_id is None:
+            dp = domain.DomainParticipant()
+        else:
+            dp = domain.DomainParticipant(domain_id)
+
+        writers = {}
+        for stream in recording.streams:
+            datatype, _ = stream.datatype()
+            tp = topic.Topic(dp, stream.topic_name, datatype, qos=qos.Qos.fromdict(stream.topic_qos))
+            writers[stream.id] = pub.DataWriter(dp, tp, qos=qos.Qos.fromdict(stream.writer_qos))
+
+        start_time = recording.start_time
+        if start_time is not None and start is not None:
+            start_time += start
+        begin = time.monotonic_ns()
+        due = None
+
+        for entries in recording.entries(start_time):
+            i = 0
+            while i < len(entries) and not live.terminate:
+                first = entries[i]
+                if rate > 0:
+                    # Sleep until the first sample is due, then write all samples that are due by now
+                    delay = begin + (first.recorded_time - start_time) / rate - time.monotonic_ns()
+                    if delay > 0:
+                        time.sleep(delay / 1e9)
+                    due = start_time + (time.monotonic_ns() - begin) * rate
+
+                j = i + 1
+                while j < len(entries) and j - i < max_batch and entries[j].stream == first.stream \
+                        and (due is None or entries[j].recorded_time <= due):
+                    j += 1
+
+                batch = entries[i:j]
+                writer = writers[first.stream]
+                written, ret = ddspy_write_batch(
+                    writer._ref,
+                    [entry.data for entry in batch],
+                    [entry.source_timestamp for entry in batch] if source_timestamps else None
+                )
+                if ret < 0:
+                    raise core.DDSException(
+                        ret, f"Occurred while writing sample {written} of a batch of {len(batch)} in {repr(writer)}"
+                    )
+                live.entities += len(batch)
+                i = j
+
+            if live.terminate:
+                break
+
+    live.delivered = True
@@ -6,11 +6,22 @@ from .layout.ping import make_ping_layout, make_ping_updater
 from .layout.pong import make_pong_layout, make_pong_updater
 from .layout.subscribe import make_sub_layout, make_sub_updater
 from .layout.publish import make_pub_layout, make_pub_updater
+from .layout.python import make_python_layout, make_python_updater
 from .layout.app import DDSPerfApp
 from .utils import TimeDeltaParamType, RateParamType, SizeParamType
+from .pyperf import PythonPerf
 
 
 @click.group()
+@click.option(
+    "--backend",
+    default="ddsperf",
+    type=click.Choice(["ddsperf", "python"]),
+    help="""Run the external [bold yellow]ddsperf[/] tool, or run the test with DataWriters and DataReaders of the Python binding
+to measure the throughput and latency an application using the binding gets. The python backend reports the time spent
+serializing, writing, taking and deserializing samples and a histogram of the ping latencies. With [bold green]--local-matching[/]
+it also runs pong with ping and subscribe with publish, in the same process.""",
+)
 @click.option(
     "-T",
     "--topic",
@@ -110,6 +121,7 @@ See the [underline blue][link=https://rich.readthedocs.io/en/stable/console.html
 @click.pass_context
 def performance(
     ctx,
+    backend,
     local_matching,
     topic,
     num_keys,
@@ -140,7 +152,7 @@ def performance(
     -   [i]basic latency test[/]
     """
 
-    cmd = ["ddsperf", "-1", "-X"]
+    cmd = []
 
     if local_matching:
         cmd.append("-L")
@@ -179,10 +191,55 @@ def performance(
         cmd += ["-i", str(domain_id)]
 
     ctx.ensure_object(dict)
-    ctx.obj["ddsperf"] = cmd
+    ctx.obj["ddsperf"] = ["ddsperf", "-1", "-X"] + cmd
+    ctx.obj["backend"] = backend
     ctx.obj["color"] = color
     ctx.obj["render_output_once"] = render_output_once_on_exit
 
+    if backend == "python":
+        unsupported = [
+            name for name, value in [
+                ("--cpu", cpu),
+                ("--device-load", device_load),
+                ("--success-criterion", success_criterion),
+                ("--reference-time", reference_time),
+                ("--wait-match-max", wait_match_max),
+            ] if value
+        ]
+        if unsupported:
+            raise click.UsageError(f"{', '.join(unsupported)} cannot be used with the python backend")
+
+        if keep is None or keep == "all":
+            depth = None
+        elif keep.isdigit() and int(keep) > 0:
+            depth = int(keep)
+        else:
+            raise click.BadParameter(f"{keep} is not 'all' or a number", param_hint="--keep")
+
+        ctx.obj["python"] = ["python"] + cmd
+        ctx.obj["python_settings"] = dict(
+            topic=topic,
+            domain_id=domain_id,
+            reliable=not unreliable,
+            keep=depth,
+            num_keys=num_keys or 1,
+            local_matching=local_matching,
+            runtime=duration.total_seconds() if duration is not None else None,
+        )
+
+
+def run_app(ctx, cmd, layout_maker, update_maker, add_roles, triggering_mode="listener"):
+    console = Console(color_system=None if ctx.obj["color"] == "none" else ctx.obj["color"])
+
+    if ctx.obj["backend"] == "python":
+        perf = PythonPerf(triggering_mode=triggering_mode, **ctx.obj["python_settings"])
+        add_roles(perf)
+        app = DDSPerfApp(console, ctx.obj["python"] + cmd, make_python_layout, make_python_updater, backend=perf)
+    else:
+        app = DDSPerfApp(console, ctx.obj["ddsperf"] + cmd, layout_maker, update_maker)
+
+    app.run(ctx.obj["render_output_once"])
+
 
 @performance.command("ping", short_help="Send pings")
 @click.option(
@@ -217,12 +274,12 @@ def ping(ctx, rate, size, triggering_mode):
     if triggering_mode:
         cmd += [triggering_mode]
 
-    DDSPerfApp(
-        Console(color_system=None if ctx.obj["color"] == "none" else ctx.obj["color"]),
-        ctx.obj["ddsperf"] + cmd,
-        make_ping_layout,
-        make_ping_updater,
-    ).run(ctx.obj["render_output_once"])
+    def add_roles(perf):
+        perf.ping(rate=None if rate == "inf" else rate, size=size or 0)
+        if perf.local_matching:
+            perf.pong()
+
+    run_app(ctx, cmd, make_ping_layout, make_ping_updater, add_roles, triggering_mode)
 
 
 @performance.command("pong", short_help="Send pongs")
@@ -243,12 +300,7 @@ def pong(ctx, triggering_mode):
     if triggering_mode:
         cmd += [triggering_mode]
 
-    DDSPerfApp(
-        Console(color_system=None if ctx.obj["color"] == "none" else ctx.obj["color"]),
-        ctx.obj["ddsperf"] + cmd,
-        make_pong_layout,
-        make_pong_updater,
-    ).run(ctx.obj["render_output_once"])
+    run_app(ctx, cmd, make_pong_layout, make_pong_updater, lambda perf: perf.pong(), triggering_mode)
 
 
 @performance.command("subscribe", short_help="Subscribe to data")
@@ -268,12 +320,7 @@ def subscribe(ctx, triggering_mode):
     if triggering_mode:
         cmd += [triggering_mode]
 
-    DDSPerfApp(
-        Console(color_system=None if ctx.obj["color"] == "none" else ctx.obj["color"]),
-        ctx.obj["ddsperf"] + cmd,
-        make_sub_layout,
-        make_sub_updater,
-    ).run(ctx.obj["render_output_once"])
+    run_app(ctx, cmd, make_sub_layout, make_sub_updater, lambda perf: perf.subscriber(), triggering_mode)
 
 
 @performance.command("publish", short_help="Publish data")
@@ -308,13 +355,15 @@ def pub(ctx, rate, size, burst, ping):
 
     if ping is not None:
         cmd += ["ping", f"{ping}%"]
+        if ctx.obj["backend"] == "python":
+            raise click.UsageError("--ping cannot be used with the python backend, use ping and pong instead")
+
+    def add_roles(perf):
+        perf.publisher(rate=None if rate == "inf" else rate, burst=burst or 1, size=size or 0)
+        if perf.local_matching:
+            perf.subscriber()
 
-    DDSPerfApp(
-        Console(color_system=None if ctx.obj["color"] == "none" else ctx.obj["color"]),
-        ctx.obj["ddsperf"] + cmd,
-        make_pub_layout,
-        make_pub_updater,
-    ).run(ctx.obj["render_output_once"])
+    run_app(ctx, cmd, make_pub_layout, make_pub_updater, add_roles)
 
 
 @performance.command(
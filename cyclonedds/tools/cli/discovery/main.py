@@ -1,10 +1,8 @@
-from dataclasses import dataclass
-import time
 import re
-from typing import List, Optional
-from cyclonedds import core, domain, builtin, dynamic, util, internal
+import uuid
+from typing import Any, Callable, List, Optional
+from cyclonedds import core, domain, builtin, dynamic, util
 from datetime import datetime, timedelta
-from collections import defaultdict
 
 from ..utils import LiveData
 from ..idl import IdlType
@@ -13,156 +11,108 @@ from .ps_discoverables import PApplication, PParticipant, PSystem
 from .type_discoverables import DiscoveredType, TypeDiscoveryData
 
 
-def ls_discovery(
-    live: LiveData, domain_id: Optional[int], runtime: timedelta, topic: str, show_qos: bool
-) -> List[DParticipant]:
+def topic_regex(topic: str) -> re.Pattern:
     try:
-        topic_re = re.compile(f"^{topic}$")
+        return re.compile(f"^{topic}$")
     except re.error:
-        topic_re = re.compile(f"^{re.escape(topic)}$")
+        return re.compile(f"^{re.escape(topic)}$")
 
+
+def discover(
+    live: LiveData,
+    domain_id: Optional[int],
+    runtime: timedelta,
+    counted: Callable[[uuid.UUID, builtin.BuiltinTopic, Any], bool],
+) -> builtin.DiscoveryGraph:
+    """Run a discovery graph for the runtime, counting the entities for which counted(own key, builtin topic, sample)
+    holds in live.entities as they are discovered."""
     if domain_id is None:
         dp = domain.DomainParticipant()
     else:
         dp = domain.DomainParticipant(domain_id)
 
-    rdp = builtin.BuiltinDataReader(dp, builtin.BuiltinTopicDcpsParticipant)
-    rcp = core.ReadCondition(
-        rdp, core.SampleState.NotRead | core.ViewState.Any | core.InstanceState.Alive
-    )
-    rdw = builtin.BuiltinDataReader(dp, builtin.BuiltinTopicDcpsPublication)
-    rcw = core.ReadCondition(
-        rdw, core.SampleState.NotRead | core.ViewState.Any | core.InstanceState.Alive
-    )
-    rdr = builtin.BuiltinDataReader(dp, builtin.BuiltinTopicDcpsSubscription)
-    rcr = core.ReadCondition(
-        rdr, core.SampleState.NotRead | core.ViewState.Any | core.InstanceState.Alive
-    )
-
-    if internal.feature_topic_discovery:
-        rdt = builtin.BuiltinDataReader(dp, builtin.BuiltinTopicDcpsTopic)
-        rct = core.ReadCondition(
-            rdt,
-            core.SampleState.NotRead | core.ViewState.Any | core.InstanceState.Alive,
-        )
+    graph = builtin.DiscoveryGraph(dp)
+    own_key = dp.guid
 
-    participants = {}
-    topic_qos = {}
-    start = datetime.now()
-    end = start + runtime
-    while datetime.now() < end and not live.terminate:
-        for p in rdp.take(N=20, condition=rcp):
-            if p.key in participants:
-                participants[p.key].sample = p
-            else:
-                participants[p.key] = DParticipant(
-                    sample=p, topics=[], show_qos=show_qos
-                )
-            if p.key == dp.guid:
-                participants[p.key].is_self = True
-            else:
-                live.entities += 1
-
-        if internal.feature_topic_discovery:
-            for t in rdt.take(N=20, condition=rct):
-                if not topic_re.match(t.topic_name):
-                    continue
-
-                for participant in participants.values():
-                    for topic in participant.topics:
-                        if topic.name == t.topic_name:
-                            topic.qos = t.qos
-                            topic.endpoint = t
-                            break
-                    else:
-                        topic = DTopic(
-                            name=t.topic_name,
-                            endpoint=t,
-                            subscriptions=[],
-                            publications=[],
-                            show_qos=show_qos,
-                            qos=topic_qos.get(t.topic_name, core.Qos()),
-                        )
-                        participant.topics.append(topic)
-
-                topic_qos[t.topic_name] = t.qos
-
-        for pub in rdw.take(N=20, condition=rcw):
-            if pub.participant_key != dp.guid:
-                live.entities += 1
-
-            if not topic_re.match(pub.topic_name):
-                continue
-
-            pqos = pub.qos
-            naming = None
-            if core.Policy.EntityName in pqos:
-                naming = pqos[core.Policy.EntityName]
-                pqos = pqos - core.Qos(naming)
+    def count(change, builtin_topic, sample):
+        if change == builtin.DiscoveryChange.Added and counted(own_key, builtin_topic, sample):
+            live.entities += 1
 
-            if pub.participant_key in participants:
-                par = participants[pub.participant_key]
-            else:
-                par = participants[pub.participant_key] = DParticipant(
-                    sample=None, topics=[], show_qos=show_qos
-                )
+    graph.subscribe(count)
 
-            pub = DPubSub(endpoint=pub, qos=pqos, name=naming.name if naming else None)
+    end = datetime.now() + runtime
+    while not live.terminate:
+        remaining = (end - datetime.now()).total_seconds()
+        if remaining <= 0:
+            break
+        # Blocks until discovery data arrives, wake up regularly to check for termination
+        graph.update(util.duration(seconds=min(remaining, 0.1)))
 
-            for topic in par.topics:
-                if topic.name == pub.endpoint.topic_name:
-                    topic.publications.append(pub)
-                    break
-            else:
-                topic = DTopic(
-                    name=pub.endpoint.topic_name,
-                    endpoint=None,
-                    subscriptions=[],
-                    publications=[pub],
-                    show_qos=show_qos,
-                    qos=topic_qos.get(pub.endpoint.topic_name, core.Qos()),
-                )
-                par.topics.append(topic)
+    return graph
 
-        for sub in rdr.take(N=20, condition=rcr):
-            if sub.participant_key != dp.guid:
-                live.entities += 1
 
-            if not topic_re.match(sub.topic_name):
-                continue
+def participant_key(builtin_topic: builtin.BuiltinTopic, sample: Any) -> Optional[uuid.UUID]:
+    if builtin_topic is builtin.BuiltinTopicDcpsParticipant:
+        return sample.key
+    if builtin_topic is builtin.BuiltinTopicDcpsTopic:
+        return None
+    return sample.participant_key
 
-            sqos = sub.qos
-            naming = None
-            if core.Policy.EntityName in sqos:
-                naming = sqos[core.Policy.EntityName]
-                sqos = sqos - core.Qos(naming)
 
-            if sub.participant_key in participants:
-                par = participants[sub.participant_key]
-            else:
-                par = participants[sub.participant_key] = DParticipant(
-                    sample=None, topics=[], show_qos=show_qos
-                )
+def ls_discovery(
+    live: LiveData, domain_id: Optional[int], runtime: timedelta, topic: str, show_qos: bool
+) -> List[DParticipant]:
+    topic_re = topic_regex(topic)
 
-            sub = DPubSub(endpoint=sub, qos=sqos, name=naming.name if naming else None)
+    graph = discover(
+        live, domain_id, runtime,
+        lambda own_key, builtin_topic, sample: participant_key(builtin_topic, sample) not in (own_key, None)
+    )
 
-            for topic in par.topics:
-                if topic.name == sub.endpoint.topic_name:
-                    topic.subscriptions.append(sub)
-                    break
-            else:
-                topic = DTopic(
-                    name=sub.endpoint.topic_name,
-                    endpoint=None,
-                    subscriptions=[sub],
+    own_key = graph.participant.guid
+    participants = {
+        key: DParticipant(sample=p, topics=[], show_qos=show_qos, is_self=key == own_key)
+        for key, p in graph.participants.items()
+    }
+
+    for name in graph.topic_names():
+        if not topic_re.match(name):
+            continue
+
+        discovered = graph.topics_named(name)
+        topic_sample = discovered[-1] if discovered else None
+        topic_qos = topic_sample.qos if topic_sample else core.Qos()
+
+        topics = {}
+        for endpoint in graph.endpoints(topic_name=name):
+            if endpoint.participant_key not in topics:
+                if endpoint.participant_key in participants:
+                    par = participants[endpoint.participant_key]
+                else:
+                    par = participants[endpoint.participant_key] = DParticipant(
+                        sample=None, topics=[], show_qos=show_qos
+                    )
+                topics[endpoint.participant_key] = DTopic(
+                    name=name,
+                    endpoint=topic_sample,
+                    subscriptions=[],
                     publications=[],
                     show_qos=show_qos,
-                    qos=topic_qos.get(sub.endpoint.topic_name, core.Qos()),
+                    qos=topic_qos,
                 )
-                par.topics.append(topic)
+                par.topics.append(topics[endpoint.participant_key])
 
-        # yield thread
-        time.sleep(0.01)
+            eqos = endpoint.qos
+            naming = None
+            if core.Policy.EntityName in eqos:
+                naming = eqos[core.Policy.EntityName]
+                eqos = eqos - core.Qos(naming)
+
+            pubsub = DPubSub(endpoint=endpoint, qos=eqos, name=naming.name if naming else None)
+            if endpoint.key in graph.publications:
+                topics[endpoint.participant_key].publications.append(pubsub)
+            else:
+                topics[endpoint.participant_key].subscriptions.append(pubsub)
 
     live.result = list(participants.values())
     live.delivered = True
@@ -171,122 +121,71 @@ def ls_discovery(
 def ps_discovery(
     live: LiveData, domain_id: Optional[int], runtime: timedelta, show_self: bool, topic: str
 ) -> List[PApplication]:
-    try:
-        topic_re = re.compile(f"^{topic}$")
-    except re.error:
-        topic_re = re.compile(f"^{re.escape(topic)}$")
+    topic_re = topic_regex(topic)
 
-    if domain_id is None:
-        dp = domain.DomainParticipant()
-    else:
-        dp = domain.DomainParticipant(domain_id)
+    def counted(own_key, builtin_topic, sample):
+        key = participant_key(builtin_topic, sample)
+        if builtin_topic is builtin.BuiltinTopicDcpsParticipant:
+            return key != own_key or show_self
+        return key not in (own_key, None)
 
-    rdp = builtin.BuiltinDataReader(dp, builtin.BuiltinTopicDcpsParticipant)
-    rcp = core.ReadCondition(
-        rdp, core.SampleState.NotRead | core.ViewState.Any | core.InstanceState.Alive
-    )
-    rdw = builtin.BuiltinDataReader(dp, builtin.BuiltinTopicDcpsPublication)
-    rcw = core.ReadCondition(
-        rdw, core.SampleState.NotRead | core.ViewState.Any | core.InstanceState.Alive
-    )
-    rdr = builtin.BuiltinDataReader(dp, builtin.BuiltinTopicDcpsSubscription)
-    rcr = core.ReadCondition(
-        rdr, core.SampleState.NotRead | core.ViewState.Any | core.InstanceState.Alive
-    )
+    graph = discover(live, domain_id, runtime, counted)
 
     applications = {}
-    participants = {}
 
     hostname_get = core.Policy.Property("__Hostname", "")
     appname_get = core.Policy.Property("__ProcessName", "")
     pid_get = core.Policy.Property("__Pid", "")
     address_get = core.Policy.Property("__NetworkAddresses", "")
 
-    start = datetime.now()
-    end = start + runtime
-    while datetime.now() < end and not live.terminate:
-        for p in rdp.take(N=20, condition=rcp):
-            if p.key == dp.guid and not show_self:
-                continue
-
-            hostname = (
-                p.qos[hostname_get].value
-                if p.qos[hostname_get] is not None
-                else "Unknown"
-            )
-            appname = (
-                p.qos[appname_get].value
-                if p.qos[appname_get] is not None
-                else "Unknown"
-            )
-            pid = p.qos[pid_get].value if p.qos[pid_get] is not None else "Unknown"
-            address = (
-                p.qos[address_get].value
-                if p.qos[address_get] is not None
-                else "Unknown"
-            )
-
-            key = f"{hostname}.{appname}.{pid}"
-            name = (
-                p.qos[core.Policy.EntityName].name
-                if core.Policy.EntityName in p.qos
-                else None
-            )
-            participant = PParticipant(name=name, key=p.key)
-            live.entities += 1
-
-            if p.key in participants:
-                participant.topics = participants[p.key].topics
+    own_key = graph.participant.guid
+    for key, p in graph.participants.items():
+        if key == own_key and not show_self:
+            continue
 
-            participants[p.key] = participant
-
-            if key in applications:
-                applications[key].participants.append(participant)
-            else:
-                applications[key] = PApplication(
-                    hostname=hostname,
-                    appname=appname,
-                    pid=pid,
-                    addresses=address,
-                    participants=[participant],
-                )
-
-        for pub in rdw.take(N=20, condition=rcw):
-            if pub.participant_key == dp.guid:
-                continue
-            live.entities += 1
-
-            if not topic_re.match(pub.topic_name):
-                continue
-
-            if pub.participant_key in participants:
-                par = participants[pub.participant_key]
-            else:
-                par = participants[pub.participant_key] = PParticipant(
-                    name=None, key=pub.participant_key
-                )
-
-            par.topics.add(pub.topic_name)
-
-        for sub in rdr.take(N=20, condition=rcr):
-            if sub.participant_key == dp.guid:
-                continue
-            live.entities += 1
-
-            if not topic_re.match(sub.topic_name):
-                continue
-
-            if sub.participant_key in participants:
-                par = participants[sub.participant_key]
-            else:
-                par = participants[sub.participant_key] = PParticipant(
-                    name=None, key=sub.participant_key
-                )
-
-            par.topics.add(sub.topic_name)
+        hostname = (
+            p.qos[hostname_get].value
+            if p.qos[hostname_get] is not None
+            else "Unknown"
+        )
+        appname = (
+            p.qos[appname_get].value
+            if p.qos[appname_get] is not None
+            else "Unknown"
+        )
+        pid = p.qos[pid_get].value if p.qos[pid_get] is not None else "Unknown"
+        address = (
+            p.qos[address_get].value
+            if p.qos[address_get] is not None
+            else "Unknown"
+        )
 
-        # yield thread
-        time.sleep(0.01)
+        app_key = f"{hostname}.{appname}.{pid}"
+        name = (
+            p.qos[core.Policy.EntityName].name
+            if core.Policy.EntityName in p.qos
+            else None
+        )
+        participant = PParticipant(name=name, key=key)
+
+        # The endpoints of the participant of the tool itself are never shown
+        if key != own_key:
+            participant.topics = {
+                endpoint.topic_name
+                for endpoint in graph.endpoints(participant_key=key)
+                if topic_re.match(endpoint.topic_name)
+            }
+
+        if app_key in applications:
+            applications[app_key].participants.append(participant)
+        else:
+            applications[app_key] = PApplication(
+                hostname=hostname,
+                appname=appname,
+                pid=pid,
+                addresses=address,
+                participants=[participant],
+            )
 
     live.result = PSystem(list(applications.values()))
     live.delivered = True
@@ -295,65 +194,36 @@ def ps_discovery(
 def type_discovery(
     live: LiveData, domain_id: Optional[int], runtime: timedelta, topic: str
 ) -> List[PApplication]:
-    try:
-        topic_re = re.compile(f"^{topic}$")
-    except re.error:
-        topic_re = re.compile(f"^{re.escape(topic)}$")
-
-    if domain_id is None:
-        dp = domain.DomainParticipant()
-    else:
-        dp = domain.DomainParticipant(domain_id)
+    topic_re = topic_regex(topic)
 
-    rdw = builtin.BuiltinDataReader(dp, builtin.BuiltinTopicDcpsPublication)
-    rcw = core.ReadCondition(
-        rdw, core.SampleState.NotRead | core.ViewState.Any | core.InstanceState.Alive
-    )
-    rdr = builtin.BuiltinDataReader(dp, builtin.BuiltinTopicDcpsSubscription)
-    rcr = core.ReadCondition(
-        rdr, core.SampleState.NotRead | core.ViewState.Any | core.InstanceState.Alive
+    graph = discover(
+        live, domain_id, runtime,
+        lambda own_key, builtin_topic, sample: builtin_topic is not builtin.BuiltinTopicDcpsParticipant
+        and topic_re.match(sample.topic_name) is not None
     )
 
-    if internal.feature_topic_discovery:
-        rdt = builtin.BuiltinDataReader(dp, builtin.BuiltinTopicDcpsTopic)
-        rct = core.ReadCondition(
-            rdt,
-            core.SampleState.NotRead | core.ViewState.Any | core.InstanceState.Alive,
-        )
-
     discovery_data = TypeDiscoveryData()
 
-    start = datetime.now()
-    end = start + runtime
-    while datetime.now() < end and not live.terminate:
-        if internal.feature_topic_discovery:
-            for t in rdt.take(N=20, condition=rct):
-                if topic_re.match(t.topic_name):
-                    discovery_data.topic_qosses.append(t.qos)
-                if t.type_id is not None:
-                    discovery_data.add_type_id(str(), t.type_id)
-                live.entities += 1
-
-        for pub in rdw.take(N=20, condition=rcw):
-            if topic_re.match(pub.topic_name):
-                if pub.type_id is not None:
-                    discovery_data.add_type_id(str(pub.participant_key), pub.type_id)
-                discovery_data.writer_qosses.append(pub.qos)
-                live.entities += 1
-
-        for sub in rdr.take(N=20, condition=rcr):
-            if topic_re.match(sub.topic_name):
-                if sub.type_id is not None:
-                    discovery_data.add_type_id(str(sub.participant_key), sub.type_id)
-                discovery_data.reader_qosses.append(sub.qos)
-                live.entities += 1
-
-        # yield thread
-        time.sleep(0.01)
+    for name in graph.topic_names():
+        if not topic_re.match(name):
+            continue
+
+        for t in graph.topics_named(name):
+            discovery_data.topic_qosses.append(t.qos)
+            if t.type_id is not None:
+                discovery_data.add_type_id(str(), t.type_id)
+
+        for endpoint in graph.endpoints(topic_name=name):
+            if endpoint.type_id is not None:
+                discovery_data.add_type_id(str(endpoint.participant_key), endpoint.type_id)
+            if endpoint.key in graph.publications:
+                discovery_data.writer_qosses.append(endpoint.qos)
+            else:
+                discovery_data.reader_qosses.append(endpoint.qos)
 
     for type_id, discovered_type in discovery_data.types.items():
         datatype, all_nested_datatypes = dynamic.get_types_for_typeid(
-            dp, type_id, util.duration(seconds=runtime.total_seconds())
+            graph.participant, type_id, util.duration(seconds=runtime.total_seconds())
         )
 
         discovered_type.code = IdlType.idl([datatype])
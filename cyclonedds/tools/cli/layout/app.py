@@ -248,7 +248,7 @@ class PeerPanel:
 
 
 class DDSPerfApp:
-    def __init__(self, console, cmd, layout_maker, update_maker) -> None:
+    def __init__(self, console, cmd, layout_maker, update_maker, backend=None) -> None:
         self.updater, self.graphs = update_maker()
         self.layout = layout_maker(cmd)
         self.cmd = cmd
@@ -256,6 +256,8 @@ class DDSPerfApp:
         self.console = console
         self.to_update = set()
         self.proc = None
+        # A PythonPerf to run instead of the ddsperf process, its reports are passed to the updater
+        self.backend = backend
 
     def add(self, a_set):
         self.to_update.update(a_set)
@@ -302,6 +304,27 @@ class DDSPerfApp:
         t2 = asyncio.create_task(self._cancel_on_quit(t1))
         await asyncio.wait((t1, t2), return_when=asyncio.FIRST_COMPLETED)
 
+    async def process_backend(self):
+        loop = asyncio.get_running_loop()
+
+        def report(reports):
+            # Called from the thread of the backend, the graphs are only touched on the event loop
+            try:
+                loop.call_soon_threadsafe(lambda: self.add(self.updater(reports)))
+            except RuntimeError:
+                # The event loop is closed, the app is exiting
+                pass
+
+        try:
+            await loop.run_in_executor(None, self.backend.run, report)
+        finally:
+            self.backend.stop()
+
+    def process(self):
+        if self.backend is not None:
+            return self.process_backend()
+        return self.process_ddsperf()
+
     async def screen_refresh(self, live):
         while True:
             await asyncio.sleep(0.5)
@@ -316,7 +339,7 @@ class DDSPerfApp:
 
     async def run_inner(self, render_once_on_exit):
         if render_once_on_exit:
-            await self.process_ddsperf()
+            await self.process()
             self.height_adjust()
             self.refresh()
             self.console.print(self.layout)
@@ -330,12 +353,15 @@ class DDSPerfApp:
                 done, pending = await asyncio.wait(
                     (
                         asyncio.create_task(self.screen_refresh(live)),
-                        asyncio.create_task(self.process_ddsperf()),
+                        asyncio.create_task(self.process()),
                     ),
                     return_when=asyncio.FIRST_COMPLETED,
                 )
                 for p in pending:
                     p.cancel()
             except KeyboardInterrupt:
-                self.proc.terminate()
-                await self.proc.wait()
+                if self.backend is not None:
+                    self.backend.stop()
+                else:
+                    self.proc.terminate()
+                    await self.proc.wait()
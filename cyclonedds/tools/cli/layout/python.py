@@ -0,0 +1,133 @@
+from rich.layout import Layout
+from rich.panel import Panel
+from rich.text import Text
+
+from .app import Header, MultiScrollGraph
+from .barchart import RichChart
+from ..pyperf import STAGES, Latencies, StageTimes
+
+
+def make_python_layout(cmd) -> Layout:
+    layout = Layout(name="ddsperf_app")
+
+    layout.split(
+        Layout(name="header", size=3),
+        Layout(name="main1", ratio=1),
+        Layout(name="main2", ratio=1),
+    )
+    layout["main1"].split_row(
+        Layout(name="samplerate", ratio=2),
+        Layout(name="latencies", ratio=2),
+        Layout(name="hist", ratio=2),
+    )
+    layout["main2"].split_row(
+        Layout(name="stages", ratio=3),
+        Layout(name="stages_legend", ratio=1),
+        Layout(name="totals", ratio=2),
+    )
+
+    layout["header"].update(Header(" ".join(cmd)))
+    layout["samplerate"].update(Text(""))
+    layout["latencies"].update(Text(""))
+    layout["hist"].update(Text(""))
+    layout["stages"].update(Text(""))
+    layout["stages_legend"].update(Text(""))
+    layout["totals"].update(Text(""))
+    return layout
+
+
+class TotalsPanel:
+    def __init__(self) -> None:
+        self.samples = {}
+        self.lost = {}
+        self.rates = {}
+        self.bytes = {}
+        self.latency = None
+
+    def add(self, report):
+        self.samples[report.role] = self.samples.get(report.role, 0) + report.samples
+        self.lost[report.role] = self.lost.get(report.role, 0) + report.lost
+        self.rates[report.role] = report.rate
+        self.bytes[report.role] = report.bytes * report.rate / report.samples if report.samples else 0.0
+
+    def draw(self):
+        if not self.samples:
+            return Panel("waiting for data")
+
+        txt = ""
+        for role in self.samples:
+            txt += (
+                f"[bold]╶── {role} ──╴[/]\n"
+                f"samples [bright_cyan]{self.samples[role]}[/] lost [bright_cyan]{self.lost[role]}[/]\n"
+                f"rate [bright_cyan]{self.rates[role]:.0f}[/] S/s [bright_cyan]{self.bytes[role] * 8e-6:.2f}[/] Mb/s\n\n"
+            )
+        if self.latency:
+            lat = self.latency
+            txt += (
+                f"[bold]╶── round trip (µs) ──╴[/]\n"
+                f"mean [bright_cyan]{lat.mean / 1000:.1f}[/] min [bright_cyan]{lat.min / 1000:.1f}[/] "
+                f"50% [bright_cyan]{lat.p50 / 1000:.1f}[/] 90% [bright_cyan]{lat.p90 / 1000:.1f}[/] "
+                f"99% [bright_cyan]{lat.p99 / 1000:.1f}[/] max [bright_cyan]{lat.max / 1000:.1f}[/]"
+            )
+        return Panel(txt.rstrip(), title="Totals")
+
+    def update_chart_vars(self, **kwargs):
+        pass
+
+
+def make_python_updater():
+    stage_colors = ["bright_green", "bright_blue", "bright_magenta", "bright_cyan"]
+    latency_colors = ["green", "blue", "magenta", "cyan"]
+
+    graphs = {}
+    graphs["samplerate"] = MultiScrollGraph("Samplerate(S/s)", 20)
+    graphs["latencies"] = MultiScrollGraph("Ping latency (µs)", 20)
+    graphs["hist"] = RichChart(title="Latency histogram (log₁₀ µs)")
+    graphs["stages"] = MultiScrollGraph("Time per sample per stage (µs)", 20)
+    graphs["stages_legend"] = Text.from_markup(
+        "\n" + "\n".join(f"[bold][{c}]{stage}[/][/]" for stage, c in zip(STAGES, stage_colors))
+        + "\n\n" + "\n".join(f"[bold][{c}]{p}[/][/] latency" for p, c in zip(["mean", "50%", "90%", "99%"], latency_colors))
+    )
+    graphs["totals"] = TotalsPanel()
+
+    stage_lines = [graphs["stages"].add_new_line(c) for c in stage_colors]
+    latency_lines = [graphs["latencies"].add_new_line(c) for c in latency_colors]
+    rate_lines = {}
+    histogram = {}
+
+    def updater(reports):
+        updated = {"samplerate", "stages", "totals"}
+
+        stages = StageTimes()
+        latencies = Latencies()
+        for report in reports:
+            if report.role not in rate_lines:
+                rate_lines[report.role] = graphs["samplerate"].add_new_line()
+            graphs["samplerate"].add_point(rate_lines[report.role], report.rate)
+            graphs["totals"].add(report)
+            stages.merge(report.stages)
+            latencies.values.extend(report.latencies.values)
+
+        means = stages.means()
+        for stage, line in zip(STAGES, stage_lines):
+            graphs["stages"].add_point(line, means.get(stage, 0.0) / 1000)
+
+        summary = latencies.summary()
+        if summary:
+            updated.update({"latencies", "hist"})
+            graphs["totals"].latency = summary
+            for value, line in zip([summary.mean, summary.p50, summary.p90, summary.p99], latency_lines):
+                graphs["latencies"].add_point(line, value / 1000)
+            for bucket, count in latencies.histogram().items():
+                histogram[bucket] = histogram.get(bucket, 0) + count
+            buckets = sorted(histogram)
+            graphs["hist"].plot(
+                [b / Latencies.buckets_per_decade for b in buckets],
+                [histogram[b] for b in buckets],
+                "bright_red",
+                index=0,
+            )
+
+        return updated
+
+    return updater, graphs
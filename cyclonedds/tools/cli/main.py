@@ -7,6 +7,8 @@ from .typeof import typeof
 from .sub import subscribe
 from .pub import publish
 from .ddsperf import performance
+from .record import record
+from .replay import replay
 
 
 @click.group(context_settings=CONTEXT_SETTINGS)
@@ -21,6 +23,8 @@ cli.add_command(typeof)
 cli.add_command(subscribe)
 cli.add_command(publish)
 cli.add_command(performance)
+cli.add_command(record)
+cli.add_command(replay)
 
 if __name__ == "__main__":
     cli()
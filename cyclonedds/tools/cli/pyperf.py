@@ -0,0 +1,632 @@
+"""A ddsperf implementation on top of the Python binding.
+
+The external ``ddsperf`` tool measures Cyclone DDS itself, this measures what an application using
+the Python binding gets: every sample goes through ``DataWriter`` serialization and the C write on
+the way out and through a take and deserialization on the way in, and the time spent in each of
+those stages is reported separately. The topics and their types are those of ``ddsperf``, so
+``cyclonedds performance --backend python`` can run against ``ddsperf`` on the other side, with
+local matching both sides run in the one process.
+"""
+
+import math
+import time
+import threading
+from abc import ABC, abstractmethod
+from array import array
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+from cyclonedds.core import (
+    Listener, ListenerDispatcher, Policy, Qos, ReadCondition, WaitSet, DDSException,
+    SampleState, ViewState, InstanceState
+)
+from cyclonedds.domain import DomainParticipant
+from cyclonedds.topic import Topic
+from cyclonedds.pub import DataWriter
+from cyclonedds.sub import DataReader
+from cyclonedds.util import duration
+from cyclonedds.internal import SampleInfoBatch
+from cyclonedds.idl import IdlStruct
+from cyclonedds.idl.annotations import key, final
+from cyclonedds.idl.types import array as idl_array, sequence, uint8, uint32, int64
+from cyclonedds._clayer import ddspy_take, ddspy_write, ddspy_write_ts
+
+
+@dataclass
+@final
+class KeyedSeq(IdlStruct, typename="KeyedSeq"):
+    seq: uint32 = 0
+    keyval: uint32 = 0
+    key("keyval")
+    baggage: sequence[uint8] = b""
+
+
+@dataclass
+@final
+class Keyed32(IdlStruct, typename="Keyed32"):
+    seq: uint32 = 0
+    keyval: uint32 = 0
+    key("keyval")
+    baggage: idl_array[uint8, 24] = bytes(24)
+
+
+@dataclass
+@final
+class Keyed256(IdlStruct, typename="Keyed256"):
+    seq: uint32 = 0
+    keyval: uint32 = 0
+    key("keyval")
+    baggage: idl_array[uint8, 248] = bytes(248)
+
+
+@dataclass
+@final
+class OneULong(IdlStruct, typename="OneULong"):
+    seq: uint32 = 0
+
+
+@dataclass
+@final
+class Unkeyed16(IdlStruct, typename="Unkeyed16"):
+    seq: uint32 = 0
+    baggage: idl_array[uint8, 12] = bytes(12)
+
+
+@dataclass
+@final
+class Unkeyed1024(IdlStruct, typename="Unkeyed1024"):
+    seq: uint32 = 0
+    baggage: idl_array[uint8, 1020] = bytes(1020)
+
+
+@dataclass
+@final
+class Struct16(IdlStruct, typename="Struct16"):
+    struct0: uint8 = 0
+    struct1: uint8 = 0
+    struct2: uint8 = 0
+    struct3: uint8 = 0
+    struct4: uint8 = 0
+    struct5: uint8 = 0
+    struct6: uint8 = 0
+    struct7: uint8 = 0
+    struct8: uint8 = 0
+    struct9: uint8 = 0
+    structa: uint8 = 0
+    structb: uint8 = 0
+    structc: uint8 = 0
+    structd: uint8 = 0
+    structe: uint8 = 0
+    structf: uint8 = 0
+    junk: int64 = 0
+    seq: uint32 = 0
+    keyval: uint32 = 0
+    key("keyval")
+
+
+@dataclass
+@final
+class Struct256(IdlStruct, typename="Struct256"):
+    struct160: Struct16 = field(default_factory=Struct16)
+    struct161: Struct16 = field(default_factory=Struct16)
+    struct162: Struct16 = field(default_factory=Struct16)
+    struct163: Struct16 = field(default_factory=Struct16)
+    struct164: Struct16 = field(default_factory=Struct16)
+    struct165: Struct16 = field(default_factory=Struct16)
+    struct166: Struct16 = field(default_factory=Struct16)
+    struct167: Struct16 = field(default_factory=Struct16)
+    struct168: Struct16 = field(default_factory=Struct16)
+    struct169: Struct16 = field(default_factory=Struct16)
+    struct16a: Struct16 = field(default_factory=Struct16)
+    struct16b: Struct16 = field(default_factory=Struct16)
+    struct16c: Struct16 = field(default_factory=Struct16)
+    struct16d: Struct16 = field(default_factory=Struct16)
+    struct16e: Struct16 = field(default_factory=Struct16)
+    struct16f: Struct16 = field(default_factory=Struct16)
+    junk: int64 = 0
+    seq: uint32 = 0
+    keyval: uint32 = 0
+    key("keyval")
+
+
+@dataclass
+@final
+class Struct4k(IdlStruct, typename="Struct4k"):
+    struct2560: Struct256 = field(default_factory=Struct256)
+    struct2561: Struct256 = field(default_factory=Struct256)
+    struct2562: Struct256 = field(default_factory=Struct256)
+    struct2563: Struct256 = field(default_factory=Struct256)
+    struct2564: Struct256 = field(default_factory=Struct256)
+    struct2565: Struct256 = field(default_factory=Struct256)
+    struct2566: Struct256 = field(default_factory=Struct256)
+    struct2567: Struct256 = field(default_factory=Struct256)
+    struct2568: Struct256 = field(default_factory=Struct256)
+    struct2569: Struct256 = field(default_factory=Struct256)
+    struct256a: Struct256 = field(default_factory=Struct256)
+    struct256b: Struct256 = field(default_factory=Struct256)
+    struct256c: Struct256 = field(default_factory=Struct256)
+    struct256d: Struct256 = field(default_factory=Struct256)
+    struct256e: Struct256 = field(default_factory=Struct256)
+    struct256f: Struct256 = field(default_factory=Struct256)
+    junk: int64 = 0
+    seq: uint32 = 0
+    keyval: uint32 = 0
+    key("keyval")
+
+
+@dataclass
+@final
+class Struct32k(IdlStruct, typename="Struct32k"):
+    struct4k0: Struct4k = field(default_factory=Struct4k)
+    struct4k1: Struct4k = field(default_factory=Struct4k)
+    struct4k2: Struct4k = field(default_factory=Struct4k)
+    struct4k3: Struct4k = field(default_factory=Struct4k)
+    struct4k4: Struct4k = field(default_factory=Struct4k)
+    struct4k5: Struct4k = field(default_factory=Struct4k)
+    struct4k6: Struct4k = field(default_factory=Struct4k)
+    struct4k7: Struct4k = field(default_factory=Struct4k)
+    junk: int64 = 0
+    seq: uint32 = 0
+    keyval: uint32 = 0
+    key("keyval")
+
+
+TOPICS = {
+    "KS": KeyedSeq,
+    "K32": Keyed32,
+    "K256": Keyed256,
+    "OU": OneULong,
+    "UK16": Unkeyed16,
+    "UK1024": Unkeyed1024,
+    "S16": Struct16,
+    "S256": Struct256,
+    "S4k": Struct4k,
+    "S32k": Struct32k,
+}
+
+STAGES = ("serialize", "write", "take", "deserialize")
+
+
+def make_sample(datatype: type, size: int = 0) -> IdlStruct:
+    """A sample of a ddsperf type, for KS ``size`` is the total payload size like in ddsperf."""
+    if datatype is KeyedSeq:
+        # The seq, keyval and sequence length take 12 bytes
+        return KeyedSeq(baggage=bytes(max(0, size - 12)))
+    return datatype()
+
+
+class StageTimes:
+    """The time spent per stage of the path of samples through the binding and the number of samples
+    that went through each stage."""
+
+    def __init__(self) -> None:
+        self.totals = dict.fromkeys(STAGES, 0)
+        self.counts = dict.fromkeys(STAGES, 0)
+
+    def add(self, stage: str, ns: int, count: int = 1) -> None:
+        self.totals[stage] += ns
+        self.counts[stage] += count
+
+    def merge(self, other: 'StageTimes') -> None:
+        for stage in STAGES:
+            self.totals[stage] += other.totals[stage]
+            self.counts[stage] += other.counts[stage]
+
+    def means(self) -> Dict[str, float]:
+        """The mean time per sample in nanoseconds of the stages that samples went through."""
+        return {stage: self.totals[stage] / self.counts[stage] for stage in STAGES if self.counts[stage]}
+
+
+@dataclass
+class LatencySummary:
+    count: int
+    mean: float
+    min: int
+    p50: int
+    p90: int
+    p99: int
+    max: int
+
+
+class Latencies:
+    """Round trip latencies in nanoseconds."""
+
+    # Buckets of the histogram per factor 10 of latency
+    buckets_per_decade = 10
+
+    def __init__(self) -> None:
+        self.values = array('q')
+
+    def add(self, ns: int) -> None:
+        self.values.append(ns)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def summary(self) -> Optional[LatencySummary]:
+        if not self.values:
+            return None
+        values = sorted(self.values)
+        n = len(values)
+        return LatencySummary(
+            count=n,
+            mean=sum(values) / n,
+            min=values[0],
+            p50=values[n // 2],
+            p90=values[min(n - 1, n * 9 // 10)],
+            p99=values[min(n - 1, n * 99 // 100)],
+            max=values[-1]
+        )
+
+    def histogram(self) -> Dict[int, int]:
+        """The number of latencies per bucket, bucket ``i`` starts at ``10 ** (i / buckets_per_decade)`` µs."""
+        histogram = {}
+        for ns in self.values:
+            bucket = math.floor(self.buckets_per_decade * math.log10(max(ns, 1) / 1000))
+            histogram[bucket] = histogram.get(bucket, 0) + 1
+        return histogram
+
+
+@dataclass
+class PerfReport:
+    """What one role did in one reporting interval.
+
+    Attributes
+    ----------
+    role: str
+        One of "publish", "subscribe", "ping" and "pong".
+    elapsed: float
+        The seconds since the start of the run.
+    samples: int
+        The number of samples written (publish) or received (the other roles).
+    rate: float
+        Samples per second over the interval.
+    bytes: int
+        The serialized size of the samples, without encapsulation headers.
+    lost: int
+        Samples that were skipped in the sequence numbers of a writer (subscribe).
+    stages: StageTimes
+    latencies: Latencies
+        The round trip latencies (ping).
+    """
+    role: str
+    elapsed: float
+    samples: int
+    rate: float
+    bytes: int
+    lost: int
+    stages: StageTimes
+    latencies: Latencies
+
+
+class _Interval:
+    def __init__(self) -> None:
+        self.samples = 0
+        self.bytes = 0
+        self.lost = 0
+        self.stages = StageTimes()
+        self.latencies = Latencies()
+
+
+class _Role(ABC):
+    name = ""
+
+    def __init__(self, perf: 'PythonPerf') -> None:
+        self.perf = perf
+        # Reentrant, so a role can hold it around write, which takes it to count the write
+        self.lock = threading.RLock()
+        self.interval = _Interval()
+
+    def collect(self, elapsed: float, seconds: float) -> PerfReport:
+        with self.lock:
+            interval, self.interval = self.interval, _Interval()
+        return PerfReport(
+            self.name, elapsed, interval.samples, interval.samples / seconds if seconds > 0 else 0.0,
+            interval.bytes, interval.lost, interval.stages, interval.latencies
+        )
+
+    def write(self, writer: DataWriter, sample: IdlStruct, timestamp: Optional[int] = None) -> None:
+        t0 = time.perf_counter_ns()
+        with writer._serialize(sample) as ser:
+            t1 = time.perf_counter_ns()
+            if timestamp is None:
+                ret = ddspy_write(writer._ref, ser)
+            else:
+                ret = ddspy_write_ts(writer._ref, ser, timestamp)
+            size = len(ser) - 4
+        t2 = time.perf_counter_ns()
+        if ret < 0:
+            raise DDSException(ret, f"Occurred while writing sample in {repr(writer)}")
+        with self.lock:
+            self.interval.stages.add("serialize", t1 - t0)
+            self.interval.stages.add("write", t2 - t1)
+            if self.name == "publish":
+                self.interval.samples += 1
+                self.interval.bytes += size
+
+    @abstractmethod
+    def run(self, stop: threading.Event) -> None:
+        pass
+
+
+class _Receiver(_Role):
+    """Takes samples with one of the triggering modes of ddsperf: a listener, a waitset or polling at 1kHz."""
+
+    mask = SampleState.Any | ViewState.Any | InstanceState.Any
+    max_batch = 256
+
+    def __init__(self, perf: 'PythonPerf', topic: Topic, qos: Qos) -> None:
+        super().__init__(perf)
+        listener = None
+        if perf.triggering_mode == "listener":
+            listener = Listener(dispatcher=perf.dispatcher, on_data_available=self.take)
+        self.reader = DataReader(perf.participant, topic, qos=qos, listener=listener)
+        if perf.triggering_mode == "waitset":
+            self.waitset = WaitSet(perf.participant)
+            self.waitset.attach(ReadCondition(self.reader, self.mask))
+
+    def take(self, reader: DataReader = None) -> None:
+        datatype = self.perf.datatype
+        while True:
+            t0 = time.perf_counter_ns()
+            ret = ddspy_take(self.reader._ref, self.mask, self.max_batch, False, True)
+            t1 = time.perf_counter_ns()
+            if type(ret) == int:
+                raise DDSException(ret, f"Occurred while taking data in {repr(self.reader)}")
+            datas, columns = ret
+            if not datas:
+                return
+            infos = SampleInfoBatch(columns)
+            valid = infos.valid_data
+            samples = [datatype.deserialize(data) for data, v in zip(datas, valid) if v]
+            t2 = time.perf_counter_ns()
+            with self.lock:
+                self.interval.stages.add("take", t1 - t0, len(datas))
+                self.interval.stages.add("deserialize", t2 - t1, len(samples))
+                self.interval.samples += len(samples)
+                self.interval.bytes += sum(len(data) - 4 for data, v in zip(datas, valid) if v)
+            self.received(samples, infos)
+            if len(datas) < self.max_batch:
+                return
+
+    def received(self, samples: List[IdlStruct], infos: SampleInfoBatch) -> None:
+        pass
+
+    def wait(self, stop: threading.Event, timeout: float) -> None:
+        """Take samples until the timeout, or until stop is set."""
+        mode = self.perf.triggering_mode
+        end = time.monotonic() + timeout
+        if mode == "listener":
+            stop.wait(timeout)
+            return
+        while not stop.is_set():
+            remaining = end - time.monotonic()
+            if remaining <= 0:
+                return
+            if mode == "waitset":
+                if self.waitset.wait(duration(seconds=min(remaining, 0.1))):
+                    self.take()
+            else:
+                self.take()
+                time.sleep(min(remaining, 0.001))
+
+    def run(self, stop: threading.Event) -> None:
+        while not stop.is_set():
+            self.wait(stop, 0.1)
+
+
+class _Publisher(_Role):
+    name = "publish"
+
+    def __init__(self, perf: 'PythonPerf', rate: Optional[float], burst: int, size: int) -> None:
+        super().__init__(perf)
+        self.rate = rate
+        self.burst = burst
+        self.sample = make_sample(perf.datatype, size)
+        self.writer = DataWriter(perf.participant, perf.data_topic, qos=perf.data_qos)
+
+    def run(self, stop: threading.Event) -> None:
+        sample = self.sample
+        keyed = hasattr(sample, "keyval")
+        num_keys = self.perf.num_keys
+        seq = 0
+        next_burst = time.monotonic()
+        while not stop.is_set():
+            for _ in range(self.burst):
+                sample.seq = seq
+                if keyed:
+                    sample.keyval = seq % num_keys
+                self.write(self.writer, sample)
+                seq = (seq + 1) & 0xffffffff
+            if self.rate:
+                next_burst += 1.0 / self.rate
+                delay = next_burst - time.monotonic()
+                if delay > 0:
+                    stop.wait(delay)
+                else:
+                    # Do not try to catch up after falling behind
+                    next_burst -= delay
+
+
+class _Subscriber(_Receiver):
+    name = "subscribe"
+
+    def __init__(self, perf: 'PythonPerf') -> None:
+        super().__init__(perf, perf.data_topic, perf.data_qos)
+        self.last_seq = {}
+
+    def received(self, samples: List[IdlStruct], infos: SampleInfoBatch) -> None:
+        lost = 0
+        handles = [handle for handle, v in zip(infos.publication_handle, infos.valid_data) if v]
+        last_seq = self.last_seq
+        for sample, handle in zip(samples, handles):
+            last = last_seq.get(handle)
+            if last is not None and sample.seq > last + 1:
+                lost += sample.seq - last - 1
+            last_seq[handle] = sample.seq
+        if lost:
+            with self.lock:
+                self.interval.lost += lost
+
+
+class _Ping(_Receiver):
+    name = "ping"
+
+    # Ping again when no pong arrived within this many seconds
+    timeout = 1.0
+
+    def __init__(self, perf: 'PythonPerf', rate: Optional[float], size: int) -> None:
+        super().__init__(perf, perf.pong_topic, perf.pingpong_qos)
+        self.rate = rate
+        self.sample = make_sample(perf.datatype, size)
+        self.writer = DataWriter(perf.participant, perf.ping_topic, qos=perf.pingpong_qos)
+        self.seq = 0
+        self.last_ping = 0.0
+
+    def ping(self) -> None:
+        # Called from the role thread and from the thread that takes the pongs
+        with self.lock:
+            self.sample.seq = self.seq
+            self.seq = (self.seq + 1) & 0xffffffff
+            self.last_ping = time.monotonic()
+            self.write(self.writer, self.sample, time.time_ns())
+
+    def received(self, samples: List[IdlStruct], infos: SampleInfoBatch) -> None:
+        now = time.time_ns()
+        with self.lock:
+            for timestamp, v in zip(infos.source_timestamp, infos.valid_data):
+                if v:
+                    self.interval.latencies.add(now - timestamp)
+        if not self.rate and samples:
+            # Without a rate the next ping is sent as soon as the pong arrived
+            self.ping()
+
+    def run(self, stop: threading.Event) -> None:
+        self.ping()
+        while not stop.is_set():
+            if self.rate:
+                self.wait(stop, max(0.0, self.last_ping + 1.0 / self.rate - time.monotonic()))
+                if not stop.is_set():
+                    self.ping()
+            else:
+                self.wait(stop, 0.1)
+                if time.monotonic() - self.last_ping > self.timeout:
+                    self.ping()
+
+
+class _Pong(_Receiver):
+    name = "pong"
+
+    def __init__(self, perf: 'PythonPerf') -> None:
+        super().__init__(perf, perf.ping_topic, perf.pingpong_qos)
+        self.writer = DataWriter(perf.participant, perf.pong_topic, qos=perf.pingpong_qos)
+
+    def received(self, samples: List[IdlStruct], infos: SampleInfoBatch) -> None:
+        # The pings are answered with their own source timestamp, so the latency is measured with the clock of the ping
+        timestamps = [timestamp for timestamp, v in zip(infos.source_timestamp, infos.valid_data) if v]
+        for sample, timestamp in zip(samples, timestamps):
+            self.write(self.writer, sample, timestamp)
+
+
+class PythonPerf:
+    """Runs the ddsperf roles with DataWriters and DataReaders of the Python binding.
+
+    Add roles with :meth:`publisher`, :meth:`subscriber`, :meth:`ping` and :meth:`pong`, then
+    :meth:`run` them, each role runs in its own thread. Without local matching the endpoints of a
+    role do not match those of the other roles in the process.
+
+    Parameters
+    ----------
+    topic: str
+        One of the ddsperf topics in :data:`TOPICS`.
+    domain_id: int, optional
+        The domain to run in, the default domain if None.
+    reliable: bool
+        Use reliable or best-effort topics.
+    keep: int, optional
+        Keep-last-N history for the data, keep-all if None. Ping/pong is always keep-last-1.
+    num_keys: int
+        The number of key values the publisher cycles through.
+    local_matching: bool
+        Let endpoints match those in the same process.
+    triggering_mode: str
+        How the readers are triggered, "listener", "waitset" or "polling".
+    runtime: float, optional
+        Stop running after this many seconds, run until :meth:`stop` is called if None.
+    """
+
+    def __init__(self, topic: str = "KS", domain_id: Optional[int] = None, reliable: bool = True,
+                 keep: Optional[int] = None, num_keys: int = 1, local_matching: bool = False,
+                 triggering_mode: str = "listener", runtime: Optional[float] = None) -> None:
+        if topic not in TOPICS:
+            raise ValueError(f"{topic} is not a ddsperf topic")
+        if triggering_mode not in ("listener", "waitset", "polling"):
+            raise ValueError(f"{triggering_mode} is not a triggering mode")
+        if num_keys < 1:
+            raise ValueError("num_keys must be at least 1")
+
+        self.datatype = TOPICS[topic]
+        self.num_keys = num_keys
+        self.local_matching = local_matching
+        self.triggering_mode = triggering_mode
+        self.runtime = runtime
+        self.participant = DomainParticipant() if domain_id is None else DomainParticipant(domain_id)
+        self.dispatcher = ListenerDispatcher() if triggering_mode == "listener" else None
+
+        kind = "R" if reliable else "U"
+        self.data_topic = Topic(self.participant, f"DDSPerf{kind}Data{topic}", self.datatype)
+        self.ping_topic = Topic(self.participant, f"DDSPerf{kind}Ping{topic}", self.datatype)
+        self.pong_topic = Topic(self.participant, f"DDSPerf{kind}Pong{topic}", self.datatype)
+
+        common = [
+            Policy.Reliability.Reliable(duration(seconds=10)) if reliable else Policy.Reliability.BestEffort,
+            Policy.IgnoreLocal.Nothing if local_matching else Policy.IgnoreLocal.Participant
+        ]
+        self.data_qos = Qos(*common, Policy.History.KeepAll if keep is None else Policy.History.KeepLast(keep))
+        self.pingpong_qos = Qos(*common, Policy.History.KeepLast(1))
+        self.roles: List[_Role] = []
+        self._stop = threading.Event()
+
+    def publisher(self, rate: Optional[float] = None, burst: int = 1, size: int = 0) -> None:
+        """Publish bursts of samples at a rate in Hz, or as fast as possible."""
+        self.roles.append(_Publisher(self, rate, burst, size))
+
+    def subscriber(self) -> None:
+        self.roles.append(_Subscriber(self))
+
+    def ping(self, rate: Optional[float] = None, size: int = 0) -> None:
+        """Send pings at a rate in Hz, or a new ping as soon as a pong arrived."""
+        self.roles.append(_Ping(self, rate, size))
+
+    def pong(self) -> None:
+        self.roles.append(_Pong(self))
+
+    def run(self, report: Callable[[List[PerfReport]], None], interval: float = 1.0) -> None:
+        """Run the roles until :meth:`stop` is called or the runtime has passed, calling report
+        with a report per role every interval seconds.
+        """
+        runtime = self.runtime
+        threads = [threading.Thread(target=role.run, args=(self._stop,), daemon=True) for role in self.roles]
+        for thread in threads:
+            thread.start()
+
+        start = last = time.monotonic()
+        try:
+            while not self._stop.is_set():
+                wait = interval if runtime is None else min(interval, start + runtime - time.monotonic())
+                if wait > 0 and self._stop.wait(wait):
+                    break
+                now = time.monotonic()
+                report([role.collect(now - start, now - last) for role in self.roles])
+                last = now
+                if runtime is not None and now - start >= runtime:
+                    break
+        finally:
+            self._stop.set()
+            for thread in threads:
+                thread.join()
+            if self.dispatcher is not None:
+                self.dispatcher.close()
+
+    def stop(self) -> None:
+        self._stop.set()
@@ -0,0 +1,125 @@
+import time
+from threading import Thread
+import rich_click as click
+import json
+from rich.console import Console
+
+from cyclonedds.qos import Qos
+
+from .utils import (
+    TimeDeltaParamType,
+    SizeParamType,
+    LiveData,
+    background_progress_viewer,
+)
+from .discovery.main import type_discovery
+from .data import record as data_record
+from .common import select_type, select_qos
+
+
+def background_counter(live: LiveData, thread: Thread, verb: str):
+    try:
+        while thread.is_alive():
+            time.sleep(0.2)
+    except KeyboardInterrupt:
+        live.terminate = True
+    thread.join()
+    live.console.print(f"[bold green] {verb} {live.entities} samples")
+
+
+@click.command(short_help="Record an arbitrary topic to a file")
+@click.argument("topic")
+@click.option(
+    "-o", "--output", type=click.Path(dir_okay=False, writable=True), required=True, help="File to record to."
+)
+@click.option(
+    "-i", "--id", "--domain-id", type=int, help="DDS Domain to inspect."
+)
+@click.option(
+    "-r",
+    "--runtime",
+    type=TimeDeltaParamType(),
+    default="1s",
+    help="Duration of discovery scan.",
+)
+@click.option(
+    "--chunk-size",
+    type=SizeParamType(),
+    default="1M",
+    help="Number of bytes of samples that are buffered before they are written to the file.",
+)
+@click.option(
+    "--suppress-progress-bar",
+    type=bool,
+    is_flag=True,
+    help="Suppress the output of the progress bar",
+)
+@click.option(
+    "--color",
+    type=click.Choice(["auto", "standard", "256", "truecolor", "windows", "none"]),
+    default="auto",
+    help="""Force the command to output with/without terminal colors. By default output colours if the terminal supports it."
+See the [underline blue][link=https://rich.readthedocs.io/en/stable/console.html#color-systems]Rich documentation[/link][/] """
+    """for more info on what the options mean.""",
+)
+@click.option(
+    "--qos",
+    type=click.Choice(["scan", "scan-random", "dds-default", "json"]),
+    default="scan",
+    help="""Method to determine the QoS settings of the reader, which are stored to replay the samples with. With "scan"
+the network is scanned for existing QoS used by writers. "scan-random" functions the same way but does not prompt for input,
+but simply picks a random QoS in case of conflicts. With "dds-default" the default QoS from the DDS specification is used and
+with "json" your first line of input should be a json string with the QoS settings, defined by the output of
+`cyclonedds.qos.Qos.asdict()`.""",
+)
+@click.option(
+    "--type",
+    type=click.Choice(["scan", "scan-random"]),
+    default="scan",
+    help="""Method to determine the datatype of the reader. With "scan" the network is scanned for existing types using
+XTypes. "scan-random" functions the same way but does not prompt for input, but simply picks a random datatype in case of
+conflicts.""",
+)
+def record(topic, output, id, runtime, chunk_size, suppress_progress_bar, color, qos, type):
+    """Record an arbitrary topic to a file. The serialized samples are stored as they are received, together with
+    their source timestamps and the type of the topic, so the recording can be replayed with `cyclonedds replay`."""
+
+    if qos == "json":
+        try:
+            qos_endpoint = Qos.fromdict(json.loads(input()))
+            qos_topic = qos_endpoint
+        except (ValueError, KeyError, TypeError) as e:
+            raise click.BadParameter(f"the first line of input is not a valid QoS: {e}", param_hint="--qos")
+
+    console = Console(color_system=None if color == "none" else color)
+    live = LiveData(console)
+
+    thread = Thread(target=type_discovery, args=(live, id, runtime, topic))
+    thread.start()
+
+    background_progress_viewer(runtime, live, suppress_progress_bar)
+
+    thread.join()
+
+    if qos in ["scan", "scan-random"]:
+        qos_topic, qos_endpoint = select_qos(
+            console, live.result, True, qos == "scan-random"
+        )
+    elif qos == "dds-default":
+        qos_topic, qos_endpoint = Qos(), Qos()
+
+    discovered_type = select_type(console, live.result, type == "scan-random")
+
+    if not discovered_type:
+        return
+
+    console.print(f"[bold green] Recording to {output}, CTRL-C to quit")
+
+    live.entities = 0
+    thread = Thread(
+        target=data_record,
+        args=(live, id, topic, discovered_type.dtype, qos_topic, qos_endpoint, output, chunk_size),
+    )
+    thread.start()
+
+    background_counter(live, thread, "Recorded")
@@ -0,0 +1,338 @@
+"""The file format of ``cyclonedds record`` and ``cyclonedds replay``.
+
+A recording is an append-only sequence of 8-byte aligned records after a file header. Stream records
+describe a recorded topic: its name, type name, Qos and the XTypes TypeInformation and TypeMapping of
+its type, so it can be replayed without discovering the type again. Chunk records hold a batch of
+samples as a table of entries followed by the raw serialized samples, including their CDR headers.
+When a recording is closed an index of the chunks by time is appended. A recording that was not closed
+is indexed by skipping from record to record instead. All integers are little-endian.
+
+The timestamps in the index are the times at which the samples were recorded, in nanoseconds since the
+UNIX epoch. They only increase, unlike the source timestamps of samples of different writers.
+"""
+
+import os
+import json
+import mmap
+import struct
+from bisect import bisect_left
+from dataclasses import dataclass
+from typing import Any, Iterator, List, Optional, Sequence, Tuple
+
+from cyclonedds.idl._typesupport.DDS.XTypes import TypeInformation, TypeMapping
+
+
+MAGIC = b"CYDDSREC"
+INDEX_MAGIC = b"CYRECIDX"
+VERSION = 1
+
+_file_header = struct.Struct("<8sII")  # magic, version, flags
+_record_header = struct.Struct("<II")  # kind, payload size
+_stream_header = struct.Struct("<II")  # stream id, metadata size
+_chunk_header = struct.Struct("<IIqq")  # number of entries, reserved, first and last recorded time
+_entry = struct.Struct("<qqIIH6x")  # recorded time, source timestamp, data offset, data size, stream id
+_index_entry = struct.Struct("<qqQI4x")  # first and last recorded time, chunk record offset, number of entries
+_footer = struct.Struct("<Q8s")  # index record offset, index magic
+
+STREAM = 1
+CHUNK = 2
+INDEX = 3
+
+
+def _padding(size: int) -> int:
+    return -size % 8
+
+
+class RecordingError(Exception):
+    """Raised when a file is not a recording or is damaged."""
+
+
+@dataclass
+class Stream:
+    """A recorded topic.
+
+    Attributes
+    ----------
+    id: int
+        The id of the stream in the entries of the chunks.
+    topic_name: str
+    type_name: str
+    topic_qos: dict
+        The topic Qos, as returned by ``Qos.asdict()``.
+    writer_qos: dict
+        The Qos to replay the samples with, as returned by ``Qos.asdict()``.
+    type_info: bytes
+        The serialized XTypes TypeInformation of the type, as in ``IDL._xt_bytedata``.
+    type_map: bytes
+        The serialized XTypes TypeMapping of the type, as in ``IDL._xt_bytedata``.
+    """
+    id: int
+    topic_name: str
+    type_name: str
+    topic_qos: dict
+    writer_qos: dict
+    type_info: bytes
+    type_map: bytes
+
+    def datatype(self) -> Tuple[Any, dict]:
+        """Rebuild the datatype of the stream from its XTypes type information.
+
+        Returns
+        -------
+        Tuple[type, dict]
+            The datatype and all datatypes it depends on by name, like
+            :func:`get_types_for_typeid<cyclonedds.dynamic.get_types_for_typeid>`.
+        """
+        from cyclonedds.idl._xt_builder import XTInterpreter
+
+        type_info = TypeInformation.deserialize(self.type_info, has_header=False, use_version_2=True)
+        type_map = TypeMapping.deserialize(self.type_map, has_header=False, use_version_2=True)
+        tmap = {pair.type_identifier: pair.type_object for pair in type_map.identifier_object_pair_complete}
+        return XTInterpreter.xt_to_class(type_info.complete.typeid_with_size.type_id, tmap)
+
+
+@dataclass
+class Chunk:
+    offset: int
+    count: int
+    first_time: int
+    last_time: int
+
+
+class RecordingWriter:
+    """Appends streams and samples to a recording.
+
+    Samples are buffered in a chunk that is written when it holds ``chunk_size`` bytes of samples or
+    when :meth:`flush` is called. Nothing is deserialized, the samples are copied as they are.
+
+    Parameters
+    ----------
+    path: str
+        The file to create, an existing file is overwritten.
+    chunk_size: int
+        The number of bytes of samples after which a chunk is written.
+    """
+
+    def __init__(self, path: str, chunk_size: int = 1 << 20) -> None:
+        self.chunk_size = chunk_size
+        self.streams: List[Stream] = []
+        self._file = open(path, "wb")
+        self._file.write(_file_header.pack(MAGIC, VERSION, 0))
+        self._offset = _file_header.size
+        self._chunks: List[Chunk] = []
+        self._entries = bytearray()
+        self._data = bytearray()
+        self._count = 0
+        self._first_time = 0
+        self._last_time = 0
+
+    def _write_record(self, kind: int, parts: Sequence[Any]) -> int:
+        size = sum(len(part) for part in parts)
+        offset = self._offset
+        self._file.write(_record_header.pack(kind, size))
+        for part in parts:
+            self._file.write(part)
+        self._file.write(bytes(_padding(size)))
+        self._offset += _record_header.size + size + _padding(size)
+        return offset
+
+    def add_stream(self, topic_name: str, type_name: str, topic_qos: dict, writer_qos: dict,
+                   type_info: bytes, type_map: bytes) -> Stream:
+        """Add a topic to the recording, the samples of the topic are written with the id of the stream."""
+        stream = Stream(len(self.streams), topic_name, type_name, topic_qos, writer_qos, type_info, type_map)
+        metadata = json.dumps({
+            "topic_name": topic_name,
+            "type_name": type_name,
+            "topic_qos": topic_qos,
+            "writer_qos": writer_qos,
+            "type_info_size": len(type_info),
+            "type_map_size": len(type_map)
+        }).encode()
+        self._write_record(STREAM, (_stream_header.pack(stream.id, len(metadata)), metadata, type_info, type_map))
+        self.streams.append(stream)
+        return stream
+
+    def write(self, stream: Stream, recorded_time: int, datas: Sequence[Any], source_timestamps: Sequence[int]) -> None:
+        """Append a batch of serialized samples.
+
+        Parameters
+        ----------
+        stream: Stream
+            The stream of the samples.
+        recorded_time: int
+            The time at which the samples were received, in nanoseconds since the UNIX epoch. This
+            must not be earlier than that of the previous batch.
+        datas: Sequence[bytes]
+            The serialized samples including their CDR headers, any objects that support the buffer protocol.
+        source_timestamps: Sequence[int]
+            The source timestamps of the samples.
+        """
+        if not self._count:
+            self._first_time = recorded_time
+        self._last_time = recorded_time
+        for data, source_timestamp in zip(datas, source_timestamps):
+            size = len(data)
+            self._entries += _entry.pack(recorded_time, source_timestamp, len(self._data), size, stream.id)
+            self._data += data
+            self._data += bytes(_padding(size))
+            self._count += 1
+
+        if len(self._data) >= self.chunk_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write the buffered samples as a chunk."""
+        if self._count:
+            offset = self._write_record(CHUNK, (
+                _chunk_header.pack(self._count, 0, self._first_time, self._last_time), self._entries, self._data
+            ))
+            self._chunks.append(Chunk(offset, self._count, self._first_time, self._last_time))
+            self._entries.clear()
+            self._data.clear()
+            self._count = 0
+        self._file.flush()
+
+    def close(self) -> None:
+        """Write the remaining samples and the time index."""
+        if self._file.closed:
+            return
+        self.flush()
+        offset = self._write_record(INDEX, [
+            _index_entry.pack(chunk.first_time, chunk.last_time, chunk.offset, chunk.count) for chunk in self._chunks
+        ])
+        self._file.write(_footer.pack(offset, INDEX_MAGIC))
+        self._file.close()
+
+    def __enter__(self) -> 'RecordingWriter':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+@dataclass
+class Entry:
+    """A recorded sample, ``data`` is a memoryview into the recording."""
+    recorded_time: int
+    source_timestamp: int
+    stream: int
+    data: memoryview
+
+
+class RecordingReader:
+    """Reads a recording through a memory map, the samples are memoryviews into the file.
+
+    Parameters
+    ----------
+    path: str
+        The recording to open.
+    """
+
+    def __init__(self, path: str) -> None:
+        with open(path, "rb") as f:
+            header = f.read(_file_header.size)
+            if len(header) < _file_header.size or _file_header.unpack(header)[0] != MAGIC:
+                raise RecordingError(f"{path} is not a recording")
+            version = _file_header.unpack(header)[1]
+            if version != VERSION:
+                raise RecordingError(f"{path} is a recording of unsupported version {version}")
+            size = os.fstat(f.fileno()).st_size
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._map)
+
+        self.streams: List[Stream] = []
+        self.chunks: List[Chunk] = []
+        self._scan(size)
+        self._last_times = [chunk.last_time for chunk in self.chunks]
+
+    def _scan(self, size: int) -> None:
+        index = None
+        if size >= _file_header.size + _footer.size:
+            offset, magic = _footer.unpack_from(self._map, size - _footer.size)
+            if magic == INDEX_MAGIC:
+                index = offset
+                size -= _footer.size
+
+        offset = _file_header.size
+        while offset + _record_header.size <= size:
+            kind, length = _record_header.unpack_from(self._map, offset)
+            payload = offset + _record_header.size
+            if payload + length > size:
+                # The recording was not closed and the last record was cut off
+                break
+            if kind == STREAM:
+                self._read_stream(payload)
+            elif kind == CHUNK and index is None:
+                count, _, first_time, last_time = _chunk_header.unpack_from(self._map, payload)
+                self.chunks.append(Chunk(offset, count, first_time, last_time))
+            elif kind == INDEX:
+                self.chunks = [
+                    Chunk(chunk_offset, count, first_time, last_time)
+                    for first_time, last_time, chunk_offset, count
+                    in _index_entry.iter_unpack(self._view[payload:payload + length])
+                ]
+            # With an index the chunks are only skipped over to find the streams
+            offset = payload + length + _padding(length)
+
+    def _read_stream(self, payload: int) -> None:
+        stream_id, metadata_size = _stream_header.unpack_from(self._map, payload)
+        start = payload + _stream_header.size
+        metadata = json.loads(bytes(self._view[start:start + metadata_size]))
+        start += metadata_size
+        type_info = bytes(self._view[start:start + metadata["type_info_size"]])
+        start += metadata["type_info_size"]
+        type_map = bytes(self._view[start:start + metadata["type_map_size"]])
+        self.streams.append(Stream(
+            stream_id, metadata["topic_name"], metadata["type_name"],
+            metadata["topic_qos"], metadata["writer_qos"], type_info, type_map
+        ))
+
+    @property
+    def start_time(self) -> Optional[int]:
+        """The time the first sample was recorded, None if there are no samples."""
+        return self.chunks[0].first_time if self.chunks else None
+
+    @property
+    def end_time(self) -> Optional[int]:
+        """The time the last sample was recorded, None if there are no samples."""
+        return self.chunks[-1].last_time if self.chunks else None
+
+    def __len__(self) -> int:
+        return sum(chunk.count for chunk in self.chunks)
+
+    def chunk_entries(self, chunk: Chunk) -> List[Entry]:
+        """The samples in a chunk, in the order they were recorded."""
+        payload = chunk.offset + _record_header.size
+        entries = payload + _chunk_header.size
+        data = entries + chunk.count * _entry.size
+        view = self._view
+        return [
+            Entry(recorded_time, source_timestamp, stream, view[data + offset:data + offset + size])
+            for recorded_time, source_timestamp, offset, size, stream
+            in _entry.iter_unpack(view[entries:data])
+        ]
+
+    def entries(self, start_time: Optional[int] = None) -> Iterator[List[Entry]]:
+        """Iterate over the samples chunk by chunk, optionally starting at the first sample recorded at or
+        after ``start_time``. The index is searched for the chunk to start in, so seeking is cheap.
+        """
+        first = 0 if start_time is None else bisect_left(self._last_times, start_time)
+        for chunk in self.chunks[first:]:
+            entries = self.chunk_entries(chunk)
+            if start_time is not None and chunk.first_time < start_time:
+                entries = [entry for entry in entries if entry.recorded_time >= start_time]
+            yield entries
+
+    def close(self) -> None:
+        # The memoryviews of entries that are still referenced keep the map alive
+        self._view.release()
+        try:
+            self._map.close()
+        except BufferError:
+            pass
+
+    def __enter__(self) -> 'RecordingReader':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,67 @@
+from threading import Thread
+import rich_click as click
+from rich.console import Console
+
+from .utils import TimeDeltaParamType, LiveData
+from .data import replay as data_replay
+from .record import background_counter
+
+
+@click.command(short_help="Replay a recording made with record")
+@click.argument("file", type=click.Path(exists=True, dir_okay=False))
+@click.option(
+    "-i", "--id", "--domain-id", type=int, help="DDS Domain to replay in."
+)
+@click.option(
+    "--rate",
+    type=float,
+    default=1.0,
+    help="Speed of the replay relative to the recording, 0 replays as fast as possible.",
+)
+@click.option(
+    "--start",
+    type=TimeDeltaParamType(),
+    default="0s",
+    help="Offset into the recording at which to start the replay.",
+)
+@click.option(
+    "--source-timestamps",
+    type=bool,
+    is_flag=True,
+    help="Write the samples with their original source timestamps instead of the current time.",
+)
+@click.option(
+    "--batch",
+    type=int,
+    default=256,
+    help="Maximum number of samples that are written at once.",
+)
+@click.option(
+    "--color",
+    type=click.Choice(["auto", "standard", "256", "truecolor", "windows", "none"]),
+    default="auto",
+    help="""Force the command to output with/without terminal colors. By default output colours if the terminal supports it."
+See the [underline blue][link=https://rich.readthedocs.io/en/stable/console.html#color-systems]Rich documentation[/link][/] """
+    """for more info on what the options mean.""",
+)
+def replay(file, id, rate, start, source_timestamps, batch, color):
+    """Replay a recording made with `cyclonedds record`. The topics are recreated with the recorded types and QoS and the
+    serialized samples are written as they were recorded, paced by the times at which they were recorded."""
+
+    if rate < 0:
+        raise click.BadParameter("the rate cannot be negative", param_hint="--rate")
+    if batch < 1:
+        raise click.BadParameter("the batch size must be at least 1", param_hint="--batch")
+
+    console = Console(color_system=None if color == "none" else color)
+    live = LiveData(console)
+
+    console.print(f"[bold green] Replaying {file}, CTRL-C to quit")
+
+    thread = Thread(
+        target=data_replay,
+        args=(live, id, file, rate, int(start.total_seconds() * 1e9), source_timestamps, batch),
+    )
+    thread.start()
+
+    background_counter(live, thread, "Replayed")
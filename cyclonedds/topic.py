@@ -11,14 +11,17 @@
 """
 
 import ctypes as ct
-from typing import Union, AnyStr, Callable, Optional, Generic, Type, TypeVar, TYPE_CHECKING
+from typing import Union, AnyStr, Any, Callable, List, Optional, Generic, Sequence, Type, TypeVar, TYPE_CHECKING
 
 from .internal import DDS, c_call, c_callable, dds_c_t
 from .core import Entity, DDSException, Listener
 from .qos import _CQos, Qos, LimitedScopeQos, TopicQos
 from .idl import IdlStruct, IdlUnion
+from .idl._filter import FilterProgram
+from .idl._extract import MemberExtractor
 
-from cyclonedds._clayer import ddspy_topic_create
+from cyclonedds._clayer import ddspy_topic_create, ddspy_topic_filter_new, ddspy_topic_filter_free, \
+    ddspy_topic_set_filter, ddspy_filter_new, ddspy_filter_set_constants, ddspy_filter_free, ddspy_filter_eval
 
 
 if TYPE_CHECKING:
@@ -36,6 +39,74 @@ class Sample(ct.Structure):
 _filter_fn = c_callable(ct.c_bool, [ct.POINTER(Sample), ct.c_void_p])
 
 
+class ContentFilter:
+    """A filter expression compiled for the serialized samples of a datatype and evaluated in C.
+
+    The expression is a subset of the DDS content filter SQL: comparisons of members with
+    ``=``, ``<>``, ``<``, ``<=``, ``>``, ``>=``, ``BETWEEN`` and ``LIKE``, combined with ``AND``,
+    ``OR``, ``NOT`` and parentheses. Members of nested structs and elements of arrays are
+    named like ``position.x`` and ``readings[2]``, constants are numbers, ``'strings'``,
+    ``TRUE`` and ``FALSE`` and ``%0``, ``%1``, ... are parameters. Enum members compare
+    with the name of a value or with the value. Comparisons of members that are absent
+    from a sample are false.
+
+    Examples
+    --------
+    >>> ContentFilter(Reading, "sensor.name LIKE 'temp%' AND value > %0", [21.5])
+    """
+
+    def __init__(self, data_type: type, expression: str, parameters: Sequence[Any] = ()) -> None:
+        """
+        Parameters
+        ----------
+        data_type: type
+            The IDL struct type of the samples.
+        expression: str
+            The filter expression.
+        parameters: Sequence[Any]
+            Values of the parameters ``%0``, ``%1``, ... of the expression.
+
+        Raises
+        ------
+        ValueError
+            If the expression is not valid or not enough parameters are given.
+        TypeError
+            If the expression uses members that can not be filtered on or compares them with values
+            of the wrong type.
+        """
+        self.data_type = data_type
+        self._program = FilterProgram(data_type, expression)
+        self._parameters = list(parameters)
+        self._ref = ddspy_filter_new(self._program.code, self._program.constants(self._parameters))
+
+    @property
+    def expression(self) -> str:
+        return self._program.expression
+
+    @property
+    def parameters(self) -> List[Any]:
+        return list(self._parameters)
+
+    def set_parameters(self, parameters: Sequence[Any]) -> None:
+        """Replace the values of the parameters, this takes effect for the next sample that is filtered."""
+        constants = self._program.constants(parameters)
+        ddspy_filter_set_constants(self._ref, constants)
+        self._parameters = list(parameters)
+
+    def matches(self, sample: Union[bytes, IdlStruct]) -> bool:
+        """Evaluate the filter on a sample or serialized sample."""
+        if not isinstance(sample, (bytes, bytearray, memoryview)):
+            sample = sample.serialize()
+        return ddspy_filter_eval(self._ref, sample)
+
+    def __del__(self) -> None:
+        if hasattr(self, "_ref"):
+            ddspy_filter_free(self._ref)
+
+    def __repr__(self) -> str:
+        return f"ContentFilter({self.data_type.__name__}, {self.expression!r}, {self._parameters!r})"
+
+
 class Topic(Entity, Generic[_S]):
     """Representing a Topic"""
 
@@ -80,6 +151,16 @@ class Topic(Entity, Generic[_S]):
                 _CQos.cqos_destroy(cqos)
 
         self._keepalive_entities = [self.participant]
+        # The installed filter, and the holder through which the receive threads use it
+        self._content_filter: Optional[ContentFilter] = None
+        self._filter_holder: int = 0
+
+    def __del__(self) -> None:
+        super().__del__()
+        # The topic is deleted, so the receive threads no longer evaluate its filter
+        if getattr(self, "_filter_holder", 0):
+            ddspy_topic_filter_free(self._filter_holder)
+            self._filter_holder = 0
 
     def get_name(self, max_size=256) -> str:
         name = (ct.c_char * max_size)()
@@ -101,29 +182,40 @@ class Topic(Entity, Generic[_S]):
 
     typename = property(get_type_name, doc="Get topic type name")
 
-    def set_topic_filter(self, callable: Callable[['cyclonedds.topic', Sample], bool]):
+    def set_topic_filter(self, callable: Callable[..., bool], members: Optional[Sequence[str]] = None):
         """Sets a filter and filter argument on a topic.
 
         Parameters
         ----------
         callable : filter
-            The filter function used to filter topic samples.
-        topic: Topic
-            The topic to set the filter function.
-        Sample: Sample
-            The sample that needs to be checked whether to be filtered.
+            The filter function used to filter topic samples. It is called with the topic and the
+            sample, or with the topic and the values of the members when members is given.
+        members: Sequence[str], optional
+            Paths of the members the filter looks at, like ``"header.seq"`` or ``"points[1].x"``.
+            Only these members are decoded from the serialized sample.
 
         Returns
         -------
         bool
             Whether this sample is filtered.
+
+        Raises
+        ------
+        ValueError, TypeError
+            If a member path is invalid or does not name a member of the datatype.
         """
         if callable is None:
             return self._set_topic_filter(self._ref, None, None)
 
-        def call(csample, args):
-            return callable(self, self.data_type.deserialize(
-                ct.string_at(csample[0].usample, csample[0].usample_size)))
+        if members is None:
+            def call(csample, args):
+                return callable(self, self.data_type.deserialize(
+                    ct.string_at(csample[0].usample, csample[0].usample_size)))
+        else:
+            extractor = MemberExtractor(self.data_type, members)
+
+            def call(csample, args):
+                return callable(self, *extractor.extract(ct.string_at(csample[0].usample, csample[0].usample_size)))
 
         self._topic_filter = _filter_fn(call)
         self._set_topic_filter(self._ref, self._topic_filter, None)
@@ -132,6 +224,42 @@ class Topic(Entity, Generic[_S]):
         self._c_topic_filter = c_callable
         self._set_topic_filter(self._ref, self._c_topic_filter, None)
 
+    def set_filter_expression(self, expression: Optional[str], parameters: Sequence[Any] = ()) -> Optional[ContentFilter]:
+        """Filter the samples of this topic with a :class:`ContentFilter`. The filter runs in C on the
+        serialized samples, rejected samples never reach Python.
+
+        Parameters
+        ----------
+        expression: str, optional
+            The filter expression, None removes the filter.
+        parameters: Sequence[Any]
+            Values of the parameters ``%0``, ``%1``, ... of the expression.
+
+        Returns
+        -------
+        ContentFilter, optional
+            The filter, use its :meth:`ContentFilter.set_parameters` to change the parameters.
+
+        Raises
+        ------
+        DDSException
+            If the filter could not be set on the topic.
+        """
+        if not self._filter_holder:
+            self._filter_holder = ddspy_topic_filter_new()
+        if expression is None:
+            ret = ddspy_topic_set_filter(self._ref, self._filter_holder, 0)
+            content_filter = None
+        else:
+            content_filter = ContentFilter(self.data_type, expression, parameters)
+            ret = ddspy_topic_set_filter(self._ref, self._filter_holder, content_filter._ref)
+        if ret < 0:
+            raise DDSException(ret, f"Occurred when setting a filter expression on {repr(self)}")
+        # The holder keeps its own reference to the C filter, it drops the previous one once no
+        # receive thread evaluates it anymore
+        self._content_filter = content_filter
+        return content_filter
+
     def get_inconsistent_topic_status(self):
         """Get INCONSISTENT_TOPIC status
 
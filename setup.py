@@ -51,7 +51,8 @@ if "BUILDING_SDIST" not in os.environ:
 
     ext_modules = [
         Extension('cyclonedds._clayer', [
-                'clayer/pysertype.c'
+                'clayer/pysertype.c',
+                'clayer/cdrfilter.c'
             ],
             include_dirs=[
                 str(cyclone.include_path),
@@ -62,6 +63,13 @@ if "BUILDING_SDIST" not in os.environ:
                 str(cyclone.library_path),
                 str(cyclone.binary_path),
             ]
+        ),
+        # The native encoder only needs Python, the pure Python encoders are used
+        # when it can't be built.
+        Extension('cyclonedds._cdrenc', [
+                'clayer/cdrenc.c'
+            ],
+            optional=True
         )
     ]
 
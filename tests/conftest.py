@@ -49,11 +49,15 @@ def hitpoint_factory():
 def pytest_addoption(parser):
     parser.addoption("--fuzzing", action="store", nargs='*', type=str,
                      help="You can specify FuzzingConfig parameters: num_types=12 skip_types=11 num_samples=11 type_seed=13 xcdr_version=1 store_reproducers=True mutation_failure_fatal=True verbose=False")
+    parser.addoption("--benchmark", action="store_true", default=False,
+                     help="Run the (slow) benchmark tests, use together with -s to see the results.")
 
 
 def pytest_runtest_setup(item):
     if 'fuzzing' in item.keywords and item.config.getoption("fuzzing") is None:
         pytest.skip("need --fuzzing option to run this test")
+    if 'benchmark' in item.keywords and not item.config.getoption("benchmark"):
+        pytest.skip("need --benchmark option to run this test")
 
 
 
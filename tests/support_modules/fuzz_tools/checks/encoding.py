@@ -0,0 +1,60 @@
+from ..rand_idl.context_containers import FullContext
+from ..rand_idl.value import generate_random_instance
+from ..utility.stream import Stream
+
+from cyclonedds.idl._support import Endianness, SerializeKind
+from cyclonedds.idl._builder import CodecBuilder, NativeCodecBuilder, _cdrenc
+
+
+def check_encoder_equivalence(log: Stream, ctx: FullContext, typename: str, num_samples: int, xcdr_version: int) -> bool:
+    """The compiled and native serializers must produce exactly what the machines produce."""
+    datatype = ctx.get_datatype(typename)
+    idl = datatype.__idl__
+    use_version_2 = (xcdr_version == 2)
+    idl.populate()
+    machine = idl.v2_machine if use_version_2 else idl.v1_machine
+    codec_key = (True, use_version_2, Endianness.Little)
+
+    samples = [generate_random_instance(datatype, seed=i) for i in range(num_samples)]
+
+    for kind in (SerializeKind.DataSample, SerializeKind.KeyDefinitionOrder, SerializeKind.KeyNormalized):
+        def serialize(codec):
+            if codec is not None:
+                idl._codecs[codec_key + (kind,)] = codec
+            else:
+                idl.use_compiled_codecs = False
+            try:
+                return idl.serialize(sample, use_version_2=use_version_2, endianness=Endianness.Little, serialize_kind=kind)
+            finally:
+                idl._codecs.pop(codec_key + (kind,), None)
+                idl.use_compiled_codecs = True
+
+        compiled = CodecBuilder.build_serializer(machine, use_version_2, Endianness.Little, kind)
+        program = NativeCodecBuilder().program(machine) if _cdrenc else None
+
+        for sample in samples:
+            reference = serialize(None)
+            results = {}
+            try:
+                if compiled:
+                    results["compiled"] = serialize(compiled)
+                if program:
+                    # Bypass the fallback to the machine, the native encoder should handle all samples
+                    data = bytearray(4)
+                    pos = _cdrenc.encode(program, sample, data, 4, 4, 4 if use_version_2 else 8, True,
+                                         NativeCodecBuilder.kinds[kind])
+                    results["native"] = reference[:4] + bytes(data[4:pos])
+            except Exception as e:
+                log.write_exception("Encoder", e)
+                return False
+
+            for name, result in results.items():
+                if result != reference:
+                    log << f"Output of the {name} serializer does not match the machines ({kind.name})!" << log.endl << log.indent
+                    log << "Instance: " << sample << log.endl
+                    log << "Machines:" << log.endl << reference
+                    log << f"{name}:" << log.endl << result
+                    log << log.dedent
+                    return False
+
+    return True
@@ -0,0 +1,77 @@
+from dataclasses import dataclass, field
+
+from cyclonedds.idl import IdlStruct
+from cyclonedds.idl.annotations import key, final
+from cyclonedds.idl.types import array, sequence, uint8, uint32, int64
+
+
+# Python equivalents of (a subset of) the ddsperf topic types,
+# see `cyclonedds performance topics` for their IDL.
+
+
+@dataclass
+@final
+class KeyedSeq(IdlStruct, typename="KeyedSeq"):
+    seq: uint32
+    keyval: uint32
+    key("keyval")
+    baggage: sequence[uint8]
+
+
+@dataclass
+@final
+class Keyed32(IdlStruct, typename="Keyed32"):
+    seq: uint32
+    keyval: uint32
+    key("keyval")
+    baggage: array[uint8, 24]
+
+
+@dataclass
+@final
+class Struct16(IdlStruct, typename="Struct16"):
+    struct0: uint8 = 0
+    struct1: uint8 = 0
+    struct2: uint8 = 0
+    struct3: uint8 = 0
+    struct4: uint8 = 0
+    struct5: uint8 = 0
+    struct6: uint8 = 0
+    struct7: uint8 = 0
+    struct8: uint8 = 0
+    struct9: uint8 = 0
+    structa: uint8 = 0
+    structb: uint8 = 0
+    structc: uint8 = 0
+    structd: uint8 = 0
+    structe: uint8 = 0
+    structf: uint8 = 0
+    junk: int64 = 0
+    seq: uint32 = 0
+    keyval: uint32 = 0
+    key("keyval")
+
+
+@dataclass
+@final
+class Struct256(IdlStruct, typename="Struct256"):
+    struct160: Struct16 = field(default_factory=Struct16)
+    struct161: Struct16 = field(default_factory=Struct16)
+    struct162: Struct16 = field(default_factory=Struct16)
+    struct163: Struct16 = field(default_factory=Struct16)
+    struct164: Struct16 = field(default_factory=Struct16)
+    struct165: Struct16 = field(default_factory=Struct16)
+    struct166: Struct16 = field(default_factory=Struct16)
+    struct167: Struct16 = field(default_factory=Struct16)
+    struct168: Struct16 = field(default_factory=Struct16)
+    struct169: Struct16 = field(default_factory=Struct16)
+    struct16a: Struct16 = field(default_factory=Struct16)
+    struct16b: Struct16 = field(default_factory=Struct16)
+    struct16c: Struct16 = field(default_factory=Struct16)
+    struct16d: Struct16 = field(default_factory=Struct16)
+    struct16e: Struct16 = field(default_factory=Struct16)
+    struct16f: Struct16 = field(default_factory=Struct16)
+    junk: int64 = 0
+    seq: uint32 = 0
+    keyval: uint32 = 0
+    key("keyval")
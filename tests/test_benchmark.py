@@ -0,0 +1,772 @@
+import time
+import array
+import asyncio
+import threading
+import tracemalloc
+import pytest
+from dataclasses import dataclass
+
+from cyclonedds.core import Qos, Policy, Listener, ListenerDispatcher, WaitSet, WaitSetDispatcher, ReadCondition, \
+    ViewState, InstanceState, SampleState
+from cyclonedds.domain import DomainParticipant
+from cyclonedds.topic import Topic
+from cyclonedds.pub import DataWriter
+from cyclonedds.sub import DataReader
+from cyclonedds.qos import _CQos
+from cyclonedds.builtin_types import cqos_to_qos
+from cyclonedds.builtin import BuiltinDataReader, BuiltinTopicDcpsPublication, BuiltinTopicDcpsSubscription, \
+    DiscoveryGraph
+from cyclonedds.util import duration
+from cyclonedds._clayer import ddspy_qos_decode
+
+from cyclonedds.idl import IdlStruct, DeserializerPool, make_idl_struct
+from cyclonedds.idl.annotations import fast_construct, compact, packed
+from cyclonedds.idl._support import Endianness
+from cyclonedds.idl._type_normalize import get_extended_type_hints
+from cyclonedds.idl._extract import MemberExtractor
+import cyclonedds.idl.types as types
+
+from support_modules.testtopics.perftopics import KeyedSeq, Struct16, Struct256
+import support_modules.test_classes as tc
+
+
+# These benchmarks only run with the --benchmark option, use
+# -s to see the results: pytest -s --benchmark tests/test_benchmark.py
+
+
+def best_of(fn, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def report(title, count, **timings):
+    print(f"\n{title}")
+    for name, seconds in timings.items():
+        print(f"  {name:<24} {seconds * 1e3:10.3f} ms  {count / seconds:12.0f} samples/s")
+
+
+def make_keyed_seq(count):
+    return [KeyedSeq(seq=i, keyval=i % 16, baggage=[i % 256] * 32) for i in range(count)]
+
+
+def make_struct256(count):
+    return [
+        Struct256(struct160=Struct16(struct0=i % 256), junk=i, seq=i, keyval=i % 16)
+        for i in range(count)
+    ]
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("datatype,make_samples", [(KeyedSeq, make_keyed_seq), (Struct256, make_struct256)])
+@pytest.mark.parametrize("batch_size", [10, 1000])
+def test_benchmark_write_many(manual_setup, datatype, make_samples, batch_size):
+    qos = Qos(Policy.Reliability.BestEffort, Policy.History.KeepLast(1))
+    tp = Topic(manual_setup.dp, f"Benchmark{datatype.__name__}", datatype, qos=qos)
+    dw = DataWriter(manual_setup.dp, tp, qos=qos)
+    dr = DataReader(manual_setup.dp, tp, qos=qos)
+    samples = make_samples(batch_size)
+
+    def write_loop():
+        for sample in samples:
+            dw.write(sample)
+
+    def write_many():
+        dw.write_many(samples)
+
+    report(
+        f"{datatype.__name__}, batches of {batch_size}",
+        batch_size,
+        write_loop=best_of(write_loop),
+        write_many=best_of(write_many)
+    )
+    assert len(dr.take(N=16)) > 0
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("num_threads", [1, 2, 4])
+def test_benchmark_threaded_pubsub(manual_setup, num_threads):
+    # Aggregate throughput of a number of writer/reader thread pairs sharing
+    # one process, this scales only if the C calls do not hold the GIL.
+    qos = Qos(Policy.Reliability.Reliable(duration(seconds=10)), Policy.History.KeepLast(64))
+    num_samples = 5000
+    samples = make_keyed_seq(num_samples)
+    writers_done = threading.Event()
+    received = [0] * num_threads
+    pairs = []
+    for i in range(num_threads):
+        tp = Topic(manual_setup.dp, f"BenchmarkThreaded{i}", KeyedSeq, qos=qos)
+        pairs.append((DataWriter(manual_setup.dp, tp, qos=qos), DataReader(manual_setup.dp, tp, qos=qos)))
+
+    def write(dw):
+        for sample in samples:
+            dw.write(sample)
+
+    def read(index, dr):
+        while not writers_done.is_set():
+            received[index] += len(dr.take(N=64))
+
+    writer_threads = [threading.Thread(target=write, args=(dw,)) for dw, _ in pairs]
+    reader_threads = [threading.Thread(target=read, args=(i, dr)) for i, (_, dr) in enumerate(pairs)]
+    for thread in reader_threads:
+        thread.start()
+
+    start = time.perf_counter()
+    for thread in writer_threads:
+        thread.start()
+    for thread in writer_threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    writers_done.set()
+    for thread in reader_threads:
+        thread.join()
+
+    report(f"{num_threads} writer/reader thread pairs", num_threads * num_samples, aggregate=elapsed)
+    assert all(count > 0 for count in received)
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("size", [32 * 1024, 256 * 1024, 1024 * 1024])
+def test_benchmark_loan_read(manual_setup, size):
+    qos = Qos(Policy.Reliability.Reliable(duration(seconds=10)), Policy.History.KeepLast(1))
+    tp = Topic(manual_setup.dp, "BenchmarkLoan", KeyedSeq, qos=qos)
+    dw = DataWriter(manual_setup.dp, tp, qos=qos)
+    dr = DataReader(manual_setup.dp, tp, qos=qos)
+    dw.write_many([KeyedSeq(seq=0, keyval=i, baggage=bytes(size)) for i in range(16)])
+    rounds = 20
+
+    def read_copy():
+        for _ in range(rounds):
+            assert len(dr.read(N=16)) == 16
+
+    def read_loan():
+        for _ in range(rounds):
+            assert len(dr.read(N=16, loan=True)) == 16
+
+    report(f"Reading 16 samples of {size // 1024} KiB", 16 * rounds, copy=best_of(read_copy), loan=best_of(read_loan))
+
+
+codec_samples = [
+    tc.SingleInt(value=9128919),
+    tc.SingleString(value="Hello, World!"),
+    tc.SingleSequence(value=[0, 1] * 100),
+    tc.SingleArray(value=[0, 1, 2]),
+    tc.SingleBoundedString(value="llsllë"),
+    tc.SingleEnum(value=tc.BasicEnum.Two),
+    tc.SingleNested(value=tc.SingleInt(1)),
+    tc.Keyed(a=1, b=2),
+    tc.AllPrimitives(),
+    tc.SingleUnion(value=tc.EasyUnion(b=True)),
+    make_keyed_seq(1)[0],
+    make_struct256(1)[0],
+]
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("value", codec_samples, ids=lambda v: type(v).__name__)
+@pytest.mark.parametrize("use_version_2", [False, True])
+def test_benchmark_compiled_codecs(value, use_version_2):
+    idl = type(value).__idl__
+    data = idl.serialize(value, use_version_2=use_version_2)
+    rounds = 10000
+
+    def serialize():
+        for _ in range(rounds):
+            idl.serialize(value, use_version_2=use_version_2)
+
+    def deserialize():
+        for _ in range(rounds):
+            idl.deserialize(data)
+
+    compiled = best_of(serialize), best_of(deserialize)
+    idl.use_compiled_codecs = False
+    try:
+        machines = best_of(serialize), best_of(deserialize)
+    finally:
+        idl.use_compiled_codecs = True
+
+    report(
+        f"{type(value).__name__}, XCDR{2 if use_version_2 else 1}",
+        rounds,
+        serialize_machines=machines[0],
+        serialize_compiled=compiled[0],
+        deserialize_machines=machines[1],
+        deserialize_compiled=compiled[1]
+    )
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("value", codec_samples, ids=lambda v: type(v).__name__)
+def test_benchmark_native_encoder(value):
+    from cyclonedds.idl._builder import CodecBuilder, NativeCodecBuilder
+    from cyclonedds.idl._support import Buffer, Endianness, SerializeKind
+
+    if not NativeCodecBuilder.available():
+        pytest.skip("native encoder not built")
+
+    idl = type(value).__idl__
+    idl.populate()
+    rounds = 10000
+    buffer = Buffer()
+    encoders = {
+        "machine": idl.v2_machine.serialize,
+        "compiled": CodecBuilder.build_serializer(idl.v2_machine, True, Endianness.Little, SerializeKind.DataSample),
+        "native": NativeCodecBuilder.build_serializer(idl.v2_machine, True, Endianness.Little, SerializeKind.DataSample)
+    }
+
+    def run(encoder):
+        def loop():
+            for _ in range(rounds):
+                buffer.seek(0)
+                encoder(buffer, value)
+        return loop
+
+    report(
+        f"Encoding {type(value).__name__}, XCDR2",
+        rounds,
+        **{name: best_of(run(encoder)) for name, encoder in encoders.items() if encoder}
+    )
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("value", [
+    make_keyed_seq(1)[0],
+    make_struct256(1)[0],
+    tc.SingleSequence(value=list(range(16 * 1024))),
+], ids=lambda v: type(v).__name__)
+def test_benchmark_reusable_buffer(value):
+    from cyclonedds.idl._support import ReusableBuffer
+
+    idl = type(value).__idl__
+    rounds = 10000 if len(idl.serialize(value)) < 4096 else 1000
+    buffer = ReusableBuffer()
+
+    def fresh_buffer():
+        for _ in range(rounds):
+            ser = idl.serialize(value)
+            ser.ljust((len(ser) + 4 - 1) & ~(4 - 1), b'\0')
+
+    def reused_buffer():
+        for _ in range(rounds):
+            with idl.serialize_view(buffer, value):
+                pass
+
+    report(
+        f"Serializing {type(value).__name__} for writing",
+        rounds,
+        fresh_buffer=best_of(fresh_buffer),
+        reused_buffer=best_of(reused_buffer)
+    )
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("num_readers", [1, 100, 1000])
+def test_benchmark_async_readers(manual_setup, num_readers):
+    from support_modules.testtopics import Message
+
+    tp = Topic(manual_setup.dp, "BenchmarkAsync", Message)
+    dw = DataWriter(manual_setup.dp, tp)
+    readers = [DataReader(manual_setup.dp, tp) for _ in range(num_readers)]
+    rounds = 20
+
+    async def receive(reader, queue):
+        async for _ in reader.take_aiter():
+            queue.put_nowait(time.perf_counter())
+
+    async def run():
+        queue = asyncio.Queue()
+        threads = threading.active_count()
+        tracemalloc.start()
+        tasks = [asyncio.ensure_future(receive(reader, queue)) for reader in readers]
+        await asyncio.sleep(0.5)
+        memory, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        threads = threading.active_count() - threads
+
+        latencies = []
+        for i in range(rounds):
+            start = time.perf_counter()
+            dw.write(Message(message=f"{i}"))
+            last = start
+            for _ in range(num_readers):
+                last = max(last, await queue.get())
+            latencies.append(last - start)
+
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        return threads, memory, latencies
+
+    threads, memory, latencies = asyncio.run(run())
+    latencies.sort()
+    print(f"\n{num_readers} async readers: {threads} extra threads, {memory / 1024:.0f} KiB allocated while waiting")
+    print(f"  wakeup of all readers: median {latencies[len(latencies) // 2] * 1e3:.3f} ms, max {latencies[-1] * 1e3:.3f} ms")
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("max_batch", [1, 16, 256])
+def test_benchmark_take_iter_batches(manual_setup, max_batch):
+    qos = Qos(Policy.Reliability.Reliable(duration(seconds=1)), Policy.History.KeepAll)
+    tp = Topic(manual_setup.dp, "BenchmarkBatches", KeyedSeq, qos=qos)
+    dw = DataWriter(manual_setup.dp, tp, qos=qos)
+    dr = DataReader(manual_setup.dp, tp, qos=qos)
+    samples = make_keyed_seq(10000)
+
+    def drain():
+        dw.write_many(samples)
+        received = 0
+        for batch in dr.take_iter_batches(timeout=duration(milliseconds=10), max_batch=max_batch):
+            received += len(batch)
+        assert received == len(samples)
+
+    report(f"Taking KeyedSeq in batches of {max_batch}", len(samples), write_and_take=best_of(drain))
+
+
+Wide = make_idl_struct("Wide", "Wide", dict(
+    [(f"name{i}", str) for i in range(16)] +
+    [(f"values{i}", types.sequence[types.int32]) for i in range(16)] +
+    [(f"point{i}", Struct16) for i in range(16)] +
+    [("seq", types.int64)]
+))
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("use_version_2", [False, True])
+def test_benchmark_lazy_views(use_version_2):
+    value = Wide(seq=1, **{
+        **{f"name{i}": f"name number {i}" for i in range(16)},
+        **{f"values{i}": list(range(64)) for i in range(16)},
+        **{f"point{i}": Struct16(struct0=i) for i in range(16)},
+    })
+    data = value.serialize(use_version_2=use_version_2)
+    rounds = 2000
+
+    def full():
+        for _ in range(rounds):
+            Wide.deserialize(data).name0
+
+    def lazy_first():
+        for _ in range(rounds):
+            Wide.deserialize_lazy(data).name0
+
+    def lazy_last():
+        for _ in range(rounds):
+            Wide.deserialize_lazy(data).seq
+
+    report(
+        f"Reading one member of a {len(data)} byte struct, XCDR{2 if use_version_2 else 1}",
+        rounds,
+        deserialize=best_of(full),
+        lazy_first_member=best_of(lazy_first),
+        lazy_last_member=best_of(lazy_last)
+    )
+
+
+@pytest.mark.benchmark
+def test_benchmark_take_numpy(manual_setup):
+    np = pytest.importorskip("numpy")
+    qos = Qos(Policy.Reliability.Reliable(duration(seconds=1)), Policy.History.KeepAll)
+    tp = Topic(manual_setup.dp, "BenchmarkNumpy", Struct256, qos=qos)
+    dw = DataWriter(manual_setup.dp, tp, qos=qos)
+    dr = DataReader(manual_setup.dp, tp, qos=qos)
+    samples = make_struct256(10000)
+
+    def take_objects():
+        dw.write_many(samples)
+        taken = dr.take(N=len(samples))
+        seq = np.array([s.seq for s in taken], dtype=np.uint32)
+        junk = np.array([s.junk for s in taken], dtype=np.int64)
+        timestamps = np.array([s.sample_info.source_timestamp for s in taken], dtype=np.int64)
+        assert len(seq) == len(junk) == len(timestamps) == len(samples)
+
+    def take_numpy():
+        dw.write_many(samples)
+        data, infos = dr.take_numpy(N=len(samples))
+        seq, junk, timestamps = data["seq"], data["junk"], infos["source_timestamp"]
+        assert len(seq) == len(junk) == len(timestamps) == len(samples)
+
+    report("Taking Struct256 into arrays", len(samples), take_objects=best_of(take_objects), take_numpy=best_of(take_numpy))
+
+
+@pytest.mark.benchmark
+def test_benchmark_listener_dispatch(manual_setup):
+    # Local delivery calls the listener on the thread that writes, the time a write takes
+    # is the time a receive thread would be stalled by a slow callback
+    count = 200
+    qos = Qos(Policy.Reliability.Reliable(duration(seconds=1)), Policy.History.KeepAll)
+    tp = Topic(manual_setup.dp, "BenchmarkListener", Struct256, qos=qos)
+    dw = DataWriter(manual_setup.dp, tp, qos=qos)
+    samples = make_struct256(count)
+
+    def on_data_available(reader):
+        reader.take(N=count)
+        time.sleep(0.001)
+
+    def stall(listener):
+        dr = DataReader(manual_setup.dp, tp, qos=qos, listener=listener)
+        stalls = []
+        for sample in samples:
+            start = time.perf_counter()
+            dw.write(sample)
+            stalls.append(time.perf_counter() - start)
+        dr.set_listener(None)
+        return sum(stalls), max(stalls)
+
+    synchronous, synchronous_max = stall(Listener(on_data_available=on_data_available))
+    with ListenerDispatcher() as dispatcher:
+        dispatched, dispatched_max = stall(Listener(dispatcher=dispatcher, on_data_available=on_data_available))
+
+    report("Writer stalled by a 1 ms on_data_available", count, synchronous=synchronous, dispatched=dispatched)
+    print(f"  longest write: synchronous {synchronous_max * 1e3:.3f} ms, dispatched {dispatched_max * 1e3:.3f} ms")
+
+
+@pytest.mark.benchmark
+def test_benchmark_content_filter(manual_setup):
+    qos = Qos(Policy.Reliability.Reliable(duration(seconds=1)), Policy.History.KeepAll)
+    samples = make_struct256(10000)
+
+    def write_and_take(tp):
+        dw = DataWriter(manual_setup.dp, tp, qos=qos)
+        dr = DataReader(manual_setup.dp, tp, qos=qos)
+
+        def run():
+            dw.write_many(samples)
+            assert len(dr.take(N=len(samples))) == len(samples) // 4
+        return best_of(run)
+
+    python_tp = Topic(manual_setup.dp, "BenchmarkPythonFilter", Struct256, qos=qos)
+    python_tp.set_topic_filter(lambda topic, sample: sample.keyval < 4)
+    expression_tp = Topic(manual_setup.dp, "BenchmarkExpressionFilter", Struct256, qos=qos)
+    expression_tp.set_filter_expression("keyval < %0", [4])
+
+    report("Filtering Struct256 on keyval", len(samples),
+           python_filter=write_and_take(python_tp), filter_expression=write_and_take(expression_tp))
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("use_version_2", [False, True])
+def test_benchmark_member_extractor(use_version_2):
+    value = Wide(seq=1, **{
+        **{f"name{i}": f"name number {i}" for i in range(16)},
+        **{f"values{i}": list(range(64)) for i in range(16)},
+        **{f"point{i}": Struct16(struct0=i) for i in range(16)},
+    })
+    data = value.serialize(use_version_2=use_version_2)
+    extractor = MemberExtractor(Wide, ["point15.struct0", "seq"])
+    rounds = 2000
+
+    def full():
+        for _ in range(rounds):
+            sample = Wide.deserialize(data)
+            sample.point15.struct0, sample.seq
+
+    def extract():
+        for _ in range(rounds):
+            extractor.extract(data)
+
+    report(
+        f"Filtering on two members of a {len(data)} byte struct, XCDR{2 if use_version_2 else 1}",
+        rounds,
+        deserialize=best_of(full),
+        member_extractor=best_of(extract)
+    )
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("instance_cache_size", [0, 20000])
+def test_benchmark_instance_cache(manual_setup, instance_cache_size):
+    tp = Topic(manual_setup.dp, "BenchmarkInstanceCache", KeyedSeq)
+    dw = DataWriter(manual_setup.dp, tp, instance_cache_size=instance_cache_size)
+    samples = [KeyedSeq(seq=i, keyval=i, baggage=[]) for i in range(20000)]
+    for sample in samples:
+        dw.register_instance(sample)
+
+    def lookup():
+        for sample in samples:
+            dw.lookup_instance(sample)
+
+    def dispose():
+        for sample in samples:
+            dw.dispose(sample)
+
+    report(f"20000 keyed instances, instance cache of {instance_cache_size}", len(samples),
+           lookup_instance=best_of(lookup), dispose=best_of(dispose))
+    if dw.instance_cache is not None:
+        print(f"  {dw.instance_cache.stats()}")
+
+
+@pytest.mark.benchmark
+def test_benchmark_write_distinct_keys(manual_setup):
+    # Every sample is a new instance, so every write extracts and hashes a new key
+    count, batch_size = 1000000, 10000
+    qos = Qos(Policy.Reliability.BestEffort, Policy.History.KeepLast(1))
+    tp = Topic(manual_setup.dp, "BenchmarkDistinctKeys", KeyedSeq, qos=qos)
+    dw = DataWriter(manual_setup.dp, tp, qos=qos)
+    batches = [
+        [KeyedSeq(seq=i, keyval=i, baggage=[]) for i in range(start, start + batch_size)]
+        for start in range(0, count, batch_size)
+    ]
+
+    def write():
+        for batch in batches:
+            dw.write_many(batch)
+
+    report(f"Writing {count} distinct keyed samples", count, write_many=best_of(write, repeat=1))
+
+
+@pytest.mark.benchmark
+def test_benchmark_take_with_info_batch(manual_setup):
+    qos = Qos(Policy.Reliability.Reliable(duration(seconds=1)), Policy.History.KeepAll)
+    tp = Topic(manual_setup.dp, "BenchmarkInfoBatch", Struct16, qos=qos)
+    dw = DataWriter(manual_setup.dp, tp, qos=qos)
+    dr = DataReader(manual_setup.dp, tp, qos=qos)
+    samples = [Struct16(struct0=i % 256) for i in range(1000)]
+    rounds = 100
+
+    def take():
+        for _ in range(rounds):
+            dw.write_many(samples)
+            taken = dr.take(N=len(samples))
+            assert sum(s.sample_info.source_timestamp > 0 for s in taken) == len(samples)
+
+    def take_with_info_batch():
+        for _ in range(rounds):
+            dw.write_many(samples)
+            taken, infos = dr.take_with_info_batch(N=len(samples))
+            assert sum(t > 0 for t in infos.source_timestamp) == len(taken) == len(samples)
+
+    report(f"Taking batches of {len(samples)} Struct16 with sample infos", rounds * len(samples),
+           take=best_of(take), take_with_info_batch=best_of(take_with_info_batch))
+
+
+def make_nested_types(depth, fast):
+    # Levels of structs that each hold the members of AllPrimitives, SingleNested and the next level
+    prefix = "Fast" if fast else "Init"
+    leaf = fast_construct(fast)(make_idl_struct(f"{prefix}Primitives", f"{prefix}Primitives", get_extended_type_hints(tc.AllPrimitives)))
+    inner = fast_construct(fast)(make_idl_struct(f"{prefix}Int", f"{prefix}Int", get_extended_type_hints(tc.SingleInt)))
+    nested = fast_construct(fast)(make_idl_struct(f"{prefix}Nested", f"{prefix}Nested", {"value": inner}))
+    level = None
+    for i in range(depth):
+        fields = {"prims": leaf, "nested": nested}
+        if level is not None:
+            fields["inner"] = level
+        level = fast_construct(fast)(make_idl_struct(f"{prefix}Level{i}", f"{prefix}Level{i}", fields))
+    top = fast_construct(fast)(make_idl_struct(f"{prefix}Deep{depth}", f"{prefix}Deep{depth}", {"levels": types.sequence[level]}))
+
+    def sample(level_type, i):
+        fields = {"prims": leaf(**vars(tc.AllPrimitives())), "nested": nested(value=inner(value=i))}
+        if "inner" in get_extended_type_hints(level_type):
+            fields["inner"] = sample(get_extended_type_hints(level_type)["inner"], i)
+        return level_type(**fields)
+
+    return top, top(levels=[sample(level, i) for i in range(100)])
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("depth", [1, 4, 8])
+@pytest.mark.parametrize("compiled", [False, True])
+def test_benchmark_fast_construct(depth, compiled):
+    rounds = 100
+    timings = {}
+    for fast in (False, True):
+        datatype, value = make_nested_types(depth, fast)
+        datatype.__idl__.use_compiled_codecs = compiled
+        data = value.serialize()
+        assert datatype.deserialize(data) == value
+
+        def deserialize():
+            for _ in range(rounds):
+                datatype.deserialize(data)
+
+        timings["fast_construct" if fast else "init"] = best_of(deserialize)
+
+    report(f"Deserializing 100 structs nested {depth} deep, {'compiled' if compiled else 'machines'}", rounds, **timings)
+
+
+@pytest.mark.benchmark
+def test_benchmark_compact_memory():
+    count = 200000
+    compact_type = compact(make_idl_struct("CompactPrimitives", "CompactPrimitives", get_extended_type_hints(tc.AllPrimitives)))
+    info = object()
+
+    def keep(datatype):
+        data = tc.AllPrimitives().serialize()
+        tracemalloc.start()
+        samples = []
+        for _ in range(count):
+            sample = datatype.deserialize(data)
+            sample.sample_info = info
+            samples.append(sample)
+        memory, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return memory
+
+    print(f"\nKeeping {count} AllPrimitives samples with a sample info")
+    for name, datatype in (("dataclass", tc.AllPrimitives), ("compact", compact_type)):
+        memory = keep(datatype)
+        print(f"  {name:<24} {memory / 2**20:10.1f} MiB  {memory / count:12.0f} bytes/sample")
+
+
+@dataclass
+class Samples(IdlStruct):
+    values: types.sequence[types.float64]
+
+
+@dataclass
+class PackedSamples(IdlStruct):
+    values: types.sequence[types.float64]
+    packed("values")
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("endianness", [Endianness.Little, Endianness.Big])
+def test_benchmark_packed_sequence(endianness):
+    rounds = 20
+    values = [i * 0.5 for i in range(100000)]
+    timings = {}
+    for name, value in (("list", Samples(values)), ("array.array", PackedSamples(array.array('d', values)))):
+        idl = type(value).__idl__
+        data = idl.serialize(value, endianness=endianness)
+        assert list(type(value).deserialize(data).values) == values
+
+        def serialize():
+            for _ in range(rounds):
+                idl.serialize(value, endianness=endianness)
+
+        def deserialize():
+            for _ in range(rounds):
+                idl.deserialize(data)
+
+        timings[f"{name} serialize"] = best_of(serialize)
+        timings[f"{name} deserialize"] = best_of(deserialize)
+
+    report(f"Sequence of 100000 float64, {endianness.name.lower()} endian", rounds, **timings)
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("workers", [2, 4, 8])
+def test_benchmark_deserializer_pool(workers):
+    count = 5000
+    datas = [sample.serialize() for sample in make_struct256(count)]
+
+    def in_process():
+        for data in datas:
+            Struct256.deserialize(data)
+
+    with DeserializerPool(Struct256, max_workers=workers, threshold=1) as pool:
+        # Start and warm up the workers first
+        pool.deserialize(Struct256, datas)
+        timings = {
+            "in-process": best_of(in_process),
+            f"{workers} workers": best_of(lambda: pool.deserialize(Struct256, datas))
+        }
+
+    report(f"Deserializing {count} Struct256 samples", count, **timings)
+
+
+@pytest.mark.benchmark
+def test_benchmark_waitset_dispatcher(manual_setup):
+    from support_modules.testtopics import Message
+
+    count = 800
+    rounds = 200
+    mask = ViewState.Any | InstanceState.Any | SampleState.Any
+    topics = [Topic(manual_setup.dp, f"BenchmarkWaitSet{i}", Message) for i in range(count)]
+    writers = [DataWriter(manual_setup.dp, tp) for tp in topics]
+    conditions = [ReadCondition(DataReader(manual_setup.dp, tp), mask) for tp in topics]
+    msg = Message(message="hi")
+
+    waitset = WaitSet(manual_setup.dp)
+    for condition in conditions:
+        waitset.attach(condition)
+
+    def polling():
+        for i in range(rounds):
+            writers[i * 7 % count].write(msg)
+            waitset.wait(duration(seconds=1))
+            for condition in conditions:
+                condition.reader.take(N=16, condition=condition)
+
+    def triggered():
+        for i in range(rounds):
+            writers[i * 7 % count].write(msg)
+            for condition in waitset.wait_triggered(duration(seconds=1)):
+                condition.reader.take(N=16, condition=condition)
+
+    timings = {"wait and take all": best_of(polling), "wait_triggered": best_of(triggered)}
+    for condition in conditions:
+        waitset.detach(condition)
+
+    dispatcher = WaitSetDispatcher(manual_setup.dp, max_batch=16)
+    for condition in conditions:
+        dispatcher.add(condition, lambda samples: None)
+
+    def dispatch():
+        for i in range(rounds):
+            writers[i * 7 % count].write(msg)
+            dispatcher.dispatch(duration(seconds=1))
+
+    timings["WaitSetDispatcher"] = best_of(dispatch)
+    report(f"One sample on one of {count} readers", rounds, **timings)
+
+
+@pytest.mark.benchmark
+def test_benchmark_qos_decode():
+    # 10k endpoints as discovered on a large system, sharing a handful of qos profiles
+    count = 10000
+    profiles = [
+        Qos(Policy.Reliability.Reliable(duration(milliseconds=100)), Policy.Durability.TransientLocal,
+            Policy.History.KeepLast(depth), Policy.Partition([f"partition_{depth % 3}"]),
+            Policy.Userdata(b"monitoring"), Policy.Property("host", "central"),
+            Policy.DataRepresentation(use_xcdrv2_representation=True))
+        for depth in range(1, 9)
+    ]
+    cqoss = [_CQos.qos_to_cqos(profiles[i % len(profiles)]) for i in range(count)]
+
+    def interned():
+        cqos_to_qos.cache_clear()
+        return [cqos_to_qos(ddspy_qos_decode(cqos.value)) for cqos in cqoss]
+
+    try:
+        assert interned() == [_CQos.cqos_to_qos(cqos) for cqos in cqoss]
+        report(f"Converting the qos of {count} endpoints", count,
+               ctypes=best_of(lambda: [_CQos.cqos_to_qos(cqos) for cqos in cqoss]),
+               decoded=best_of(lambda: [_CQos.decoded_to_qos(ddspy_qos_decode(cqos.value)) for cqos in cqoss]),
+               interned=best_of(interned))
+    finally:
+        for cqos in cqoss:
+            _CQos.cqos_destroy(cqos)
+
+
+@pytest.mark.benchmark
+def test_benchmark_discovery_graph(manual_setup):
+    # 5k endpoints, the time until all of them are known
+    count = 2500
+    mask = ViewState.Any | InstanceState.Alive | SampleState.NotRead
+    topics = [Topic(manual_setup.dp, f"BenchmarkDiscovery{i % 100}", KeyedSeq) for i in range(100)]
+    writers = [DataWriter(manual_setup.dp, topics[i % 100]) for i in range(count)]
+    readers = [DataReader(manual_setup.dp, topics[i % 100]) for i in range(count)]
+    expected = 2 * count
+
+    def polling():
+        # How cyclonedds ls used to poll the builtin readers
+        rdw = BuiltinDataReader(manual_setup.dp, BuiltinTopicDcpsPublication)
+        rcw = ReadCondition(rdw, mask)
+        rdr = BuiltinDataReader(manual_setup.dp, BuiltinTopicDcpsSubscription)
+        rcr = ReadCondition(rdr, mask)
+        seen = 0
+        while seen < expected:
+            seen += len(rdw.take(N=20, condition=rcw)) + len(rdr.take(N=20, condition=rcr))
+            time.sleep(0.01)
+
+    def graph():
+        discovery = DiscoveryGraph(manual_setup.dp, topic_discovery=False)
+        while len(discovery.publications) + len(discovery.subscriptions) < expected:
+            discovery.update(duration(seconds=1))
+
+    report(f"Discovering {expected} endpoints", expected,
+           polling=best_of(polling, repeat=3), DiscoveryGraph=best_of(graph, repeat=3))
@@ -1,3 +1,4 @@
+import gc
 import pytest
 
 import cyclonedds.internal
@@ -5,7 +6,10 @@ from cyclonedds.domain import DomainParticipant
 from cyclonedds.sub import Subscriber
 from cyclonedds.topic import Topic
 from cyclonedds.util import duration, isgoodentity
-from cyclonedds.builtin import BuiltinDataReader, BuiltinTopicDcpsParticipant, BuiltinTopicDcpsSubscription, BuiltinTopicDcpsTopic
+from cyclonedds.pub import DataWriter
+from cyclonedds.sub import DataReader
+from cyclonedds.builtin import BuiltinDataReader, BuiltinTopicDcpsParticipant, BuiltinTopicDcpsSubscription, BuiltinTopicDcpsTopic, \
+    BuiltinTopicDcpsPublication, DiscoveryGraph, DiscoveryChange
 
 from support_modules.testtopics import Message
 
@@ -87,3 +91,64 @@ def test_builtin_dcps_topic_take(manual_setup):
     assert msg.topic_name == 'MessageTopic'
     assert msg.type_name == 'Message'
 
+
+
+def update_until(graph, predicate):
+    for _ in range(50):
+        if predicate():
+            return
+        graph.update(duration(milliseconds=100))
+    assert predicate()
+
+
+def test_discovery_graph(manual_setup):
+    dp = manual_setup.dp
+    graph = DiscoveryGraph(dp, topic_discovery=False)
+    tp = Topic(dp, 'MessageTopic', Message)
+    dw = DataWriter(dp, tp)
+    dr = DataReader(dp, tp)
+
+    update_until(graph, lambda: dw.guid in graph.publications and dr.guid in graph.subscriptions)
+
+    assert dp.guid in graph.participants
+    assert 'MessageTopic' in graph.topic_names()
+    assert [e.key for e in graph.endpoints(topic_name='MessageTopic')] == [dw.guid, dr.guid]
+    assert [e.key for e in graph.endpoints(participant_key=dp.guid, topic_name='MessageTopic')] == [dw.guid, dr.guid]
+    assert graph.endpoints(topic_name='OtherTopic') == []
+
+    type_id = graph.publications[dw.guid].type_id
+    if type_id is not None:
+        assert type_id in graph.type_ids()
+        assert dr.guid in [e.key for e in graph.endpoints(type_id=type_id)]
+
+
+def test_discovery_graph_changes(manual_setup):
+    dp = manual_setup.dp
+    graph = DiscoveryGraph(dp, topic_discovery=False)
+    tp = Topic(dp, 'MessageTopic', Message)
+    changes = []
+    graph.subscribe(lambda change, builtin_topic, sample: changes.append((change, builtin_topic, sample.key)))
+
+    dw = DataWriter(dp, tp)
+    key = dw.guid
+    update_until(graph, lambda: key in graph.publications)
+    assert (DiscoveryChange.Added, BuiltinTopicDcpsPublication, key) in changes
+
+    changes.clear()
+    del dw
+    gc.collect()
+    update_until(graph, lambda: key not in graph.publications)
+    assert changes == [(DiscoveryChange.Removed, BuiltinTopicDcpsPublication, key)]
+    assert graph.endpoints(topic_name='MessageTopic') == []
+    assert 'MessageTopic' not in graph.topic_names()
+
+
+@requires_dcps_topic
+def test_discovery_graph_topics(manual_setup):
+    dp = manual_setup.dp
+    graph = DiscoveryGraph(dp, topic_discovery=True)
+    tp = Topic(dp, 'MessageTopic', Message)
+
+    update_until(graph, lambda: graph.topics_named('MessageTopic'))
+    assert graph.topics_named('MessageTopic')[0].type_name == 'Message'
+    assert 'MessageTopic' in graph.topic_names()
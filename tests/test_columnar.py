@@ -0,0 +1,136 @@
+import pytest
+from dataclasses import dataclass, fields
+from enum import Enum
+
+from cyclonedds.idl import IdlStruct, IdlBitmask
+from cyclonedds.idl.annotations import appendable
+from cyclonedds.idl._support import Endianness
+from cyclonedds.idl._columnar import decode_columnar
+import cyclonedds.idl.types as types
+
+import support_modules.test_classes as tc
+from support_modules.testtopics.perftopics import Struct256, Struct16
+import test_compiled_codecs as tcc
+
+
+np = pytest.importorskip("numpy")
+
+
+@dataclass
+class Pair(IdlStruct):
+    a: types.float64
+    b: types.uint8
+
+
+@dataclass
+@appendable
+class Reading(IdlStruct):
+    sensor: types.uint16
+    value: types.float32
+
+
+@dataclass
+@appendable
+class ReadingV2(IdlStruct, typename="Reading"):
+    sensor: types.uint16
+    value: types.float32
+    unit: str
+
+
+@dataclass
+class Columns(IdlStruct):
+    x: types.int16
+    pair: Pair
+    pairs: types.array[Pair, 3]
+    grid: types.array[types.array[types.int16, 3], 2]
+    c: types.char
+    color: tcc.Color
+    small: tcc.SmallColor
+    flags: tcc.Flags
+    raw: types.array[types.uint8, 3]
+    reading: Reading
+    readings: types.array[Reading, 2]
+    last: types.array[Pair, 2]
+
+
+def make_columns(i):
+    return Columns(
+        x=i, pair=Pair(a=i / 2, b=2), pairs=[Pair(a=i, b=j) for j in range(3)], grid=[[1, 2, 3], [4, 5, i]],
+        c='q', color=tcc.Color.Blue, small=tcc.SmallColor.Magenta, flags=tcc.Flags(a=True, b=i % 2 == 0),
+        raw=bytes([i, 2, 3]), reading=Reading(sensor=i, value=0.5), readings=[Reading(sensor=j, value=j) for j in range(2)],
+        last=[Pair(a=7, b=8), Pair(a=9, b=i)]
+    )
+
+
+def plain(value):
+    # Python sample values in the form NumPy rows take
+    if isinstance(value, IdlBitmask):
+        return value.as_mask()
+    elif isinstance(value, IdlStruct):
+        return tuple(plain(getattr(value, f.name)) for f in fields(value))
+    elif isinstance(value, Enum):
+        return value.value
+    elif isinstance(value, str):
+        return value.encode()
+    elif isinstance(value, (list, bytes)):
+        return tuple(plain(v) for v in value)
+    return value
+
+
+def plain_row(row):
+    if isinstance(row, np.void):
+        return tuple(plain_row(row[name]) for name in row.dtype.names)
+    elif isinstance(row, np.ndarray):
+        return tuple(plain_row(v) for v in row)
+    return row.item()
+
+
+def serialized(value, use_version_2, endianness):
+    data = value.serialize(use_version_2=use_version_2, endianness=endianness)
+    return data + bytes(-len(data) % 4)
+
+
+@pytest.mark.parametrize("values", [
+    [tc.AllPrimitives()],
+    [tcc.Point(x=i, y=i / 3, c='z') for i in range(5)],
+    [make_columns(i) for i in range(4)],
+    [Struct256(struct160=Struct16(struct0=i), junk=i, seq=i, keyval=i % 16) for i in range(3)],
+], ids=lambda v: type(v[0]).__name__)
+@pytest.mark.parametrize("use_version_2", [False, True])
+@pytest.mark.parametrize("endianness", [Endianness.Little, Endianness.Big])
+def test_columnar_decode(values, use_version_2, endianness):
+    datatype = type(values[0])
+    array = decode_columnar(datatype, [(serialized(v, use_version_2, endianness), True) for v in values])
+
+    assert array.dtype.names == tuple(f.name for f in fields(datatype))
+    assert len(array) == len(values)
+    for row, value in zip(array, values):
+        assert plain_row(row) == plain(value)
+
+
+def test_columnar_decode_mixed_encodings():
+    values = [make_columns(i) for i in range(4)]
+    samples = [
+        (serialized(values[0], False, Endianness.Little), True),
+        (serialized(values[1], True, Endianness.Big), True),
+        (b"\x00\x07\x00\x00", False),
+        (serialized(values[2], True, Endianness.Little), True),
+        (serialized(values[3], False, Endianness.Big), True),
+    ]
+    array = decode_columnar(Columns, samples)
+
+    assert [plain_row(row) for row in array[[0, 1, 3, 4]]] == [plain(v) for v in values]
+    assert plain_row(array[2]) == plain_row(np.zeros(1, dtype=array.dtype)[0])
+
+
+def test_columnar_decode_wrong_size():
+    # A writer with a newer version of the appendable type sends more data
+    data = ReadingV2(sensor=1, value=2.0, unit="cm").serialize(use_version_2=True)
+    with pytest.raises(ValueError):
+        decode_columnar(Reading, [(data, True)])
+
+
+@pytest.mark.parametrize("datatype", [tc.SingleString, tc.SingleSequence, tc.SingleUnion, tcc.Extended, tcc.Everything])
+def test_columnar_not_fixed_size(datatype):
+    with pytest.raises(TypeError):
+        decode_columnar(datatype, [])
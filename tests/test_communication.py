@@ -1,8 +1,14 @@
 import pytest
+import threading
+import time
 
-from cyclonedds.core import Entity, DDSStatus
+from cyclonedds.core import Entity, DDSStatus, Qos, Policy
+from cyclonedds.topic import Topic
+from cyclonedds.pub import DataWriter
+from cyclonedds.sub import DataReader
+from cyclonedds.util import duration
 
-from support_modules.testtopics import Message
+from support_modules.testtopics import Message, MessageKeyed
 
 
 def test_communication_basic_read(common_setup):
@@ -70,3 +76,43 @@ def test_communication_status_mask(common_setup):
 
     status = common_setup.dr.take_status()
     assert (status & DDSStatus.SubscriptionMatched) > 0
+
+
+def test_communication_multithreaded_stress(manual_setup):
+    # Writers block on a full reader history, which only resolves if
+    # the reader thread gets to run while the writers wait in C.
+    qos = Qos(
+        Policy.Reliability.Reliable(duration(seconds=10)),
+        Policy.History.KeepAll,
+        Policy.ResourceLimits(max_samples=32)
+    )
+    tp = Topic(manual_setup.dp, "StressTest", MessageKeyed, qos=qos)
+    dr = DataReader(manual_setup.dp, tp, qos=qos)
+    num_writers, num_samples = 4, 500
+    received = []
+    errors = []
+
+    def write(index):
+        try:
+            dw = DataWriter(manual_setup.dp, tp, qos=qos)
+            for i in range(num_samples):
+                dw.write(MessageKeyed(user_id=index, message=str(i)))
+        except Exception as e:
+            errors.append(e)
+
+    def read():
+        end = time.monotonic() + 30
+        while len(received) < num_writers * num_samples and time.monotonic() < end:
+            received.extend(dr.take(N=64))
+
+    threads = [threading.Thread(target=write, args=(i,)) for i in range(num_writers)]
+    threads.append(threading.Thread(target=read))
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    assert len(received) == num_writers * num_samples
+    for index in range(num_writers):
+        assert [int(m.message) for m in received if m.user_id == index] == list(range(num_samples))
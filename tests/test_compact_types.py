@@ -0,0 +1,120 @@
+import copy
+import pickle
+import pytest
+from dataclasses import dataclass, field, fields
+from typing import Optional
+
+from cyclonedds.idl import IdlStruct, IdlUnion
+from cyclonedds.idl.annotations import compact, key, appendable, mutable, AnnotationException
+from cyclonedds.idl._support import Endianness
+from cyclonedds.idl._type_normalize import get_extended_type_hints
+import cyclonedds.idl.types as types
+
+
+@compact
+@dataclass
+class Point(IdlStruct):
+    x: types.float64 = 0.0
+    y: types.float64 = 0.0
+
+
+class Value(IdlUnion, discriminator=types.int16):
+    number: types.case[1, types.int32]
+    text: types.default[str]
+
+
+@compact
+@dataclass
+@appendable
+class Track(IdlStruct):
+    id: types.int32
+    key("id")
+    name: str = "track"
+    points: types.sequence[Point] = field(default_factory=list)
+    value: Value = field(default_factory=lambda: Value(number=0))
+    note: Optional[str] = None
+
+
+@compact
+@dataclass
+class LabeledTrack(Track):
+    label: types.array[types.char, 4] = field(default_factory=lambda: ["a"] * 4)
+
+
+@compact
+@dataclass
+@mutable
+class Setting(IdlStruct):
+    name: str
+    key("name")
+    level: types.uint8 = 1
+
+
+@dataclass
+class Plain(IdlStruct):
+    a: types.int32
+
+
+samples = [
+    Point(x=1.5, y=-2.0),
+    Track(id=7, points=[Point(1, 2), Point(3, 4)], value=Value(number=7), note="n"),
+    LabeledTrack(id=8, name="labeled", label=["a", "b", "c", "d"]),
+    Setting(name="speed", level=3),
+]
+
+
+def test_compact_layout():
+    for value in samples:
+        assert not hasattr(value, "__dict__")
+        value.sample_info = "info"
+        assert value.sample_info == "info"
+        with pytest.raises(AttributeError):
+            value.unknown = 1
+
+    assert Track.__slots__ == ("id", "name", "points", "value", "note", "sample_info")
+    assert LabeledTrack.__slots__ == ("label",)
+    assert Track(id=1).name == "track" and Track(id=1).points == []
+    assert list(get_extended_type_hints(LabeledTrack)) == [f.name for f in fields(LabeledTrack)]
+
+
+@pytest.mark.parametrize("value", samples, ids=lambda v: type(v).__name__)
+@pytest.mark.parametrize("use_version_2", [False, True])
+@pytest.mark.parametrize("endianness", [Endianness.Little, Endianness.Big])
+@pytest.mark.parametrize("compiled", [True, False])
+def test_compact_roundtrip(value, use_version_2, endianness, compiled):
+    idl = type(value).__idl__
+    idl.use_compiled_codecs = compiled
+    try:
+        data = idl.serialize(value, use_version_2=use_version_2, endianness=endianness)
+        result = type(value).deserialize(data)
+        assert result == value and not hasattr(result, "__dict__")
+        key_sample = type(value).deserialize_key(value.serialize_key(endianness=endianness, use_version_2=use_version_2))
+        assert not hasattr(key_sample, "__dict__")
+        if not isinstance(value, Setting):
+            assert type(value).deserialize_lazy(data).materialize() == value
+    finally:
+        idl.use_compiled_codecs = True
+
+
+def test_compact_copy():
+    value = samples[1]
+    value.sample_info = None
+    assert pickle.loads(pickle.dumps(value)) == value
+    assert copy.deepcopy(value) == value
+
+
+def test_compact_errors():
+    with pytest.raises(AnnotationException):
+        @dataclass
+        @compact
+        class NotYetDataclass(IdlStruct):
+            a: int
+
+    with pytest.raises(AnnotationException):
+        @compact
+        @dataclass
+        class PlainBase(Plain):
+            b: int
+
+    with pytest.raises(AnnotationException):
+        compact(Point)
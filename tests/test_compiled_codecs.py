@@ -0,0 +1,193 @@
+import pytest
+import random
+from dataclasses import dataclass
+from typing import Optional
+
+from cyclonedds.idl import IdlStruct, IdlEnum, IdlBitmask
+from cyclonedds.idl.annotations import key, appendable, bit_bound
+from cyclonedds.idl._support import Endianness, SerializeKind, DeserializeKind
+import cyclonedds.idl.types as types
+
+import support_modules.test_classes as tc
+import support_modules.test_rec_classes as trc
+
+
+class Color(IdlEnum):
+    Red = 0
+    Green = 1
+    Blue = 2
+
+
+@bit_bound(8)
+class SmallColor(IdlEnum):
+    Cyan = 0
+    Magenta = 1
+
+
+@dataclass
+class Flags(IdlBitmask):
+    a: bool
+    b: bool
+
+
+@dataclass
+class Point(IdlStruct):
+    x: types.int16
+    y: types.float64
+    c: types.char
+
+
+@dataclass
+@appendable
+class Extended(IdlStruct):
+    a: types.uint8
+    b: types.int64
+    name: str
+
+
+@dataclass
+class Everything(IdlStruct):
+    id: types.uint8
+    key("id")
+    tag: types.array[types.char, 2]
+    point: Point
+    key("point")
+    color: Color
+    small: SmallColor
+    flags: Flags
+    ext: Extended
+    points: types.sequence[Point]
+    exts: types.array[Extended, 2]
+    names: types.sequence[str, 4]
+    floats: types.array[types.float32, 3]
+    shorts: types.sequence[types.int16]
+    raw: types.array[types.uint8, 5]
+    blob: bytes
+    maybe: Optional[Point] = None
+    maybe_str: Optional[str] = None
+
+
+everything = [
+    Everything(
+        id=7, tag=['a', 'b'], point=Point(x=-3, y=2.5, c='q'), color=Color.Blue, small=SmallColor.Magenta,
+        flags=Flags(a=True, b=False), ext=Extended(a=1, b=-2, name="ext"),
+        points=[Point(x=i, y=i / 2, c='p') for i in range(5)],
+        exts=[Extended(a=2, b=3, name=""), Extended(a=4, b=5, name="Hello, World!")],
+        names=["a", "bb", "ccc"], floats=[1.0, 2.0, 3.0], shorts=[1, -2, 3], raw=bytes(range(5)),
+        blob=b"\x00\x01\x02", maybe=Point(x=1, y=1.0, c='m'), maybe_str="set"
+    ),
+    Everything(
+        id=0, tag=['\0', '\0'], point=Point(x=0, y=0.0, c='\0'), color=Color.Red, small=SmallColor.Cyan,
+        flags=Flags(a=False, b=True), ext=Extended(a=0, b=0, name=""),
+        points=[], exts=[Extended(a=0, b=0, name="x")] * 2, names=[], floats=[0.0] * 3, shorts=[],
+        raw=bytes(5), blob=b""
+    ),
+]
+
+
+def make_tree():
+    tree = trc.CNode(value=0)
+    values = list(range(-20, 20))
+    random.seed(1)
+    random.shuffle(values)
+    for v in values:
+        tree.add(v)
+    return tree
+
+
+samples = [
+    tc.SingleInt(value=9128919),
+    tc.SingleString(value="Hello, World!"),
+    tc.SingleFloat(value=1.02),
+    tc.SingleBool(value=True),
+    tc.SingleSequence(value=[0, 1] * 100),
+    tc.SingleArray(value=[0, 1, 2]),
+    tc.SingleUint16(value=65535),
+    tc.SingleBoundedSequence(value=[100, 1, 1]),
+    tc.SingleBoundedString(value="llsllë"),
+    tc.SingleEnum(value=tc.BasicEnum.Two),
+    tc.SingleNested(value=tc.SingleInt(1)),
+    tc.Keyed(a=1, b=2),
+    tc.Keyed2(a=1, b=2),
+    tc.Keyless(a=1, b=2),
+    tc.AllPrimitives(),
+    tc.SingleUnion(value=tc.EasyUnion(b=True)),
+    make_tree()
+] + everything
+
+
+def run_machines(value, function):
+    idl = type(value).__idl__
+    idl.use_compiled_codecs = False
+    try:
+        return function()
+    finally:
+        idl.use_compiled_codecs = True
+
+
+@pytest.mark.parametrize("value", samples, ids=lambda v: type(v).__name__)
+@pytest.mark.parametrize("use_version_2", [False, True])
+@pytest.mark.parametrize("endianness", [Endianness.Little, Endianness.Big])
+def test_compiled_codecs_match_machines(value, use_version_2, endianness):
+    idl = type(value).__idl__
+
+    for kind in (SerializeKind.DataSample, SerializeKind.KeyDefinitionOrder, SerializeKind.KeyNormalized):
+        serialize = lambda: idl.serialize(value, use_version_2=use_version_2, endianness=endianness, serialize_kind=kind)
+        assert idl.serialize(value, use_version_2=use_version_2, endianness=endianness, serialize_kind=kind) == \
+            run_machines(value, serialize)
+
+    data = idl.serialize(value, use_version_2=use_version_2, endianness=endianness)
+    deserialize = lambda: idl.deserialize(data)
+    assert idl.deserialize(data) == run_machines(value, deserialize) == value
+
+    key = idl.serialize(value, use_version_2=use_version_2, endianness=endianness, serialize_kind=SerializeKind.KeyDefinitionOrder)
+    deserialize_key = lambda: idl.deserialize(key, deserialize_kind=DeserializeKind.KeySample)
+    assert idl.deserialize(key, deserialize_kind=DeserializeKind.KeySample) == run_machines(value, deserialize_key)
+
+
+def test_compiled_codecs_generated():
+    idl = Everything.__idl__
+    idl.populate()
+    for use_version_2 in (False, True):
+        assert idl._codec(True, use_version_2, Endianness.Little, SerializeKind.DataSample) is not None
+        assert idl._codec(False, use_version_2, Endianness.Little, DeserializeKind.DataSample) is not None
+
+
+def test_compiled_codecs_errors_from_machine():
+    with pytest.raises(Exception) as compiled:
+        tc.SingleBoundedString(value="too long for the bound").serialize()
+
+    tc.SingleBoundedString.__idl__.use_compiled_codecs = False
+    try:
+        with pytest.raises(Exception) as machine:
+            tc.SingleBoundedString(value="too long for the bound").serialize()
+    finally:
+        tc.SingleBoundedString.__idl__.use_compiled_codecs = True
+
+    assert str(compiled.value) == str(machine.value)
+
+
+@dataclass
+@appendable
+class ExtendedV1(IdlStruct, typename="Extended"):
+    a: types.uint8
+
+
+@dataclass
+@appendable
+class Extensible(IdlStruct):
+    b: types.int32
+    ext: Extended
+    c: types.int32 = 0
+
+
+@dataclass
+@appendable
+class ExtensibleV1(IdlStruct, typename="Extensible"):
+    b: types.int32
+    ext: ExtendedV1
+
+
+def test_compiled_codecs_appendable_fallback():
+    data = ExtensibleV1(b=12, ext=ExtendedV1(a=3)).serialize(use_version_2=True)
+    assert Extensible.deserialize(data) == Extensible(b=12, ext=Extended(a=3, b=0, name=""), c=0)
@@ -0,0 +1,132 @@
+import pytest
+import re
+import random
+from dataclasses import dataclass
+
+from cyclonedds.idl import IdlStruct
+from cyclonedds.idl.annotations import appendable, key
+from cyclonedds.idl._support import Endianness
+from cyclonedds.topic import ContentFilter
+import cyclonedds.idl.types as types
+
+import test_compiled_codecs as tcc
+
+
+@dataclass
+@appendable
+class Inner(IdlStruct):
+    name: str
+    level: types.int16
+
+
+@dataclass
+class Thing(IdlStruct):
+    id: types.int32
+    key("id")
+    label: str
+    values: types.sequence[types.float64]
+    inner: Inner
+    grid: types.array[types.array[types.uint16, 3], 2]
+    inners: types.array[Inner, 3]
+    color: tcc.Color
+    big: types.uint64
+    f: types.float32
+    c: types.char
+    flag: bool
+
+
+@dataclass
+@appendable
+class Shape(IdlStruct, typename="Shape"):
+    x: types.int32
+
+
+@dataclass
+@appendable
+class ShapeV2(IdlStruct, typename="Shape"):
+    x: types.int32
+    y: types.int32
+
+
+def make_thing(i):
+    r = random.Random(i)
+    return Thing(
+        id=r.randint(-100, 100), label=r.choice(["apple", "banana", "cherry", "", "a_b%c"]),
+        values=[r.random() for _ in range(r.randint(0, 4))],
+        inner=Inner(name=r.choice(["x", "yy", "zzz"]), level=r.randint(-5, 5)),
+        grid=[[r.randint(0, 9) for _ in range(3)] for _ in range(2)],
+        inners=[Inner(name=str(j), level=r.randint(0, 3)) for j in range(3)],
+        color=r.choice(list(tcc.Color)), big=r.choice([0, 7, 2**63 + 5]), f=r.choice([0.5, 1.5, -2.0]),
+        c=r.choice('abc'), flag=r.choice([True, False])
+    )
+
+
+def like(value, pattern):
+    return re.fullmatch(''.join('.*' if c == '%' else '.' if c == '_' else re.escape(c) for c in pattern), value, re.S) is not None
+
+
+@pytest.mark.parametrize("expression,parameters,expected", [
+    ("id > %0", [10], lambda t: t.id > 10),
+    ("id BETWEEN -10 AND 10 AND label = 'apple'", [], lambda t: -10 <= t.id <= 10 and t.label == 'apple'),
+    ("NOT (label < 'b' OR inner.level >= 2)", [], lambda t: not (t.label < 'b' or t.inner.level >= 2)),
+    ("inner.name LIKE '%z%'", [], lambda t: like(t.inner.name, '%z%')),
+    ("label NOT LIKE %0", ["a_b\\%c"], lambda t: not like(t.label, "a_b\\%c")),
+    ("grid[1][2] = %0 OR grid[0][0] <> 3", [4], lambda t: t.grid[1][2] == 4 or t.grid[0][0] != 3),
+    ("inners[2].level > inners[1].level", [], lambda t: t.inners[2].level > t.inners[1].level),
+    ("color = 'Blue' OR color = %0", [tcc.Color.Red], lambda t: t.color in (tcc.Color.Blue, tcc.Color.Red)),
+    ("big >= %0", [2**63], lambda t: t.big >= 2**63),
+    ("f < 1.0 AND c = 'b'", [], lambda t: t.f < 1.0 and t.c == 'b'),
+    ("flag = TRUE AND id < -3.5", [], lambda t: t.flag and t.id < -3.5),
+])
+@pytest.mark.parametrize("use_version_2", [False, True])
+@pytest.mark.parametrize("endianness", [Endianness.Little, Endianness.Big])
+def test_content_filter_matches(expression, parameters, expected, use_version_2, endianness):
+    content_filter = ContentFilter(Thing, expression, parameters)
+    for i in range(50):
+        thing = make_thing(i)
+        data = thing.serialize(use_version_2=use_version_2, endianness=endianness)
+        assert content_filter.matches(data) == expected(thing)
+
+
+def test_content_filter_set_parameters():
+    content_filter = ContentFilter(Thing, "id BETWEEN %0 AND %1", [0, 10])
+    thing = make_thing(0)
+    thing.id = 20
+
+    assert not content_filter.matches(thing)
+    content_filter.set_parameters([15, 25])
+    assert content_filter.matches(thing)
+    assert content_filter.parameters == [15, 25]
+
+    with pytest.raises(ValueError):
+        content_filter.set_parameters([1])
+    assert content_filter.parameters == [15, 25]
+    assert content_filter.matches(thing)
+
+
+def test_content_filter_absent_member():
+    # A reader with a newer version of the appendable type filters samples of an older writer
+    content_filter = ContentFilter(ShapeV2, "y = 0 OR x = 1")
+    assert content_filter.matches(Shape(x=1).serialize(use_version_2=True))
+    assert not content_filter.matches(Shape(x=0).serialize(use_version_2=True))
+    # The comparison is false, so its negation holds
+    assert ContentFilter(ShapeV2, "NOT y = 0").matches(Shape(x=0).serialize(use_version_2=True))
+
+
+def test_content_filter_truncated_data():
+    content_filter = ContentFilter(Thing, "inners[2].level > 0 OR label = 'x'")
+    data = make_thing(1).serialize()
+    for size in range(len(data)):
+        content_filter.matches(data[:size])
+
+
+@pytest.mark.parametrize("expression", ["id >", "id > 3 AND", "id @ 3", "label = 'open", "id = %0"])
+def test_content_filter_invalid_expression(expression):
+    with pytest.raises(ValueError):
+        ContentFilter(Thing, expression)
+
+
+@pytest.mark.parametrize("expression", ["nope = 1", "id LIKE 'x'", "values[0] = 1", "label = 3", "id = 'x'", "grid[5][0] = 1"])
+def test_content_filter_unfilterable(expression):
+    with pytest.raises(TypeError):
+        ContentFilter(Thing, expression)
@@ -0,0 +1,52 @@
+import pytest
+from dataclasses import dataclass
+
+from cyclonedds.idl import IdlStruct, DeserializerPool
+import cyclonedds.idl.types as types
+
+import support_modules.test_classes as tc
+from support_modules.testtopics.perftopics import Struct16, Struct256
+
+
+@pytest.fixture(scope="module")
+def pool():
+    with DeserializerPool([tc.AllPrimitives, Struct256], max_workers=2, threshold=10) as pool:
+        yield pool
+
+
+def test_deserializer_pool_order(pool):
+    samples = [Struct256(struct160=Struct16(struct0=i % 256), junk=-i, seq=i, keyval=i % 16) for i in range(500)]
+    datas = [sample.serialize() for sample in samples]
+    assert pool.deserialize(Struct256, datas) == samples
+
+    # Any buffer is accepted, types the workers were not warmed up for work as well
+    values = [tc.SingleSequence(value=list(range(i))) for i in range(50)]
+    assert pool.deserialize(tc.SingleSequence, [memoryview(v.serialize()) for v in values]) == values
+    assert pool.deserialize(Struct256, []) == []
+
+
+def test_deserializer_pool_chunks():
+    values = [tc.AllPrimitives(i=i) for i in range(25)]
+    with DeserializerPool(tc.AllPrimitives, max_workers=1, threshold=1, chunksize=7) as pool:
+        assert pool.deserialize(tc.AllPrimitives, [v.serialize() for v in values]) == values
+
+
+def test_deserializer_pool_threshold(pool):
+    # Local types cannot be pickled, so they only deserialize in-process
+    @dataclass
+    class Local(IdlStruct):
+        a: types.int32
+
+    values = [Local(a=i) for i in range(9)]
+    assert pool.deserialize(Local, [v.serialize() for v in values]) == values
+    with pytest.raises(Exception):
+        pool.deserialize(Local, [v.serialize() for v in values * 2])
+
+
+def test_deserializer_pool_errors(pool):
+    with pytest.raises(Exception):
+        pool.deserialize(Struct256, [b"\x00\x01\x00\x00"] * 20)
+
+    for kwargs in ({"max_workers": 0}, {"threshold": 0}, {"chunksize": 0}):
+        with pytest.raises(ValueError):
+            DeserializerPool(Struct256, **kwargs)
@@ -3,6 +3,7 @@ import pytest
 from dataclasses import dataclass
 
 from cyclonedds.idl import IdlStruct, IdlBitmask, IdlUnion, IdlEnum
+from cyclonedds.idl.annotations import appendable, fast_construct
 from cyclonedds.idl._support import Buffer, Endianness
 import cyclonedds.idl._machinery as mc
 import cyclonedds.idl.types as tp
@@ -214,3 +215,82 @@ def test_all_machine_serializers():
 
 
 
+
+
+def test_deserialize_from_buffer_objects():
+    c = C(A=0xab, B=0xcdef)
+    data = c.serialize()
+
+    assert C.deserialize(data) == c
+    assert C.deserialize(bytearray(data)) == c
+    assert C.deserialize(memoryview(data)) == c
+
+    # Views are read in place, not copied
+    view = memoryview(bytearray(data))
+    b = Buffer(view)
+    assert b._bytes.obj is view.obj
+
+
+@dataclass
+class PostInit(IdlStruct):
+    a: tp.int32
+    b: str
+
+    def __post_init__(self):
+        self.calls = getattr(self, "calls", 0) + 1
+
+
+class CustomInit(IdlStruct):
+    a: tp.int32
+    b: str
+
+    def __init__(self, a, b):
+        self.a, self.b, self.initialized = a, b, True
+
+    def __eq__(self, other):
+        return (self.a, self.b) == (other.a, other.b)
+
+
+@dataclass
+@fast_construct(True)
+class ForcedFast(IdlStruct):
+    a: tp.int32
+    b: str
+
+    def __post_init__(self):
+        raise AssertionError("deserialization should not call __init__")
+
+
+@dataclass(frozen=True)
+class Frozen(IdlStruct):
+    a: tp.int32
+    b: tp.sequence[C]
+
+
+@dataclass
+@fast_construct(False)
+@appendable
+class Nested(IdlStruct):
+    c: C
+    frozen: Frozen
+    d: D
+
+
+@pytest.mark.parametrize("compiled", [True, False])
+def test_deserialize_constructors(compiled):
+    for datatype in (PostInit, CustomInit, ForcedFast, Frozen, Nested):
+        datatype.__idl__.use_compiled_codecs = compiled
+
+    sample = PostInit.deserialize(PostInit(a=1, b="x").serialize())
+    assert sample == PostInit(a=1, b="x") and sample.calls == 1
+    assert CustomInit.deserialize(CustomInit(a=1, b="x").serialize()).initialized
+    forced = ForcedFast.__idl__.constructor()(5, "y")
+    forced = ForcedFast.deserialize(forced.serialize())
+    assert (forced.a, forced.b) == (5, "y")
+
+    frozen = Frozen(a=2, b=[C(A=1, B=2), C(A=3, B=4)])
+    assert Frozen.deserialize(frozen.serialize()) == frozen
+    nested = Nested(c=C(A=5, B=6), frozen=frozen, d=D(A=7))
+    for use_version_2 in (False, True):
+        assert Nested.deserialize(nested.serialize(use_version_2=use_version_2)) == nested
+    assert Nested.__idl__.v2_machine.default_initialize().frozen == Frozen(a=0, b=[])
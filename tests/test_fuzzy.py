@@ -11,6 +11,7 @@ from support_modules.fuzz_tools.checks.typeobject import check_type_object_equiv
 from support_modules.fuzz_tools.checks.keys import check_py_c_key_equivalence
 from support_modules.fuzz_tools.checks.mutated import check_mutation_assignability, check_mutation_key, check_enforced_non_communication
 from support_modules.fuzz_tools.checks.typebuilder import check_sertype_from_typeobj
+from support_modules.fuzz_tools.checks.encoding import check_encoder_equivalence
 
 
 @pytest.mark.fuzzing
@@ -43,6 +44,10 @@ def test_fuzzing_types(fuzzing_config: FuzzingConfig):
             log << ctx.narrow_context_of(typename).idl_file << log.endl
             log << log.dedent
 
+        if success:
+            # The compiled and native serializers are shortcuts, they must agree with the machines.
+            success = check_encoder_equivalence(typelog, ctx, typename, fuzzing_config.num_samples, fuzzing_config.xcdr_version)
+
         if success:
             # If python and pyc are not agreeing on keys then python and C is not so relevant.
             success = check_py_c_key_equivalence(typelog, ctx, typename, fuzzing_config.num_samples, fuzzing_config.xcdr_version)
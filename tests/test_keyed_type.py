@@ -1,11 +1,16 @@
 import pytest
+from dataclasses import dataclass
 
 from cyclonedds.domain import DomainParticipant
 from cyclonedds.topic import Topic
 from cyclonedds.sub import DataReader
 from cyclonedds.pub import DataWriter
+from cyclonedds.idl import IdlStruct
+from cyclonedds.idl.annotations import appendable, keylist
+from cyclonedds.idl.types import int32
+from cyclonedds._clayer import ddspy_calc_keyhash, ddspy_lookup_instance_keyhash
 
-from support_modules.testtopics import KeyedArrayType
+from support_modules.testtopics import KeyedArrayType, MessageKeyed
 
 
 def test_keyed_type_alignment():
@@ -26,3 +31,73 @@ def test_keyed_type_alignment():
     dw.write(samp1)
     samp2 = dr.read()[0]
     assert KeyedArrayType.__idl__.serialize_key_normalized(samp1) == KeyedArrayType.__idl__.serialize_key_normalized(samp2)
+
+
+@dataclass
+@appendable
+@keylist(["key"])
+class AppendableKeyed(IdlStruct, typename="keyhash.AppendableKeyed"):
+    key: int32
+    value: int32
+
+
+@dataclass
+@keylist(["b", "a"])
+class ReorderedKeyed(IdlStruct, typename="keyhash.ReorderedKeyed"):
+    a: int32
+    b: int32
+
+
+def test_keyed_type_lookup_keyhash():
+    dp = DomainParticipant()
+    tp = Topic(dp, "TestKeyhash", MessageKeyed)
+    dw = DataWriter(dp, tp)
+    dr = DataReader(dp, tp)
+
+    # The keyhash of an 8 byte key holds the key itself, so the instance can be found from it
+    for user_id in (1, -42, 2**40):
+        sample = MessageKeyed(user_id=user_id, message="hi")
+        dw.write(sample)
+        keyhash = ddspy_calc_keyhash(dr._ref, sample.serialize())
+        assert len(keyhash) == 16
+        handle = ddspy_lookup_instance_keyhash(dr._ref, keyhash)
+        assert handle != 0 and handle == dr.lookup_instance(sample)
+        assert ddspy_lookup_instance_keyhash(dw._ref, keyhash) == dw.lookup_instance(sample)
+
+    absent = MessageKeyed(user_id=7, message="hi")
+    assert ddspy_lookup_instance_keyhash(dr._ref, ddspy_calc_keyhash(dr._ref, absent.serialize())) == 0
+
+
+def test_keyed_type_lookup_keyhash_md5():
+    dp = DomainParticipant()
+    tp = Topic(dp, "TestKeyhashMd5", KeyedArrayType)
+    dw = DataWriter(dp, tp)
+    dr = DataReader(dp, tp)
+
+    # A 39 byte key gets an MD5 keyhash, the key can not be recovered from that
+    samples = [KeyedArrayType([i] * 3, [0] * 3, [i] * 3, [0] * 3, [i] * 3, [0] * 3) for i in range(2)]
+    keyhashes = [ddspy_calc_keyhash(dr._ref, sample.serialize()) for sample in samples]
+    for sample in samples:
+        dw.write(sample)
+        assert dr.lookup_instance(sample) is not None
+    assert len(keyhashes[0]) == 16 and keyhashes[0] != keyhashes[1]
+    assert all(ddspy_lookup_instance_keyhash(dr._ref, keyhash) == 0 for keyhash in keyhashes)
+
+    with pytest.raises(ValueError):
+        ddspy_lookup_instance_keyhash(dr._ref, keyhashes[0][:8])
+
+
+@pytest.mark.parametrize("datatype", [AppendableKeyed, ReorderedKeyed])
+def test_keyed_type_lookup_keyhash_not_sample_form(datatype):
+    dp = DomainParticipant()
+    tp = Topic(dp, f"TestKeyhash{datatype.__name__}", datatype)
+    dw = DataWriter(dp, tp)
+    dr = DataReader(dp, tp)
+
+    # These keys fit in a keyhash, but its keyhash form differs from the sample form of the key:
+    # the keyhash is not turned into a key at all rather than into the wrong one
+    assert not datatype.__idl__.keyhash_is_sample_key
+    sample = datatype(1, 2)
+    dw.write(sample)
+    assert dr.lookup_instance(sample) is not None
+    assert ddspy_lookup_instance_keyhash(dr._ref, ddspy_calc_keyhash(dr._ref, sample.serialize())) == 0
@@ -0,0 +1,102 @@
+import pytest
+import random
+from dataclasses import dataclass, fields
+
+from cyclonedds.idl import IdlStruct, LazyView
+from cyclonedds.idl.annotations import key, mutable
+from cyclonedds.idl._support import Endianness
+import cyclonedds.idl.types as types
+
+import support_modules.test_classes as tc
+import test_compiled_codecs as tcc
+
+
+@dataclass
+@mutable
+class MutableThing(IdlStruct):
+    id: types.int32
+    key("id")
+    name: str
+
+
+@dataclass
+class Grids(IdlStruct):
+    flag: types.uint8
+    grid: types.array[types.array[types.int16, 3], 2]
+    rows: types.sequence[types.array[types.int64, 2]]
+    points: types.sequence[tcc.Point]
+    after: types.uint8
+    tail: str
+
+
+@pytest.mark.parametrize("value", tcc.samples, ids=lambda v: type(v).__name__)
+@pytest.mark.parametrize("use_version_2", [False, True])
+@pytest.mark.parametrize("endianness", [Endianness.Little, Endianness.Big])
+def test_lazy_view_members(value, use_version_2, endianness):
+    idl = type(value).__idl__
+    data = idl.serialize(value, use_version_2=use_version_2, endianness=endianness)
+    names = [f.name for f in fields(value)]
+
+    random.seed(len(data))
+    for order in (names, names[::-1], random.sample(names, len(names))):
+        view = idl.deserialize_lazy(data)
+        assert isinstance(view, LazyView)
+        for name in order:
+            assert getattr(view, name) == getattr(value, name)
+        assert view.materialize() == value
+
+
+def test_lazy_view_decodes_accessed_member_only():
+    value = tcc.everything[0]
+    view = tcc.Everything.deserialize_lazy(value.serialize())
+    assert view.__dict__ == {}
+
+    assert view.shorts == value.shorts
+    assert view.__dict__ == {"shorts": value.shorts}
+    assert view.raw == value.raw
+    assert set(view.__dict__) == {"shorts", "raw"}
+
+
+def test_lazy_view_materialize():
+    value = tc.Keyed(a=1, b=2)
+    view = tc.Keyed.deserialize_lazy(value.serialize())
+    view.sample_info = "info"
+    sample = view.materialize()
+    assert type(sample) is tc.Keyed
+    assert sample == value == view
+    assert sample.sample_info == "info"
+
+
+def test_lazy_view_appendable_missing_members():
+    data = tcc.ExtensibleV1(b=12, ext=tcc.ExtendedV1(a=3)).serialize(use_version_2=True)
+    view = tcc.Extensible.deserialize_lazy(data)
+    assert view.c == 0
+    assert view.ext == tcc.Extended(a=3, b=0, name="")
+    assert view.b == 12
+
+
+def test_lazy_view_not_viewable():
+    value = MutableThing(id=1, name="full")
+    sample = MutableThing.deserialize_lazy(value.serialize(use_version_2=True))
+    assert type(sample) is MutableThing
+    assert sample == value
+
+
+def test_lazy_view_copies_bytearray():
+    value = tc.SingleString(value="Hello")
+    data = bytearray(value.serialize())
+    view = tc.SingleString.deserialize_lazy(data)
+    data[:] = bytes(len(data))
+    assert view.value == "Hello"
+
+
+@pytest.mark.parametrize("use_version_2", [False, True])
+def test_lazy_view_nested_repeats(use_version_2):
+    value = Grids(
+        flag=1, grid=[[1, 2, 3], [4, 5, 6]], rows=[[7, 8], [9, 10], [11, 12]],
+        points=[tcc.Point(x=1, y=0.5, c='a'), tcc.Point(x=2, y=1.5, c='b')], after=13, tail="end"
+    )
+    data = value.serialize(use_version_2=use_version_2)
+    assert Grids.deserialize_lazy(data).tail == "end"
+    assert Grids.deserialize_lazy(data).after == 13
+    assert Grids.deserialize_lazy(data).materialize() == value
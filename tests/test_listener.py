@@ -1,6 +1,9 @@
 import pytest
 
-from cyclonedds.core import Listener, Qos, Policy
+import asyncio
+import threading
+
+from cyclonedds.core import Listener, ListenerDispatcher, Qos, Policy
 from cyclonedds.util import duration, timestamp
 from cyclonedds.domain import DomainParticipant
 from cyclonedds.pub import Publisher, DataWriter
@@ -332,3 +335,124 @@ def test_listener_assignment_exhaustively():
     for n in evt_names:
         assert getattr(l, n) is not funcs[n]
         assert getattr(l, n) is funcs2[n]
+
+
+def test_dispatched_on_data_available(manual_setup, hitpoint):
+    threads = []
+
+    def on_data_available(reader):
+        threads.append(threading.current_thread().name)
+        hitpoint.hit(reader.take())
+
+    with ListenerDispatcher() as dispatcher:
+        reader = manual_setup.dr(listener=Listener(dispatcher=dispatcher, on_data_available=on_data_available))
+        manual_setup.dw().write(manual_setup.msg)
+
+        assert hitpoint.was_hit()
+        assert hitpoint.data == [manual_setup.msg]
+        assert threads[0].startswith("cyclonedds-listener")
+        assert reader.get_listener()._dispatcher is dispatcher
+
+
+def test_dispatched_merged_listener(manual_setup, hitpoint_factory):
+    matched, available = hitpoint_factory(), hitpoint_factory()
+    threads = {}
+
+    def on_subscription_matched(reader, status):
+        threads["matched"] = threading.current_thread().name
+        matched.hit()
+
+    def on_data_available(reader):
+        threads["available"] = threading.current_thread().name
+        available.hit(reader.take())
+
+    with ListenerDispatcher() as dispatcher:
+        reader = manual_setup.dr(listener=Listener(on_subscription_matched=on_subscription_matched))
+        reader.set_listener(Listener(dispatcher=dispatcher, on_data_available=on_data_available))
+        assert reader.get_listener()._dispatcher is dispatcher
+        manual_setup.dw().write(manual_setup.msg)
+
+        # The callbacks that were set before are dispatched too
+        assert matched.was_hit() and available.was_hit()
+        assert available.data == [manual_setup.msg]
+        assert threads["matched"].startswith("cyclonedds-listener")
+        assert threads["available"].startswith("cyclonedds-listener")
+
+        listener = Listener(on_data_available=on_data_available)
+        listener.merge(Listener(dispatcher=dispatcher))
+        assert listener._dispatcher is dispatcher
+
+
+def test_dispatched_remove_listener(manual_setup, hitpoint):
+    with ListenerDispatcher() as dispatcher:
+        reader = manual_setup.dr(listener=Listener(dispatcher=dispatcher, on_data_available=lambda r: hitpoint.hit()))
+        reader.set_listener(None)
+        manual_setup.dw().write(manual_setup.msg)
+        assert hitpoint.was_not_hit()
+        assert reader.take() == [manual_setup.msg]
+
+
+def test_dispatched_status(manual_setup, hitpoint_factory):
+    matched, available = hitpoint_factory(), hitpoint_factory()
+
+    class MyListener(Listener):
+        def on_subscription_matched(self, reader, status):
+            matched.hit(status)
+
+        def on_data_available(self, reader):
+            available.hit()
+
+    with ListenerDispatcher(threads=2) as dispatcher:
+        listener = MyListener(dispatcher=dispatcher)
+        listener.set_on_data_available(None)
+        manual_setup.dr(listener=listener)
+        manual_setup.dw().write(manual_setup.msg)
+
+        assert matched.was_hit()
+        assert matched.data.current_count == 1
+        assert matched.data.current_count_change == 1
+        assert available.was_not_hit()
+
+
+def test_dispatched_coalesces_slow_callbacks(manual_setup):
+    calls = []
+    done = threading.Event()
+
+    def on_data_available(reader):
+        calls.append(len(reader.take(N=100)))
+        sleep(0.2)
+        if sum(calls) == 20:
+            done.set()
+
+    with ListenerDispatcher() as dispatcher:
+        qos = Qos(Policy.Reliability.Reliable(duration(seconds=2)), Policy.History.KeepAll)
+        manual_setup.dr(qos=qos, listener=Listener(dispatcher=dispatcher, on_data_available=on_data_available))
+        writer = manual_setup.dw()
+        for _ in range(20):
+            writer.write(manual_setup.msg)
+
+        assert done.wait(10)
+        assert len(calls) < 20
+        assert dispatcher.dropped == 0
+
+
+def test_dispatched_on_event_loop(manual_setup):
+    async def run():
+        received = asyncio.get_running_loop().create_future()
+
+        async def handle(reader):
+            await asyncio.sleep(0)
+            if not received.done():
+                received.set_result((threading.current_thread(), reader.take()))
+
+        dispatcher = ListenerDispatcher(loop=asyncio.get_running_loop())
+        try:
+            manual_setup.dr(listener=Listener(dispatcher=dispatcher, on_data_available=handle))
+            manual_setup.dw().write(manual_setup.msg)
+            return await asyncio.wait_for(received, 10)
+        finally:
+            dispatcher.close()
+
+    thread, samples = asyncio.run(run())
+    assert thread is threading.main_thread()
+    assert samples == [manual_setup.msg]
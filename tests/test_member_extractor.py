@@ -0,0 +1,108 @@
+import pytest
+import random
+import re
+from dataclasses import dataclass
+from typing import Optional
+
+from cyclonedds.idl import IdlStruct
+from cyclonedds.idl.annotations import appendable
+from cyclonedds.idl._support import Endianness
+from cyclonedds.idl._extract import MemberExtractor
+import cyclonedds.idl.types as types
+
+import support_modules.test_classes as tc
+import test_compiled_codecs as tcc
+
+
+@dataclass
+@appendable
+class Inner(IdlStruct):
+    name: str
+    level: types.int16
+
+
+@dataclass
+class Thing(IdlStruct):
+    id: types.int32
+    label: str
+    choice: tc.EasyUnion
+    values: types.sequence[types.float64]
+    inner: Inner
+    grid: types.array[types.array[types.uint16, 3], 2]
+    inners: types.array[Inner, 3]
+    maybe: Optional[types.int32]
+    raw: types.array[types.uint8, 4]
+    color: tcc.Color
+    big: types.uint64
+    c: types.char
+    flag: bool
+    tail: Inner
+
+
+@dataclass
+@appendable
+class Shape(IdlStruct, typename="Shape"):
+    x: types.int32
+
+
+@dataclass
+@appendable
+class ShapeV2(IdlStruct, typename="Shape"):
+    x: types.int32
+    y: types.int32
+    label: str
+
+
+def make_thing(i):
+    r = random.Random(i)
+    return Thing(
+        id=r.randint(-100, 100), label=r.choice(["apple", "", "a_b%c"]),
+        choice=r.choice([tc.EasyUnion(a=r.randint(0, 9)), tc.EasyUnion(b=True)]),
+        values=[r.random() for _ in range(r.randint(0, 4))],
+        inner=Inner(name=r.choice(["x", "yy", "zzz"]), level=r.randint(-5, 5)),
+        grid=[[r.randint(0, 9) for _ in range(3)] for _ in range(2)],
+        inners=[Inner(name=str(j) * j, level=r.randint(0, 3)) for j in range(3)],
+        maybe=r.choice([None, r.randint(0, 10)]), raw=bytes(r.randint(0, 255) for _ in range(4)),
+        color=r.choice(list(tcc.Color)), big=r.choice([0, 7, 2**63 + 5]), c=r.choice('abc'),
+        flag=r.choice([True, False]), tail=Inner(name="t", level=r.randint(0, 4))
+    )
+
+
+def member(value, path):
+    for name, index in re.findall(r"(\w+)|\[(\d+)\]", path):
+        value = getattr(value, name) if name else value[int(index)]
+    return value
+
+
+paths = [
+    "id", "label", "choice", "values", "inner", "inner.level", "grid[1][2]", "grid[1]", "inners[2].level",
+    "inners[1].name", "inners[0]", "maybe", "raw[3]", "color", "big", "c", "flag", "tail.level"
+]
+
+
+@pytest.mark.parametrize("use_version_2", [False, True])
+@pytest.mark.parametrize("endianness", [Endianness.Little, Endianness.Big])
+def test_member_extractor(use_version_2, endianness):
+    extractor = MemberExtractor(Thing, paths)
+    for i in range(50):
+        thing = make_thing(i)
+        values = extractor.extract(thing.serialize(use_version_2=use_version_2, endianness=endianness))
+        assert values == tuple(member(thing, path) for path in paths)
+
+
+def test_member_extractor_absent_members():
+    # Members an older writer of the appendable type did not send have their default value
+    extractor = MemberExtractor(ShapeV2, ["label", "y", "x"])
+    assert extractor.extract(Shape(x=4).serialize(use_version_2=True)) == ("", 0, 4)
+
+
+@pytest.mark.parametrize("path", ["a..b", "x[", "3", ""])
+def test_member_extractor_invalid_path(path):
+    with pytest.raises(ValueError):
+        MemberExtractor(Thing, [path])
+
+
+@pytest.mark.parametrize("path", ["nope", "id.x", "grid[9][0]", "id[0]", "values[0]", "choice.a"])
+def test_member_extractor_not_a_member(path):
+    with pytest.raises(TypeError):
+        MemberExtractor(Thing, [path])
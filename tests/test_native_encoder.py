@@ -0,0 +1,125 @@
+import pytest
+from dataclasses import dataclass
+from typing import Optional
+
+from cyclonedds.idl import IdlStruct, IdlUnion
+from cyclonedds.idl.annotations import key, mutable, appendable
+from cyclonedds.idl._support import Buffer, Endianness, SerializeKind
+from cyclonedds.idl._builder import NativeCodecBuilder
+import cyclonedds.idl.types as types
+
+from support_modules.fuzz_tools.rand_idl.value import generate_random_instance
+import support_modules.test_classes as tc
+import support_modules.test_fullxcdr2_classes as tfc
+import test_compiled_codecs as tcc
+
+
+_cdrenc = pytest.importorskip("cyclonedds._cdrenc")
+
+
+@appendable
+class Shape(IdlUnion, discriminator=types.int16):
+    circle: types.case[1, types.float64]
+    square: types.case[2, tcc.Point]
+    name: types.default[str]
+
+
+class Choice(IdlUnion, discriminator=tcc.Color):
+    red: types.case[tcc.Color.Red, types.sequence[types.int32]]
+    green: types.case[tcc.Color.Green, types.array[str, 2]]
+
+
+@dataclass
+@mutable
+class Settings(IdlStruct):
+    id: types.uint32
+    key("id")
+    shape: Shape
+    choice: Choice
+    extra: Optional[types.int64]
+    table: types.sequence[tcc.Extended, 3]
+    label: types.bounded_str[8]
+
+
+datatypes = [
+    tc.SingleInt, tc.SingleString, tc.SingleFloat, tc.SingleBool, tc.SingleSequence, tc.SingleArray,
+    tc.SingleUint16, tc.SingleBoundedSequence, tc.SingleBoundedString, tc.SingleEnum, tc.SingleNested,
+    tc.Keyed, tc.Keyed2, tc.Keyless, tc.AllPrimitives, tc.SingleUnion,
+    tfc.XStruct, tcc.Extensible, Settings
+]
+
+
+def machine_serialize(value, use_version_2, endianness, kind):
+    type(value).__idl__.populate()
+    buffer = Buffer()
+    buffer.set_endianness(endianness)
+    buffer._align_max = 4 if use_version_2 else 8
+    buffer.write('I', 4, 0)
+    buffer.set_align_offset(4)
+    machine = type(value).__idl__.v2_machine if use_version_2 else type(value).__idl__.v1_machine
+    machine.serialize(buffer, value, kind)
+    return buffer.asbytes()
+
+
+def native_serialize(value, use_version_2, endianness, kind):
+    # Call the encoder directly, without falling back to the machine
+    idl = type(value).__idl__
+    idl.populate()
+    program = NativeCodecBuilder().program(idl.v2_machine if use_version_2 else idl.v1_machine)
+    data = bytearray(8)
+    pos = _cdrenc.encode(program, value, data, 4, 4, 4 if use_version_2 else 8,
+                         endianness == Endianness.Little, NativeCodecBuilder.kinds[kind])
+    return bytes(data[:pos])
+
+
+@pytest.mark.parametrize("datatype", datatypes, ids=lambda t: t.__name__)
+@pytest.mark.parametrize("use_version_2", [False, True])
+@pytest.mark.parametrize("endianness", [Endianness.Little, Endianness.Big])
+def test_native_encoder_matches_machines(datatype, use_version_2, endianness):
+    datatype.__idl__.populate()
+    for seed in range(20):
+        value = generate_random_instance(datatype, seed=seed)
+        for kind in (SerializeKind.DataSample, SerializeKind.KeyDefinitionOrder, SerializeKind.KeyNormalized):
+            assert native_serialize(value, use_version_2, endianness, kind) == \
+                machine_serialize(value, use_version_2, endianness, kind)
+
+
+@pytest.mark.parametrize("value", tcc.samples, ids=lambda v: type(v).__name__)
+@pytest.mark.parametrize("use_version_2", [False, True])
+def test_native_encoder_samples(value, use_version_2):
+    for kind in (SerializeKind.DataSample, SerializeKind.KeyDefinitionOrder):
+        assert native_serialize(value, use_version_2, Endianness.Little, kind) == \
+            machine_serialize(value, use_version_2, Endianness.Little, kind)
+
+
+@pytest.mark.parametrize("value", [
+    tc.SingleBoundedString(value="too long for the bound"),
+    tc.SingleBoundedSequence(value=[1, 2, 3, 4]),
+    tc.SingleArray(value=[1, 2]),
+    tc.SingleUint16(value=-1),
+    tc.SingleInt(value="1"),
+    tc.AllPrimitives(i=1e300),
+], ids=lambda v: type(v).__name__)
+def test_native_encoder_errors(value):
+    with pytest.raises(Exception):
+        native_serialize(value, True, Endianness.Little, SerializeKind.DataSample)
+
+    # The regular path falls back to the machine for the error message
+    with pytest.raises(Exception) as native:
+        value.serialize()
+
+    type(value).__idl__.use_compiled_codecs = False
+    try:
+        with pytest.raises(Exception) as machine:
+            value.serialize()
+    finally:
+        type(value).__idl__.use_compiled_codecs = True
+
+    assert str(native.value) == str(machine.value)
+
+
+def test_native_encoder_grows_buffer():
+    value = tc.SingleSequence(value=list(range(10000)))
+    assert native_serialize(value, True, Endianness.Little, SerializeKind.DataSample) == \
+        machine_serialize(value, True, Endianness.Little, SerializeKind.DataSample)
+    assert tc.SingleSequence.deserialize(value.serialize()) == value
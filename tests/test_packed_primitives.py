@@ -0,0 +1,186 @@
+import array
+import pytest
+from dataclasses import dataclass, field
+from typing import Optional
+
+from cyclonedds.idl import IdlStruct
+from cyclonedds.idl.annotations import packed, packed_members, appendable, mutable, key, AnnotationException
+from cyclonedds.idl._support import Endianness, SerializeKind
+from cyclonedds.idl._builder import NativeCodecBuilder
+import cyclonedds.idl.types as types
+
+
+@dataclass
+@appendable
+class Trace(IdlStruct):
+    id: types.int32
+    key("id")
+    samples: types.sequence[types.float64]
+    packed("samples")
+    window: types.array[types.int16, 3]
+    packed("window")
+    counts: types.sequence[types.uint32, 8] = field(default_factory=lambda: array.array('I'))
+    packed("counts")
+    scale: Optional[types.sequence[types.float32]] = None
+    packed("scale")
+    rows: types.sequence[types.array[types.int64, 2]] = field(default_factory=list)
+    packed("rows")
+    labels: types.sequence[types.float64] = field(default_factory=list)
+
+
+@dataclass
+@mutable
+@packed_members()
+class Frame(IdlStruct):
+    pixels: types.sequence[types.uint16]
+    raw: types.sequence[types.uint8]
+    gains: types.array[types.float32, 2]
+    names: types.sequence[types.float64]
+    packed("names", None)
+
+
+def make_trace():
+    return Trace(
+        id=3,
+        samples=array.array('d', [1.5, -2.25, 1e300]),
+        window=array.array('h', [-1, 0, 1]),
+        counts=array.array('I', [1, 2**32 - 1]),
+        scale=array.array('f', [0.5]),
+        rows=[array.array('q', [1, -2]), array.array('q', [2**62, 0])],
+        labels=[1.0, 2.0]
+    )
+
+
+def as_lists(value):
+    # The same sample with plain lists, which encode to exactly the same bytes
+    return type(value)(**{
+        name: [list(v) for v in member] if name == "rows" else
+        list(member) if isinstance(member, array.array) else member
+        for name, member in vars(value).items()
+    })
+
+
+def native_serialize(value, use_version_2, endianness):
+    _cdrenc = pytest.importorskip("cyclonedds._cdrenc")
+    idl = type(value).__idl__
+    idl.populate()
+    program = NativeCodecBuilder().program(idl.v2_machine if use_version_2 else idl.v1_machine)
+    data = bytearray(8)
+    pos = _cdrenc.encode(program, value, data, 4, 4, 4 if use_version_2 else 8,
+                         endianness == Endianness.Little, NativeCodecBuilder.kinds[SerializeKind.DataSample])
+    return bytes(data[4:pos])
+
+
+@pytest.mark.parametrize("use_version_2", [False, True])
+@pytest.mark.parametrize("endianness", [Endianness.Little, Endianness.Big])
+@pytest.mark.parametrize("compiled", [True, False])
+def test_packed_roundtrip(use_version_2, endianness, compiled):
+    value = make_trace()
+    idl = Trace.__idl__
+    idl.use_compiled_codecs = compiled
+    try:
+        data = idl.serialize(value, use_version_2=use_version_2, endianness=endianness)
+        assert data == idl.serialize(as_lists(value), use_version_2=use_version_2, endianness=endianness)
+        result = Trace.deserialize(data)
+        assert result == value
+        assert type(result.samples) is array.array and result.samples.typecode == 'd'
+        assert type(result.rows[0]) is array.array and type(result.labels) is list
+        assert Trace.deserialize_lazy(data).samples == value.samples
+    finally:
+        idl.use_compiled_codecs = True
+
+
+@pytest.mark.parametrize("use_version_2", [False, True])
+@pytest.mark.parametrize("endianness", [Endianness.Little, Endianness.Big])
+def test_packed_native_encoder(use_version_2, endianness):
+    value = make_trace()
+    data = Trace.__idl__.serialize(value, use_version_2=use_version_2, endianness=endianness)
+    assert native_serialize(value, use_version_2, endianness) == data[4:]
+
+
+def test_packed_type_level():
+    Frame.__idl__.populate()
+    frame = Frame(pixels=array.array('H', [1, 2]), raw=array.array('B', b"ab"),
+                  gains=array.array('f', [1.0, 2.0]), names=[3.0])
+    result = Frame.deserialize(frame.serialize())
+    assert result == frame
+    assert type(result.pixels) is array.array and type(result.names) is list
+
+    machines = Trace.__idl__.v2_machine.member_machines
+    assert machines["window"].default_initialize() == array.array('h', [0, 0, 0])
+    assert machines["counts"].default_initialize() == array.array('I')
+
+
+def test_packed_accepts_other_values():
+    # Sequences of other element types go through struct, like lists do
+    value = make_trace()
+    value.samples = (1.5, -2.25, 1e300)
+    value.window = array.array('l', [-1, 0, 1])
+    value.counts = [1, 2**32 - 1]
+    data = value.serialize()
+    assert data == make_trace().serialize()
+    assert Trace.deserialize(data) == make_trace()
+
+    value.counts = [2**32]
+    with pytest.raises(Exception):
+        value.serialize()
+
+
+def test_packed_numpy():
+    np = pytest.importorskip("numpy")
+
+    @dataclass
+    @packed_members("numpy")
+    class Image(IdlStruct):
+        pixels: types.sequence[types.uint16]
+        mask: types.sequence[bool]
+        origin: types.array[types.float64, 2]
+
+    image = Image(pixels=np.arange(5, dtype=np.uint16), mask=np.array([True, False]),
+                  origin=np.array([0.5, -0.5]))
+    for use_version_2 in (False, True):
+        for endianness in (Endianness.Little, Endianness.Big):
+            data = Image.__idl__.serialize(image, use_version_2=use_version_2, endianness=endianness)
+            result = Image.deserialize(data)
+            assert result.pixels.dtype == np.uint16 and result.pixels.tolist() == [0, 1, 2, 3, 4]
+            assert result.mask.tolist() == [True, False] and result.origin.tolist() == [0.5, -0.5]
+            assert result.pixels.flags.writeable and result.pixels.dtype.isnative
+
+    # Non-contiguous and differently typed arrays are converted element by element
+    image.pixels = np.arange(10, dtype=np.int64)[::2]
+    assert Image.deserialize(image.serialize()).pixels.tolist() == [0, 2, 4, 6, 8]
+
+
+def test_packed_errors():
+    with pytest.raises(AnnotationException):
+        @dataclass
+        @packed_members("list")
+        class BadContainer(IdlStruct):
+            a: types.sequence[types.int32]
+
+    @dataclass
+    class Flags(IdlStruct):
+        flags: types.sequence[bool]
+        packed("flags")
+
+    with pytest.raises(TypeError):
+        Flags.__idl__.populate()
+
+
+@dataclass
+@packed_members()
+class Samples(IdlStruct):
+    values: types.sequence[types.float64]
+
+
+@pytest.mark.parametrize("compiled", [True, False])
+def test_packed_truncated(compiled):
+    idl = Samples.__idl__
+    idl.use_compiled_codecs = compiled
+    try:
+        data = Samples(values=array.array('d', [1.0, 2.0, 3.0])).serialize()
+        assert Samples.deserialize(data).values == array.array('d', [1.0, 2.0, 3.0])
+        with pytest.raises(Exception):
+            Samples.deserialize(data[:-8])
+    finally:
+        idl.use_compiled_codecs = True
@@ -0,0 +1,76 @@
+import pytest
+
+from cyclonedds.tools.cli.pyperf import PythonPerf, TOPICS, StageTimes, Latencies, make_sample
+
+
+def test_pyperf_topic_sizes():
+    # The serialized sizes of the ddsperf types, without encapsulation header
+    sizes = {
+        "KS": 100, "K32": 32, "K256": 256, "OU": 4, "UK16": 16, "UK1024": 1024,
+        "S16": 32, "S256": 528, "S4k": 8464, "S32k": 67728
+    }
+    for name, datatype in TOPICS.items():
+        data = make_sample(datatype, 100).serialize()
+        assert len(data) - 4 == sizes[name]
+        assert datatype.deserialize(data).serialize() == data
+
+
+def test_pyperf_stage_times():
+    times = StageTimes()
+    times.add("take", 1000, 10)
+    times.add("serialize", 30)
+    other = StageTimes()
+    other.add("take", 500, 5)
+    times.merge(other)
+    assert times.means() == {"serialize": 30.0, "take": 100.0}
+
+
+def test_pyperf_latencies():
+    latencies = Latencies()
+    assert latencies.summary() is None
+    for ns in range(1000, 101000, 1000):
+        latencies.add(ns)
+
+    summary = latencies.summary()
+    assert (summary.count, summary.min, summary.max) == (100, 1000, 100000)
+    assert (summary.p50, summary.p90, summary.p99) == (51000, 91000, 100000)
+
+    histogram = latencies.histogram()
+    assert sum(histogram.values()) == 100
+    # Bucket 0 starts at 1µs, bucket 20 at 100µs
+    assert min(histogram) == 0 and max(histogram) == 20
+
+
+@pytest.mark.parametrize("triggering_mode", ["listener", "waitset", "polling"])
+def test_pyperf_local_pubsub(triggering_mode):
+    perf = PythonPerf("K32", local_matching=True, triggering_mode=triggering_mode, runtime=1.5)
+    perf.publisher(rate=1000)
+    perf.subscriber()
+    reports = []
+    perf.run(reports.extend, interval=0.5)
+
+    written = sum(r.samples for r in reports if r.role == "publish")
+    received = sum(r.samples for r in reports if r.role == "subscribe")
+    assert written > 0 and received > 0
+    assert all(r.lost == 0 for r in reports)
+
+    stages = StageTimes()
+    for r in reports:
+        stages.merge(r.stages)
+    assert set(stages.means()) == {"serialize", "write", "take", "deserialize"}
+
+
+def test_pyperf_local_pingpong():
+    perf = PythonPerf("KS", local_matching=True, triggering_mode="waitset", runtime=1.5)
+    perf.ping(size=64)
+    perf.pong()
+    reports = []
+    perf.run(reports.extend, interval=0.5)
+
+    latencies = Latencies()
+    for r in reports:
+        latencies.values.extend(r.latencies.values)
+    summary = latencies.summary()
+    assert summary is not None and summary.count > 10
+    assert 0 < summary.min <= summary.p50 <= summary.max
+    assert sum(r.samples for r in reports if r.role == "pong") >= summary.count
@@ -1,6 +1,9 @@
 import pytest
 import itertools
 from cyclonedds.qos import Policy, Qos, _CQos, TopicQos
+from cyclonedds.builtin_types import cqos_to_qos
+from cyclonedds._clayer import ddspy_qos_decode
+from cyclonedds.util import duration
 
 
 some_qosses = [
@@ -83,6 +86,30 @@ def test_qos_ops():
         assert qos + qos == qos
 
 
+def decode_and_back(qos):
+    cqos = _CQos.qos_to_cqos(qos)
+    decoded = ddspy_qos_decode(cqos.value)
+    _CQos.cqos_destroy(cqos)
+    return decoded
+
+
+def test_qos_decode():
+    for qos in some_qosses:
+        decoded = decode_and_back(qos)
+        assert len(decoded) == len(_CQos._all_scopes)
+        assert qos == _CQos.decoded_to_qos(decoded)
+        assert qos == cqos_to_qos(decoded)
+
+
+def test_qos_decode_interned():
+    qos = Qos(Policy.Reliability.Reliable(duration(seconds=1)), Policy.Partition(["a", "b"]),
+              Policy.Property("a", "bs"), Policy.Userdata(b"\0data"))
+    first = cqos_to_qos(decode_and_back(qos))
+    assert first == qos
+    assert cqos_to_qos(decode_and_back(qos)) is first
+    assert cqos_to_qos(decode_and_back(qos + Qos(Policy.Deadline(10)))) is not first
+
+
 def test_qos_inequality():
     for qos1, qos2 in qos_pairs:
         assert qos1 != qos2
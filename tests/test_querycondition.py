@@ -1,6 +1,8 @@
+import gc
 import pytest
 
 from cyclonedds.core import Entity, QueryCondition, SampleState, InstanceState, ViewState
+from cyclonedds.topic import ContentFilter
 from cyclonedds.util import isgoodentity
 
 from support_modules.testtopics import Message
@@ -58,3 +60,80 @@ def test_querycondition_read(common_setup):
     received = common_setup.dr.read(condition=qc)
 
     assert len(received) == 1 and received[0] == messages[5]
+
+
+def test_querycondition_read_members(common_setup):
+    qc = QueryCondition(
+        common_setup.dr,
+        SampleState.Any | ViewState.Any | InstanceState.Any,
+        lambda message: message.startswith("Goodbye"),
+        members=["message"]
+    )
+
+    messages = [Message(message=f"Hi {i}!") for i in range(5)] + [Message(message="Goodbye")]
+    for m in messages:
+        common_setup.dw.write(m)
+
+    received = common_setup.dr.read(condition=qc)
+    assert len(received) == 1 and received[0] == messages[5]
+
+
+def test_querycondition_invalid_members(common_setup):
+    with pytest.raises(TypeError):
+        QueryCondition(common_setup.dr, SampleState.Any | ViewState.Any | InstanceState.Any, lambda x: False, members=["nope"])
+
+
+def test_querycondition_content_filter(common_setup):
+    content_filter = ContentFilter(Message, "message LIKE %0", ["Goodbye%"])
+    qc = QueryCondition(common_setup.dr, SampleState.Any | ViewState.Any | InstanceState.Any, content_filter)
+
+    messages = [Message(message=f"Hi {i}!") for i in range(5)] + [Message(message="Goodbye")]
+    for m in messages:
+        common_setup.dw.write(m)
+    assert common_setup.dr.read(condition=qc) == [messages[5]]
+
+    # New parameters apply to the samples that arrive afterwards
+    content_filter.set_parameters(["Hi%"])
+    common_setup.dw.write(Message(message="Hi again"))
+    assert common_setup.dr.take(condition=qc) == [Message(message="Hi again")]
+
+
+def test_querycondition_content_filter_many(common_setup):
+    # More conditions than there are C filter functions, the rest are evaluated from Python
+    mask = SampleState.Any | ViewState.Any | InstanceState.Any
+    conditions = [
+        QueryCondition(common_setup.dr, mask, ContentFilter(Message, "message = %0", [f"Hi {i}!"]))
+        for i in range(80)
+    ]
+
+    assert conditions[0]._filter_slot >= 0 and conditions[-1]._filter_slot == -1
+
+    for i in (3, 70, 79):
+        common_setup.dw.write(Message(message=f"Hi {i}!"))
+    assert [i for i, qc in enumerate(conditions) if qc.triggered] == [3, 70, 79]
+    assert common_setup.dr.read(condition=conditions[70]) == [Message(message="Hi 70!")]
+
+    # Released slots are reused
+    del conditions
+    qc = QueryCondition(common_setup.dr, mask, ContentFilter(Message, "message = 'Hi 3!'"))
+    assert qc._filter_slot >= 0
+    assert common_setup.dr.read(condition=qc) == [Message(message="Hi 3!")]
+
+
+def test_querycondition_content_filter_outlives_python(common_setup):
+    # The slot keeps the C filter when the ContentFilter is freed before its condition
+    mask = SampleState.Any | ViewState.Any | InstanceState.Any
+    qc = QueryCondition(common_setup.dr, mask, ContentFilter(Message, "message = 'Hi 1!'"))
+    assert qc._filter_slot >= 0
+    qc.filter = None
+    gc.collect()
+
+    for i in range(3):
+        common_setup.dw.write(Message(message=f"Hi {i}!"))
+    assert common_setup.dr.read(condition=qc) == [Message(message="Hi 1!")]
+
+
+def test_querycondition_content_filter_invalid(common_setup):
+    mask = SampleState.Any | ViewState.Any | InstanceState.Any
+    with pytest.raises(ValueError):
+        QueryCondition(common_setup.dr, mask, ContentFilter(Message, "message = 'x'"), members=["message"])
@@ -1,15 +1,21 @@
 import pytest
+import pickle
 import random
+import asyncio
+import threading
 
 from cyclonedds.domain import Domain, DomainParticipant
 from cyclonedds.topic import Topic
 from cyclonedds.sub import Subscriber, DataReader
 from cyclonedds.pub import Publisher, DataWriter
 from cyclonedds.util import duration, isgoodentity
-from cyclonedds.core import Qos, Policy
+from cyclonedds.core import Qos, Policy, SampleState, InstanceState
+from cyclonedds.idl import LazyView, DeserializerPool
+from cyclonedds.internal import SampleInfo, InvalidSample
 
 
 from support_modules.testtopics import Message, MessageKeyed
+from support_modules.testtopics.perftopics import Struct16, Struct256
 
 def test_reader_initialize():
     dp = DomainParticipant(0)
@@ -209,3 +215,232 @@ def test_get_matched_publication_data():
     for handle in matched_handles:
         matched_data = dr.get_matched_publication_data(handle)
         assert matched_data is not None
+
+
+def test_reader_loan(common_setup):
+    msgs = [Message(message="Hi" * (i + 1) * 1000) for i in range(3)]
+    for msg in msgs:
+        common_setup.dw.write(msg)
+
+    assert common_setup.dr.read(N=10, loan=True) == msgs
+    received = common_setup.dr.take(N=10, loan=True)
+    assert received == msgs
+    assert all(m.sample_info.valid_data for m in received)
+    assert common_setup.dr.read(N=10, loan=True) == []
+
+
+def test_reader_loan_buffer(common_setup):
+    from cyclonedds._clayer import ddspy_take, SerdataBuffer
+    from cyclonedds.core import SampleState, ViewState, InstanceState
+
+    common_setup.dw.write(common_setup.msg)
+    ret = ddspy_take(common_setup.dr._ref, SampleState.Any | ViewState.Any | InstanceState.Any, 1, True)
+    assert len(ret) == 1
+    data, info = ret[0]
+    assert isinstance(data, SerdataBuffer)
+
+    view = memoryview(data)
+    assert view.readonly
+    assert len(view) == len(data)
+    assert Message.deserialize(view) == common_setup.msg
+    assert Message.deserialize(data) == common_setup.msg
+    # The view keeps the buffer (and with it the serdata) alive.
+    del data, ret
+    assert Message.deserialize(view) == common_setup.msg
+    view.release()
+
+
+def test_reader_aiter_shared_thread(common_setup):
+    readers = [DataReader(common_setup.sub, common_setup.tp, qos=common_setup.qos) for _ in range(20)]
+    msgs = [Message(message=f"Hi {i}!") for i in range(3)]
+
+    async def receive(reader):
+        received = []
+        async for sample in reader.take_aiter(timeout=duration(seconds=1)):
+            received.append(sample)
+            if len(received) == len(msgs):
+                break
+        return received
+
+    async def run():
+        tasks = [asyncio.ensure_future(receive(reader)) for reader in readers]
+        await asyncio.sleep(0.1)
+        threads = threading.active_count()
+        for msg in msgs:
+            common_setup.dw.write(msg)
+        return threads, await asyncio.gather(*tasks)
+
+    threads_before = threading.active_count()
+    threads, results = asyncio.run(run())
+    # One waitset thread serves all readers
+    assert threads <= threads_before + 1
+    assert all(result == msgs for result in results)
+
+
+def test_reader_aiter_timeout(common_setup):
+    async def run():
+        return [sample async for sample in common_setup.dr.read_aiter(timeout=duration(milliseconds=50))]
+
+    assert asyncio.run(run()) == []
+
+
+def test_reader_take_iter_batches(common_setup):
+    msgs = [Message(message=f"Hi {i}!") for i in range(7)]
+    for msg in msgs:
+        common_setup.dw.write(msg)
+
+    batches = list(common_setup.dr.take_iter_batches(timeout=duration(milliseconds=50), max_batch=3))
+    assert [len(batch) for batch in batches] == [3, 3, 1]
+    assert [sample for batch in batches for sample in batch] == msgs
+    assert common_setup.dr.take(N=10) == []
+
+
+def test_reader_read_iter_batches(common_setup):
+    for msg in (common_setup.msg, common_setup.msg2):
+        common_setup.dw.write(msg)
+
+    assert list(common_setup.dr.read_iter_batches(timeout=duration(milliseconds=50))) == [[common_setup.msg, common_setup.msg2]]
+    assert list(common_setup.dr.read_iter(timeout=duration(milliseconds=50))) == []
+    assert common_setup.dr.read(N=10) == [common_setup.msg, common_setup.msg2]
+
+
+def test_reader_take_iter_stop_early(common_setup):
+    msgs = [Message(message=f"Hi {i}!") for i in range(4)]
+    for msg in msgs:
+        common_setup.dw.write(msg)
+
+    for sample in common_setup.dr.take_iter(timeout=duration(milliseconds=50)):
+        assert sample == msgs[0]
+        break
+    assert common_setup.dr.take(N=10) == msgs[1:]
+
+
+def test_reader_iter_batches_invalid(common_setup):
+    # Invalid arguments raise at the call, not on the first step of the iteration
+    for iter_batches in (common_setup.dr.read_iter_batches, common_setup.dr.take_iter_batches,
+                         common_setup.dr.read_aiter_batches, common_setup.dr.take_aiter_batches):
+        with pytest.raises(ValueError):
+            iter_batches(max_batch=0)
+
+
+def test_reader_take_aiter_batches(common_setup):
+    msgs = [Message(message=f"Hi {i}!") for i in range(5)]
+
+    async def run():
+        batches = common_setup.dr.take_aiter_batches(timeout=duration(seconds=1))
+        for msg in msgs:
+            common_setup.dw.write(msg)
+        received = []
+        async for batch in batches:
+            received.extend(batch)
+            if len(received) == len(msgs):
+                break
+        return received
+
+    assert asyncio.run(run()) == msgs
+
+
+def test_reader_take_lazy(common_setup):
+    common_setup.dw.write(common_setup.msg)
+
+    samples = common_setup.dr.take(N=10, lazy=True)
+    assert len(samples) == 1
+    assert isinstance(samples[0], LazyView)
+    assert samples[0].message == common_setup.msg.message
+    assert samples[0].sample_info.valid_data
+    assert samples[0].materialize() == common_setup.msg
+
+
+def test_reader_take_numpy(common_setup):
+    np = pytest.importorskip("numpy")
+    tp = Topic(common_setup.dp, "Struct256Numpy", Struct256)
+    dw = DataWriter(common_setup.dp, tp)
+    dr = DataReader(common_setup.dp, tp)
+    samples = [Struct256(struct160=Struct16(struct0=i), junk=-i, seq=i, keyval=i) for i in range(5)]
+    for sample in samples:
+        dw.write(sample)
+
+    data, infos = dr.take_numpy(N=10)
+    assert len(data) == len(infos) == 5
+    assert list(data["seq"]) == [s.seq for s in samples]
+    assert list(data["junk"]) == [s.junk for s in samples]
+    assert list(data["struct160"]["struct0"]) == list(range(5))
+    assert infos["valid_data"].all()
+    assert (infos["source_timestamp"] > 0).all()
+    assert dr.take(N=10) == []
+
+
+def test_reader_take_numpy_not_fixed_size(common_setup):
+    pytest.importorskip("numpy")
+    common_setup.dw.write(common_setup.msg)
+    with pytest.raises(TypeError):
+        common_setup.dr.take_numpy(N=1)
+
+
+def test_reader_take_with_info_batch(common_setup):
+    tp = Topic(common_setup.dp, "MessageKeyedInfoBatch", MessageKeyed)
+    dw = DataWriter(common_setup.dp, tp)
+    dr = DataReader(common_setup.dp, tp)
+    msgs = [MessageKeyed(user_id=i, message=f"Hi {i}") for i in range(5)]
+    for msg in msgs:
+        dw.write(msg)
+
+    read, read_infos = dr.read_with_info_batch(N=10)
+    samples, infos = dr.take_with_info_batch(N=10)
+    assert read == samples == msgs
+    assert len(infos) == 5
+    assert list(read_infos.source_timestamp) == list(infos.source_timestamp)
+    assert all(infos.valid_data) and all(t > 0 for t in infos.source_timestamp)
+    assert not hasattr(samples[0], "sample_info")
+    assert infos[1] == list(infos)[1]
+    assert infos[1].instance_handle == infos.instance_handle[1] == dr.lookup_instance(msgs[1])
+
+    dw.dispose(msgs[0])
+    samples, infos = dr.take_with_info_batch(N=10)
+    assert len(samples) == len(infos) == 1
+    assert isinstance(samples[0], InvalidSample) and samples[0].sample_info == infos[0]
+    assert samples[0].key_sample.user_id == 0
+    assert not infos.valid_data[0]
+    assert infos.instance_state[0] == InstanceState.NotAliveDisposed
+
+    samples, infos = dr.take_with_info_batch(N=10)
+    assert samples == [] and len(infos) == 0
+
+
+def test_reader_sample_info(common_setup):
+    common_setup.dw.write(common_setup.msg)
+    info = common_setup.dr.take()[0].sample_info
+
+    assert isinstance(info, SampleInfo)
+    assert info.valid_data and info.sample_state == SampleState.NotRead
+    copy = SampleInfo(*(getattr(info, name) for name in (
+        "sample_state", "view_state", "instance_state", "valid_data", "source_timestamp", "instance_handle",
+        "publication_handle", "disposed_generation_count", "no_writers_generation_count", "sample_rank",
+        "generation_rank", "absolute_generation_rank")))
+    assert copy == info
+    assert pickle.loads(pickle.dumps(info)) == info
+    with pytest.raises(AttributeError):
+        info.valid_data = False
+
+
+def test_reader_deserializer_pool(common_setup):
+    tp = Topic(common_setup.dp, "MessageKeyedPool", MessageKeyed)
+    dw = DataWriter(common_setup.dp, tp, qos=Qos(Policy.History.KeepAll))
+    with DeserializerPool(MessageKeyed, max_workers=2, threshold=4) as pool:
+        dr = DataReader(common_setup.dp, tp, qos=Qos(Policy.History.KeepAll), deserializer_pool=pool)
+        msgs = [MessageKeyed(user_id=i, message=f"Hi {i}") for i in range(20)]
+        for msg in msgs:
+            dw.write(msg)
+        dw.dispose(msgs[3])
+
+        assert dr.read(N=30, loan=True)[:20] == msgs
+        samples, infos = dr.read_with_info_batch(N=30)
+        assert samples[:20] == msgs and len(infos) == 21
+
+        samples = dr.take(N=30)
+        assert samples[:20] == msgs
+        assert all(s.sample_info.valid_data for s in samples[:20])
+        assert isinstance(samples[20], InvalidSample) and samples[20].key_sample.user_id == 3
+
+    with pytest.raises(TypeError):
+        DataReader(common_setup.dp, tp, deserializer_pool=object())
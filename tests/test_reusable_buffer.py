@@ -0,0 +1,60 @@
+import pytest
+
+from cyclonedds.idl._support import ReusableBuffer, SerializeKind
+
+import support_modules.test_classes as tc
+from support_modules.testtopics.perftopics import KeyedSeq, Struct16, Struct256
+import test_compiled_codecs as tcc
+
+
+def padded(data):
+    return data.ljust((len(data) + 3) & ~3, b'\0')
+
+
+@pytest.mark.parametrize("use_version_2", [False, True])
+def test_reusable_buffer_matches_serialize(use_version_2):
+    buffer = ReusableBuffer()
+    # Serializing in both directions puts every sample after a larger and after a smaller one
+    for value in tcc.samples + tcc.samples[::-1]:
+        idl = type(value).__idl__
+        for kind in (SerializeKind.DataSample, SerializeKind.KeyDefinitionOrder):
+            with idl.serialize_view(buffer, value, use_version_2=use_version_2, serialize_kind=kind) as view:
+                assert bytes(view) == padded(idl.serialize(value, use_version_2=use_version_2, serialize_kind=kind))
+
+
+@pytest.mark.parametrize("datatype,use_version_2,free", [
+    (tc.SingleInt, True, True),
+    (tc.SingleString, True, True),
+    (tc.AllPrimitives, True, False),
+    (KeyedSeq, True, True),
+    (Struct16, True, True),
+    (Struct16, False, True),
+    (Struct256, True, True),
+    (tcc.Point, True, False),
+    (tcc.Extended, True, False),
+    (tcc.Everything, True, False),
+], ids=lambda v: getattr(v, "__name__", str(v)))
+def test_reusable_buffer_padding_free(datatype, use_version_2, free):
+    datatype.__idl__.populate()
+    assert datatype.__idl__._padding_free(use_version_2) == free
+
+
+def test_reusable_buffer_high_water():
+    buffer = ReusableBuffer()
+    big = tc.SingleSequence(value=list(range(10000)))
+    small = tc.SingleInt(value=1)
+
+    with big.__idl__.serialize_view(buffer, big) as view:
+        assert bytes(view) == padded(big.serialize())
+    size = buffer._size
+    assert size > 40000
+
+    # The buffer keeps its size while the large sample is recent, then shrinks to fit
+    for _ in range(2 * ReusableBuffer.window - 1):
+        with small.__idl__.serialize_view(buffer, small):
+            pass
+    assert buffer._size == size
+    with small.__idl__.serialize_view(buffer, small) as view:
+        assert bytes(view) == padded(small.serialize())
+    assert buffer._size == 512
+
@@ -1,4 +1,5 @@
 import pytest
+import weakref
 
 from cyclonedds.core import Entity
 from cyclonedds.domain import DomainParticipant
@@ -54,3 +55,59 @@ def test_topic_filter():
     data = str(dr.read(5))
     assert "Filter" not in data
     assert "filter" and "Hello" and "Nice" in data
+
+
+def test_topic_filter_expression():
+    dp = DomainParticipant(0)
+    tp = Topic(dp, "MessageTopic", Message, qos=Qos(Policy.History.KeepLast(5)))
+    content_filter = tp.set_filter_expression("message NOT LIKE %0", ["%ilter%"])
+    dw = DataWriter(dp, tp)
+    dr = DataReader(dp, tp)
+
+    dw.write(Message("Nice Message"))
+    dw.write(Message("Test Filtering"))
+    dw.write(Message("Hello"))
+    dw.write(Message("lower case filter"))
+    assert [s.message for s in dr.take(5)] == ["Nice Message", "Hello"]
+
+    content_filter.set_parameters(["Hello"])
+    dw.write(Message("Hello"))
+    dw.write(Message("Test Filtering"))
+    assert [s.message for s in dr.take(5)] == ["Test Filtering"]
+
+    tp.set_filter_expression(None)
+    dw.write(Message("Hello"))
+    assert [s.message for s in dr.take(5)] == ["Hello"]
+
+
+def test_topic_filter_expression_replace():
+    dp = DomainParticipant(0)
+    tp = Topic(dp, "MessageTopic", Message)
+    first = weakref.ref(tp.set_filter_expression("message LIKE 'a%'"))
+    second = tp.set_filter_expression("message LIKE 'b%'")
+    # Only the installed filter is kept alive by the topic
+    assert first() is None
+
+    dw = DataWriter(dp, tp)
+    dr = DataReader(dp, tp)
+    dw.write(Message("apple"))
+    dw.write(Message("banana"))
+    assert [s.message for s in dr.take(5)] == ["banana"]
+
+    second = weakref.ref(second)
+    assert second() is not None
+    tp.set_filter_expression(None)
+    assert second() is None
+
+
+def test_topic_filter_members():
+    dp = DomainParticipant(0)
+    tp = Topic(dp, "MessageTopic", Message, qos=Qos(Policy.History.KeepLast(5)))
+    tp.set_topic_filter(lambda topic, message: "ilter" not in message, members=["message"])
+    dw = DataWriter(dp, tp)
+    dr = DataReader(dp, tp)
+
+    dw.write(Message("Nice Message"))
+    dw.write(Message("Test Filtering"))
+    dw.write(Message("Hello"))
+    assert [s.message for s in dr.take(5)] == ["Nice Message", "Hello"]
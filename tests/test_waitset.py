@@ -1,6 +1,13 @@
 import pytest
+import asyncio
 
-from cyclonedds.core import Entity, DDSException, WaitSet, ReadCondition, ViewState, InstanceState, SampleState
+import threading
+
+from cyclonedds.core import Entity, DDSException, WaitSet, WaitSetDispatcher, AsyncWaitSet, GuardCondition, ReadCondition, \
+    ViewState, InstanceState, SampleState
+from cyclonedds.topic import Topic
+from cyclonedds.pub import DataWriter
+from cyclonedds.sub import DataReader
 from cyclonedds.util import duration, isgoodentity
 
 from support_modules.testtopics import Message
@@ -47,4 +54,153 @@ def test_waitset_wait(common_setup):
     rc2 = ReadCondition(common_setup.dr, ViewState.Any | InstanceState.Any | SampleState.NotRead)
     ws.attach(rc2)
 
-    assert ws.wait(duration(seconds=1)) == 2
\ No newline at end of file
+    assert ws.wait(duration(seconds=1)) == 2
+
+def test_waitset_wait_triggered(common_setup):
+    ws = WaitSet(common_setup.dp)
+    guards = [GuardCondition(common_setup.dp) for _ in range(20)]
+    for gc in guards:
+        ws.attach(gc)
+    rc = ReadCondition(common_setup.dr, ViewState.Any | InstanceState.Any | SampleState.Any)
+    ws.attach(rc)
+    ws.attach(rc)
+    assert len(ws.get_entities()) == 21
+
+    assert ws.wait_triggered(duration(milliseconds=5)) == []
+
+    common_setup.dw.write(Message(message="Hi!"))
+    guards[3].set(True)
+    guards[17].set(True)
+    triggered = ws.wait_triggered(duration(seconds=1))
+    assert len(triggered) == 3 and all(t is rc or t is guards[3] or t is guards[17] for t in triggered)
+
+    ws.detach(guards[3])
+    assert not ws.is_attached(guards[3])
+    assert set(ws.wait_triggered(duration(seconds=1))) == {rc, guards[17]}
+
+
+def test_waitset_dispatcher(common_setup):
+    topics = [Topic(common_setup.dp, f"MessageDispatch{i}", Message) for i in range(10)]
+    writers = [DataWriter(common_setup.dp, tp, qos=common_setup.qos) for tp in topics]
+    readers = [DataReader(common_setup.dp, tp, qos=common_setup.qos) for tp in topics]
+
+    dispatcher = WaitSetDispatcher(common_setup.dp, max_batch=3)
+    received = {}
+    for i, dr in enumerate(readers):
+        rc = ReadCondition(dr, ViewState.Any | InstanceState.Any | SampleState.Any)
+        dispatcher.add(rc, lambda samples, i=i: received.setdefault(i, []).append(samples))
+    gc = GuardCondition(common_setup.dp)
+    guard_calls = []
+    dispatcher.add(gc, guard_calls.append)
+
+    assert dispatcher.dispatch(duration(milliseconds=5)) == 0
+
+    for j in range(7):
+        writers[2].write(Message(message=f"{j}"))
+    writers[8].write(Message(message="8"))
+    assert dispatcher.dispatch(duration(seconds=1)) == 2
+    assert sorted(received) == [2, 8]
+    assert [len(batch) for batch in received[2]] == [3, 3, 1]
+    assert [m.message for batch in received[2] for m in batch] == [f"{j}" for j in range(7)]
+
+    gc.set(True)
+    assert dispatcher.dispatch(duration(seconds=1)) == 1
+    assert guard_calls == [gc] and not gc.read()
+
+    dispatcher.remove(gc)
+    gc.set(True)
+    assert dispatcher.dispatch(duration(milliseconds=5)) == 0
+
+    thread = threading.Thread(target=dispatcher.run)
+    thread.start()
+    writers[5].write(Message(message="5"))
+    dispatcher.stop()
+    thread.join(5)
+    assert not thread.is_alive()
+
+
+def test_waitset_dispatcher_read(common_setup):
+    dispatcher = WaitSetDispatcher(common_setup.dp, max_batch=3)
+    received = []
+    rc = ReadCondition(common_setup.dr, ViewState.Any | InstanceState.Any | SampleState.Any)
+    dispatcher.add(rc, received.append, take=False)
+
+    msgs = [Message(message=f"{j}") for j in range(5)]
+    for msg in msgs:
+        common_setup.dw.write(msg)
+
+    # A single read per wakeup, even though the condition keeps matching the samples
+    assert dispatcher.dispatch(duration(seconds=1)) == 1
+    assert received == [msgs[:3]]
+    assert dispatcher.dispatch(duration(seconds=1)) == 1
+    assert received == [msgs[:3], msgs[:3]]
+
+    dispatcher.remove(rc)
+    received.clear()
+    nrc = ReadCondition(common_setup.dr, ViewState.Any | InstanceState.Any | SampleState.NotRead)
+    dispatcher.add(nrc, received.append, take=False)
+    common_setup.dw.write(Message(message="5"))
+    assert dispatcher.dispatch(duration(seconds=1)) == 1
+    assert received == [msgs[3:] + [Message(message="5")]]
+    assert dispatcher.dispatch(duration(milliseconds=5)) == 0
+    assert common_setup.dr.read(N=10) == msgs + [Message(message="5")]
+
+
+def test_waitset_dispatcher_run_timeout(common_setup):
+    dispatcher = WaitSetDispatcher(common_setup.dp)
+    gc = GuardCondition(common_setup.dp)
+    dispatcher.add(gc, lambda gc: None)
+
+    # A finite timeout ends the run when nothing triggers, a zero timeout is not infinity
+    dispatcher.run(duration(milliseconds=5))
+    dispatcher.run(0)
+
+    # Without a timeout a wakeup that handled nothing does not end the run
+    dispatcher.remove(gc)
+    dispatcher.waitset.attach(gc)
+    gc.set(True)
+    thread = threading.Thread(target=dispatcher.run)
+    thread.start()
+    thread.join(0.2)
+    assert thread.is_alive()
+    dispatcher.stop()
+    thread.join(5)
+    assert not thread.is_alive()
+
+
+def test_async_waitset_shared(common_setup):
+    assert AsyncWaitSet.of(common_setup.dp) is AsyncWaitSet.of(common_setup.dp)
+
+
+def test_async_waitset_wait(common_setup):
+    aws = AsyncWaitSet.of(common_setup.dp)
+    gc1 = GuardCondition(common_setup.dp)
+    gc2 = GuardCondition(common_setup.dp)
+
+    async def run():
+        assert not await aws.wait(gc1, duration(milliseconds=10))
+
+        waiting = [asyncio.ensure_future(aws.wait(gc, duration(seconds=1))) for gc in (gc1, gc1, gc2)]
+        await asyncio.sleep(0.05)
+        gc1.set(True)
+        assert await asyncio.gather(*waiting[:2]) == [True, True]
+        assert not waiting[2].done()
+        gc2.set(True)
+        assert await waiting[2]
+
+    asyncio.run(run())
+
+
+def test_async_waitset_close(common_setup):
+    aws = AsyncWaitSet.of(common_setup.dp)
+    gc = GuardCondition(common_setup.dp)
+
+    async def run():
+        waiting = asyncio.ensure_future(aws.wait(gc))
+        await asyncio.sleep(0.05)
+        aws.close()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+
+    asyncio.run(run())
+    assert AsyncWaitSet.of(common_setup.dp) is not aws
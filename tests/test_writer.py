@@ -7,7 +7,8 @@ from cyclonedds.topic import Topic
 from cyclonedds.pub import Publisher, DataWriter
 from cyclonedds.util import duration, isgoodentity
 from cyclonedds.sub import DataReader
-from cyclonedds.core import Qos, Policy
+from cyclonedds.core import Qos, Policy, InstanceState
+from cyclonedds._clayer import ddspy_unregister_instance_handle
 
 from support_modules.testtopics import Message, MessageKeyed
 
@@ -116,3 +117,86 @@ def test_get_matched_subscription_data():
         matched_data = dw.get_matched_subscription_data(handle)
         print(f"matched data = {matched_data.key}")
         assert matched_data is not None
+
+
+def test_writer_write_many(common_setup):
+    msgs = [Message(message=f"Hi {i}!") for i in range(5)]
+    common_setup.dw.write_many(msgs)
+    assert common_setup.dr.read(N=10) == msgs
+
+
+def test_writer_write_many_timestamps(common_setup):
+    msgs = [Message(message=f"Hi {i}!") for i in range(3)]
+    timestamps = [1_000_000_000 * (i + 1) for i in range(3)]
+    common_setup.dw.write_many(msgs, timestamps=timestamps)
+    received = common_setup.dr.read(N=10)
+    assert received == msgs
+    assert [m.sample_info.source_timestamp for m in received] == timestamps
+
+
+def test_writer_write_many_invalid(common_setup):
+    with pytest.raises(ValueError):
+        common_setup.dw.write_many([common_setup.msg], timestamps=[])
+    with pytest.raises(TypeError):
+        common_setup.dw.write_many([common_setup.msg, MessageKeyed(user_id=1, message="Hi")])
+    assert common_setup.dr.read(N=10) == []
+
+
+def test_writer_reuses_buffer(common_setup):
+    # A long sample followed by short ones must not leak stale bytes into the short ones
+    msgs = [Message(message="x" * 5000), Message(message="Hi"), Message(message="")]
+    for msg in msgs:
+        common_setup.dw.write(msg)
+    assert common_setup.dr.read(N=10) == msgs
+
+
+def test_writer_instance_cache():
+    dp = DomainParticipant(0)
+    tp = Topic(dp, "MessageKeyed", MessageKeyed)
+    dw = DataWriter(dp, tp, instance_cache_size=2)
+    dr = DataReader(dp, tp)
+    cache = dw.instance_cache
+
+    handles = [dw.register_instance(MessageKeyed(user_id=i, message="Hi")) for i in range(3)]
+    assert cache.stats() == {"hits": 0, "misses": 3, "evictions": 1, "size": 2}
+
+    # Only the key members matter
+    assert dw.register_instance(MessageKeyed(user_id=2, message="Other")) == handles[2]
+    assert dw.lookup_instance(MessageKeyed(user_id=1, message="Hi")) == handles[1]
+    # Looked up instances are not added to the cache
+    assert dw.lookup_instance(MessageKeyed(user_id=0, message="Hi")) == handles[0]
+    assert cache.hits == 2 and cache.misses == 4 and cache.evictions == 1 and len(cache) == 2
+
+    dw.write(MessageKeyed(user_id=1, message="Hi"))
+    dw.dispose(MessageKeyed(user_id=1, message="Hi"))
+    assert cache.hits == 3
+    samples = dr.read()
+    assert len(samples) == 1 and samples[0].sample_info.instance_state == InstanceState.NotAliveDisposed
+
+    dw.unregister_instance(MessageKeyed(user_id=1, message="Hi"))
+    assert len(cache) == 1
+    dw.unregister_instance_handle(handles[2])
+    assert len(cache) == 0
+
+
+def test_writer_instance_cache_stale():
+    dp = DomainParticipant(0)
+    tp = Topic(dp, "MessageKeyed", MessageKeyed)
+    dw = DataWriter(dp, tp, instance_cache_size=2)
+    sample = MessageKeyed(user_id=1, message="Hi")
+
+    handle = dw.register_instance(sample)
+    # Unregister behind the back of the cache, register_instance must still register again
+    assert ddspy_unregister_instance_handle(dw._ref, handle) == 0
+    handle = dw.register_instance(sample)
+    assert dw.instance_cache.hits == 1 and dw.lookup_instance(sample) == handle
+    dw.dispose(sample)
+    dw.unregister_instance(sample)
+
+
+def test_writer_instance_cache_disabled():
+    dp = DomainParticipant(0)
+    tp = Topic(dp, "MessageKeyed", MessageKeyed)
+    assert DataWriter(dp, tp).instance_cache is None
+    with pytest.raises(ValueError):
+        DataWriter(dp, tp, instance_cache_size=-1)